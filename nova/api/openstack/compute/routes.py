@@ -15,6 +15,13 @@
 #    under the License.
 
 import functools
+import re
+import time
+
+from oslo_log import log as logging
+import routes.middleware
+import routes.util
+import webob.dec
 
 import nova.api.openstack
 from nova.api.openstack.compute import admin_actions
@@ -85,7 +92,13 @@ from nova.api.openstack.compute import versionsV21
 from nova.api.openstack.compute import virtual_interfaces
 from nova.api.openstack.compute import volumes
 from nova.api.openstack import wsgi
+from nova.api import validation
 from nova.api import wsgi as base_wsgi
+import nova.conf
+
+
+CONF = nova.conf.CONF
+LOG = logging.getLogger(__name__)
 
 
 def _create_controller(main_controller, action_controller_list):
@@ -851,6 +864,23 @@ ROUTE_LIST = (
     }),
 )
 
+# The paths of the most requested routes, which are routed by looking them up
+# in a table instead of matching them against all the routes when the
+# [api]fast_path_routing option is enabled. Only the last segment of these
+# paths can be a variable.
+FAST_ROUTED_PATHS = (
+    '/servers',
+    '/servers/detail',
+    '/servers/{id}',
+    '/os-hypervisors',
+)
+
+# The project IDs the routes of nova.api.openstack.ProjectMapper accept
+_PROJECT_ID_RE = re.compile('[0-9a-f-]+$')
+
+# The environ key of the time the routing of a request started at
+_ROUTING_START = 'nova.routing_start'
+
 
 class APIRouterV21(base_wsgi.Router):
     """Routes requests on the OpenStack API to the appropriate controller
@@ -868,6 +898,10 @@ class APIRouterV21(base_wsgi.Router):
         if custom_routes is None:
             custom_routes = tuple()
 
+        # {(method, path segments): (controller, action, variable name,
+        #                            project route, route)}
+        self._fast_routes = {}
+
         for path, methods in ROUTE_LIST + custom_routes:
             # NOTE(alex_xu): The variable 'methods' is a dict in normal, since
             # the dict includes all the methods supported in the path. But
@@ -887,6 +921,106 @@ class APIRouterV21(base_wsgi.Router):
                 action = controller_info[1]
                 self.map.create_route(path, method, controller, action)
 
+                if CONF.api.fast_path_routing and path in FAST_ROUTED_PATHS:
+                    # NOTE: create_route() connects the route with a project
+                    # ID prefix and then the route without it.
+                    self._add_fast_route(path, method, controller, action,
+                                         *self.map.matchlist[-2:])
+
+        if CONF.api.fast_path_routing:
+            # Time the routing of the requests matched by the mapper too.
+            self._router = routes.middleware.RoutesMiddleware(
+                self._timed_dispatch, self.map)
+
+        if CONF.api.compile_schema_validators:
+            validation.compile_validators()
+
+    def _add_fast_route(self, path, method, controller, action,
+                        project_route, route):
+        segments = path.split('/')[1:]
+        variable = None
+        if segments[-1].startswith('{'):
+            variable = segments[-1][1:-1]
+            segments[-1] = None
+        # Like with the mapper, the route connected first wins.
+        self._fast_routes.setdefault(
+            (method, tuple(segments)),
+            (controller, action, variable, project_route, route))
+
+    def _fast_match(self, environ):
+        """Look the route of a request up in the fast routed paths.
+
+        :param environ: The WSGI environment of the request
+        :returns: A tuple of the match dict and the matched route, like
+            routes.Mapper.routematch(), or None if the request has to be
+            matched against the routes of the mapper
+        """
+        # NOTE: The method of a request can be overridden by a _method
+        # parameter, which the mapper handles.
+        method = environ['REQUEST_METHOD']
+        if '_method' in environ.get('QUERY_STRING', ''):
+            return None
+        if method == 'POST' and routes.middleware.is_form_post(environ):
+            return None
+
+        segments = environ['PATH_INFO'].split('/')
+        if segments[0] or '' in segments[1:]:
+            return None
+        segments = segments[1:]
+
+        match = {}
+        # NOTE: The fast routed paths don't start with a segment which could
+        # be a project ID, so that a path starting with one can only match the
+        # route with a project ID prefix.
+        if len(segments) > 1 and _PROJECT_ID_RE.match(segments[0]):
+            match['project_id'] = segments[0]
+            segments = segments[1:]
+
+        key = tuple(segments)
+        entry = self._fast_routes.get((method, key))
+        if entry is None and key:
+            entry = self._fast_routes.get((method, key[:-1] + (None,)))
+        if entry is None:
+            return None
+
+        controller, action, variable, project_route, route = entry
+        if variable is not None:
+            match[variable] = segments[-1]
+        match['controller'] = controller
+        match['action'] = action
+        return match, project_route if 'project_id' in match else route
+
+    @webob.dec.wsgify(RequestClass=base_wsgi.Request)
+    def __call__(self, req):
+        if not self._fast_routes:
+            return self._router
+
+        req.environ[_ROUTING_START] = time.monotonic()
+        result = self._fast_match(req.environ)
+        if result is None:
+            return self._router
+
+        # Set what routes.middleware.RoutesMiddleware would have set
+        match, route = result
+        url = routes.util.URLGenerator(self.map, req.environ)
+        req.environ['wsgiorg.routing_args'] = (url, match)
+        req.environ['routes.route'] = route
+        req.environ['routes.url'] = url
+        return self._timed_dispatch(req)
+
+    @staticmethod
+    @webob.dec.wsgify(RequestClass=base_wsgi.Request)
+    def _timed_dispatch(req):
+        start = req.environ.pop(_ROUTING_START, None)
+        if start is not None:
+            route = req.environ['routes.route']
+            LOG.debug('Routed %(method)s %(path)s to %(route)s in %(time).3f '
+                      'ms',
+                      {'method': req.method, 'path': req.path_info,
+                       'route': route.routepath if route else None,
+                       'time': (time.monotonic() - start) * 1000})
+        return base_wsgi.Router._dispatch(req)
+
     @classmethod
     def factory(cls, global_config, **local_config):
         """Simple paste factory.
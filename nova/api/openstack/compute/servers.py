@@ -313,8 +313,12 @@ class ServersController(wsgi.Controller):
                 expected_attrs.append("tags")
             if api_version_request.is_supported(req, '2.63'):
                 expected_attrs.append("trusted_certs")
-            if api_version_request.is_supported(req, '2.73'):
+            if api_version_request.is_supported(req, '2.98'):
+                # The image properties are all of the image_* items
                 expected_attrs.append("system_metadata")
+            elif api_version_request.is_supported(req, '2.73'):
+                # Only load the system_metadata item of the locked reason
+                expected_attrs.append("system_metadata.locked_reason")
 
             # merge our expected attrs with what the view builder needs for
             # showing details
@@ -25,6 +25,7 @@ from nova.api.openstack.compute.views import ips as views_ips
 from nova import availability_zones as avail_zone
 from nova.compute import api as compute
 from nova.compute import vm_states
+import nova.conf
 from nova import context as nova_context
 from nova import exception
 from nova.network import security_group_api
@@ -33,9 +34,11 @@ from nova.objects import fields
 from nova.objects import virtual_interface
 from nova.policies import extended_server_attributes as esa_policies
 from nova.policies import servers as servers_policies
+from nova import server_view_cache
 from nova import utils
 
 
+CONF = nova.conf.CONF
 LOG = logging.getLogger(__name__)
 
 
@@ -99,7 +102,7 @@ class ViewBuilder(common.ViewBuilder):
               show_extended_attr=None, show_host_status=None,
               show_sec_grp=None, bdms=None, cell_down_support=False,
               show_user_data=False, provided_az=None,
-              provided_sched_hints=None):
+              provided_sched_hints=None, cache_fragment=False):
         """Generic, non-detailed view of an instance."""
         if cell_down_support and 'display_name' not in instance:
             # NOTE(tssurya): If the microversion is >= 2.69, this boolean will
@@ -262,7 +265,8 @@ class ViewBuilder(common.ViewBuilder):
              show_keypair=True, show_srv_usg=True, show_sec_grp=True,
              show_extended_status=True, show_extended_volumes=True,
              bdms=None, cell_down_support=False, show_server_groups=False,
-             show_user_data=True, provided_az=None, provided_sched_hints=None):
+             show_user_data=True, provided_az=None, provided_sched_hints=None,
+             cache_fragment=False):
         """Detailed view of a single instance."""
         if show_extra_specs is None:
             # detail will pre-calculate this for us. If we're doing show,
@@ -283,47 +287,30 @@ class ViewBuilder(common.ViewBuilder):
             # information available from the nova_api database.
             return self._show_from_down_cell(
                 request, instance, show_extra_specs, show_server_groups)
-        ip_v4 = instance.get('access_ip_v4')
-        ip_v6 = instance.get('access_ip_v6')
+        context = request.environ['nova.context']
+
+        if show_extended_attr is None:
+            show_extended_attr = context.can(
+                esa_policies.BASE_POLICY_NAME, fatal=False,
+                target={'project_id': instance.project_id})
+
+        fragment_args = (request, instance, show_extra_specs,
+                         show_config_drive, show_extended_attr, show_keypair,
+                         show_srv_usg, show_extended_status, show_user_data)
+        if cache_fragment:
+            fragment = self._get_cached_fragment(*fragment_args)
+        else:
+            fragment = self._get_fragment(*fragment_args)
+        server = {"server": dict(fragment)}
+        server["server"]["metadata"] = self._get_metadata(instance)
+        server["server"]["addresses"] = self._get_addresses(
+            request, instance, extend_address)
 
-        server = {
-            "server": {
-                "id": instance["uuid"],
-                "name": instance["display_name"],
-                "status": self._get_vm_status(instance),
-                "tenant_id": instance.get("project_id") or "",
-                "user_id": instance.get("user_id") or "",
-                "metadata": self._get_metadata(instance),
-                "hostId": self._get_host_id(instance),
-                "image": self._get_image(request, instance),
-                "flavor": self._get_flavor(request, instance,
-                                           show_extra_specs),
-                "created": utils.isotime(instance["created_at"]),
-                "updated": utils.isotime(instance["updated_at"]),
-                "addresses": self._get_addresses(request, instance,
-                                                 extend_address),
-                "accessIPv4": str(ip_v4) if ip_v4 is not None else '',
-                "accessIPv6": str(ip_v6) if ip_v6 is not None else '',
-                "links": self._get_links(request,
-                                         instance["uuid"],
-                                         self._collection_name),
-                # NOTE(sdague): historically this was the
-                # os-disk-config extension, but now that extensions
-                # are gone, we merge these attributes here.
-                "OS-DCF:diskConfig": (
-                    'AUTO' if instance.get('auto_disk_config') else 'MANUAL'),
-            },
-        }
         if server["server"]["status"] in self._fault_statuses:
             _inst_fault = self._get_fault(request, instance)
             if _inst_fault:
                 server['server']['fault'] = _inst_fault
 
-        if server["server"]["status"] in self._progress_statuses:
-            server["server"]["progress"] = instance.get("progress", 0)
-
-        context = request.environ['nova.context']
-
         if show_AZ:
             az = avail_zone.get_instance_availability_zone(context, instance)
             # NOTE(mriedem): The OS-EXT-AZ prefix should not be used for new
@@ -339,11 +326,90 @@ class ViewBuilder(common.ViewBuilder):
                     self._get_scheduler_hints(
                         context, instance, provided_sched_hints))
 
+        if show_sec_grp:
+            self._add_security_grps(request, [server["server"]], [instance])
+
+        if show_extended_volumes:
+            # NOTE(mriedem): The os-extended-volumes prefix should not be used
+            # for new attributes after v2.1. They are only in v2.1 for backward
+            # compat with v2.0.
+            add_delete_on_termination = api_version_request.is_supported(
+                request, '2.3')
+            if bdms is None:
+                bdms = objects.BlockDeviceMappingList.bdms_by_instance_uuid(
+                    context, [instance["uuid"]])
+            self._add_volumes_attachments(server["server"],
+                                          bdms,
+                                          add_delete_on_termination)
+
+        if api_version_request.is_supported(request, '2.16'):
+            if show_host_status is None:
+                unknown_only = self._get_host_status_unknown_only(
+                    context, instance)
+                # If we're not allowed by policy to show host status at all,
+                # don't bother requesting instance host status from the compute
+                # API.
+                if unknown_only is not None:
+                    host_status = self.compute_api.get_instance_host_status(
+                                      instance)
+                    # If we are allowed to show host status of some kind, set
+                    # the host status field only if:
+                    #   * unknown_only = False, meaning we can show any status
+                    # OR
+                    #   * if unknown_only = True and host_status == UNKNOWN
+                    if (not unknown_only or
+                            host_status == fields.HostStatus.UNKNOWN):
+                        server["server"]['host_status'] = host_status
+
+        if api_version_request.is_supported(request, "2.26"):
+            server["server"]["tags"] = [t.tag for t in instance.tags]
+
+        if show_server_groups:
+            server['server']['server_groups'] = self._get_server_groups(
+                                                                   context,
+                                                                   instance)
+        return server
+
+    def _get_fragment(self, request, instance, show_extra_specs,
+                      show_config_drive, show_extended_attr, show_keypair,
+                      show_srv_usg, show_extended_status, show_user_data):
+        """Render the fields of the detailed view of an instance which only
+        depend on the instance record, besides the request.
+        """
+        ip_v4 = instance.get('access_ip_v4')
+        ip_v6 = instance.get('access_ip_v6')
+
+        server = {
+            "id": instance["uuid"],
+            "name": instance["display_name"],
+            "status": self._get_vm_status(instance),
+            "tenant_id": instance.get("project_id") or "",
+            "user_id": instance.get("user_id") or "",
+            "hostId": self._get_host_id(instance),
+            "image": self._get_image(request, instance),
+            "flavor": self._get_flavor(request, instance, show_extra_specs),
+            "created": utils.isotime(instance["created_at"]),
+            "updated": utils.isotime(instance["updated_at"]),
+            "accessIPv4": str(ip_v4) if ip_v4 is not None else '',
+            "accessIPv6": str(ip_v6) if ip_v6 is not None else '',
+            "links": self._get_links(request,
+                                     instance["uuid"],
+                                     self._collection_name),
+            # NOTE(sdague): historically this was the
+            # os-disk-config extension, but now that extensions
+            # are gone, we merge these attributes here.
+            "OS-DCF:diskConfig": (
+                'AUTO' if instance.get('auto_disk_config') else 'MANUAL'),
+        }
+
+        if server["status"] in self._progress_statuses:
+            server["progress"] = instance.get("progress", 0)
+
         if show_config_drive:
-            server["server"]["config_drive"] = instance["config_drive"]
+            server["config_drive"] = instance["config_drive"]
 
         if show_keypair:
-            server["server"]["key_name"] = instance["key_name"]
+            server["key_name"] = instance["key_name"]
 
         if show_srv_usg:
             for k in ['launched_at', 'terminated_at']:
@@ -352,15 +418,8 @@ class ViewBuilder(common.ViewBuilder):
                 # merely by grabbing str(datetime) of a TZ-naive object. The
                 # only way we can keep that with instance objects is to strip
                 # the tzinfo from the stamp and str() it.
-                server["server"][key] = (instance[k].replace(tzinfo=None)
-                                         if instance[k] else None)
-        if show_sec_grp:
-            self._add_security_grps(request, [server["server"]], [instance])
-
-        if show_extended_attr is None:
-            show_extended_attr = context.can(
-                esa_policies.BASE_POLICY_NAME, fatal=False,
-                target={'project_id': instance.project_id})
+                server[key] = (instance[k].replace(tzinfo=None)
+                               if instance[k] else None)
 
         if show_extended_attr:
             properties = ['host', 'name', 'node']
@@ -390,7 +449,7 @@ class ViewBuilder(common.ViewBuilder):
                     # NOTE(mriedem): Nothing after microversion 2.3 should use
                     # the OS-EXT-SRV-ATTR prefix for the attribute key name.
                     key = "OS-EXT-SRV-ATTR:%s" % attr
-                server["server"][key] = getattr(instance, attr)
+                server[key] = getattr(instance, attr)
 
         if show_extended_status:
             # NOTE(gmann): Removed 'locked_by' from extended status
@@ -401,60 +460,23 @@ class ViewBuilder(common.ViewBuilder):
                 # new attributes after v2.1. They are only in v2.1 for backward
                 # compat with v2.0.
                 key = "%s:%s" % ('OS-EXT-STS', state)
-                server["server"][key] = instance[state]
-
-        if show_extended_volumes:
-            # NOTE(mriedem): The os-extended-volumes prefix should not be used
-            # for new attributes after v2.1. They are only in v2.1 for backward
-            # compat with v2.0.
-            add_delete_on_termination = api_version_request.is_supported(
-                request, '2.3')
-            if bdms is None:
-                bdms = objects.BlockDeviceMappingList.bdms_by_instance_uuid(
-                    context, [instance["uuid"]])
-            self._add_volumes_attachments(server["server"],
-                                          bdms,
-                                          add_delete_on_termination)
-
-        if api_version_request.is_supported(request, '2.16'):
-            if show_host_status is None:
-                unknown_only = self._get_host_status_unknown_only(
-                    context, instance)
-                # If we're not allowed by policy to show host status at all,
-                # don't bother requesting instance host status from the compute
-                # API.
-                if unknown_only is not None:
-                    host_status = self.compute_api.get_instance_host_status(
-                                      instance)
-                    # If we are allowed to show host status of some kind, set
-                    # the host status field only if:
-                    #   * unknown_only = False, meaning we can show any status
-                    # OR
-                    #   * if unknown_only = True and host_status == UNKNOWN
-                    if (not unknown_only or
-                            host_status == fields.HostStatus.UNKNOWN):
-                        server["server"]['host_status'] = host_status
+                server[key] = instance[state]
 
         if api_version_request.is_supported(request, "2.9"):
-            server["server"]["locked"] = (True if instance["locked_by"]
-                                          else False)
+            server["locked"] = (True if instance["locked_by"] else False)
 
         if api_version_request.is_supported(request, "2.73"):
-            server["server"]["locked_reason"] = (instance.system_metadata.get(
-                                                 "locked_reason"))
+            server["locked_reason"] = (
+                instance.get_system_metadata("locked_reason"))
 
         if api_version_request.is_supported(request, "2.19"):
-            server["server"]["description"] = instance.get(
-                                                "display_description")
-
-        if api_version_request.is_supported(request, "2.26"):
-            server["server"]["tags"] = [t.tag for t in instance.tags]
+            server["description"] = instance.get("display_description")
 
         if api_version_request.is_supported(request, "2.63"):
             trusted_certs = None
             if instance.trusted_certs:
                 trusted_certs = instance.trusted_certs.ids
-            server["server"]["trusted_image_certificates"] = trusted_certs
+            server["trusted_image_certificates"] = trusted_certs
 
         # TODO(stephenfin): Remove this check once we remove the
         # OS-EXT-SRV-ATTR:hostname policy checks from the policy is Y or later
@@ -462,15 +484,24 @@ class ViewBuilder(common.ViewBuilder):
             # API 2.90 made this field visible to non-admins, but we only show
             # it if it's not already added
             if not show_extended_attr:
-                server["server"]["OS-EXT-SRV-ATTR:hostname"] = \
-                    instance.hostname
+                server["OS-EXT-SRV-ATTR:hostname"] = instance.hostname
 
-        if show_server_groups:
-            server['server']['server_groups'] = self._get_server_groups(
-                                                                   context,
-                                                                   instance)
         return server
 
+    def _get_cached_fragment(self, request, instance, *args):
+        """Get the result of _get_fragment() from the server view cache,
+        rendering and caching it if it is not cached yet.
+        """
+        # The rendered fields also depend on the base URL of the links, the
+        # microversion, and the policy checks passed as arguments.
+        variant = (request.application_url,
+                   str(request.api_version_request)) + args
+        fragment = server_view_cache.get_fragment(instance, variant)
+        if fragment is None:
+            fragment = self._get_fragment(request, instance, *args)
+            server_view_cache.set_fragment(instance, variant, fragment)
+        return fragment
+
     def index(self, request, instances, cell_down_support=False):
         """Show a list of servers without many details."""
         coll_name = self._collection_name
@@ -492,6 +523,7 @@ class ViewBuilder(common.ViewBuilder):
             show_extra_specs = False
         show_extended_attr = context.can(
             esa_policies.BASE_POLICY_NAME, fatal=False)
+        cache_fragment = CONF.api.server_view_cache_size > 0
 
         instance_uuids = [inst['uuid'] for inst in instances]
         bdms = self._get_instance_bdms_in_multiple_cells(context,
@@ -508,7 +540,13 @@ class ViewBuilder(common.ViewBuilder):
                                        show_host_status=False,
                                        show_sec_grp=False,
                                        bdms=bdms,
-                                       cell_down_support=cell_down_support)
+                                       cell_down_support=cell_down_support,
+                                       cache_fragment=cache_fragment)
+        if cache_fragment:
+            hits, misses, hit_rate = server_view_cache.get_stats()
+            LOG.debug('Server view cache: %(hits)d hits, %(misses)d misses, '
+                      'hit rate %(rate).2f',
+                      {'hits': hits, 'misses': misses, 'rate': hit_rate})
 
         if api_version_request.is_supported(request, '2.16'):
             unknown_only = self._get_host_status_unknown_only(context)
@@ -524,7 +562,8 @@ class ViewBuilder(common.ViewBuilder):
 
     def _list_view(self, func, request, servers, coll_name, show_extra_specs,
                    show_extended_attr=None, show_host_status=None,
-                   show_sec_grp=False, bdms=None, cell_down_support=False):
+                   show_sec_grp=False, bdms=None, cell_down_support=False,
+                   cache_fragment=False):
         """Provide a view for a list of servers.
 
         :param func: Function used to format the server data
@@ -543,6 +582,9 @@ class ViewBuilder(common.ViewBuilder):
                                   returning a minimal instance
                                   construct if the relevant cell is
                                   down.
+        :param cache_fragment: If the parts of the server views which only
+                        depend on the instances should be looked up in and
+                        stored into the server view cache.
         :returns: Server data in dictionary format
         """
         req_specs = None
@@ -572,7 +614,8 @@ class ViewBuilder(common.ViewBuilder):
                  provided_az=req_specs_dict.get(
                      server.uuid, AZ_NOT_IN_REQUEST_SPEC),
                  provided_sched_hints=sched_hints_dict.get(
-                     server.uuid, SCHED_HINTS_NOT_IN_REQUEST_SPEC)
+                     server.uuid, SCHED_HINTS_NOT_IN_REQUEST_SPEC),
+                 cache_fragment=cache_fragment
                  )["server"]
             for server in servers
             # Filter out the fake marker instance created by the
@@ -29,6 +29,7 @@ from nova.api import wsgi
 from nova import exception
 from nova import i18n
 from nova.i18n import _
+from nova import serialization
 from nova import version
 
 
@@ -217,7 +218,7 @@ class JSONDictSerializer(ActionDispatcher):
         return self.dispatch(data, action=action)
 
     def default(self, data):
-        return str(jsonutils.dumps(data))
+        return serialization.dumps(data)
 
 
 class WSGICodes:
@@ -708,11 +709,11 @@ def api_version(
         version of the JSON-Schema against to.
     """
     def decorator(f):
+        min_ver = api_version_request.APIVersionRequest(min_version)
+        max_ver = api_version_request.APIVersionRequest(max_version)
+
         @functools.wraps(f)
         def wrapped(*args, **kwargs):
-            min_ver = api_version_request.APIVersionRequest(min_version)
-            max_ver = api_version_request.APIVersionRequest(max_version)
-
             # The request object is always the second argument.
             # However numerous unittests pass in the request object
             # via kwargs instead so we handle that as well.
@@ -748,11 +749,11 @@ def expected_errors(
     of the API to file a bug report.
     """
     def decorator(f):
+        min_ver = api_version_request.APIVersionRequest(min_version)
+        max_ver = api_version_request.APIVersionRequest(max_version)
+
         @functools.wraps(f)
         def wrapped(*args, **kwargs):
-            min_ver = api_version_request.APIVersionRequest(min_version)
-            max_ver = api_version_request.APIVersionRequest(max_version)
-
             # The request object is always the second argument.
             # However numerous unittests pass in the request object
             # via kwargs instead so we handle that as well.
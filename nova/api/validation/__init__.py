@@ -18,6 +18,7 @@ Request Body validating middleware.
 
 import functools
 import re
+import time
 import typing as ty
 
 from oslo_log import log as logging
@@ -34,6 +35,13 @@ from nova.i18n import _
 CONF = nova.conf.CONF
 LOG = logging.getLogger(__name__)
 
+# The schemas registered by the decorators below, as (schema, min_version,
+# is_body, is_response) tuples
+_REGISTERED_SCHEMAS = []
+
+# The schemas of this minimum version, or of none, validate legacy v2 requests
+_LEGACY_V2_VERSION = api_version_request.APIVersionRequest('2.0')
+
 
 def validated(cls):
     cls._validated = True
@@ -114,10 +122,10 @@ def _schema_validation_helper(schema, target, min_version, max_version,
 
     :param schema: A dict, the JSON-Schema is used to validate the target.
     :param target: A dict, the target is validated by the JSON-Schema.
-    :param min_version: A string of two numerals. X.Y indicating the minimum
-                        version of the JSON-Schema to validate against.
-    :param max_version: A string of two numerals. X.Y indicating the maximum
-                        version of the JSON-Schema to validate against.
+    :param min_version: An APIVersionRequest indicating the minimum version of
+                        the JSON-Schema to validate against.
+    :param max_version: An APIVersionRequest indicating the maximum version of
+                        the JSON-Schema to validate against.
     :param args: Positional arguments which passed into original method.
     :param kwargs: Keyword arguments which passed into original method.
     :param is_body: A boolean. Indicating whether the target is HTTP request
@@ -128,9 +136,6 @@ def _schema_validation_helper(schema, target, min_version, max_version,
               performed.
     :raises: ValidationError, when the validation fails.
     """
-    min_ver = api_version_request.APIVersionRequest(min_version)
-    max_ver = api_version_request.APIVersionRequest(max_version)
-
     # The request object is always the second argument.
     # However numerous unittests pass in the request object
     # via kwargs instead so we handle that as well.
@@ -150,17 +155,17 @@ def _schema_validation_helper(schema, target, min_version, max_version,
         #  legacy_v2 | None               | work
         #  legacy_v2 | 2.0                | work
         #  legacy_v2 | 2.1+               | don't
-        if min_version is None or min_version == '2.0':
-            schema_validator = validators._SchemaValidator(
+        if min_version.is_null() or min_version == _LEGACY_V2_VERSION:
+            schema_validator = validators.get_validator(
                 schema, legacy_v2, is_body)
             schema_validator.validate(target)
             return True
-    elif ver.matches(min_ver, max_ver):
+    elif ver.matches(min_version, max_version):
         # Only validate against the schema if it lies within
         # the version range specified. Note that if both min
         # and max are not specified the validator will always
         # be run.
-        schema_validator = validators._SchemaValidator(
+        schema_validator = validators.get_validator(
             schema, legacy_v2, is_body)
         schema_validator.validate(target)
         return True
@@ -189,13 +194,16 @@ def schema(
     """
 
     def add_validator(func):
+        min_ver = api_version_request.APIVersionRequest(min_version)
+        max_ver = api_version_request.APIVersionRequest(max_version)
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             _schema_validation_helper(
                 request_body_schema,
                 kwargs['body'],
-                min_version,
-                max_version,
+                min_ver,
+                max_ver,
                 args,
                 kwargs
             )
@@ -207,6 +215,8 @@ def schema(
         wrapper.request_body_schemas.add_schema(
             request_body_schema, min_version, max_version
         )
+        _REGISTERED_SCHEMAS.append(
+            (request_body_schema, min_version, True, False))
 
         return wrapper
 
@@ -229,6 +239,9 @@ def response_body_schema(
     """
 
     def add_validator(func):
+        min_ver = api_version_request.APIVersionRequest(min_version)
+        max_ver = api_version_request.APIVersionRequest(max_version)
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             response = func(*args, **kwargs)
@@ -260,8 +273,8 @@ def response_body_schema(
                 _schema_validation_helper(
                     response_body_schema,
                     body,
-                    min_version,
-                    max_version,
+                    min_ver,
+                    max_ver,
                     args,
                     kwargs
                 )
@@ -278,6 +291,8 @@ def response_body_schema(
         wrapper.response_body_schemas.add_schema(
             response_body_schema, min_version, max_version
         )
+        _REGISTERED_SCHEMAS.append(
+            (response_body_schema, min_version, True, True))
 
         return wrapper
 
@@ -328,6 +343,9 @@ def query_schema(request_query_schema, min_version=None,
     """
 
     def add_validator(func):
+        min_ver = api_version_request.APIVersionRequest(min_version)
+        max_ver = api_version_request.APIVersionRequest(max_version)
+
         @functools.wraps(func)
         def wrapper(*args, **kwargs):
             # The request object is always the second argument.
@@ -351,7 +369,7 @@ def query_schema(request_query_schema, min_version=None,
 
             if _schema_validation_helper(request_query_schema,
                                          query_dict,
-                                         min_version, max_version,
+                                         min_ver, max_ver,
                                          args, kwargs, is_body=False):
                 # NOTE(alex_xu): The additional query parameters were stripped
                 # out when `additionalProperties=True`. This is for backward
@@ -368,7 +386,31 @@ def query_schema(request_query_schema, min_version=None,
         wrapper.request_query_schemas.add_schema(
             request_query_schema, min_version, max_version
         )
+        _REGISTERED_SCHEMAS.append(
+            (request_query_schema, min_version, False, False))
 
         return wrapper
 
     return add_validator
+
+
+def compile_validators():
+    """Create the validators of all the registered schemas.
+
+    This moves the cost of creating the validator of each schema from the
+    first request validated against it to the API startup.
+    """
+    start = time.monotonic()
+    count = 0
+    for schema, min_version, is_body, is_response in _REGISTERED_SCHEMAS:
+        if is_response and CONF.api.response_validation == 'ignore':
+            continue
+        validators.get_validator(schema, False, is_body)
+        count += 1
+        # Only these schemas validate legacy v2 requests, see
+        # _schema_validation_helper().
+        if min_version in (None, '2.0'):
+            validators.get_validator(schema, True, is_body)
+            count += 1
+    LOG.debug('Created %(count)d schema validators in %(time).2f seconds',
+              {'count': count, 'time': time.monotonic() - start})
@@ -265,6 +265,7 @@ class _SchemaValidator(object):
 
     def __init__(self, schema, relax_additional_properties=False,
                  is_body=True):
+        self.schema = schema
         self.is_body = is_body
         validators = {
             'minimum': self._validate_minimum,
@@ -339,3 +340,32 @@ class _SchemaValidator(object):
             return
         return self.validator_org.VALIDATORS['maximum'](validator, maximum,
                                                         instance, schema)
+
+
+# Validators of the schemas, keyed by the id of the schema and the other
+# arguments of _SchemaValidator. The schemas are kept alive by their
+# validators, so their ids cannot be reused by other schemas.
+_VALIDATORS = {}
+
+
+def get_validator(schema, relax_additional_properties=False, is_body=True):
+    """Get a validator of a schema.
+
+    Creating a validator is costly, so the validator created by the first call
+    for a schema is reused by the next ones.
+
+    :param schema: A dict, the JSON-Schema to validate against.
+    :param relax_additional_properties: A boolean. Whether additional
+        properties not allowed by the schema are removed instead of failing
+        the validation, for the legacy v2 API.
+    :param is_body: A boolean. Indicating whether the validated targets are
+        HTTP request bodies or not.
+    :returns: A _SchemaValidator.
+    """
+    key = (id(schema), relax_additional_properties, is_body)
+    validator = _VALIDATORS.get(key)
+    if validator is None or validator.schema is not schema:
+        validator = _SchemaValidator(schema, relax_additional_properties,
+                                     is_body)
+        _VALIDATORS[key] = validator
+    return validator
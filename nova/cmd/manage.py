@@ -28,6 +28,7 @@ import os
 import re
 import sys
 import textwrap
+import threading
 import time
 import traceback
 import typing as ty
@@ -178,6 +179,53 @@ def locked_instance(cell_mapping, instance, reason):
                 compute_api.unlock(cctxt, instance)
 
 
+class ArchiveCheckpoints(object):
+    """Track how far the tables of each cell database have been archived.
+
+    This holds, for each cell, the checkpoint dict which
+    nova.db.main.api.archive_deleted_rows() updates with the primary key up
+    to which each table has been archived. The checkpoints are optionally
+    saved to a JSON file, from which they are loaded again to resume an
+    interrupted archive.
+    """
+
+    def __init__(self, path=None):
+        self.path = path
+        self.checkpoints = {}
+        self._lock = threading.Lock()
+        if path and os.path.exists(path):
+            with open(path, 'rb') as f:
+                self.checkpoints = jsonutils.load(f)
+
+    @staticmethod
+    def _key(cell_uuid):
+        # The default database is archived when not archiving across cells
+        return cell_uuid or 'default'
+
+    def get(self, cell_uuid):
+        """Return the checkpoint dict of a cell, keyed by table name."""
+        with self._lock:
+            return self.checkpoints.setdefault(self._key(cell_uuid), {})
+
+    def save(self):
+        """Save the checkpoints, or remove the file if none is left."""
+        if not self.path:
+            return
+        with self._lock:
+            checkpoints = {
+                key: dict(checkpoint)
+                for key, checkpoint in self.checkpoints.items() if checkpoint
+            }
+            if not checkpoints:
+                if os.path.exists(self.path):
+                    os.unlink(self.path)
+                return
+            tmp_path = self.path + '.tmp'
+            with open(tmp_path, 'w') as f:
+                jsonutils.dump(checkpoints, f)
+            os.replace(tmp_path, self.path)
+
+
 class DbCommands(object):
     """Class for managing the main database."""
 
@@ -294,17 +342,31 @@ class DbCommands(object):
     @args('--sleep', type=int, metavar='<seconds>', dest='sleep',
           help='The amount of time in seconds to sleep between batches when '
                '``--until-complete`` is used. Defaults to 0.')
+    @args('--parallel', type=int, metavar='<workers>', dest='parallel',
+          help='Archive up to this many groups of tables related by foreign '
+               'keys concurrently, and all cells concurrently when used with '
+               '``--all-cells``. Rows to archive are then selected in ranges '
+               'of primary keys and max_rows applies to each group of tables '
+               'of each cell. The rate at which rows were archived from each '
+               'table is also printed with ``--verbose``.')
+    @args('--checkpoint-file', metavar='<path>', dest='checkpoint_file',
+          help='Record how far each table has been archived in this file, so '
+               'that an interrupted archive is resumed when running the '
+               'command again with the same file. The file is removed once '
+               'there is nothing left to archive. Implies that rows to '
+               'archive are selected in ranges of primary keys.')
     def archive_deleted_rows(
         self, max_rows=1000, verbose=False,
         until_complete=False, purge=False,
         before=None, all_cells=False, task_log=False, sleep=0,
+        parallel=None, checkpoint_file=None,
     ):
         """Move deleted rows from production tables to shadow tables.
 
         Returns 0 if nothing was archived, 1 if some number of rows were
-        archived, 2 if max_rows is invalid, 3 if no connection could be
-        established to the API DB, 4 if before date is invalid. If automating,
-        this should be run continuously while the result
+        archived, 2 if max_rows or parallel is invalid, 3 if no connection
+        could be established to the API DB, 4 if before date is invalid. If
+        automating, this should be run continuously while the result
         is 1, stopping at 0.
         """
         max_rows = int(max_rows)
@@ -315,6 +377,9 @@ class DbCommands(object):
             print(_('max rows must be <= %(max_value)d') %
                   {'max_value': db_const.MAX_INT})
             return 2
+        if parallel is not None and parallel < 1:
+            print(_("Must supply a positive value for parallel"))
+            return 2
 
         ctxt = context.get_admin_context()
         try:
@@ -338,6 +403,13 @@ class DbCommands(object):
         else:
             before_date = None
 
+        # Archiving in ranges of primary keys is tracked with checkpoints, and
+        # reports the rate at which rows were archived.
+        checkpoints = None
+        table_to_archive_stats = {}
+        if parallel or checkpoint_file:
+            checkpoints = ArchiveCheckpoints(checkpoint_file)
+
         table_to_rows_archived = {}
         if until_complete and verbose:
             sys.stdout.write(_('Archiving') + '..')  # noqa
@@ -365,6 +437,16 @@ class DbCommands(object):
             cell_mappings = [None]
             print_sort_func = None
         total_rows_archived = 0
+        if parallel and all_cells:
+            try:
+                self._do_archive_all_cells(
+                    table_to_rows_archived, ctxt, cell_mappings, max_rows,
+                    until_complete, verbose, before_date, task_log, sleep,
+                    parallel, checkpoints, table_to_archive_stats)
+            except KeyboardInterrupt:
+                interrupt = True
+            # All the cells have been archived concurrently
+            cell_mappings = []
         for cell_mapping in cell_mappings:
             # NOTE(Kevin_Zheng): No need to calculate limit for each
             # cell if until_complete=True.
@@ -392,7 +474,10 @@ class DbCommands(object):
                         before_date,
                         cell_name,
                         task_log,
-                        sleep)
+                        sleep,
+                        workers=parallel,
+                        checkpoints=checkpoints,
+                        stats=table_to_archive_stats)
                 except KeyboardInterrupt:
                     interrupt = True
                     break
@@ -416,6 +501,15 @@ class DbCommands(object):
                 ))
             else:
                 print(_('Nothing was archived.'))
+            if table_to_archive_stats:
+                print(format_dict(
+                    {table: '%.1f' % (rows / seconds if seconds else rows)
+                     for table, (rows, seconds) in
+                     table_to_archive_stats.items()},
+                    dict_property=_('Table'),
+                    dict_value=_('Rows Archived Per Second'),
+                    sort_key=print_sort_func,
+                ))
 
         if table_to_rows_archived and purge:
             if verbose:
@@ -425,9 +519,47 @@ class DbCommands(object):
         # NOTE(danms): Return nonzero if we archived something
         return int(bool(table_to_rows_archived))
 
+    def _do_archive_all_cells(
+        self, table_to_rows_archived, ctxt, cell_mappings, max_rows,
+        until_complete, verbose, before_date, task_log, sleep, workers,
+        checkpoints, stats,
+    ):
+        """Helper function for archiving deleted rows of all cells
+        concurrently.
+
+        The parameters are the same as those of _do_archive(), with the cells
+        to archive given as cell_mappings.
+        """
+        cell_names = {cell.uuid: cell.name for cell in cell_mappings}
+
+        def archive_cell(cctxt):
+            cell_to_rows_archived = {}
+            cell_stats = {}
+            self._do_archive(
+                cell_to_rows_archived, cctxt, max_rows, until_complete,
+                verbose, before_date, cell_names[cctxt.cell_uuid], task_log,
+                sleep, workers=workers, checkpoints=checkpoints,
+                stats=cell_stats)
+            return cell_to_rows_archived, cell_stats
+
+        # Archiving a cell can take hours, so there is no timeout.
+        results = context.scatter_gather_cells(
+            ctxt, cell_mappings, None, archive_cell)
+        for cell_uuid, result in results.items():
+            if context.is_cell_failure_sentinel(result):
+                print(_('Failed to archive cell %(cell)s: %(error)s') % {
+                    'cell': cell_uuid, 'error': result})
+                continue
+            cell_to_rows_archived, cell_stats = result
+            for table_name, rows_archived in cell_to_rows_archived.items():
+                table_to_rows_archived.setdefault(table_name, 0)
+                table_to_rows_archived[table_name] += rows_archived
+            stats.update(cell_stats)
+
     def _do_archive(
         self, table_to_rows_archived, cctxt, max_rows,
         until_complete, verbose, before_date, cell_name, task_log, sleep,
+        workers=None, checkpoints=None, stats=None,
     ):
         """Helper function for archiving deleted rows for a cell.
 
@@ -453,14 +585,36 @@ class DbCommands(object):
         :param task_log: Whether to archive task_log table rows
         :param sleep: The amount of time in seconds to sleep between batches
             when ``until_complete`` is True.
+        :param workers: The number of groups of tables related by foreign
+            keys to archive concurrently
+        :param checkpoints: ArchiveCheckpoints object in which to track how
+            far each table has been archived, when selecting rows to archive
+            in ranges of primary keys
+        :param stats: Dict tracking a list of the number of rows archived and
+            the seconds spent archiving them by <cell_name>.<table name>,
+            when checkpoints are specified
         """
         ctxt = context.get_admin_context()
+        archive_kwargs = {}
+        table_stats = {}
+        if checkpoints is not None:
+            checkpoint = checkpoints.get(cctxt.cell_uuid)
+            archive_kwargs = dict(
+                workers=workers, checkpoint=checkpoint, stats=table_stats)
         while True:
             # table_to_rows = {table_name: number_of_rows_archived}
             # deleted_instance_uuids = ['uuid1', 'uuid2', ...]
             table_to_rows, deleted_instance_uuids, total_rows_archived = \
                 db.archive_deleted_rows(
-                    cctxt, max_rows, before=before_date, task_log=task_log)
+                    cctxt, max_rows, before=before_date, task_log=task_log,
+                    **archive_kwargs)
+
+            if checkpoints is not None:
+                if not any(table_to_rows.values()):
+                    # Everything has been archived, start from scratch next
+                    # time to find the rows deleted since.
+                    checkpoint.clear()
+                checkpoints.save()
 
             for table_name, rows_archived in table_to_rows.items():
                 if cell_name:
@@ -506,6 +660,11 @@ class DbCommands(object):
                 sys.stdout.write('.')
             # Optionally sleep between batches to throttle the archiving.
             time.sleep(sleep)
+
+        for table_name, table_stat in table_stats.items():
+            if cell_name:
+                table_name = cell_name + '.' + table_name
+            stats[table_name] = table_stat
         return total_rows_archived
 
     @args('--before', metavar='<before>', dest='before',
@@ -519,11 +678,28 @@ class DbCommands(object):
           help='Print information about purged records')
     @args('--all-cells', dest='all_cells', action='store_true', default=False,
           help='Run against all cell databases')
+    @args('--max-rows', type=int, metavar='<number>', dest='max_rows',
+          help='Delete at most this many rows per database transaction, '
+               'rather than all the rows to purge of each table at once.')
+    @args('--max-rate', type=int, metavar='<rows>', dest='max_rate',
+          help='Delete at most this many rows per second. Requires '
+               '``--max-rows``.')
+    @args('--parallel', type=int, metavar='<workers>', dest='parallel',
+          help='Purge up to this many shadow tables concurrently. Requires '
+               '``--max-rows``.')
     def purge(self, before=None, purge_all=False, verbose=False,
-              all_cells=False):
+              all_cells=False, max_rows=None, max_rate=None, parallel=None):
         if before is None and purge_all is False:
             print(_('Either --before or --all is required'))
             return 1
+        if max_rows is None and (max_rate or parallel):
+            print(_('--max-rate and --parallel require --max-rows'))
+            return 1
+        if any(value is not None and value < 1
+               for value in (max_rows, max_rate, parallel)):
+            print(_('Must supply a positive value for --max-rows, '
+                    '--max-rate and --parallel'))
+            return 5
         if before:
             try:
                 before_date = dateutil_parser.parse(before, fuzzy=True)
@@ -537,6 +713,11 @@ class DbCommands(object):
             if verbose:
                 print('%s: %s' % (identity, msg))
 
+        purge_kwargs = {}
+        if max_rows is not None:
+            purge_kwargs = dict(
+                max_rows=max_rows, max_rate=max_rate, workers=parallel)
+
         deleted = 0
         admin_ctxt = context.get_admin_context()
 
@@ -551,11 +732,11 @@ class DbCommands(object):
                 identity = _('Cell %s') % cell.identity
                 with context.target_cell(admin_ctxt, cell) as cctxt:
                     deleted += db.purge_shadow_tables(
-                        cctxt, before_date, status_fn=status)
+                        cctxt, before_date, status_fn=status, **purge_kwargs)
         else:
             identity = _('DB')
             deleted = db.purge_shadow_tables(
-                admin_ctxt, before_date, status_fn=status)
+                admin_ctxt, before_date, status_fn=status, **purge_kwargs)
         if deleted:
             return 0
         else:
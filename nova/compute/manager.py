@@ -646,6 +646,10 @@ class ComputeManager(manager.Manager):
         self._sync_power_pool = eventlet.GreenPool(
             size=CONF.sync_power_state_pool_size)
         self._syncs_in_progress = {}
+        # {instance UUID: (power state, time.monotonic() value)}, the power
+        # states last confirmed by the _sync_power_states periodic task when
+        # sync_power_state_max_age is set
+        self._confirmed_power_states = {}
         self.send_instance_updates = (
             CONF.filter_scheduler.track_instance_changes)
         if CONF.max_concurrent_builds != 0:
@@ -1059,8 +1063,12 @@ class ComputeManager(manager.Manager):
             instance.task_state = None
             instance.save(expected_task_state=[task_states.MIGRATING])
 
-    def _init_instance(self, context, instance):
-        """Initialize this instance during service init."""
+    def _init_instance(self, context, instance, vm_power_state=None):
+        """Initialize this instance during service init.
+
+        :param vm_power_state: The power state of the instance on the
+            hypervisor if it was already retrieved, None to retrieve it here
+        """
 
         # NOTE(danms): If the instance appears to not be owned by this
         # host, it may have been evacuated away, but skipped by the
@@ -1158,7 +1166,9 @@ class ComputeManager(manager.Manager):
                 self._set_instance_obj_error_state(instance)
             return
 
-        current_power_state = self._get_power_state(instance)
+        current_power_state = vm_power_state
+        if current_power_state is None:
+            current_power_state = self._get_power_state(instance)
         try_reboot, reboot_type = self._retry_reboot(
             instance, current_power_state)
 
@@ -1277,6 +1287,8 @@ class ComputeManager(manager.Manager):
             return
 
         if instance.task_state == task_states.RESIZE_MIGRATING:
+            # The power state of the instance may change below
+            vm_power_state = None
             # We crashed during resize/migration, so roll back for safety
             try:
                 # NOTE(mriedem): check old_vm_state for STOPPED here, if it's
@@ -1306,10 +1318,13 @@ class ComputeManager(manager.Manager):
         if instance.task_state == task_states.MIGRATING:
             # Live migration did not complete, but instance is on this
             # host. Abort ongoing migration if still running and reset state.
+            vm_power_state = None
             self._reset_live_migration(context, instance)
 
         db_state = instance.power_state
-        drv_state = self._get_power_state(instance)
+        drv_state = vm_power_state
+        if drv_state is None:
+            drv_state = self._get_power_state(instance)
         expect_running = (db_state == power_state.RUNNING and
                           drv_state != db_state)
 
@@ -1453,6 +1468,9 @@ class ComputeManager(manager.Manager):
 
     def handle_events(self, event):
         if isinstance(event, virtevent.LifecycleEvent):
+            # The power state of the instance has to be checked again by the
+            # next _sync_power_states periodic task.
+            self._confirmed_power_states.pop(event.get_instance_uuid(), None)
             try:
                 self.handle_lifecycle_event(event)
             except exception.InstanceNotFound:
@@ -1670,15 +1688,24 @@ class ComputeManager(manager.Manager):
         # _destroy_evacuated_instances and
         # _error_out_instances_whose_build_was_interrupted out in the
         # background on startup
+        phase_times = {}
         try:
             # checking that instance was not already evacuated to other host
+            start = time.monotonic()
             evacuated_instances = self._destroy_evacuated_instances(
                 context, nodes_by_uuid)
+            phase_times['evacuations'] = time.monotonic() - start
 
             # Initialise instances on the host that are not evacuating
-            for instance in instances:
-                if instance.uuid not in evacuated_instances:
-                    self._init_instance(context, instance)
+            start = time.monotonic()
+            instances_to_init = [instance for instance in instances
+                                 if instance.uuid not in evacuated_instances]
+            vm_power_states = self._get_power_states(instances_to_init)
+            phase_times['power states'] = time.monotonic() - start
+
+            start = time.monotonic()
+            self._init_instances(context, instances_to_init, vm_power_states)
+            phase_times['instances'] = time.monotonic() - start
 
             # NOTE(gibi): collect all the instance uuids that is in some way
             # was already handled above. Either by init_instance or by
@@ -1688,9 +1715,16 @@ class ComputeManager(manager.Manager):
             # handled by the above calls.
             already_handled = {instance.uuid for instance in instances}.union(
                 evacuated_instances)
+            start = time.monotonic()
             self._error_out_instances_whose_build_was_interrupted(
                 context, already_handled, nodes_by_uuid.keys())
+            phase_times['interrupted builds'] = time.monotonic() - start
 
+            phases = ', '.join('%s %.2fs' % (phase, seconds)
+                               for phase, seconds in phase_times.items())
+            LOG.info('Initialized %(count)d instances on startup, time spent '
+                     'in each phase: %(phases)s',
+                     {'count': len(instances_to_init), 'phases': phases})
         finally:
             if instances:
                 # We only send the instance info to the scheduler on startup
@@ -1701,6 +1735,42 @@ class ComputeManager(manager.Manager):
                 # _sync_scheduler_instance_info periodic task will.
                 self._update_scheduler_instance_info(context, instances)
 
+    def _init_instances(self, context, instances, vm_power_states):
+        """Initialize the given instances during service init.
+
+        Up to the max_concurrent_instance_inits option instances are
+        initialized concurrently, the ones with a pending task first.
+
+        :param instances: The instances to initialize
+        :param vm_power_states: A dict of the power states of the instances on
+            the hypervisor by instance UUID, as returned by _get_power_states
+        """
+        if CONF.max_concurrent_instance_inits == 1:
+            for instance in instances:
+                self._init_instance(context, instance,
+                                    vm_power_states.get(instance.uuid))
+            return
+
+        # The instances an operation was interrupted for are recovered first
+        instances = sorted(instances,
+                           key=lambda instance: instance.task_state is None)
+        pool = eventlet.GreenPool(
+            size=CONF.max_concurrent_instance_inits or max(len(instances), 1))
+        # NOTE: The instances are not locked here, like when they are
+        # initialized one at a time, since recovering an interrupted reboot
+        # or power off takes the lock of the instance itself. The periodic
+        # tasks only start once the service is initialized.
+        threads = [nova.utils.pass_context(pool.spawn, self._init_instance,
+                                           context, instance,
+                                           vm_power_states.get(instance.uuid))
+                   for instance in instances]
+        # Like when the instances are initialized one at a time, an error
+        # initializing an instance is raised, but only once all of them are
+        # done.
+        pool.waitall()
+        for thread in threads:
+            thread.wait()
+
     def _error_out_instances_whose_build_was_interrupted(
             self, context, already_handled_instances, node_uuids):
         """If there are instances in BUILDING state that are not
@@ -1804,6 +1874,28 @@ class ComputeManager(manager.Manager):
         except exception.InstanceNotFound:
             return power_state.NOSTATE
 
+    def _get_power_states(self, instances):
+        """Retrieve the power states of the given instances at once.
+
+        :returns: A dict of the power states by instance UUID, which is empty
+            if the driver cannot retrieve them at once
+        """
+        LOG.debug('Checking the state of %d instances', len(instances))
+        try:
+            infos = self.driver.get_info_many(instances)
+        except NotImplementedError:
+            return {}
+        except Exception:
+            LOG.warning('Failed to retrieve the power states of the '
+                        'instances at once, retrieving them one by one',
+                        exc_info=True)
+            return {}
+        return {
+            instance.uuid: (infos[instance.uuid].state
+                            if instance.uuid in infos
+                            else power_state.NOSTATE)
+            for instance in instances}
+
     def _await_block_device_map_created(self, context, vol_id):
         # TODO(yamahata): creating volume simultaneously
         #                 reduces creation time?
@@ -10957,13 +11049,22 @@ class ComputeManager(manager.Manager):
                         {'num_db_instances': num_db_instances,
                          'num_vm_instances': num_vm_instances})
 
+        if CONF.sync_power_state_max_age:
+            db_instances = self._get_unconfirmed_power_states(db_instances)
+
+        vm_power_states = self._get_power_states(
+            [db_instance for db_instance in db_instances
+             if db_instance.uuid not in self._syncs_in_progress])
+
         def _sync(db_instance):
             # NOTE(melwitt): This must be synchronized as we query state from
             #                two separate sources, the driver and the database.
             #                They are set (in stop_instance) and read, in sync.
             @utils.synchronized(db_instance.uuid)
             def query_driver_power_state_and_sync():
-                self._query_driver_power_state_and_sync(context, db_instance)
+                self._query_driver_power_state_and_sync(
+                    context, db_instance,
+                    vm_power_states.get(db_instance.uuid))
 
             try:
                 query_driver_power_state_and_sync()
@@ -10987,29 +11088,68 @@ class ComputeManager(manager.Manager):
                                         _sync,
                                         db_instance)
 
-    def _query_driver_power_state_and_sync(self, context, db_instance):
+    def _get_unconfirmed_power_states(self, db_instances):
+        """Filter out the instances whose power state does not need to be
+        checked against the hypervisor.
+
+        The power state of an instance is checked again if it was not
+        confirmed within the sync_power_state_max_age option, if a lifecycle
+        event was received for the instance since then or if the power state
+        in the database changed since then.
+
+        :param db_instances: The instances of the host
+        :returns: The list of instances whose power state has to be checked
+        """
+        instance_uuids = set(db_instance.uuid for db_instance in db_instances)
+        for uuid in set(self._confirmed_power_states) - instance_uuids:
+            self._confirmed_power_states.pop(uuid, None)
+
+        now = time.monotonic()
+        unconfirmed = []
+        for db_instance in db_instances:
+            confirmed = self._confirmed_power_states.get(db_instance.uuid)
+            if (confirmed is None or confirmed[0] != db_instance.power_state or
+                    now - confirmed[1] > CONF.sync_power_state_max_age):
+                unconfirmed.append(db_instance)
+
+        LOG.debug('Skipping the power state sync of %(confirmed)d instances '
+                  'whose power state was recently confirmed',
+                  {'confirmed': len(db_instances) - len(unconfirmed)})
+        return unconfirmed
+
+    def _query_driver_power_state_and_sync(self, context, db_instance,
+                                           vm_power_state=None):
         if db_instance.task_state is not None:
             LOG.info("During sync_power_state the instance has a "
                      "pending task (%(task)s). Skip.",
                      {'task': db_instance.task_state}, instance=db_instance)
             return
+        prefetched = vm_power_state is not None
         # No pending tasks. Now try to figure out the real vm_power_state.
-        try:
-            vm_instance = self.driver.get_info(db_instance)
-            vm_power_state = vm_instance.state
-        except exception.InstanceNotFound:
-            vm_power_state = power_state.NOSTATE
+        if not prefetched:
+            try:
+                vm_instance = self.driver.get_info(db_instance)
+                vm_power_state = vm_instance.state
+            except exception.InstanceNotFound:
+                vm_power_state = power_state.NOSTATE
         # Note(maoy): the above get_info call might take a long time,
         # for example, because of a broken libvirt driver.
         try:
             self._sync_instance_power_state(context,
                                             db_instance,
                                             vm_power_state,
-                                            use_slave=True)
+                                            use_slave=True,
+                                            prefetched=prefetched)
         except exception.InstanceNotFound:
             # NOTE(hanlind): If the instance gets deleted during sync,
             # silently ignore.
-            pass
+            return
+
+        if (CONF.sync_power_state_max_age and
+                db_instance.task_state is None and
+                db_instance.power_state == vm_power_state):
+            self._confirmed_power_states[db_instance.uuid] = (
+                vm_power_state, time.monotonic())
 
     def _stop_unexpected_shutdown_instance(self, context, vm_state,
                                            db_instance, orig_db_power_state):
@@ -11050,11 +11190,15 @@ class ComputeManager(manager.Manager):
                               instance=db_instance)
 
     def _sync_instance_power_state(self, context, db_instance, vm_power_state,
-                                   use_slave=False):
+                                   use_slave=False, prefetched=False):
         """Align instance power state between the database and hypervisor.
 
         If the instance is not found on the hypervisor, but is in the database,
         then a stop() API will be called on the instance.
+
+        If prefetched is True, vm_power_state was retrieved before the lock of
+        the instance was acquired, and is queried again from the hypervisor if
+        it does not match the database.
         """
 
         # We re-query the DB to get the latest instance info to minimize
@@ -11090,6 +11234,12 @@ class ComputeManager(manager.Manager):
                      instance=db_instance)
             return
 
+        if prefetched and vm_power_state != db_power_state:
+            try:
+                vm_power_state = self.driver.get_info(db_instance).state
+            except exception.InstanceNotFound:
+                vm_power_state = power_state.NOSTATE
+
         orig_db_power_state = db_power_state
         if vm_power_state != db_power_state:
             LOG.info('During _sync_instance_power_state the DB '
@@ -11280,6 +11430,19 @@ class ComputeManager(manager.Manager):
             LOG.exception("Error updating resources for node %(node)s.",
                           {'node': nodename})
 
+    @periodic_task.periodic_task
+    def _revalidate_provider_associations(self, context):
+        """Refresh the placement client's cache of resource provider
+        inventories, aggregates and traits in the background.
+
+        See [compute]resource_provider_association_background_refresh.
+        """
+        if not CONF.compute.resource_provider_association_background_refresh:
+            return
+        self.reportclient.revalidate_associations(context)
+        LOG.debug('Resource provider association cache stats: %s',
+                  self.reportclient.get_association_stats())
+
     @periodic_task.periodic_task(spacing=CONF.update_resources_interval)
     def update_available_resource(self, context, startup=False):
         """See driver.get_available_resource()
@@ -11350,9 +11513,16 @@ class ComputeManager(manager.Manager):
                             "Failed to delete compute node resource provider "
                             "for compute node %s: %s", cn.uuid, str(e))
 
-        for nodename in nodenames:
-            self._update_available_resource_for_node(context, nodename,
-                                                     startup=startup)
+        if startup or len(nodenames) < 2:
+            batch = contextlib.nullcontext()
+        else:
+            # Flush the resource provider trees of all the nodes to placement
+            # at once, if so configured.
+            batch = self.rt.batch_placement_updates(context)
+        with batch:
+            for nodename in nodenames:
+                self._update_available_resource_for_node(context, nodename,
+                                                         startup=startup)
 
     def _get_compute_nodes_in_db(self, context, nodenames, use_slave=False,
                                  startup=False):
@@ -11,21 +11,30 @@
 #    under the License.
 
 import abc
+import collections
 import copy
 import heapq
+import time
 
 import eventlet
+import futurist
 from oslo_log import log as logging
 
 import nova.conf
 from nova import context
 from nova import exception
 from nova.i18n import _
+from nova import utils
 
 LOG = logging.getLogger(__name__)
 
 CONF = nova.conf.CONF
 
+# Number of records each cell contributed to the last listing of each type of
+# record, keyed by (lister class name, cell uuid). This is used to size the
+# first batch queried from each cell when prefetching.
+_CELL_CONTRIBUTIONS = {}
+
 
 class RecordSortContext(object):
     def __init__(self, sort_keys, sort_dirs):
@@ -113,6 +122,49 @@ def query_wrapper(ctx, fn, *args, **kwargs):
             return
 
 
+def prefetch_wrapper(ctx, fn, *args, **kwargs):
+    """This is a helper to run a batched query ahead of its consumer.
+
+    This is the prefetching counterpart of query_wrapper(). The fn
+    generator is expected to generate lists of RecordWrapper objects, one
+    per query. The first list is queried on the scatter-gather executor
+    right away, and each following one as soon as the previous one has
+    been, while the caller consumes the records of the latter. Timeouts and
+    failures are translated into the usual sentinel objects like
+    query_wrapper() does.
+
+    :returns: A generator of RecordWrapper objects.
+    """
+    batches = fn(ctx, *args, **kwargs)
+    executor = utils.get_scatter_gather_executor()
+    deadline = time.monotonic() + context.CELL_TIMEOUT
+
+    def fetch():
+        return executor.submit(
+            utils.pass_context_wrapper(next), batches, None)
+
+    def consume(future):
+        while True:
+            try:
+                batch = future.result(
+                    timeout=max(0, deadline - time.monotonic()))
+            except futurist.TimeoutError:
+                future.cancel()
+                yield RecordWrapper(ctx, None,
+                                    context.did_not_respond_sentinel)
+                return
+            except Exception as e:
+                yield RecordWrapper(ctx, None, e.__class__(e.args))
+                return
+            if batch is None:
+                return
+            future = fetch()
+            for record in batch:
+                yield record
+
+    return consume(fetch())
+
+
 class CrossCellLister(metaclass=abc.ABCMeta):
     """An implementation of a cross-cell efficient lister.
 
@@ -259,14 +311,13 @@ class CrossCellLister(metaclass=abc.ABCMeta):
             global_marker_values = [global_marker_record[key]
                                     for key in self.sort_ctx.sort_keys]
 
-        def do_query(cctx):
-            """Generate RecordWrapper(record) objects from a cell.
+        def find_local_marker(cctx):
+            """Find the local marker of a cell.
 
-            We do this inside the thread (created by
-            scatter_gather_all_cells()) so that we return wrappers and
-            avoid having to iterate the combined result list in the
-            caller again. This is run against each cell by the
-            scatter_gather routine.
+            :returns: A tuple of the local marker identifier, or None, and
+                      a list of the records to generate before querying from
+                      that marker; or None if there is nothing to query from
+                      this cell.
             """
 
             # The local marker is an identifier of a record in a cell
@@ -321,7 +372,23 @@ class CrossCellLister(metaclass=abc.ABCMeta):
                     # nothing. If we didn't have this clause, we'd
                     # pass marker=None to the query below and return a
                     # full unpaginated set for our cell.
-                    return
+                    return None
+
+            return local_marker, local_marker_prefix
+
+        def do_query(cctx):
+            """Generate RecordWrapper(record) objects from a cell.
+
+            We do this inside the thread (created by
+            scatter_gather_all_cells()) so that we return wrappers and
+            avoid having to iterate the combined result list in the
+            caller again. This is run against each cell by the
+            scatter_gather routine.
+            """
+            found = find_local_marker(cctx)
+            if found is None:
+                return
+            local_marker, local_marker_prefix = found
 
             if local_marker_prefix:
                 # Per above, if we had a matching marker object, that is
@@ -377,6 +444,60 @@ class CrossCellLister(metaclass=abc.ABCMeta):
                            'total': return_count,
                            'limit': limit or 'no'})
 
+        def query_batches(cctx):
+            """Generate lists of RecordWrapper(record) objects from a cell,
+            one per query.
+
+            This is the batched counterpart of do_query() for
+            prefetch_wrapper(). If a batch size was provided, the first batch
+            is sized after what the cell contributed to the last listing,
+            and each following batch is twice as large as the previous one,
+            since the cell keeps contributing records.
+            """
+            found = find_local_marker(cctx)
+            if found is None:
+                return
+            local_marker, local_marker_prefix = found
+
+            if local_marker_prefix:
+                yield [RecordWrapper(cctx, self.sort_ctx,
+                                     local_marker_prefix[0])]
+
+            batch_size = self.batch_size or limit
+            if self.batch_size:
+                contributed = _CELL_CONTRIBUTIONS.get(
+                    (self.__class__.__name__, cctx.cell_uuid), 0)
+                batch_size = max(batch_size, int(contributed * 1.10))
+
+            return_count = 0
+            while limit is None or return_count < limit:
+                if limit:
+                    query_size = min(batch_size, limit - return_count)
+                else:
+                    query_size = batch_size
+
+                query_result = self.get_by_filters(
+                    cctx, filters,
+                    limit=query_size or None, marker=local_marker,
+                    **kwargs)
+                batch = [RecordWrapper(cctx, self.sort_ctx, item)
+                         for item in query_result]
+                if not batch:
+                    break
+
+                local_marker = batch[-1]._db_record[self.marker_identifier]
+                return_count += len(batch)
+                LOG.debug(('Listed batch of %(batch)i results from cell '
+                           'out of %(limit)s limit. Returned %(total)i '
+                           'total so far.'),
+                          {'batch': len(batch),
+                           'total': return_count,
+                           'limit': limit or 'no'})
+                yield batch
+
+                if self.batch_size:
+                    batch_size *= 2
+
         # NOTE(danms): The calls to do_query() will return immediately
         # with a generator. There is no point in us checking the
         # results for failure or timeout since we have not actually
@@ -384,13 +505,21 @@ class CrossCellLister(metaclass=abc.ABCMeta):
         # below. The query_wrapper() utility handles inline
         # translation of failures and timeouts to sentinels which will
         # be generated and consumed just like any normal result below.
+        # When prefetching, prefetch_wrapper() rather starts querying each
+        # cell right away, and queries the next batch of each cell while the
+        # current one is being consumed, so that a slow cell does not hold up
+        # the others.
+        prefetch = CONF.api.list_records_by_prefetching_cells
+        if prefetch:
+            wrapper, query = prefetch_wrapper, query_batches
+        else:
+            wrapper, query = query_wrapper, do_query
         if self.cells:
             results = context.scatter_gather_cells(ctx, self.cells,
                                                    context.CELL_TIMEOUT,
-                                                   query_wrapper, do_query)
+                                                   wrapper, query)
         else:
-            results = context.scatter_gather_all_cells(ctx,
-                                                       query_wrapper, do_query)
+            results = context.scatter_gather_all_cells(ctx, wrapper, query)
 
         # If a limit was provided, it was passed to the per-cell query
         # routines.  That means we have NUM_CELLS * limit items across
@@ -404,6 +533,25 @@ class CrossCellLister(metaclass=abc.ABCMeta):
         # instance instead of the wrapper. This is basically free
         # as it works as our caller iterates the results.
         feeder = heapq.merge(*results.values())
+        contributions = collections.Counter()
+        try:
+            yield from self._feed_records(feeder, total_limit,
+                                          cell_down_support, contributions)
+        finally:
+            if prefetch:
+                for cell_uuid in results:
+                    _CELL_CONTRIBUTIONS[
+                        (self.__class__.__name__, cell_uuid)] = (
+                            contributions[cell_uuid])
+
+    def _feed_records(self, feeder, total_limit, cell_down_support,
+                      contributions):
+        """Generate the records from the merged results of all cells.
+
+        This handles the failure sentinels and enforces the total limit, and
+        counts the number of records generated from each cell in the
+        contributions Counter.
+        """
         while True:
             try:
                 item = next(feeder)
@@ -440,6 +588,7 @@ class CrossCellLister(metaclass=abc.ABCMeta):
 
             yield item._db_record
             self._cells_responded.add(item.cell_uuid)
+            contributions[item.cell_uuid] += 1
             total_limit -= 1
             if total_limit == 0:
                 # We'll only hit this if limit was nonzero and we just
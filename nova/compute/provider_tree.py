@@ -422,6 +422,45 @@ class ProviderTree(object):
             self.roots_by_name[name] = p
             return p.uuid
 
+    def copy_tree(self, name_or_uuid):
+        """Returns a new ProviderTree containing a deep copy of the whole tree
+        of which the provider identified by ``name_or_uuid`` is a member, and
+        nothing else.
+
+        :raises: ValueError if a provider with name_or_uuid was not found in
+                 the tree.
+        :param name_or_uuid: Provider name or UUID representing any member of
+                             the whole tree to copy.
+        """
+        with self.lock:
+            root = copy.deepcopy(
+                self._find_with_lock(name_or_uuid, return_root=True))
+        ret = ProviderTree()
+        ret.roots_by_uuid[root.uuid] = root
+        ret.roots_by_name[root.name] = root
+        return ret
+
+    def add_trees(self, other):
+        """Adds all the trees of another ProviderTree to this one, replacing
+        any tree of this one having the same root provider.
+
+        Note that the providers are not copied; the two ProviderTree objects
+        share them afterwards.
+
+        :param other: The ProviderTree whose trees are to be added.
+        """
+        # NOTE: All ProviderTree objects share the same lock, so we cannot
+        # hold it for both trees at once.
+        with other.lock:
+            roots = list(other.roots)
+        with self.lock:
+            for root in roots:
+                old = self.roots_by_uuid.pop(root.uuid, None)
+                if old is not None:
+                    del self.roots_by_name[old.name]
+                self.roots_by_uuid[root.uuid] = root
+                self.roots_by_name[root.name] = root
+
     def _find_with_lock(self, name_or_uuid, return_root=False):
         # Optimization for large number of roots (e.g. ironic): if name_or_uuid
         # represents a root, this is O(1).
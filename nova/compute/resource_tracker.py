@@ -19,6 +19,7 @@ scheduler with useful information about availability through the ComputeNode
 model.
 """
 import collections
+import contextlib
 import copy
 
 from keystoneauth1 import exceptions as ks_exc
@@ -32,6 +33,7 @@ from nova.compute import claims
 from nova.compute import monitors
 from nova.compute import pci_placement_translator
 from nova.compute import provider_config
+from nova.compute import provider_tree as provider_tree_obj
 from nova.compute import stats as compute_stats
 from nova.compute import task_states
 from nova.compute import utils as compute_utils
@@ -111,6 +113,10 @@ class ResourceTracker(object):
         self.cpu_allocation_ratio = CONF.cpu_allocation_ratio
         self.disk_allocation_ratio = CONF.disk_allocation_ratio
         self.provider_tree = None
+        # Dict of (nodename, ProviderTree) tuples waiting to be flushed to
+        # placement, keyed by compute node uuid, while batching placement
+        # updates; None otherwise. See batch_placement_updates().
+        self._batched_provider_trees = None
         # Dict of assigned_resources, keyed by resource provider uuid
         # the value is a dict again, keyed by resource class
         # and value of this sub-dict is a set of Resource obj
@@ -1303,16 +1309,28 @@ class ResourceTracker(object):
         # ensure the update request to placement only happens when inventory
         # is changed.
         nodename = compute_node.hypervisor_hostname
-        # Persist the stats to the Scheduler
-        # Retrieve the provider tree associated with this compute node.  If
-        # it doesn't exist yet, this will create it with a (single, root)
-        # provider corresponding to the compute node.
-        prov_tree = self.reportclient.get_provider_tree_and_ensure_root(
-            context, compute_node.uuid, name=compute_node.hypervisor_hostname)
+        batched = self._batched_provider_trees is not None and not startup
+        if batched:
+            # Only retrieve the tree of this compute node, as the trees of
+            # all the nodes are flushed together in
+            # _flush_batched_provider_trees. The allocations are only needed
+            # to reshape, which does not happen on periodic, and to track PCI
+            # devices in placement, which is not batched.
+            prov_tree = self.reportclient.get_provider_subtree_and_ensure_root(
+                context, compute_node.uuid, name=nodename)
+            allocs = {}
+        else:
+            # Persist the stats to the Scheduler
+            # Retrieve the provider tree associated with this compute node.
+            # If it doesn't exist yet, this will create it with a (single,
+            # root) provider corresponding to the compute node.
+            prov_tree = self.reportclient.get_provider_tree_and_ensure_root(
+                context, compute_node.uuid,
+                name=compute_node.hypervisor_hostname)
+            allocs = self.reportclient.get_allocations_for_provider_tree(
+                context, nodename)
         # Let the virt driver rearrange the provider tree and set/update
         # the inventory, traits, and aggregates throughout.
-        allocs = self.reportclient.get_allocations_for_provider_tree(
-            context, nodename)
         driver_reshaped = False
         try:
             self.driver.update_provider_tree(prov_tree, nodename)
@@ -1377,11 +1395,26 @@ class ResourceTracker(object):
             instances_under_same_host_resize,
         )
 
-        self.provider_tree = prov_tree
+        if batched:
+            # Keep the trees of the other nodes around, as they will not be
+            # in prov_tree.
+            if self.provider_tree is None:
+                self.provider_tree = provider_tree_obj.ProviderTree()
+            self.provider_tree.add_trees(prov_tree)
+        else:
+            self.provider_tree = prov_tree
 
         # This merges in changes from the provider config files loaded in init
         self._merge_provider_configs(self.provider_configs, prov_tree)
 
+        if batched:
+            self._batched_provider_trees[compute_node.uuid] = (
+                nodename, prov_tree)
+            return
+        if self._batched_provider_trees:
+            # We are flushing a fresher tree for this node right now.
+            self._batched_provider_trees.pop(compute_node.uuid, None)
+
         try:
             # Flush any changes. If we either processed ReshapeNeeded above or
             # update_provider_tree_for_pci did reshape, then we need to pass
@@ -1399,6 +1432,65 @@ class ResourceTracker(object):
             # compute service to start
             raise exception.PlacementPciException(error=str(e))
 
+    @contextlib.contextmanager
+    def batch_placement_updates(self, context):
+        """Batch the placement updates of update_available_resource().
+
+        Within this context, update_available_resource() does not flush the
+        provider tree of each node to placement; instead, the trees of all the
+        nodes are flushed together in a single pass when the context exits
+        without error. This is a no-op unless
+        [placement]batch_provider_tree_sync is enabled, and PCI devices are
+        not tracked in placement.
+
+        :param context: security context
+        """
+        if (not CONF.placement.batch_provider_tree_sync or
+                CONF.pci.report_in_placement or
+                self._batched_provider_trees is not None):
+            yield
+            return
+
+        self._batched_provider_trees = {}
+        try:
+            yield
+            self._flush_batched_provider_trees(context)
+        finally:
+            self._batched_provider_trees = None
+
+    @utils.synchronized(COMPUTE_RESOURCE_SEMAPHORE, fair=True)
+    def _flush_batched_provider_trees(self, context):
+        """Flush the provider trees collected by batch_placement_updates()."""
+        batch = self._batched_provider_trees
+        # Stop batching, so that any update done from here on is flushed
+        # right away.
+        self._batched_provider_trees = None
+        if not batch:
+            return
+
+        errors = self.reportclient.update_from_provider_trees(
+            context, [prov_tree for _nodename, prov_tree in batch.values()])
+        for rp_uuid, error in errors.items():
+            nodename = batch[rp_uuid][0]
+            if nodename not in self.compute_nodes:
+                # The node has been removed meanwhile.
+                continue
+            if isinstance(error, exception.ResourceProviderUpdateConflict):
+                # The cache of this tree has been invalidated, so redrive the
+                # update of this node from a fresh view of placement, with
+                # retries.
+                LOG.info("Conflict updating placement for node %(node)s, "
+                         "retrying.", {'node': nodename})
+                try:
+                    self._update_to_placement(
+                        context, self.compute_nodes[nodename], False)
+                except Exception:
+                    LOG.exception("Error updating placement for node "
+                                  "%(node)s.", {'node': nodename})
+                continue
+            LOG.error("Error updating placement for node %(node)s: "
+                      "%(error)s", {'node': nodename, 'error': error})
+
     def _update(self, context, compute_node, startup=False):
         """Update partial stats locally and populate them to Scheduler."""
 
@@ -356,6 +356,83 @@ partial for certain requests containing those records. In those cases this
 option will be ignored. See "Handling Down Cells" section of the Compute API
 guide (https://docs.openstack.org/api-guide/compute/down_cells.html) for
 more information.
+"""),
+    cfg.BoolOpt("list_records_by_prefetching_cells",
+        default=False,
+        help="""
+When set to True, listing records like instances across cells queries all the
+cell databases concurrently from the start, and queries the next batch of
+records from each cell in the background while the current one is being
+processed, so that a slow cell does not hold up the others.
+
+Additionally, the first batch queried from each cell is sized after the
+number of records the cell contributed to the last listing, and each
+following batch queried from a cell is twice as large as the previous one,
+which reduces the number of queries to the cells holding most of the records.
+
+Related options:
+
+* instance_list_cells_batch_strategy
+* cell_worker_thread_pool_size
+"""),
+    cfg.BoolOpt("instance_list_keyset_pagination",
+        default=False,
+        help="""
+When set to True, paging through instances sorted in a single direction by
+``created_at``, ``updated_at``, ``display_name``, ``id`` or ``uuid`` resumes
+after the marker instance with a single row value comparison on the sort keys,
+rather than with a compound condition per sort key. Sort keys following the
+first unique one are also dropped, since they cannot change the order. This
+allows the database to serve deep pages from the composite instance indexes
+instead of scanning the instances table.
+
+Listings using other sort keys, mixed sort directions, or a marker instance
+with a null value for one of the sort keys are paginated as before.
+"""),
+    cfg.IntOpt("server_view_cache_size",
+        default=0,
+        min=0,
+        help="""
+Number of instances whose rendered views are cached by each API worker when
+listing servers in detail.
+
+The fields of a server which only depend on its instance record, such as its
+flavor, image, status and timestamps, are cached along with the values of the
+instance fields, the microversion and the policy checks they were rendered
+with, and reused by later listings as long as those values are unchanged.
+The fields which depend on other records, such as the addresses, metadata,
+volume attachments, tags, security groups and host status, are rendered for
+every request. This mostly benefits deployments where dashboards poll the
+detailed server list. ``0`` disables the cache.
+
+Related options:
+
+* server_view_cache_use_memcached
+"""),
+    cfg.BoolOpt("server_view_cache_use_memcached",
+        default=False,
+        help="""
+When set to True, the rendered server views cached by each API worker are also
+stored in memcached, so that they are shared by all the API workers.
+
+This requires ``[cache] enabled`` and ``[cache] memcache_servers`` to be set,
+and has no effect unless ``server_view_cache_size`` is greater than 0.
+
+Related options:
+
+* server_view_cache_size
+"""),
+    cfg.BoolOpt("fast_path_routing",
+        default=False,
+        help="""
+When set to True, the requests to the most used paths of the compute API,
+which are ``/servers``, ``/servers/detail``, ``/servers/{id}`` and
+``/os-hypervisors`` with or without a project ID prefix, are routed by looking
+their path up in a table built when the API starts, instead of matching it
+against the regular expressions of the routes of the API one after the other.
+
+The other requests are routed as before. The time spent routing each request
+is logged at debug level.
 """),
 ]
 
@@ -424,6 +501,20 @@ expected to change to ``error`` in a future release.
 
 If you find it necessary to enable the ``ignore`` option, please report the
 issues you are seeing to the Nova team so we can improve our schemas.
+""",
+    ),
+    cfg.BoolOpt(
+        "compile_schema_validators",
+        default=False,
+        help="""\
+Create the validators of all the API request and response schemas when the API
+starts.
+
+The validator of each schema is created once and reused by all the requests
+validated against it. By default, it is created by the first request using the
+schema. Enabling this option creates them all when the API starts instead,
+which makes the API slower to start but keeps the first requests of each kind
+from paying for it.
 """,
     ),
 ]
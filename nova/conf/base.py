@@ -76,6 +76,24 @@ greenthread pool concurrently, defaults to 1000, min value is 100.
 The number of tasks that can run concurrently, one for each cell, for
 operations requires cross cell data gathering a.k.a scatter-gather, like
 listing instances across multiple cells.
+'''),
+    cfg.StrOpt(
+        'json_serializer',
+        default='stdlib',
+        choices=[
+            ('stdlib', 'Use the json module of the Python standard library'),
+            ('orjson', 'Use the orjson library, falling back to the standard '
+                       'library if it is not installed'),
+        ],
+        help='''
+The JSON encoder used to serialize the API responses.
+
+The ``orjson`` encoder is several times faster than the standard library one,
+which matters when listing many servers. The
+types it does not handle natively, like datetimes, IP addresses and versioned
+objects, are converted like with the standard library encoder. Unlike the
+standard library encoder, it does not escape non-ASCII characters and does not
+add spaces after separators, which is equivalent JSON.
 '''),
 ]
 
@@ -682,6 +682,28 @@ Possible Values:
 
 * 0 : treated as unlimited.
 * Any positive integer representing maximum concurrent snapshots.
+"""),
+    cfg.IntOpt('max_concurrent_instance_inits',
+        default=1,
+        min=0,
+        help="""
+Maximum number of instances to initialize concurrently when nova-compute
+starts.
+
+On startup, nova-compute checks each instance of the host and recovers the
+ones an operation was interrupted for, plugs their VIFs and resumes them if
+needed, before it reports itself as up. By default this is done for one
+instance at a time, which takes a long time on hosts running many instances.
+When this is greater than 1, the instances are initialized concurrently, with
+the instances which have a pending task being initialized first. The time
+spent in each phase of the startup is logged.
+
+Possible Values:
+
+* 0 : treated as unlimited.
+* 1 : the instances are initialized one at a time (default).
+* Any other positive integer representing the maximum number of instances
+  initialized concurrently.
 """),
     cfg.IntOpt('max_concurrent_live_migrations',
         default=1,
@@ -818,6 +840,46 @@ process, causing it to be repopulated the next time the data is accessed.
 Possible values:
 
 * Any positive integer in seconds, or zero to disable refresh.
+"""),
+    cfg.BoolOpt('resource_provider_association_background_refresh',
+        default=False,
+        help="""
+Refresh the cached resource provider inventories, aggregates and traits in the
+background rather than when they are used.
+
+By default, the inventories, aggregates and traits of a resource provider are
+fetched again from placement the first time they are used after
+``[compute] resource_provider_association_refresh`` seconds, which makes
+compute services loaded at the same time, or managing many nodes, refresh them
+all at once. When enabled, the cache of a provider is only refreshed when it
+is used if it was invalidated, for instance by a resource provider generation
+conflict or by a change made with a generation not matching the cached one.
+Otherwise, it is revalidated by a periodic task, between 1 and 1.5 times
+``[compute] resource_provider_association_refresh`` seconds after its last
+refresh, and at most
+``[compute] resource_provider_association_refresh_batch_size`` providers at a
+time. A successful update of a provider also revalidates its cache.
+
+Related options:
+
+* ``[compute] resource_provider_association_refresh``
+* ``[compute] resource_provider_association_refresh_batch_size``
+"""),
+    cfg.IntOpt('resource_provider_association_refresh_batch_size',
+        default=50,
+        min=1,
+        help="""
+Maximum number of resource providers whose cached inventories, aggregates and
+traits are revalidated by each run of the periodic task when
+``[compute] resource_provider_association_background_refresh`` is enabled.
+
+Possible values:
+
+* Any positive integer.
+
+Related options:
+
+* ``[compute] resource_provider_association_background_refresh``
 """),
    cfg.StrOpt('cpu_shared_set',
         help="""
@@ -1083,6 +1145,35 @@ Related options:
   false and this option is negative, then instances that get out
   of sync between the hypervisor and the Nova database will have
   to be synchronized manually.
+* ``sync_power_state_max_age``
+"""),
+    cfg.IntOpt('sync_power_state_max_age',
+        default=0,
+        min=0,
+        help="""
+Maximum age of the last confirmed power state of an instance before it is
+checked again against the hypervisor.
+
+By default, the ``_sync_power_states`` periodic task queries the hypervisor
+for the power state of every instance of the host each time it runs. When
+this is set, the task only checks the instances whose power state was not
+confirmed within that many seconds, the instances for which the compute
+driver emitted a lifecycle event since the last check, and the instances
+whose power state in the database differs from the last one seen on the
+hypervisor. This reduces the number of hypervisor and database calls made by
+the task on hosts running many instances.
+
+Possible values:
+
+* 0: Check the power state of every instance each time the task runs.
+* Any positive integer in seconds.
+
+Related options:
+
+* ``sync_power_state_interval``: This should be larger than it.
+* ``handle_virt_lifecycle_events`` in the ``workarounds`` group: If it is
+  false, the changes of power state outside of the compute service are only
+  noticed once the last confirmed power state is older than this.
 """),
     cfg.IntOpt('heal_instance_info_cache_interval',
         default=-1,
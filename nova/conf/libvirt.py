@@ -939,6 +939,51 @@ Related options:
 * ``my_ip``
 * ``live_migration_inbound_addr``
 
+"""),
+    cfg.BoolOpt('bulk_domain_stats',
+                default=False,
+                help="""
+Get the statistics of all the running guests with a single libvirt call when
+updating the resources of the host.
+
+By default, the periodic update of the available resources queries the vCPUs
+and memory of each guest separately, and reads the size of each local disk of
+each guest with ``qemu-img info``, which takes tens of seconds on hosts running
+hundreds of guests. When this is enabled, the vCPUs, the memory and the
+capacity of the disks of all the running guests are gathered in one call
+instead, and the size allocated to the disks is read from their files without
+running ``qemu-img info``. The guests which are not running are still handled
+one by one.
+
+Related options:
+
+* ``virt_type`` must be set to ``kvm`` or ``qemu``, this has no effect
+  otherwise.
+* ``domain_config_cache``, so that the disks of a guest are only read from its
+  definition again after libvirt reported an event about it.
+"""),
+    cfg.BoolOpt('domain_config_cache',
+                default=False,
+                help="""
+Reuse the parsed definitions of the guests in the periodic update of the
+available resources until libvirt reports an event about them.
+
+By default, the periodic update of the available resources fetches and parses
+the XML definition of every guest to find its disks, which adds up on hosts
+running hundreds of guests. When this is enabled, the parsed definition of a
+guest is kept until libvirt reports a lifecycle event or the addition or
+removal of a device for it, and is reused by the next updates in the
+meantime. The operations on the guests, like attaching or detaching a device,
+still read the definition from libvirt every time.
+
+The number of definitions fetched from libvirt, the time spent parsing them
+and the number of times a parsed definition was reused are logged at the
+debug level by the periodic update of the available resources.
+
+Related options:
+
+* ``bulk_domain_stats``, the over committed size of the disks of the running
+  guests is then computed from the reused definitions.
 """),
 ]
 
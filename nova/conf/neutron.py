@@ -107,6 +107,39 @@ to 3 means total attempts to connect will be 4.
 Possible values:
 
 * Any integer value. 0 means connection is attempted only once
+"""),
+    cfg.IntOpt('security_group_lookup_workers',
+        default=1,
+        min=1,
+        help="""
+Number of concurrent Neutron port queries used to find the security groups
+of the servers when listing servers in detail.
+
+The ports of the listed servers are queried in chunks of at most 150 device
+IDs. When this is greater than 1, up to that many chunks are queried at once
+and only the fields of the ports needed to find their security groups are
+requested, which greatly reduces the time spent listing thousands of servers.
+
+Related options:
+
+* security_group_name_cache_ttl
+"""),
+    cfg.IntOpt('security_group_name_cache_ttl',
+        default=0,
+        min=0,
+        help="""
+Number of seconds the names of security groups are cached for by the API
+when listing servers.
+
+The names are cached per project and set of roles, since these decide which
+security groups Neutron shows, and are reused by later server listings instead
+of querying Neutron for them again. A security group renamed or deleted
+outside of the compute API can therefore be shown with its previous name for
+up to that many seconds. ``0`` disables the cache.
+
+Related options:
+
+* security_group_lookup_workers
 """),
 ]
 
@@ -24,15 +24,88 @@ placement_group = cfg.OptGroup(
     title='Placement Service Options',
     help="Configuration options for connecting to the placement API service")
 
+placement_opts = [
+    cfg.IntOpt('connection_pool_size',
+        default=0,
+        min=0,
+        help="""
+Number of persistent HTTP connections kept open to the placement API.
+
+When set to a value greater than 0, the placement client uses a dedicated
+connection pool of this size, with TCP keep-alive enabled, instead of the
+default pool of the HTTP library, which keeps at most 10 connections open.
+Connections above the pool size are closed after use, so this should be at
+least ``[placement] max_concurrent_requests``.
+
+Possible values:
+
+* 0: Use the default connection pool. This is the default.
+* Any positive integer: The number of connections kept open.
+
+Related options:
+
+* ``[placement] max_concurrent_requests``
+"""),
+    cfg.IntOpt('max_concurrent_requests',
+        default=1,
+        min=1,
+        help="""
+Maximum number of placement API requests issued concurrently.
+
+When refreshing the inventories, aggregates and traits of resource providers,
+for example when a compute service starts or periodically updates its
+resources, the placement client fetches them for several providers at once,
+with up to this many requests in flight. This mainly benefits compute
+services managing many nodes, like the ironic driver. The requests are run on
+the scatter-gather executor, which is sized by ``[DEFAULT]
+cell_worker_thread_pool_size`` in native threading mode.
+
+Possible values:
+
+* 1: Issue the requests sequentially. This is the default.
+* Any integer greater than 1: The maximum number of concurrent requests.
+
+Related options:
+
+* ``[placement] connection_pool_size``
+* ``[DEFAULT] cell_worker_thread_pool_size``
+"""),
+    cfg.BoolOpt('batch_provider_tree_sync',
+        default=False,
+        help="""
+Synchronize the resource providers of all the nodes of a compute service with
+placement in a single batch.
+
+By default, the periodic ``update_available_resource`` task of a compute
+service managing several nodes, like the ironic driver, compares the resource
+provider tree of each node with placement and flushes its changes one node
+after the other, and the cost of each comparison grows with the number of
+nodes. When enabled, the task only collects the provider tree of each node,
+then compares all of them with the cached view of placement in a single pass
+and flushes the trees that changed, ``[placement] max_concurrent_requests`` at
+a time.
+
+This is not used when the compute service starts, where resource provider data
+migrations may be needed, nor when ``[pci] report_in_placement`` is enabled.
+
+Related options:
+
+* ``[placement] max_concurrent_requests``
+* ``[pci] report_in_placement``
+"""),
+]
+
 
 def register_opts(conf):
     conf.register_group(placement_group)
+    conf.register_opts(placement_opts, group=placement_group)
     confutils.register_ksa_opts(conf, placement_group, DEFAULT_SERVICE_TYPE)
 
 
 def list_opts():
     return {
         placement_group.name: (
+            placement_opts +
             ks_loading.get_session_conf_options() +
             ks_loading.get_auth_common_conf_options() +
             ks_loading.get_auth_plugin_conf_options('password') +
@@ -770,6 +770,120 @@ are typically many baremetal nodes with identical weights returned to the
 scheduler.  In such case enabling this option will reduce contention and
 chances for rescheduling events.  At the same time it will make the instance
 packing (even in unweighed case) less dense.
+"""),
+    cfg.BoolOpt(
+        "columnar_weighing",
+        default=False,
+        help="""
+Enable the columnar (vectorized) weighing engine.
+
+When enabled, the host attributes used by the weighers are gathered once per
+scheduling request into NumPy arrays, and clamping, normalization, multiplier
+application and the final sort are done as array operations. Weighers that
+only implement per-host weighing are still supported and are evaluated through
+a compatible fallback path. The resulting host order is the same as with the
+default engine.
+
+This is mainly beneficial for deployments where a single request has many
+thousands of candidate hosts, for example Ironic deployments. It requires the
+``numpy`` library to be installed on the host running the scheduler; if it is
+not available the default engine is used and a warning is logged.
+
+Related options:
+
+* ``[filter_scheduler] weight_classes``
+"""),
+    cfg.BoolOpt(
+        "host_state_cache",
+        default=False,
+        help="""
+Enable the incremental host state cache.
+
+By default the scheduler builds the state of every candidate compute node
+from scratch for each scheduling request, deserializing its NUMA topology, PCI
+device pools, metrics and stats every time. When this option is enabled, the
+scheduler keeps the host states between requests, keyed by compute node UUID,
+and only refreshes the parts that changed since the previous request: the
+compute node when its ``updated_at`` timestamp changed, the service when its
+record changed and the aggregates when an aggregate update was received. Each
+request still works on its own copy of the host states, so resources consumed
+by a request are not visible to other requests.
+
+The cache is cleared when the scheduler receives a ``SIGHUP`` signal.
+"""),
+    cfg.BoolOpt(
+        "compute_node_projection",
+        default=False,
+        help="""
+Only load the compute node fields needed by the enabled filters and weighers.
+
+Compute nodes carry potentially large JSON fields, like their NUMA topology,
+PCI device pools, metrics and stats, which are fetched from the database and
+deserialized for every allocation candidate. When this option is enabled, the
+scheduler only fetches and deserializes the fields read by the enabled
+filters and weighers, as declared by their ``HOST_STATE_ATTRS`` attribute. The
+other fields are loaded on first access, for example when resources are
+consumed on the selected host.
+
+Filters and weighers which do not declare the attributes they read, which is
+the case of most out-of-tree ones, cause all the fields to be loaded.
+
+Related options:
+
+* ``[filter_scheduler] enabled_filters``
+* ``[filter_scheduler] weight_classes``
+"""),
+    cfg.IntOpt(
+        "filter_partitions",
+        default=1,
+        min=1,
+        help="""
+Number of partitions the candidate hosts are split in for filtering.
+
+When set to a value greater than 1 and the scheduler runs in native threading
+mode, the list of candidate hosts is split in up to this many partitions and
+the enabled filters are run on each partition concurrently using the
+scatter-gather executor. The per-filter host counts are still logged for the
+whole list of hosts. Partitions smaller than 50 hosts are not created, so
+small deployments keep filtering sequentially. This option has no effect when
+the scheduler runs with eventlet.
+
+The executor is shared with the cell database queries and is sized by
+``[DEFAULT] cell_worker_thread_pool_size``, which should be at least as large
+as this value.
+
+Related options:
+
+* ``[filter_scheduler] enabled_filters``
+* ``[DEFAULT] cell_worker_thread_pool_size``
+"""),
+    cfg.IntOpt(
+        "numa_fit_cache_size",
+        default=0,
+        min=0,
+        help="""
+Maximum number of NUMA fitting results cached by the scheduler.
+
+Fitting the NUMA topology of an instance on a host is done by the
+``NUMATopologyFilter`` for every candidate host and again when the selected
+host is consumed. In deployments where many hosts share the same NUMA
+topology and usage, the result of the fitting is the same for all of them.
+When this option is greater than 0, the results are cached, keyed by the host
+NUMA topology and usage, the requested instance NUMA topology, the allocation
+ratios, the network affinity requirements and the number of free PCI devices
+per NUMA node. The least recently used results are evicted when the cache is
+full. Requests for PCI devices on hosts with PCI devices are always fitted
+without the cache. The cache hit and miss counts of each request are logged
+at debug level.
+
+Possible values:
+
+* 0: Disable the cache. This is the default.
+* Any positive integer: The maximum number of cached results.
+
+Related options:
+
+* ``[filter_scheduler] enabled_filters``
 """),
     cfg.StrOpt(
         "image_properties_default_architecture",
@@ -22,6 +22,8 @@ import copy
 import datetime
 import functools
 import inspect
+import threading
+import time
 import traceback
 
 from oslo_db import api as oslo_db_api
@@ -53,6 +55,7 @@ from nova.db.utils import require_context
 from nova import exception
 from nova.i18n import _
 from nova import safe_utils
+from nova import utils
 
 profiler_sqlalchemy = importutils.try_import('osprofiler.sqlalchemy')
 
@@ -1435,6 +1438,11 @@ def _build_instance_get(context, columns_to_join=None):
     ).options(orm.joinedload(models.Instance.info_cache))
     if columns_to_join is None:
         columns_to_join = ['metadata', 'system_metadata']
+    # NOTE: Specific system_metadata items are only loaded on their own when
+    # listing instances, a single instance gets all of them.
+    columns_to_join = [
+        'system_metadata' if column.startswith('system_metadata.') else column
+        for column in columns_to_join]
     for column in columns_to_join:
         if column in ['info_cache', 'security_groups']:
             # Already always joined above
@@ -1474,26 +1482,41 @@ def _instances_fill_metadata(context, instances, manual_joins=None):
     """Selectively fill instances with manually-joined metadata. Note that
     instance will be converted to a dict.
 
+    The metadata and system_metadata of the instances are filled in as dicts
+    of their keys and values, rather than as lists of rows, like
+    utils.instance_meta() and utils.instance_sys_meta() would return them.
+
     :param context: security context
     :param instances: list of instances to fill
     :param manual_joins: list of tables to manually join (can be any
                          combination of 'metadata' and 'system_metadata' or
-                         None to take the default of both)
+                         None to take the default of both). Rather than
+                         'system_metadata', specific system_metadata items
+                         can be joined with 'system_metadata.<key>' entries.
     """
     uuids = [inst['uuid'] for inst in instances]
 
     if manual_joins is None:
         manual_joins = ['metadata', 'system_metadata']
 
-    meta = collections.defaultdict(list)
+    meta = collections.defaultdict(dict)
     if 'metadata' in manual_joins:
-        for row in _instance_metadata_get_multi(context, uuids):
-            meta[row['instance_uuid']].append(row)
-
-    sys_meta = collections.defaultdict(list)
-    if 'system_metadata' in manual_joins:
-        for row in _instance_system_metadata_get_multi(context, uuids):
-            sys_meta[row['instance_uuid']].append(row)
+        for instance_uuid, key, value, deleted in (
+                _instance_metadata_get_multi(context, uuids)):
+            if not deleted:
+                meta[instance_uuid][key] = value
+
+    sys_meta_keys = None
+    if 'system_metadata' not in manual_joins:
+        sys_meta_keys = [column.partition('.')[2] for column in manual_joins
+                         if column.startswith('system_metadata.')]
+
+    sys_meta = collections.defaultdict(dict)
+    if sys_meta_keys is None or sys_meta_keys:
+        for instance_uuid, key, value in (
+                _instance_system_metadata_get_multi(
+                    context, uuids, keys=sys_meta_keys)):
+            sys_meta[instance_uuid][key] = value
 
     pcidevs = collections.defaultdict(list)
     if 'pci_devices' in manual_joins:
@@ -1538,6 +1561,7 @@ def _manual_join_columns(columns_to_join):
     If columns_to_join contains 'metadata', 'system_metadata', 'fault', or
     'pci_devices' those columns are removed from columns_to_join and added
     to a manual_joins list to be used with the _instances_fill_metadata method.
+    So are 'system_metadata.<key>' entries for specific system_metadata items.
 
     The columns_to_join formal parameter is copied and not modified, the return
     tuple has the modified columns_to_join list to be used with joinedload in
@@ -1552,6 +1576,10 @@ def _manual_join_columns(columns_to_join):
         if column in columns_to_join_new:
             columns_to_join_new.remove(column)
             manual_joins.append(column)
+    for column in columns_to_join:
+        if column.startswith('system_metadata.'):
+            columns_to_join_new.remove(column)
+            manual_joins.append(column)
     return manual_joins, columns_to_join_new
 
 
@@ -1624,6 +1652,68 @@ def _get_query_nova_resource_by_changes_time(query, filters, model_object):
     return query
 
 
+# Sort keys which instances can be paginated by with a row value comparison,
+# see _instance_keyset_paginate_query(). The order of instances is total as
+# soon as it includes one of the unique keys.
+_INSTANCE_KEYSET_SORT_KEYS = ('created_at', 'updated_at', 'display_name',
+                              'id', 'uuid')
+_INSTANCE_UNIQUE_SORT_KEYS = ('id', 'uuid')
+
+
+def _instance_keyset_paginate_query(query, limit, sort_keys, sort_dirs,
+                                    marker=None):
+    """Add keyset sorting and pagination criteria to an instance query.
+
+    This is an alternative to oslo_db.sqlalchemy.utils.paginate_query() for
+    the common instance sort orders. Rather than OR'ing together a condition
+    per sort key, the instances following the marker are selected with a
+    single row value comparison, like (created_at, id) < (X1, X2), which the
+    database can resolve with a range scan of a composite index. Sort keys
+    following the first unique one cannot change the order, so they are
+    dropped.
+
+    :param query: the instance query to which to add sorting and pagination
+    :param limit: maximum number of instances to return
+    :param sort_keys: list of instance attributes to sort by
+    :param sort_dirs: per-key list of sort directions
+    :param marker: the last instance of the previous page, if any
+    :returns: The query with sorting and pagination added, or None if the
+              sort keys, directions or marker values do not allow keyset
+              pagination, in which case paginate_query() must be used.
+    """
+    if len(set(sort_dirs)) != 1:
+        return None
+
+    for index, sort_key in enumerate(sort_keys):
+        if sort_key not in _INSTANCE_KEYSET_SORT_KEYS:
+            return None
+        if sort_key in _INSTANCE_UNIQUE_SORT_KEYS:
+            sort_keys = sort_keys[:index + 1]
+            break
+    else:
+        return None
+
+    columns = [getattr(models.Instance, sort_key) for sort_key in sort_keys]
+    descending = sort_dirs[0] == 'desc'
+
+    if marker is not None:
+        values = [getattr(marker, sort_key) for sort_key in sort_keys]
+        # NOTE: A null can't be compared, and paginate_query() rather skips
+        # the corresponding criteria, so leave it up to it.
+        if any(value is None for value in values):
+            return None
+        if descending:
+            query = query.filter(sql.tuple_(*columns) < sql.tuple_(*values))
+        else:
+            query = query.filter(sql.tuple_(*columns) > sql.tuple_(*values))
+
+    sort_dir_func = expression.desc if descending else expression.asc
+    query = query.order_by(*[sort_dir_func(column) for column in columns])
+    if limit is not None:
+        query = query.limit(limit)
+    return query
+
+
 @require_context
 @pick_context_manager_reader_allow_async
 def instance_get_all_by_filters_sort(context, filters, limit=None, marker=None,
@@ -1838,17 +1928,24 @@ def instance_get_all_by_filters_sort(context, filters, limit=None, marker=None,
             )
         except exception.InstanceNotFound:
             raise exception.MarkerNotFound(marker=marker)
-    try:
-        query_prefix = sqlalchemyutils.paginate_query(
-            query_prefix,
-            models.Instance,
-            limit,
-            sort_keys,
-            marker=marker,
-            sort_dirs=sort_dirs,
-        )
-    except db_exc.InvalidSortKey:
-        raise exception.InvalidSortKey()
+    keyset_query = None
+    if CONF.api.instance_list_keyset_pagination:
+        keyset_query = _instance_keyset_paginate_query(
+            query_prefix, limit, sort_keys, sort_dirs, marker=marker)
+    if keyset_query is not None:
+        query_prefix = keyset_query
+    else:
+        try:
+            query_prefix = sqlalchemyutils.paginate_query(
+                query_prefix,
+                models.Instance,
+                limit,
+                sort_keys,
+                marker=marker,
+                sort_dirs=sort_dirs,
+            )
+        except db_exc.InvalidSortKey:
+            raise exception.InvalidSortKey()
 
     instances = query_prefix.all()
 
@@ -3541,10 +3638,19 @@ def migration_get_in_progress_and_error_by_host_and_node(context, host, node):
 # User-provided metadata
 
 def _instance_metadata_get_multi(context, instance_uuids):
+    """Get the metadata items of multiple instances.
+
+    Rather than loading rows, this only queries the (instance_uuid, key,
+    value, deleted) tuples of the items, since that is all that is needed to
+    fill the metadata of instances.
+    """
     if not instance_uuids:
         return []
-    return model_query(context, models.InstanceMetadata).filter(
-        models.InstanceMetadata.instance_uuid.in_(instance_uuids))
+    model = models.InstanceMetadata
+    return model_query(
+        context, model,
+        (model.instance_uuid, model.key, model.value, model.deleted),
+    ).filter(model.instance_uuid.in_(instance_uuids))
 
 
 def _instance_metadata_get_query(context, instance_uuid):
@@ -3604,12 +3710,24 @@ def instance_metadata_update(context, instance_uuid, metadata, delete):
 # System-owned metadata
 
 
-def _instance_system_metadata_get_multi(context, instance_uuids):
+def _instance_system_metadata_get_multi(context, instance_uuids, keys=None):
+    """Get the system metadata items of multiple instances.
+
+    Like _instance_metadata_get_multi(), this only queries the
+    (instance_uuid, key, value) tuples of the items.
+
+    :param keys: if not None, only get the items with these keys
+    """
     if not instance_uuids:
         return []
-    return model_query(context, models.InstanceSystemMetadata,
-                       read_deleted='yes').filter(
-        models.InstanceSystemMetadata.instance_uuid.in_(instance_uuids))
+    model = models.InstanceSystemMetadata
+    query = model_query(
+        context, model, (model.instance_uuid, model.key, model.value),
+        read_deleted='yes',
+    ).filter(model.instance_uuid.in_(instance_uuids))
+    if keys is not None:
+        query = query.filter(model.key.in_(keys))
+    return query
 
 
 def _instance_system_metadata_get_query(context, instance_uuid):
@@ -4227,6 +4345,11 @@ def task_log_end_task(
 ##################
 
 
+# The number of consecutive primary key values covered by each query selecting
+# rows to archive, when selecting them in ranges of primary keys.
+_ARCHIVE_PK_RANGE_SIZE = 10000
+
+
 def _get_tables_with_fk_to_table(table):
     """Get a list of tables that refer to the given table by foreign key (FK).
 
@@ -4353,8 +4476,77 @@ def _get_fk_stmts(metadata, conn, table, column, records):
     return inserts, deletes
 
 
+def _get_table_dependency_chains(tables):
+    """Group tables which are related, directly or not, by foreign keys.
+
+    Both the foreign keys of the database schema and those of the models are
+    considered, the latter being the ones followed when archiving rows.
+
+    :param tables: A list of Table objects sorted in order of foreign key
+        dependency
+
+    :returns: A list of lists of Table objects, one per group of related
+        tables, each sorted in the order of the given list
+    """
+    groups = {table.name: {table.name} for table in tables}
+    for table in tables:
+        foreign_keys = set(table.foreign_keys)
+        model_table = models.BASE.metadata.tables.get(table.name)
+        if model_table is not None:
+            foreign_keys.update(model_table.foreign_keys)
+        for fk in foreign_keys:
+            parent = fk.column.table.name
+            if parent not in groups or groups[parent] is groups[table.name]:
+                continue
+            group = groups[parent] | groups[table.name]
+            for tablename in group:
+                groups[tablename] = group
+
+    chains = {}
+    for table in tables:
+        chains.setdefault(id(groups[table.name]), []).append(table)
+    return list(chains.values())
+
+
+def _select_records_in_pk_ranges(conn, select, column, max_rows, start):
+    """Select the IDs of up to max_rows rows to archive after the start ID.
+
+    Rather than sorting all the rows to archive of a table to find the first
+    max_rows ones, whose cost grows with the number of rows left behind by
+    earlier batches, scan consecutive ranges of IDs from the start ID until
+    enough rows are found or the highest ID of the table is reached.
+
+    :param conn: Connection object to use to select the rows
+    :param select: Select statement of the IDs of the rows to archive
+    :param column: Integer primary key Column object of the table
+    :param max_rows: Maximum number of IDs to select
+    :param start: ID after which to select rows
+
+    :returns: tuple of (list of IDs of rows to archive, ID up to which all the
+        rows to archive have been selected)
+    """
+    with conn.begin():
+        max_id = conn.execute(sql.select(func.max(column))).scalar()
+    records = []
+    while max_id is not None and start < max_id:
+        end = min(start + _ARCHIVE_PK_RANGE_SIZE, max_id)
+        limit = None if max_rows is None else max_rows - len(records)
+        range_select = select.where(
+            column > start, column <= end,
+        ).order_by(column).limit(limit)
+        with conn.begin():
+            rows = conn.execute(range_select).fetchall()
+        records.extend(r[0] for r in rows)
+        if limit is not None and len(rows) >= limit:
+            # There may be more rows to archive in this range, past the last
+            # one selected.
+            return records, records[-1] if records else start
+        start = end
+    return records, start
+
+
 def _archive_deleted_rows_for_table(
-    metadata, engine, tablename, max_rows, before, task_log,
+    metadata, engine, tablename, max_rows, before, task_log, checkpoint=None,
 ):
     """Move up to max_rows rows from one tables to the corresponding
     shadow table.
@@ -4363,6 +4555,11 @@ def _archive_deleted_rows_for_table(
     Example: archiving a record from the 'instances' table will also archive
     the 'instance_extra' record before archiving the 'instances' record.
 
+    If a checkpoint dict is given and the table has an integer primary key,
+    the rows to archive are selected in ranges of primary keys, from the one
+    recorded for the table in the checkpoint. The checkpoint is then updated
+    once the rows are archived.
+
     :returns: 3-item tuple:
 
         - number of rows archived
@@ -4418,13 +4615,17 @@ def _archive_deleted_rows_for_table(
             # base our select statement on the 'deleted_at' column status.
             select = select.where(table.c.updated_at < before)
 
-    select = select.order_by(column).limit(max_rows)
-    with conn.begin():
-        rows = conn.execute(select).fetchall()
-
     # This is a list of IDs of rows that should be archived from this table,
     # limited to a length of max_rows.
-    records = [r[0] for r in rows]
+    scanned_up_to = None
+    if checkpoint is not None and isinstance(column.type, sa.Integer):
+        records, scanned_up_to = _select_records_in_pk_ranges(
+            conn, select, column, max_rows, checkpoint.get(tablename, 0))
+    else:
+        select = select.order_by(column).limit(max_rows)
+        with conn.begin():
+            rows = conn.execute(select).fetchall()
+        records = [r[0] for r in rows]
 
     # We will archive deleted rows for this table and also generate insert and
     # delete statements for extra rows we may archive by following FK
@@ -4442,6 +4643,8 @@ def _archive_deleted_rows_for_table(
 
     if not records:
         # Nothing to archive, so return.
+        if scanned_up_to is not None:
+            checkpoint[tablename] = scanned_up_to
         return rows_archived, deleted_instance_uuids, extras
 
     # Keep track of how many rows we accumulate for the insert+delete database
@@ -4533,6 +4736,13 @@ def _archive_deleted_rows_for_table(
         LOG.warning("IntegrityError detected when archiving table "
                     "%(tablename)s: %(error)s",
                     {'tablename': tablename, 'error': str(ex)})
+    else:
+        if scanned_up_to is not None:
+            if len(records_in_batch) < len(records):
+                # The batch was full before all the records selected could
+                # be added to it.
+                scanned_up_to = records_in_batch[-1]
+            checkpoint[tablename] = scanned_up_to
 
     conn.close()
 
@@ -4540,7 +4750,8 @@ def _archive_deleted_rows_for_table(
 
 
 def archive_deleted_rows(context=None, max_rows=None, before=None,
-                         task_log=False):
+                         task_log=False, workers=None, checkpoint=None,
+                         stats=None):
     """Move up to max_rows rows from production tables to the corresponding
     shadow tables.
 
@@ -4549,6 +4760,18 @@ def archive_deleted_rows(context=None, max_rows=None, before=None,
     :param before: optional datetime which when specified filters the records
         to only archive those records deleted before the given date
     :param task_log: Optional for whether to archive task_log table records
+    :param workers: Optional number of groups of tables related by foreign
+        keys to archive concurrently. Note that max_rows then applies to each
+        group of tables rather than to all of them.
+    :param checkpoint: Optional dict mapping table names to the primary key
+        up to which rows have been considered for archiving. When specified,
+        the rows to archive are selected in ranges of primary keys from there
+        and the dict is updated as rows are archived, so that passing it again
+        resumes archiving where this call stopped.
+    :param stats: Optional dict which is updated to map table names to a list
+        of the number of rows archived from that table, including the
+        referring rows archived with them, and the seconds spent archiving
+        them
     :returns: 3-item tuple:
 
         - dict that maps table name to number of rows archived from that table,
@@ -4562,9 +4785,6 @@ def archive_deleted_rows(context=None, max_rows=None, before=None,
         - list of UUIDs of instances that were archived
         - total number of rows that were archived
     """
-    table_to_rows_archived = collections.defaultdict(int)
-    deleted_instance_uuids = []
-    total_rows_archived = 0
     meta = sa.MetaData()
     engine = get_engine(use_slave=True, context=context)
     meta.reflect(bind=engine)
@@ -4574,9 +4794,9 @@ def archive_deleted_rows(context=None, max_rows=None, before=None,
     # is to avoid a situation where, for example, an 'instances' table record
     # is missing its corresponding 'instance_extra' record due to running the
     # archive_deleted_rows command with max_rows.
+    tables = []
     for table in meta.sorted_tables:
         tablename = table.name
-        rows_archived = 0
         # skip the special alembic_version version table and any shadow tables
         if (
             tablename == 'alembic_version' or
@@ -4588,23 +4808,58 @@ def archive_deleted_rows(context=None, max_rows=None, before=None,
         if tablename in models.REMOVED_TABLES:
             continue
 
-        rows_archived, _deleted_instance_uuids, extras = (
-            _archive_deleted_rows_for_table(
-                meta, engine, tablename,
-                max_rows=max_rows - total_rows_archived,
-                before=before,
-                task_log=task_log))
-        total_rows_archived += rows_archived
-        if tablename == 'instances':
-            deleted_instance_uuids = _deleted_instance_uuids
-        # Only report results for tables that had updates.
-        if rows_archived:
-            table_to_rows_archived[tablename] = rows_archived
-            for tablename, extra_rows_archived in extras.items():
-                table_to_rows_archived[tablename] += extra_rows_archived
-                total_rows_archived += extra_rows_archived
-        if total_rows_archived >= max_rows:
-            break
+        tables.append(table)
+
+    def archive_tables(tables):
+        table_to_rows_archived = collections.defaultdict(int)
+        deleted_instance_uuids = []
+        total_rows_archived = 0
+        for table in tables:
+            tablename = table.name
+            with timeutils.StopWatch() as timer:
+                rows_archived, _deleted_instance_uuids, extras = (
+                    _archive_deleted_rows_for_table(
+                        meta, engine, tablename,
+                        max_rows=max_rows - total_rows_archived,
+                        before=before,
+                        task_log=task_log,
+                        checkpoint=checkpoint))
+            total_rows_archived += rows_archived
+            if tablename == 'instances':
+                deleted_instance_uuids = _deleted_instance_uuids
+            # Only report results for tables that had updates.
+            if rows_archived:
+                table_to_rows_archived[tablename] = rows_archived
+                for tablename, extra_rows_archived in extras.items():
+                    table_to_rows_archived[tablename] += extra_rows_archived
+                    total_rows_archived += extra_rows_archived
+                if stats is not None:
+                    table_stats = stats.setdefault(table.name, [0, 0.0])
+                    table_stats[0] += rows_archived + sum(extras.values())
+                    table_stats[1] += timer.elapsed()
+            if total_rows_archived >= max_rows:
+                break
+        return (
+            table_to_rows_archived, deleted_instance_uuids,
+            total_rows_archived,
+        )
+
+    if not workers or workers <= 1:
+        return archive_tables(tables)
+
+    # Tables which are not related by foreign keys can be archived
+    # independently, so archive each group of related tables concurrently.
+    chains = _get_table_dependency_chains(tables)
+    with utils.get_executor(workers) as executor:
+        results = list(executor.map(archive_tables, chains))
+
+    table_to_rows_archived = collections.defaultdict(int)
+    deleted_instance_uuids = []
+    total_rows_archived = 0
+    for chain_to_rows_archived, chain_instance_uuids, chain_rows in results:
+        table_to_rows_archived.update(chain_to_rows_archived)
+        deleted_instance_uuids.extend(chain_instance_uuids)
+        total_rows_archived += chain_rows
     return table_to_rows_archived, deleted_instance_uuids, total_rows_archived
 
 
@@ -4617,12 +4872,91 @@ def _purgeable_tables(metadata):
     ]
 
 
-def purge_shadow_tables(context, before_date, status_fn=None):
+def _purge_shadow_table(
+    engine, table, col, before_date, status_fn, max_rows=None, throttle=None,
+):
+    """Delete the rows of a shadow table.
+
+    :param engine: Engine object to use to delete the rows
+    :param table: Table object of the shadow table
+    :param col: Column object of the timestamp to compare with before_date, or
+        None to delete all the rows
+    :param before_date: Datetime before which to delete rows
+    :param status_fn: Function to report progress to
+    :param max_rows: Optional maximum number of rows to delete per
+        transaction. The rows of each chunk are found by walking the primary
+        key of the table from where the previous chunk stopped, so that
+        neither the transactions nor the queries grow with the size of the
+        table. Tables without an integer primary key are purged with a single
+        statement.
+    :param throttle: Optional function called with the number of rows
+        deleted after each chunk, which may sleep to limit the rate of
+        deletion
+
+    :returns: number of rows deleted
+    """
+    pk_columns = list(table.primary_key.columns)
+    with engine.connect() as conn:
+        if max_rows is None or not (
+            len(pk_columns) == 1 and
+            isinstance(pk_columns[0].type, sa.Integer)
+        ):
+            if col is not None:
+                delete = table.delete().where(col < before_date)
+            else:
+                delete = table.delete()
+
+            with conn.begin():
+                return conn.execute(delete).rowcount
+
+        column = pk_columns[0]
+        select = sql.select(column).order_by(column).limit(max_rows)
+        if col is not None:
+            select = select.where(col < before_date)
+        total_deleted = 0
+        last_id = None
+        while True:
+            chunk_select = select
+            if last_id is not None:
+                chunk_select = select.where(column > last_id)
+            with conn.begin():
+                ids = [r[0] for r in conn.execute(chunk_select).fetchall()]
+                if not ids:
+                    break
+                deleted = conn.execute(
+                    table.delete().where(column.in_(ids))).rowcount
+            total_deleted += deleted
+            last_id = ids[-1]
+            status_fn(_('Deleted %(rows)i rows from %(table)s so far') % {
+                'rows': total_deleted, 'table': table.name})
+            if throttle is not None:
+                throttle(deleted)
+            if len(ids) < max_rows:
+                break
+
+    return total_deleted
+
+
+def purge_shadow_tables(context, before_date, status_fn=None, max_rows=None,
+                        max_rate=None, workers=None):
+    """Delete rows from the shadow tables.
+
+    :param context: nova.context.RequestContext for database access
+    :param before_date: Optional datetime before which to delete rows, or
+        None to delete all the rows
+    :param status_fn: Optional function to report progress to
+    :param max_rows: Optional maximum number of rows to delete per
+        transaction, rather than deleting all the rows to purge of each table
+        at once
+    :param max_rate: Optional maximum number of rows to delete per second
+        across all the tables, when max_rows is specified
+    :param workers: Optional number of tables to purge concurrently, when
+        max_rows is specified
+    :returns: total number of rows deleted
+    """
     engine = get_engine(context=context)
-    conn = engine.connect()
     metadata = sa.MetaData()
     metadata.reflect(bind=engine)
-    total_deleted = 0
 
     if status_fn is None:
         status_fn = lambda m: None
@@ -4636,6 +4970,7 @@ def purge_shadow_tables(context, before_date, status_fn=None):
         'shadow_task_log': 'updated_at',
     }
 
+    tables = []
     for table in _purgeable_tables(metadata):
         if before_date is None:
             col = None
@@ -4652,25 +4987,39 @@ def purge_shadow_tables(context, before_date, status_fn=None):
                         'has no timestamp column') % {
                             'table': table.name})
             continue
-
-        if col is not None:
-            delete = table.delete().where(col < before_date)
-        else:
-            delete = table.delete()
-
-        with conn.begin():
-            deleted = conn.execute(delete)
-        if deleted.rowcount > 0:
+        tables.append((table, col))
+
+    throttle_lock = threading.Lock()
+    throttle_start = time.monotonic()
+    throttled_rows = 0
+
+    def throttle(rows):
+        nonlocal throttled_rows
+        with throttle_lock:
+            throttled_rows += rows
+            delay = (throttled_rows / max_rate -
+                     (time.monotonic() - throttle_start))
+        if delay > 0:
+            time.sleep(delay)
+
+    def purge(table_col):
+        table, col = table_col
+        deleted = _purge_shadow_table(
+            engine, table, col, before_date, status_fn, max_rows=max_rows,
+            throttle=throttle if max_rate else None)
+        if deleted > 0:
             status_fn(_('Deleted %(rows)i rows from %(table)s based on '
                         'timestamp column %(col)s') % {
-                            'rows': deleted.rowcount,
+                            'rows': deleted,
                             'table': table.name,
                             'col': col is None and '(n/a)' or col.name})
-        total_deleted += deleted.rowcount
+        return deleted
 
-    conn.close()
+    if max_rows is not None and workers and workers > 1:
+        with utils.get_executor(workers) as executor:
+            return sum(executor.map(purge, tables))
 
-    return total_deleted
+    return sum(purge(table_col) for table_col in tables)
 
 
 ####################
@@ -0,0 +1,40 @@
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License. You may obtain
+# a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+# License for the specific language governing permissions and limitations
+# under the License.
+
+"""add_instance_keyset_pagination_indexes
+
+Revision ID: b7e4d2a9c1f3
+Revises: 2903cd72dc14
+Create Date: 2026-10-17 09:12:44.318207
+"""
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision = 'b7e4d2a9c1f3'
+down_revision = '2903cd72dc14'
+branch_labels = None
+depends_on = None
+
+
+def upgrade():
+    with op.batch_alter_table('instances', schema=None) as batch_op:
+        batch_op.create_index(
+            'instances_project_id_deleted_created_at_idx',
+            ('project_id', 'deleted', 'created_at', 'id'))
+        batch_op.create_index(
+            'instances_project_id_deleted_updated_at_idx',
+            ('project_id', 'deleted', 'updated_at', 'created_at', 'id'))
+        batch_op.create_index(
+            'instances_project_id_deleted_display_name_idx',
+            ('project_id', 'deleted', 'display_name', 'created_at', 'id'))
@@ -287,6 +287,12 @@ class Instance(BASE, NovaBase, models.SoftDeleteMixin):
               'updated_at', 'project_id'),
         sa.Index('instances_compute_id_deleted_idx',
               'compute_id', 'deleted'),
+        sa.Index('instances_project_id_deleted_created_at_idx',
+              'project_id', 'deleted', 'created_at', 'id'),
+        sa.Index('instances_project_id_deleted_updated_at_idx',
+              'project_id', 'deleted', 'updated_at', 'created_at', 'id'),
+        sa.Index('instances_project_id_deleted_display_name_idx',
+              'project_id', 'deleted', 'display_name', 'created_at', 'id'),
         schema.UniqueConstraint('uuid', name='uniq_instances0uuid'),
     )
     injected_files = []
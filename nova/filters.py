@@ -20,6 +20,7 @@ Filter support
 from oslo_log import log as logging
 
 from nova import loadables
+from nova import utils
 
 LOG = logging.getLogger(__name__)
 
@@ -65,6 +66,74 @@ class BaseFilterHandler(loadables.BaseLoader):
     This class should be subclassed where one needs to use filters.
     """
 
+    def _get_partition_count(self, num_objs):
+        """Return the number of partitions to filter the objects in.
+
+        The filters are run concurrently on each partition if more than one
+        is returned. Override this in a subclass to enable it.
+        """
+        return 1
+
+    @staticmethod
+    def _run_filters(filters, list_objs, spec_obj, index):
+        """Run the filters on the objects, one after the other.
+
+        Yields a (filter, objs) tuple for each filter run, where objs is the
+        list of objects which passed the filter, or None if the filter said
+        to stop filtering. Stops after the first filter returning no objects.
+        """
+        for filter_ in filters:
+            if filter_.run_filter_for_index(index):
+                objs = filter_.filter_all(list_objs, spec_obj)
+                if objs is None:
+                    yield filter_, None
+                    return
+                list_objs = list(objs)
+                yield filter_, list_objs
+                if not list_objs:
+                    return
+
+    def _run_filters_partitioned(self, filters, list_objs, spec_obj, index,
+                                 partitions):
+        """Run the filters concurrently on partitions of the objects.
+
+        Each partition is run through the whole filter chain on the
+        scatter-gather executor. The results are then merged per filter, in
+        the original order of the objects, and yielded like _run_filters
+        does.
+        """
+        size = -(-len(list_objs) // partitions)
+        chunks = [list_objs[i:i + size]
+                  for i in range(0, len(list_objs), size)]
+        executor = utils.get_scatter_gather_executor()
+        futures = [
+            executor.submit(
+                utils.pass_context_wrapper(
+                    lambda chunk: list(self._run_filters(
+                        filters, chunk, spec_obj, index))),
+                chunk)
+            for chunk in chunks]
+        # Re-raise the first exception raised by a filter, if any
+        chunk_results = [future.result() for future in futures]
+
+        step = 0
+        while True:
+            filter_ = None
+            objs = []
+            for results in chunk_results:
+                # A partition stops early once it is left without objects
+                if step >= len(results):
+                    continue
+                filter_, chunk_objs = results[step]
+                if chunk_objs is None:
+                    yield filter_, None
+                    return
+                objs.extend(chunk_objs)
+            if filter_ is None:
+                return
+            yield filter_, objs
+            step += 1
+
     def get_filtered_objects(self, filters, objs, spec_obj, index=0):
         list_objs = list(objs)
         LOG.debug("Starting with %d host(s)", len(list_objs))
@@ -78,29 +147,33 @@ class BaseFilterHandler(loadables.BaseLoader):
         part_filter_results = []
         full_filter_results = []
         log_msg = "%(cls_name)s: (start: %(start)s, end: %(end)s)"
-        for filter_ in filters:
-            if filter_.run_filter_for_index(index):
-                cls_name = filter_.__class__.__name__
-                start_count = len(list_objs)
-                objs = filter_.filter_all(list_objs, spec_obj)
-                if objs is None:
-                    LOG.debug("Filter %s says to stop filtering", cls_name)
-                    return
-                list_objs = list(objs)
-                end_count = len(list_objs)
-                part_filter_results.append(log_msg % {"cls_name": cls_name,
-                        "start": start_count, "end": end_count})
-                if list_objs:
-                    remaining = [(getattr(obj, "host", obj),
-                                  getattr(obj, "nodename", ""))
-                                 for obj in list_objs]
-                    full_filter_results.append((cls_name, remaining))
-                else:
-                    LOG.info("Filter %s returned 0 hosts", cls_name)
-                    full_filter_results.append((cls_name, None))
-                    break
-                LOG.debug("Filter %(cls_name)s returned %(obj_len)d host(s)",
-                          {'cls_name': cls_name, 'obj_len': len(list_objs)})
+        partitions = self._get_partition_count(len(list_objs))
+        if partitions > 1:
+            results = self._run_filters_partitioned(
+                filters, list_objs, spec_obj, index, partitions)
+        else:
+            results = self._run_filters(filters, list_objs, spec_obj, index)
+        for filter_, objs in results:
+            cls_name = filter_.__class__.__name__
+            start_count = len(list_objs)
+            if objs is None:
+                LOG.debug("Filter %s says to stop filtering", cls_name)
+                return
+            list_objs = objs
+            end_count = len(list_objs)
+            part_filter_results.append(log_msg % {"cls_name": cls_name,
+                    "start": start_count, "end": end_count})
+            if list_objs:
+                remaining = [(getattr(obj, "host", obj),
+                              getattr(obj, "nodename", ""))
+                             for obj in list_objs]
+                full_filter_results.append((cls_name, remaining))
+            else:
+                LOG.info("Filter %s returned 0 hosts", cls_name)
+                full_filter_results.append((cls_name, None))
+                break
+            LOG.debug("Filter %(cls_name)s returned %(obj_len)d host(s)",
+                      {'cls_name': cls_name, 'obj_len': len(list_objs)})
         if not list_objs:
             # Log the filtration history
             msg_dict = {
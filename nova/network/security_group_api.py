@@ -17,6 +17,8 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import threading
+import time
 import urllib
 
 import netaddr
@@ -29,13 +31,16 @@ from oslo_utils import netutils
 from oslo_utils import uuidutils
 from webob import exc
 
+import nova.conf
 from nova import context as nova_context
 from nova import exception
 from nova.i18n import _
 from nova.network import neutron as neutronapi
 from nova.objects import security_group as security_group_obj
+from nova import utils
 
 
+CONF = nova.conf.CONF
 LOG = logging.getLogger(__name__)
 
 # NOTE: Neutron client has a max URL length of 8192, so we have
@@ -43,6 +48,12 @@ LOG = logging.getLogger(__name__)
 # doesn't seem to be any point in making this a config value.
 MAX_SEARCH_IDS = 150
 
+# Names of the security groups found when listing servers, see the
+# [neutron] security_group_name_cache_ttl option.
+# {(project_id, roles, security_group_id): (expiry, security_group)}
+_SG_NAME_CACHE = {}
+_SG_NAME_CACHE_LOCK = threading.Lock()
+
 
 def validate_id(id):
     if not uuidutils.is_uuid_like(id):
@@ -251,6 +262,7 @@ def update_security_group(context, security_group, name, description):
             # quota
             raise exc.HTTPBadRequest()
         raise e
+    _forget_security_group_name(security_group['id'])
     return _convert_to_nova_security_group_format(security_group)
 
 
@@ -352,6 +364,7 @@ def destroy(context, security_group):
         else:
             LOG.error("Neutron Error: %s", e)
             raise e
+    _forget_security_group_name(security_group['id'])
 
 
 def add_rules(context, id, name, vals):
@@ -455,53 +468,57 @@ def get_rule(context, id):
     return _convert_to_nova_security_group_rule_format(rule)
 
 
+def _chunk_by_ids(ids, limit):
+    chunk = []
+    for item in ids:
+        chunk.append(item)
+        if len(chunk) >= limit:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
 def _get_ports_from_server_list(servers, neutron):
     """Returns a list of ports used by the servers."""
 
-    def _chunk_by_ids(servers, limit):
-        ids = []
-        for server in servers:
-            ids.append(server['id'])
-            if len(ids) >= limit:
-                yield ids
-                ids = []
-        if ids:
-            yield ids
-
-    # Note: Have to split the query up as the search criteria
-    # form part of the URL, which has a fixed max size
-    ports = []
-    for ids in _chunk_by_ids(servers, MAX_SEARCH_IDS):
-        search_opts = {'device_id': ids}
+    def _list_ports(ids, **search_opts):
         try:
-            ports.extend(neutron.list_ports(**search_opts).get('ports'))
+            return neutron.list_ports(device_id=ids,
+                                      **search_opts).get('ports')
         except n_exc.PortNotFoundClient:
             # There could be a race between deleting an instance and
             # retrieving its port groups from Neutron. In this case
             # PortNotFoundClient is raised and it can be safely ignored
             LOG.debug("Port not found for device with id %s", ids)
+            return []
 
-    return ports
-
+    # Note: Have to split the query up as the search criteria
+    # form part of the URL, which has a fixed max size
+    chunks = [ids for ids in _chunk_by_ids(
+        (server['id'] for server in servers), MAX_SEARCH_IDS)]
+    workers = min(CONF.neutron.security_group_lookup_workers, len(chunks))
 
-def _get_secgroups_from_port_list(ports, neutron, fields=None):
-    """Returns a dict of security groups keyed by their ids."""
+    ports = []
+    if workers <= 1:
+        for ids in chunks:
+            ports.extend(_list_ports(ids))
+        return ports
+
+    # Only the fields used to find the security groups of the servers are
+    # requested, which keeps the responses of the concurrent queries small.
+    with utils.get_executor(workers) as executor:
+        for chunk_ports in executor.map(
+                lambda ids: _list_ports(
+                    ids, fields=['device_id', 'security_groups']),
+                chunks):
+            ports.extend(chunk_ports)
 
-    def _chunk_by_ids(sg_ids, limit):
-        sg_id_list = []
-        for sg_id in sg_ids:
-            sg_id_list.append(sg_id)
-            if len(sg_id_list) >= limit:
-                yield sg_id_list
-                sg_id_list = []
-        if sg_id_list:
-            yield sg_id_list
+    return ports
 
-    # Find the set of unique SecGroup IDs to search for
-    sg_ids = set()
-    for port in ports:
-        sg_ids.update(port.get('security_groups', []))
 
+def _get_secgroups(sg_ids, neutron, fields=None):
+    """Returns a dict of the given security groups keyed by their ids."""
     # Note: Have to split the query up as the search criteria
     # form part of the URL, which has a fixed max size
     security_groups = {}
@@ -516,6 +533,66 @@ def _get_secgroups_from_port_list(ports, neutron, fields=None):
     return security_groups
 
 
+def _get_secgroups_from_port_list(ports, neutron, fields=None):
+    """Returns a dict of security groups keyed by their ids."""
+    # Find the set of unique SecGroup IDs to search for
+    sg_ids = set()
+    for port in ports:
+        sg_ids.update(port.get('security_groups', []))
+
+    return _get_secgroups(sg_ids, neutron, fields=fields)
+
+
+def _get_cached_secgroup_names_from_port_list(context, ports, neutron):
+    """Returns a dict of the ids and names of security groups keyed by their
+    ids, using the security groups cached by previous calls.
+    """
+    # NOTE: Which security groups are visible depends on the project and the
+    # roles of the user, so the cached ones are only shared by the requests
+    # made with the same project and roles.
+    scope = (context.project_id, tuple(sorted(context.roles)))
+    now = time.monotonic()
+
+    sg_ids = set()
+    for port in ports:
+        sg_ids.update(port.get('security_groups', []))
+
+    security_groups = {}
+    with _SG_NAME_CACHE_LOCK:
+        for sg_id in sg_ids:
+            entry = _SG_NAME_CACHE.get(scope + (sg_id,))
+            if entry is not None and entry[0] > now:
+                security_groups[sg_id] = entry[1]
+
+    missing_sg_ids = sg_ids - set(security_groups)
+    if not missing_sg_ids:
+        return security_groups
+
+    found = _get_secgroups(missing_sg_ids, neutron, fields=['id', 'name'])
+    security_groups.update(found)
+    expiry = now + CONF.neutron.security_group_name_cache_ttl
+    with _SG_NAME_CACHE_LOCK:
+        # Drop the expired security groups so the cache does not grow
+        # forever.
+        for key in [key for key, entry in _SG_NAME_CACHE.items()
+                    if entry[0] <= now]:
+            del _SG_NAME_CACHE[key]
+        for sg_id, sg in found.items():
+            _SG_NAME_CACHE[scope + (sg_id,)] = (expiry, sg)
+
+    return security_groups
+
+
+def _forget_security_group_name(security_group_id):
+    """Drop a security group updated or deleted through the compute API from
+    the cache of security group names.
+    """
+    with _SG_NAME_CACHE_LOCK:
+        for key in [key for key in _SG_NAME_CACHE
+                    if key[-1] == security_group_id]:
+            del _SG_NAME_CACHE[key]
+
+
 def get_instances_security_groups_bindings(context, servers,
                                            detailed=False):
     """Returns a dict(instance_id, [security_groups]) to allow obtaining
@@ -531,9 +608,13 @@ def get_instances_security_groups_bindings(context, servers,
     # including the potentially slow-to-join security_group_rules field.
     # But if detailed is False, only get the id and name fields since
     # that's all we'll use below.
-    fields = None if detailed else ['id', 'name']
-    security_groups = _get_secgroups_from_port_list(
-        ports, neutron, fields=fields)
+    if not detailed and CONF.neutron.security_group_name_cache_ttl:
+        security_groups = _get_cached_secgroup_names_from_port_list(
+            context, ports, neutron)
+    else:
+        fields = None if detailed else ['id', 'name']
+        security_groups = _get_secgroups_from_port_list(
+            ports, neutron, fields=fields)
 
     instances_security_group_bindings = {}
     for port in ports:
@@ -13,10 +13,12 @@
 #    under the License.
 
 from oslo_db import exception as db_exc
+from oslo_log import log as logging
 from oslo_serialization import jsonutils
 from oslo_utils import uuidutils
 from oslo_utils import versionutils
 import sqlalchemy as sa
+from sqlalchemy import orm
 from sqlalchemy import sql
 
 import nova.conf
@@ -29,6 +31,19 @@ from nova.objects import fields
 from nova.objects import pci_device_pool
 
 CONF = nova.conf.CONF
+LOG = logging.getLogger(__name__)
+
+# Fields backed by potentially large JSON columns which can be left unloaded
+# by ComputeNodeList.get_all_by_uuids() and are lazy-loaded on access,
+# mapped to the name of their column in the database.
+COMPUTE_NODE_OPTIONAL_ATTRS = {
+    'cpu_info': 'cpu_info',
+    'metrics': 'metrics',
+    'numa_topology': 'numa_topology',
+    'pci_device_pools': 'pci_stats',
+    'stats': 'stats',
+    'supported_hv_specs': 'supported_instances',
+}
 
 
 @base.NovaObjectRegistry.register
@@ -171,14 +186,24 @@ class ComputeNode(base.NovaPersistentObject, base.NovaObject):
             compute.host = None
 
     @staticmethod
-    def _from_db_object(context, compute, db_compute):
+    def _from_db_object(context, compute, db_compute, expected_attrs=None):
+        """Load a ComputeNode from its database record.
+
+        :param expected_attrs: The fields of COMPUTE_NODE_OPTIONAL_ATTRS to
+            load, the other ones being left unset. All fields are loaded if
+            None.
+        """
         special_cases = set([
             'stats',
             'supported_hv_specs',
             'host',
             'pci_device_pools',
             ])
-        fields = set(compute.fields) - special_cases
+        if expected_attrs is None:
+            skipped = set()
+        else:
+            skipped = set(COMPUTE_NODE_OPTIONAL_ATTRS) - set(expected_attrs)
+        fields = set(compute.fields) - special_cases - skipped
         online_updates = {}
         for key in fields:
             value = db_compute[key]
@@ -222,21 +247,24 @@ class ComputeNode(base.NovaPersistentObject, base.NovaObject):
         if online_updates:
             db.compute_node_update(context, compute.id, online_updates)
 
-        stats = db_compute['stats']
-        if stats:
-            compute.stats = jsonutils.loads(stats)
-
-        sup_insts = db_compute.get('supported_instances')
-        if sup_insts:
-            hv_specs = jsonutils.loads(sup_insts)
-            hv_specs = [objects.HVSpec.from_list(hv_spec)
-                        for hv_spec in hv_specs]
-            compute.supported_hv_specs = hv_specs
-
-        pci_stats = db_compute.get('pci_stats')
-        if pci_stats is not None:
-            pci_stats = pci_device_pool.from_pci_stats(pci_stats)
-        compute.pci_device_pools = pci_stats
+        if 'stats' not in skipped:
+            stats = db_compute['stats']
+            if stats:
+                compute.stats = jsonutils.loads(stats)
+
+        if 'supported_hv_specs' not in skipped:
+            sup_insts = db_compute.get('supported_instances')
+            if sup_insts:
+                hv_specs = jsonutils.loads(sup_insts)
+                hv_specs = [objects.HVSpec.from_list(hv_spec)
+                            for hv_spec in hv_specs]
+                compute.supported_hv_specs = hv_specs
+
+        if 'pci_device_pools' not in skipped:
+            pci_stats = db_compute.get('pci_stats')
+            if pci_stats is not None:
+                pci_stats = pci_device_pool.from_pci_stats(pci_stats)
+            compute.pci_device_pools = pci_stats
         compute._context = context
 
         # Make sure that we correctly set the host field depending on either
@@ -247,6 +275,39 @@ class ComputeNode(base.NovaPersistentObject, base.NovaObject):
 
         return compute
 
+    @base.lazy_load_counter
+    def obj_load_attr(self, attrname):
+        if attrname not in COMPUTE_NODE_OPTIONAL_ATTRS:
+            raise exception.ObjectActionError(
+                action='obj_load_attr',
+                reason='attribute %s not lazy-loadable' % attrname)
+        if not self._context:
+            raise exception.OrphanedObjectError(method='obj_load_attr',
+                                                objtype=self.obj_name())
+
+        LOG.debug("Lazy-loading '%(attr)s' on %(name)s uuid %(uuid)s",
+                  {'attr': attrname,
+                   'name': self.obj_name(),
+                   'uuid': self.uuid,
+                   })
+
+        # NOTE: Load all the optional fields which are not set yet at once,
+        # as the ones used by a caller usually come together.
+        unset = [attr for attr in COMPUTE_NODE_OPTIONAL_ATTRS
+                 if not self.obj_attr_is_set(attr)]
+        db_compute = db.compute_node_get(self._context, self.id)
+        compute = self._from_db_object(
+            self._context, self.__class__(), db_compute,
+            expected_attrs=unset)
+        for attr in unset:
+            if compute.obj_attr_is_set(attr):
+                setattr(self, attr, getattr(compute, attr))
+            elif attr == 'stats':
+                self.stats = {}
+            elif attr == 'supported_hv_specs':
+                self.supported_hv_specs = []
+        self.obj_reset_changes(fields=unset)
+
     @base.remotable_classmethod
     def get_by_id(cls, context, compute_id):
         db_compute = db.compute_node_get(context, compute_id)
@@ -428,7 +489,8 @@ class ComputeNodeList(base.ObjectListBase, base.NovaObject):
     # Version 1.15 Added get_by_pagination()
     # Version 1.16: Added get_all_by_uuids()
     # Version 1.17: Added get_all_by_not_mapped()
-    VERSION = '1.17'
+    # Version 1.18: Added expected_attrs to get_all_by_uuids()
+    VERSION = '1.18'
     fields = {
         'objects': fields.ListOfObjectsField('ComputeNode'),
         }
@@ -489,17 +551,31 @@ class ComputeNodeList(base.ObjectListBase, base.NovaObject):
 
     @staticmethod
     @db.select_db_reader_mode
-    def _db_compute_node_get_all_by_uuids(context, compute_uuids):
-        db_computes = db.model_query(context, models.ComputeNode).filter(
-            models.ComputeNode.uuid.in_(compute_uuids)).all()
-        return db_computes
+    def _db_compute_node_get_all_by_uuids(context, compute_uuids,
+                                          expected_attrs=None):
+        query = db.model_query(context, models.ComputeNode).filter(
+            models.ComputeNode.uuid.in_(compute_uuids))
+        if expected_attrs is not None:
+            # Do not fetch the columns of the optional fields which were not
+            # asked for, they will be lazy-loaded if accessed.
+            query = query.options(*[
+                orm.defer(getattr(models.ComputeNode, column))
+                for attr, column in COMPUTE_NODE_OPTIONAL_ATTRS.items()
+                if attr not in expected_attrs])
+        return query.all()
 
     @base.remotable_classmethod
-    def get_all_by_uuids(cls, context, compute_uuids):
-        db_computes = cls._db_compute_node_get_all_by_uuids(context,
-                                                            compute_uuids)
+    def get_all_by_uuids(cls, context, compute_uuids, expected_attrs=None):
+        """Get the compute nodes matching a list of UUIDs.
+
+        :param expected_attrs: The fields of COMPUTE_NODE_OPTIONAL_ATTRS to
+            load, the other ones being lazy-loaded on access. All fields are
+            loaded if None.
+        """
+        db_computes = cls._db_compute_node_get_all_by_uuids(
+            context, compute_uuids, expected_attrs=expected_attrs)
         return base.obj_make_list(context, cls(context), objects.ComputeNode,
-                                  db_computes)
+                                  db_computes, expected_attrs=expected_attrs)
 
     @staticmethod
     @db.select_db_reader_mode
@@ -38,6 +38,7 @@ from nova import notifications
 from nova import objects
 from nova.objects import base
 from nova.objects import fields
+from nova import server_view_cache
 from nova import utils
 
 
@@ -73,6 +74,11 @@ INSTANCE_DEFAULT_FIELDS = ['metadata', 'system_metadata',
 # Maximum count of tags to one instance
 MAX_TAG_COUNT = 50
 
+# Prefix of the expected_attrs to load specific system_metadata items of an
+# instance, like 'system_metadata.locked_reason', see
+# Instance.get_system_metadata().
+_SYSTEM_METADATA_ITEM_PREFIX = 'system_metadata.'
+
 
 def _expected_cols(expected_attrs):
     """Return expected_attrs that are columns needing joining.
@@ -85,6 +91,12 @@ def _expected_cols(expected_attrs):
 
     simple_cols = [attr for attr in expected_attrs
                    if attr in _INSTANCE_OPTIONAL_JOINED_FIELDS]
+    # Specific system_metadata items, which are only worth joining on their
+    # own if system_metadata as a whole is not.
+    if 'system_metadata' not in expected_attrs:
+        simple_cols.extend(
+            attr for attr in expected_attrs
+            if attr.startswith(_SYSTEM_METADATA_ITEM_PREFIX))
 
     complex_cols = ['extra.%s' % field
                     for field in _INSTANCE_EXTRA_FIELDS
@@ -398,6 +410,14 @@ class Instance(base.NovaPersistentObject, base.NovaObject,
             instance['metadata'] = utils.instance_meta(db_inst)
         if 'system_metadata' in expected_attrs:
             instance['system_metadata'] = utils.instance_sys_meta(db_inst)
+        else:
+            keys = [attr.partition('.')[2] for attr in expected_attrs
+                    if attr.startswith(_SYSTEM_METADATA_ITEM_PREFIX)]
+            if keys:
+                sys_meta = utils.instance_sys_meta(db_inst)
+                instance._system_metadata_keys = frozenset(keys)
+                instance._system_metadata_items = {
+                    key: sys_meta[key] for key in keys if key in sys_meta}
         if 'fault' in expected_attrs:
             instance['fault'] = (
                 objects.InstanceFault.get_latest_for_instance(
@@ -849,6 +869,12 @@ class Instance(base.NovaPersistentObject, base.NovaObject,
             db.instance_extra_update_by_uuid(context, self.uuid,
                                              self._extra_values_to_save)
 
+        # NOTE: The cached server views are also checked against the fields
+        # they are rendered from, this only drops them from the cache of this
+        # process and memcached early.
+        if self._extra_values_to_save or updates:
+            server_view_cache.invalidate(self.uuid)
+
         if not updates:
             return
 
@@ -1234,6 +1260,19 @@ class Instance(base.NovaPersistentObject, base.NovaObject,
             # is not nullable.
             return None
 
+    def get_system_metadata(self, key, default=None):
+        """Return the system_metadata item with the given key, or default.
+
+        This is like system_metadata.get(), except that if system_metadata
+        is not loaded but the item was, by a 'system_metadata.<key>'
+        expected attribute, the item is returned without lazy-loading all
+        of system_metadata.
+        """
+        if ('system_metadata' not in self and
+                key in getattr(self, '_system_metadata_keys', ())):
+            return self._system_metadata_items.get(key, default)
+        return self.system_metadata.get(key, default)
+
     @base.remotable
     def delete_metadata_key(self, key):
         """Optimized metadata delete method.
@@ -69,7 +69,10 @@ class NUMACell(base.NovaObject):
     @property
     def free_siblings(self):
         """Return available dedicated CPUs in their sibling set form."""
-        return [sibling_set & self.free_pcpus for sibling_set in self.siblings]
+        free_pcpus = (hardware.CPUSet(self.pcpuset) -
+                      hardware.CPUSet(self.pinned_cpus))
+        return [hardware.CPUSet(sibling_set) & free_pcpus
+                for sibling_set in self.siblings]
 
     @property
     def avail_pcpus(self):
@@ -86,28 +89,43 @@ class NUMACell(base.NovaObject):
         return any(len(sibling_set) > 1 for sibling_set in self.siblings)
 
     def pin_cpus(self, cpus):
-        if cpus - self.pcpuset:
+        cpus = hardware.CPUSet(cpus)
+        pcpuset = hardware.CPUSet(self.pcpuset)
+        pinned_cpus = hardware.CPUSet(self.pinned_cpus)
+        if cpus - pcpuset:
             raise exception.CPUPinningUnknown(requested=list(cpus),
-                                              available=list(self.pcpuset))
+                                              available=list(pcpuset))
 
-        if self.pinned_cpus & cpus:
-            available = list(self.pcpuset - self.pinned_cpus)
+        if pinned_cpus & cpus:
+            available = list(pcpuset - pinned_cpus)
             raise exception.CPUPinningInvalid(requested=list(cpus),
                                               available=available)
 
-        self.pinned_cpus |= cpus
+        self.pinned_cpus = set(pinned_cpus | cpus)
 
     def unpin_cpus(self, cpus):
-        if cpus - self.pcpuset:
+        cpus = hardware.CPUSet(cpus)
+        pcpuset = hardware.CPUSet(self.pcpuset)
+        pinned_cpus = hardware.CPUSet(self.pinned_cpus)
+        if cpus - pcpuset:
             raise exception.CPUUnpinningUnknown(requested=list(cpus),
-                                                available=list(self.pcpuset))
+                                                available=list(pcpuset))
 
-        if (self.pinned_cpus & cpus) != cpus:
+        if (pinned_cpus & cpus) != cpus:
             raise exception.CPUUnpinningInvalid(requested=list(cpus),
-                                                available=list(
-                                                    self.pinned_cpus))
+                                                available=list(pinned_cpus))
 
-        self.pinned_cpus -= cpus
+        self.pinned_cpus = set(pinned_cpus - cpus)
+
+    def _with_siblings(self, cpus):
+        """Return the CPUs and their thread siblings."""
+        cpus = hardware.CPUSet(cpus)
+        with_siblings = hardware.CPUSet()
+        for sib in self.siblings:
+            sib = hardware.CPUSet(sib)
+            if cpus & sib:
+                with_siblings |= sib
+        return with_siblings
 
     def pin_cpus_with_siblings(self, cpus):
         """Pin (consume) both thread siblings if one of them is requested to
@@ -115,16 +133,12 @@ class NUMACell(base.NovaObject):
 
         :param cpus: set of CPUs to pin
         """
-        pin_siblings = set()
-        for sib in self.siblings:
-            if cpus & sib:
-                # NOTE(artom) If the intersection between cpus and sib is not
-                # empty - IOW, the CPU we want to pin has sibligns - pin the
-                # sibling as well. This is because we normally got here because
-                # the `isolate` CPU thread policy is set, so we don't want to
-                # place guest CPUs on host thread siblings.
-                pin_siblings.update(sib)
-        self.pin_cpus(pin_siblings)
+        # NOTE(artom) If the intersection between cpus and a sibling set is
+        # not empty - IOW, the CPU we want to pin has sibligns - pin the
+        # sibling as well. This is because we normally got here because the
+        # `isolate` CPU thread policy is set, so we don't want to place guest
+        # CPUs on host thread siblings.
+        self.pin_cpus(self._with_siblings(cpus))
 
     def unpin_cpus_with_siblings(self, cpus):
         """Unpin (free up) both thread siblings if one of them is requested to
@@ -132,14 +146,10 @@ class NUMACell(base.NovaObject):
 
         :param cpus: set of CPUs to unpin.
         """
-        pin_siblings = set()
-        for sib in self.siblings:
-            if cpus & sib:
-                # NOTE(artom) This is the inverse operation of
-                # pin_cpus_with_siblings() - see the NOTE there. If the CPU
-                # we're unpinning has siblings, unpin the sibling as well.
-                pin_siblings.update(sib)
-        self.unpin_cpus(pin_siblings)
+        # NOTE(artom) This is the inverse operation of
+        # pin_cpus_with_siblings() - see the NOTE there. If the CPU we're
+        # unpinning has siblings, unpin the sibling as well.
+        self.unpin_cpus(self._with_siblings(cpus))
 
     def can_fit_pagesize(self, pagesize, memory, use_free=True):
         """Returns whether memory can fit into a given pagesize.
@@ -22,6 +22,7 @@ import time
 import typing as ty
 
 from keystoneauth1 import exceptions as ks_exc
+from keystoneauth1 import session as ks_session
 import os_resource_classes as orc
 import os_traits
 from oslo_log import log as logging
@@ -234,6 +235,10 @@ class SchedulerReportClient(object):
         self._provider_tree: provider_tree.ProviderTree = None
         # Track the last time we updated providers' aggregates and traits
         self._association_refresh_time: ty.Dict[str, float] = {}
+        # Count the providers whose associations were refreshed, in total and
+        # in the background, and the refreshes avoided thanks to the latter
+        self._association_stats = collections.Counter(
+            refreshed=0, revalidated=0, avoided=0)
         self._client = self._create_client()
         # NOTE(danms): Keep track of how naggy we've been
         self._warn_count = 0
@@ -282,8 +287,57 @@ class SchedulerReportClient(object):
         # Set accept header on every request to ensure we notify placement
         # service of our response body media type preferences.
         client.additional_headers = {'accept': 'application/json'}
+        self._configure_connection_pool(client)
         return client
 
+    @staticmethod
+    def _configure_connection_pool(client):
+        """Use a dedicated pool of persistent connections to placement.
+
+        The pool is sized by [placement]connection_pool_size so that
+        concurrent requests do not end up opening and closing connections
+        once the default pool of the HTTP library is exhausted.
+        """
+        pool_size = CONF.placement.connection_pool_size
+        if not pool_size:
+            return
+        # The keystoneauth session wraps a requests session, which holds the
+        # connection pools of its transport adapters.
+        requests_session = getattr(
+            getattr(client, 'session', None), 'session', None)
+        if requests_session is None:
+            LOG.warning('Unable to configure the placement connection pool: '
+                        'the placement client has no HTTP session.')
+            return
+        adapter = ks_session.TCPKeepAliveAdapter(
+            pool_connections=pool_size, pool_maxsize=pool_size)
+        for scheme in ('https://', 'http://'):
+            requests_session.mount(scheme, adapter)
+        LOG.debug('Using a pool of %d connections to placement', pool_size)
+
+    @staticmethod
+    def _run_concurrently(funcs):
+        """Call the functions concurrently and return their results in order.
+
+        At most [placement]max_concurrent_requests functions are run at the
+        same time, on the scatter-gather executor. The first exception raised
+        by a function, in order, is re-raised.
+
+        :param funcs: A list of callables taking no arguments.
+        :return: A list of the results of the callables.
+        """
+        concurrency = CONF.placement.max_concurrent_requests
+        if concurrency <= 1 or len(funcs) <= 1:
+            return [func() for func in funcs]
+
+        executor = utils.get_scatter_gather_executor()
+        results: ty.List[ty.Any] = []
+        for i in range(0, len(funcs), concurrency):
+            futures = [executor.submit(utils.pass_context_wrapper(func))
+                       for func in funcs[i:i + concurrency]]
+            results.extend(future.result() for future in futures)
+        return results
+
     def get(self, url, version=None, global_request_id=None):
         return self._client.get(url, microversion=version,
                                 global_request_id=global_request_id)
@@ -728,8 +782,9 @@ class SchedulerReportClient(object):
 
         # At this point, the whole tree exists in the local cache.
 
-        for uuid_to_refresh in uuids_to_refresh:
-            self._refresh_associations(context, uuid_to_refresh, force=True)
+        if uuids_to_refresh:
+            self._refresh_associations_for_providers(
+                context, uuids_to_refresh, force=True)
 
         return uuid
 
@@ -780,6 +835,16 @@ class SchedulerReportClient(object):
         return empty inventories.
         """
         curr = self._get_inventory(context, rp_uuid)
+        return self._refresh_inventory(rp_uuid, curr)
+
+    def _refresh_inventory(self, rp_uuid, curr):
+        """Update the cached inventory of a resource provider.
+
+        :param rp_uuid: UUID of the resource provider
+        :param curr: The inventory of the provider as returned by
+                     _get_inventory, or None.
+        :return: curr
+        """
         if curr is None:
             return None
 
@@ -816,15 +881,70 @@ class SchedulerReportClient(object):
         :raise: keystoneauth1.exceptions.ClientException if placement API
                 communication fails.
         """
-        if force or self._associations_stale(rp_uuid):
-            # Refresh inventories
+        self._refresh_associations_for_providers(
+            context, [rp_uuid], force=force, refresh_sharing=refresh_sharing)
+
+    def _get_associations(self, context, rp_uuids):
+        """Fetch the inventories, aggregates and traits of resource providers.
+
+        The requests for all the providers are issued concurrently, see
+        _run_concurrently.
+
+        :param context: The security context
+        :param rp_uuids: List of UUIDs of the resource providers
+        :return: A list, in the order of rp_uuids, of (inventory, AggInfo,
+                 TraitInfo) tuples, where inventory is the result of
+                 _get_inventory.
+        :raise: See _refresh_associations.
+        """
+        funcs = []
+        for rp_uuid in rp_uuids:
+            funcs.extend([
+                functools.partial(self._get_inventory, context, rp_uuid),
+                functools.partial(
+                    self._get_provider_aggregates, context, rp_uuid),
+                functools.partial(self.get_provider_traits, context, rp_uuid),
+            ])
+        results = self._run_concurrently(funcs)
+        return [tuple(results[i:i + 3]) for i in range(0, len(results), 3)]
+
+    def _refresh_associations_for_providers(self, context, rp_uuids,
+                                            force=False, refresh_sharing=True):
+        """Refresh inventories, aggregates, traits, and (optionally) aggregate-
+        associated sharing providers for several resource providers.
+
+        This is _refresh_associations for a list of providers, fetching the
+        associations of all of them from placement at once.
+
+        :param context: The security context
+        :param rp_uuids: List of UUIDs of the resource providers to check for
+                         fresh inventories, aggregates, and traits
+        :param force: If True, force the refresh
+        :param refresh_sharing: If True, fetch all the providers associated
+                                by aggregate with the specified providers,
+                                including their inventories, traits, and
+                                aggregates (but not *their* sharing providers).
+        :raise: See _refresh_associations.
+        """
+        rp_uuids = [rp_uuid for rp_uuid in rp_uuids
+                    if force or self._associations_stale(rp_uuid)]
+        if not rp_uuids:
+            return
+        self._association_stats['refreshed'] += len(rp_uuids)
+
+        for rp_uuid in rp_uuids:
             msg = "Refreshing inventories for resource provider %s"
             LOG.debug(msg, rp_uuid)
-            self._refresh_and_get_inventory(context, rp_uuid)
+        associations = self._get_associations(context, rp_uuids)
+
+        all_aggs = set()
+        for rp_uuid, (inventory, agg_info, trait_info) in zip(
+                rp_uuids, associations):
+            # Refresh inventories
+            self._refresh_inventory(rp_uuid, inventory)
             # Refresh aggregates
-            agg_info = self._get_provider_aggregates(context, rp_uuid)
-            # If @safe_connect makes the above return None, this will raise
-            # TypeError. Good.
+            # If @safe_connect makes _get_provider_aggregates return None,
+            # this will raise TypeError. Good.
             aggs, generation = agg_info.aggregates, agg_info.generation
             msg = ("Refreshing aggregate associations for resource provider "
                    "%s, aggregates: %s")
@@ -834,9 +954,9 @@ class SchedulerReportClient(object):
             # exist in our _provider_tree.
             self._provider_tree.update_aggregates(
                 rp_uuid, aggs, generation=generation)
+            all_aggs |= aggs
 
             # Refresh traits
-            trait_info = self.get_provider_traits(context, rp_uuid)
             traits, generation = trait_info.traits, trait_info.generation
             msg = ("Refreshing trait associations for resource provider %s, "
                    "traits: %s")
@@ -846,26 +966,30 @@ class SchedulerReportClient(object):
             self._provider_tree.update_traits(
                 rp_uuid, traits, generation=generation)
 
-            if refresh_sharing:
-                # Refresh providers associated by aggregate
-                for rp in self._get_sharing_providers(context, aggs):
-                    if not self._provider_tree.exists(rp['uuid']):
-                        # NOTE(efried): Right now sharing providers are always
-                        # treated as roots. This is deliberate. From the
-                        # context of this compute's RP, it doesn't matter if a
-                        # sharing RP is part of a tree.
-                        self._provider_tree.new_root(
-                            rp['name'], rp['uuid'],
-                            generation=rp['generation'])
-                    # Now we have to (populate or) refresh that provider's
-                    # traits, aggregates, and inventories (but not *its*
-                    # aggregate-associated providers). No need to override
-                    # force=True for newly-added providers - the missing
-                    # timestamp will always trigger them to refresh.
-                    self._refresh_associations(context, rp['uuid'],
-                                               force=force,
-                                               refresh_sharing=False)
-            self._association_refresh_time[rp_uuid] = time.time()
+        if refresh_sharing:
+            # Refresh providers associated by aggregate
+            sharing_uuids = []
+            for rp in self._get_sharing_providers(context, all_aggs):
+                if not self._provider_tree.exists(rp['uuid']):
+                    # NOTE(efried): Right now sharing providers are always
+                    # treated as roots. This is deliberate. From the
+                    # context of this compute's RP, it doesn't matter if a
+                    # sharing RP is part of a tree.
+                    self._provider_tree.new_root(
+                        rp['name'], rp['uuid'],
+                        generation=rp['generation'])
+                sharing_uuids.append(rp['uuid'])
+            # Now we have to (populate or) refresh those providers' traits,
+            # aggregates, and inventories (but not *their* aggregate-
+            # associated providers). No need to override force=True for
+            # newly-added providers - the missing timestamp will always
+            # trigger them to refresh.
+            self._refresh_associations_for_providers(
+                context, sharing_uuids, force=force, refresh_sharing=False)
+
+        refresh_time = time.time()
+        for rp_uuid in rp_uuids:
+            self._association_refresh_time[rp_uuid] = refresh_time
 
     def _associations_stale(self, uuid):
         """Respond True if aggregates and traits have not been refreshed
@@ -876,7 +1000,9 @@ class SchedulerReportClient(object):
         seconds ago.
 
         Always False if CONF.compute.resource_provider_association_refresh is
-        zero.
+        zero, or if the associations were already set and
+        CONF.compute.resource_provider_association_background_refresh is
+        enabled, in which case they are refreshed by revalidate_associations.
         """
         rpar = CONF.compute.resource_provider_association_refresh
         refresh_time = self._association_refresh_time.get(uuid, 0)
@@ -887,7 +1013,93 @@ class SchedulerReportClient(object):
             # _association_refresh_time dict anywhere, but that would take some
             # nontrivial refactoring.
             return False
-        return (time.time() - refresh_time) > rpar
+        stale = (time.time() - refresh_time) > rpar
+        if (stale and refresh_time != 0 and
+                CONF.compute.resource_provider_association_background_refresh):
+            self._association_stats['avoided'] += 1
+            return False
+        return stale
+
+    def _associations_updated(self, rp_uuid, from_cache):
+        """Account for a successful update of the inventories, aggregates or
+        traits of a provider in placement.
+
+        This is a no-op unless
+        CONF.compute.resource_provider_association_background_refresh is
+        enabled. If the update was based on the cached generation of the
+        provider, its cached associations are as fresh as they can be; else
+        they were not current, so they are invalidated.
+
+        :param rp_uuid: UUID of the updated resource provider
+        :param from_cache: True if the update was done with the generation of
+                           the provider in the cache
+        """
+        background = (
+            CONF.compute.resource_provider_association_background_refresh)
+        if not background or rp_uuid not in self._association_refresh_time:
+            return
+        if from_cache:
+            self._association_refresh_time[rp_uuid] = time.time()
+        else:
+            self._association_refresh_time.pop(rp_uuid, None)
+
+    def revalidate_associations(self, context):
+        """Refresh the cached associations which are due for revalidation.
+
+        This is only used when
+        CONF.compute.resource_provider_association_background_refresh is
+        enabled, and is meant to be called periodically. The associations of
+        a provider are due between 1 and 1.5 times
+        CONF.compute.resource_provider_association_refresh seconds after they
+        were last refreshed, depending on the provider, so that the providers
+        loaded together are not all refreshed together afterwards. At most
+        CONF.compute.resource_provider_association_refresh_batch_size
+        providers, the longest due first, are refreshed per call.
+
+        :param context: The security context
+        :return: The list of UUIDs of the refreshed resource providers.
+        :raise: See _refresh_associations.
+        """
+        rpar = CONF.compute.resource_provider_association_refresh
+        background = (
+            CONF.compute.resource_provider_association_background_refresh)
+        if not background or rpar == 0:
+            return []
+
+        now = time.time()
+        due = []
+        for rp_uuid, refresh_time in list(
+                self._association_refresh_time.items()):
+            # Seeding with the UUID gives a stable jitter for each provider.
+            jitter = random.Random(rp_uuid).random() / 2
+            deadline = refresh_time + rpar * (1 + jitter)
+            if deadline <= now and self._provider_tree.exists(rp_uuid):
+                due.append((deadline, rp_uuid))
+        due.sort()
+        batch_size = (
+            CONF.compute.resource_provider_association_refresh_batch_size)
+        rp_uuids = [rp_uuid for _deadline, rp_uuid in due[:batch_size]]
+        if not rp_uuids:
+            return []
+
+        LOG.debug('Revalidating associations for %(count)d out of %(due)d '
+                  'resource providers due.',
+                  {'count': len(rp_uuids), 'due': len(due)})
+        self._refresh_associations_for_providers(context, rp_uuids, force=True)
+        self._association_stats['revalidated'] += len(rp_uuids)
+        return rp_uuids
+
+    def get_association_stats(self):
+        """Returns a dict of counters about the association cache, with keys:
+
+        * refreshed: The number of provider association refreshes.
+        * revalidated: How many of those were done by revalidate_associations.
+        * avoided: The number of refreshes that the expiry of
+          CONF.compute.resource_provider_association_refresh would have
+          triggered, were it not for
+          CONF.compute.resource_provider_association_background_refresh.
+        """
+        return dict(self._association_stats)
 
     def get_provider_tree_and_ensure_root(self, context, rp_uuid, name=None,
                                           parent_provider_uuid=None):
@@ -920,6 +1132,31 @@ class SchedulerReportClient(object):
         # Return a *copy* of the tree.
         return copy.deepcopy(self._provider_tree)
 
+    def get_provider_subtree_and_ensure_root(self, context, rp_uuid,
+                                             name=None):
+        """Returns a fresh ProviderTree representing only the providers which
+        are in the same tree as the specified provider, including their
+        aggregates, traits, and inventories.
+
+        Unlike get_provider_tree_and_ensure_root, the cost of this does not
+        grow with the number of other trees in the local cache, which makes
+        it suitable for compute services managing many nodes. The result is
+        meant to be flushed back with update_from_provider_trees.
+
+        If the specified provider does not exist, it is created as a root
+        provider with the specified UUID and name.
+
+        :param context: The security context
+        :param rp_uuid: UUID of the resource provider for which to populate the
+                        tree.  (This doesn't need to be the UUID of the root.)
+        :param name: Optional name for the resource provider if the record
+                     does not exist. If empty, the name is set to the UUID
+                     value
+        :return: A new ProviderTree object.
+        """
+        self._ensure_resource_provider(context, rp_uuid, name=name)
+        return self._provider_tree.copy_tree(rp_uuid)
+
     def set_inventory_for_provider(self, context, rp_uuid, inv_data):
         """Given the UUID of a provider, set the inventory records for the
         provider to the supplied dict of resources.
@@ -979,6 +1216,7 @@ class SchedulerReportClient(object):
             self._provider_tree.update_inventory(
                 rp_uuid, json['inventories'],
                 generation=json['resource_provider_generation'])
+            self._associations_updated(rp_uuid, True)
             return
 
         # Some error occurred; log it
@@ -1003,7 +1241,9 @@ class SchedulerReportClient(object):
             if err['code'] == 'placement.inventory.inuse':
                 # The error detail includes the resource class and provider.
                 raise exception.InventoryInUse(err['detail'])
-            # Other conflicts are generation mismatch: raise conflict exception
+            # Other conflicts are generation mismatch: invalidate the
+            # associations and raise conflict exception
+            self._association_refresh_time.pop(rp_uuid, None)
             raise exception.ResourceProviderUpdateConflict(
                 uuid=rp_uuid, generation=generation, error=resp.text)
 
@@ -1099,8 +1339,9 @@ class SchedulerReportClient(object):
         # that method doesn't return content, and we need to update the cached
         # provider tree with the new generation.
         traits = list(traits) if traits else []
+        cached_generation = self._provider_tree.data(rp_uuid).generation
         if generation is None:
-            generation = self._provider_tree.data(rp_uuid).generation
+            generation = cached_generation
         payload = {
             'resource_provider_generation': generation,
             'traits': traits,
@@ -1113,6 +1354,8 @@ class SchedulerReportClient(object):
             self._provider_tree.update_traits(
                 rp_uuid, json['traits'],
                 generation=json['resource_provider_generation'])
+            self._associations_updated(
+                rp_uuid, generation == cached_generation)
             return
 
         # Some error occurred; log it
@@ -1128,8 +1371,10 @@ class SchedulerReportClient(object):
         }
         LOG.error(msg, args)
 
-        # If a conflict, raise special conflict exception
+        # If a conflict, invalidate the associations and raise special
+        # conflict exception
         if resp.status_code == 409:
+            self._association_refresh_time.pop(rp_uuid, None)
             raise exception.ResourceProviderUpdateConflict(
                 uuid=rp_uuid, generation=generation, error=resp.text)
 
@@ -1171,13 +1416,14 @@ class SchedulerReportClient(object):
         # Check whether aggregates need updating.  We can only do this if we
         # have a cache entry with a matching generation.
         try:
-            if (self._provider_tree.data(rp_uuid).generation == generation and
-                    not self._provider_tree.have_aggregates_changed(
-                        rp_uuid, aggregates)):
-                return
+            cached_generation = self._provider_tree.data(rp_uuid).generation
         except ValueError:
             # Not found in the cache; proceed
-            pass
+            cached_generation = None
+        if (cached_generation == generation and
+                not self._provider_tree.have_aggregates_changed(
+                    rp_uuid, aggregates)):
+            return
 
         url = '/resource_providers/%s/aggregates' % rp_uuid
         aggregates = list(aggregates) if aggregates else []
@@ -1198,6 +1444,8 @@ class SchedulerReportClient(object):
                 if use_cache:
                     # The entry should've been there
                     raise
+            self._associations_updated(
+                rp_uuid, generation == cached_generation)
             return
 
         # Some error occurred; log it
@@ -1372,6 +1620,20 @@ class SchedulerReportClient(object):
         :raises: keystoneauth1.exceptions.base.ClientException on failure to
                  communicate with the placement API
         """
+        self._update_from_provider_tree(
+            context, new_tree, self._provider_tree.get_provider_uuids(),
+            allocations=allocations)
+
+    def _update_from_provider_tree(self, context, new_tree, old_uuids,
+                                   allocations=None):
+        """Flush changes from a specified ProviderTree back to placement.
+
+        See update_from_provider_tree.
+
+        :param old_uuids: The UUIDs, in top-down order, of the providers in the
+                          local cache which new_tree supersedes. Any of them
+                          missing from new_tree is deleted.
+        """
         # NOTE(efried): We currently do not handle the "rename" case.  This is
         # where new_tree contains a provider named Y whose UUID already exists
         # but is named X.
@@ -1421,7 +1683,6 @@ class SchedulerReportClient(object):
         # intentional) so we need to grab up front any data we need to operate
         # on in its "original" form.
         old_tree = self._provider_tree
-        old_uuids = old_tree.get_provider_uuids()
         new_uuids = new_tree.get_provider_uuids()
         uuids_to_add = set(new_uuids) - set(old_uuids)
         uuids_to_remove = set(old_uuids) - set(new_uuids)
@@ -1465,12 +1726,15 @@ class SchedulerReportClient(object):
             # the cache are now stale. The inventory update below will short
             # out, but we would still bounce with a provider generation
             # conflict on the trait and aggregate updates.
-            for uuid in new_uuids:
-                # TODO(efried): GET /resource_providers?uuid=in:[list] would be
-                # handy here. Meanwhile, this is an already-written, if not
-                # obvious, way to refresh provider generations in the cache.
+            # TODO(efried): GET /resource_providers?uuid=in:[list] would be
+            # handy here. Meanwhile, this is an already-written, if not
+            # obvious, way to refresh provider generations in the cache.
+            inventories = self._run_concurrently([
+                functools.partial(self._get_inventory, context, uuid)
+                for uuid in new_uuids])
+            for uuid, inventory in zip(new_uuids, inventories):
                 with catch_all(uuid):
-                    self._refresh_and_get_inventory(context, uuid)
+                    self._refresh_inventory(uuid, inventory)
 
         # Now we can do provider deletions, because we should have moved any
         # allocations off of them via reshape.
@@ -1505,6 +1769,81 @@ class SchedulerReportClient(object):
                     context, pd.uuid, pd.aggregates)
                 self.set_traits_for_provider(context, pd.uuid, pd.traits)
 
+    def _has_provider_tree_changed(self, new_tree):
+        """Returns True if flushing the specified single-tree ProviderTree
+        would change anything in placement, according to the local cache.
+        """
+        new_uuids = new_tree.get_provider_uuids()
+        try:
+            old_uuids = self._provider_tree.get_provider_uuids_in_tree(
+                new_uuids[0])
+        except ValueError:
+            return True
+        if set(old_uuids) != set(new_uuids):
+            return True
+        for uuid in new_uuids:
+            pd = new_tree.data(uuid)
+            if (self._provider_tree.has_inventory_changed(
+                    uuid, pd.inventory) or
+                    self._provider_tree.have_aggregates_changed(
+                        uuid, pd.aggregates) or
+                    self._provider_tree.have_traits_changed(
+                        uuid, pd.traits)):
+                return True
+        return False
+
+    def update_from_provider_trees(self, context, new_trees):
+        """Flush changes from several ProviderTrees back to placement.
+
+        Each of the specified ProviderTrees must contain a single tree, such
+        as returned by get_provider_subtree_and_ensure_root, and the trees
+        must not overlap. All the trees are first compared against the local
+        cache in a single pass, and only the ones where a provider was added
+        or removed, or where a provider's inventory, aggregates or traits
+        differ, are flushed. Those are flushed concurrently, with at most
+        [placement]max_concurrent_requests trees in flight; the providers of a
+        given tree are still flushed one after the other.
+
+        Reshapes are not supported here, and a failure to flush one tree does
+        not prevent the other ones from being flushed. As with
+        update_from_provider_tree, the caches of a tree which failed to be
+        flushed are invalidated.
+
+        :param context: The security context
+        :param new_trees: An iterable of ProviderTree instances representing
+                          the desired state of their providers in placement.
+        :return: A dict, keyed by root provider UUID, of the exception raised
+                 while flushing each tree which failed, for instance
+                 ResourceProviderUpdateConflict if the tree should be flushed
+                 again from a fresh view of placement, or
+                 ResourceProviderSyncFailed.
+        """
+        new_trees = list(new_trees)
+        changed = [tree for tree in new_trees
+                   if self._has_provider_tree_changed(tree)]
+        LOG.debug('Flushing %(changed)d out of %(total)d provider trees to '
+                  'placement.', {'changed': len(changed),
+                                 'total': len(new_trees)})
+
+        def flush(new_tree, root_uuid):
+            try:
+                try:
+                    old_uuids = self._provider_tree.get_provider_uuids(
+                        root_uuid)
+                except ValueError:
+                    old_uuids = []
+                self._update_from_provider_tree(context, new_tree, old_uuids)
+            except Exception as e:
+                return e
+
+        root_uuids = [tree.get_provider_uuids()[0] for tree in changed]
+        errors = self._run_concurrently([
+            functools.partial(flush, tree, root_uuid)
+            for tree, root_uuid in zip(changed, root_uuids)])
+        return {root_uuid: error
+                for root_uuid, error in zip(root_uuids, errors)
+                if error is not None}
+
     # TODO(efried): Cut users of this method over to get_allocs_for_consumer
     def get_allocations_for_consumer(self, context, consumer):
         """Legacy method for allocation retrieval.
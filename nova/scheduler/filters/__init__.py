@@ -18,8 +18,13 @@ Scheduler host filters
 """
 from oslo_log import log as logging
 
+import nova.conf
 from nova import filters
+# NOTE: imported by full name so it does not shadow the
+# nova.scheduler.filters.utils module
+import nova.utils
 
+CONF = nova.conf.CONF
 LOG = logging.getLogger(__name__)
 
 
@@ -37,6 +42,13 @@ class BaseHostFilter(filters.BaseFilter):
     # specially.
     RUN_ON_REBUILD = False
 
+    # The HostState attributes computed from optional compute node fields
+    # (see nova.scheduler.host_manager.LAZY_HOST_STATE_ATTRS) this filter
+    # reads. When [filter_scheduler]compute_node_projection is enabled, only
+    # the compute node fields needed by the enabled filters and weighers are
+    # loaded. None means that the filter may read any attribute.
+    HOST_STATE_ATTRS = None
+
     def _filter_one(self, obj, spec):
         """Return True if the object passes the filter, otherwise False."""
         # Do this here so we don't get scheduler.filters.utils
@@ -95,9 +107,19 @@ class CandidateFilterMixin:
 
 
 class HostFilterHandler(filters.BaseFilterHandler):
+
+    # The minimum number of hosts in a partition when filtering in parallel.
+    min_partition_size = 50
+
     def __init__(self):
         super(HostFilterHandler, self).__init__(BaseHostFilter)
 
+    def _get_partition_count(self, num_objs):
+        partitions = CONF.filter_scheduler.filter_partitions
+        if partitions <= 1 or not nova.utils.concurrency_mode_threading():
+            return 1
+        return max(1, min(partitions, num_objs // self.min_partition_size))
+
 
 def all_filters():
     """Return a list of filter classes found in this directory.
@@ -25,6 +25,7 @@ class ComputeFilter(filters.BaseHostFilter):
     """Filter on active Compute nodes."""
 
     RUN_ON_REBUILD = False
+    HOST_STATE_ATTRS = ()
 
     def __init__(self):
         self.servicegroup_api = servicegroup.API()
@@ -37,6 +37,7 @@ class ImagePropertiesFilter(filters.BaseHostFilter):
     """
 
     RUN_ON_REBUILD = True
+    HOST_STATE_ATTRS = ('supported_instances', 'cpu_info')
 
     # Image Properties and Compute Capabilities do not change within
     # a request
@@ -26,6 +26,7 @@ class IsolatedHostsFilter(filters.BaseHostFilter):
     run_filter_once_per_request = True
 
     RUN_ON_REBUILD = True
+    HOST_STATE_ATTRS = ()
 
     def host_passes(self, host_state, spec_obj):
         """Result Matrix with 'restrict_isolated_hosts_to_isolated_images' set
@@ -33,6 +33,7 @@ class MetricsFilter(filters.BaseHostFilter):
     """
 
     RUN_ON_REBUILD = False
+    HOST_STATE_ATTRS = ('metrics',)
 
     def __init__(self):
         super(MetricsFilter, self).__init__()
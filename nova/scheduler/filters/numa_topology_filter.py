@@ -15,7 +15,7 @@ from oslo_log import log as logging
 from nova import objects
 from nova.objects import fields
 from nova.scheduler import filters
-from nova.virt import hardware
+from nova.scheduler import utils
 
 LOG = logging.getLogger(__name__)
 
@@ -31,6 +31,7 @@ class NUMATopologyFilter(
     # requested image would alter the NUMA constraints we reject the rebuild
     # request and therefore do not need to run this filter on rebuild.
     RUN_ON_REBUILD = False
+    HOST_STATE_ATTRS = ('numa_topology', 'pci_stats')
 
     def _satisfies_cpu_policy(self, host_state, extra_specs, image_props):
         """Check that the host_state provided satisfies any available
@@ -102,7 +103,7 @@ class NUMATopologyFilter(
 
             good_candidates = self.filter_candidates(
                 host_state,
-                lambda candidate: hardware.numa_fit_instance_to_host(
+                lambda candidate: utils.numa_fit_instance_to_host(
                     host_topology,
                     requested_topology,
                     limits=limits,
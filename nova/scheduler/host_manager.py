@@ -18,6 +18,7 @@ Manage hosts in the current zone.
 """
 
 import collections
+import copy
 import functools
 import time
 
@@ -31,6 +32,7 @@ from nova import exception
 from nova import objects
 from nova.pci import stats as pci_stats
 from nova.scheduler import filters
+from nova.scheduler import utils as scheduler_utils
 from nova.scheduler import weights
 from nova import utils
 from nova.virt import hardware
@@ -41,6 +43,24 @@ CONF = nova.conf.CONF
 LOG = logging.getLogger(__name__)
 HOST_INSTANCE_SEMAPHORE = "host_instance"
 
+# HostState attributes computed from the optional ComputeNode fields (see
+# nova.objects.compute_node.COMPUTE_NODE_OPTIONAL_ATTRS), mapped to the fields
+# they are computed from. Filters and weighers declare which of them they
+# read with their HOST_STATE_ATTRS attribute. If the ComputeNode was loaded
+# without some of these fields, the matching attributes are only computed on
+# first access.
+LAZY_HOST_STATE_ATTRS = {
+    'numa_topology': ('numa_topology',),
+    'pci_stats': ('numa_topology', 'pci_device_pools'),
+    'supported_instances': ('supported_hv_specs',),
+    'cpu_info': ('cpu_info',),
+    'stats': ('stats',),
+    'num_instances': ('stats',),
+    'num_io_ops': ('stats',),
+    'failed_builds': ('stats',),
+    'metrics': ('metrics',),
+}
+
 
 class ReadOnlyDict(collections.UserDict):
     """A read-only dict."""
@@ -221,45 +241,89 @@ class HostState(object):
         self.vcpus_total = compute.vcpus
         self.vcpus_used = compute.vcpus_used
         self.updated = compute.updated_at
-        # the ComputeNode.numa_topology field is a StringField so deserialize
-        self.numa_topology = objects.NUMATopology.obj_from_db_obj(
-            compute.numa_topology) if compute.numa_topology else None
-        self.pci_stats = pci_stats.PciDeviceStats(
-            self.numa_topology,
-            stats=compute.pci_device_pools)
 
         # All virt drivers report host_ip
         self.host_ip = compute.host_ip
         self.hypervisor_type = compute.hypervisor_type
         self.hypervisor_version = compute.hypervisor_version
         self.hypervisor_hostname = compute.hypervisor_hostname
-        self.cpu_info = compute.cpu_info
-        if compute.supported_hv_specs:
-            self.supported_instances = [spec.to_list() for spec
-                                        in compute.supported_hv_specs]
-        else:
-            self.supported_instances = []
 
-        # Don't store stats directly in host_state to make sure these don't
-        # overwrite any values, or get overwritten themselves. Store in self so
-        # filters can schedule with them.
-        self.stats = compute.stats or {}
+        # update allocation ratios given by the ComputeNode object
+        self.cpu_allocation_ratio = compute.cpu_allocation_ratio
+        self.ram_allocation_ratio = compute.ram_allocation_ratio
+        self.disk_allocation_ratio = compute.disk_allocation_ratio
+
+        # Defer the attributes computed from fields the compute node was
+        # loaded without, they are computed by __getattr__ when first read.
+        self._lazy_compute = None
+        lazy_attrs = set()
+        for attr, compute_fields in LAZY_HOST_STATE_ATTRS.items():
+            if not all(compute.obj_attr_is_set(f) for f in compute_fields):
+                lazy_attrs.add(attr)
+                self.__dict__.pop(attr, None)
+        if lazy_attrs:
+            self._lazy_compute = compute
+        self._update_optional_attrs(
+            compute, set(LAZY_HOST_STATE_ATTRS) - lazy_attrs)
+
+    def _update_optional_attrs(self, compute, attrs):
+        """Update the given LAZY_HOST_STATE_ATTRS from a ComputeNode."""
+        if 'numa_topology' in attrs:
+            # the ComputeNode.numa_topology field is a StringField so
+            # deserialize
+            self.numa_topology = objects.NUMATopology.obj_from_db_obj(
+                compute.numa_topology) if compute.numa_topology else None
+        if 'pci_stats' in attrs:
+            self.pci_stats = pci_stats.PciDeviceStats(
+                self.numa_topology,
+                stats=compute.pci_device_pools)
+
+        if 'cpu_info' in attrs:
+            self.cpu_info = compute.cpu_info
+        if 'supported_instances' in attrs:
+            if compute.supported_hv_specs:
+                self.supported_instances = [spec.to_list() for spec
+                                            in compute.supported_hv_specs]
+            else:
+                self.supported_instances = []
+
+        if 'stats' in attrs:
+            # Don't store stats directly in host_state to make sure these
+            # don't overwrite any values, or get overwritten themselves. Store
+            # in self so filters can schedule with them.
+            self.stats = compute.stats or {}
 
         # Track number of instances on host
-        self.num_instances = int(self.stats.get('num_instances', 0))
+        if 'num_instances' in attrs:
+            self.num_instances = int(self.stats.get('num_instances', 0))
 
-        self.num_io_ops = int(self.stats.get('io_workload', 0))
+        if 'num_io_ops' in attrs:
+            self.num_io_ops = int(self.stats.get('io_workload', 0))
 
         # update metrics
-        self.metrics = objects.MonitorMetricList.from_json(compute.metrics)
-
-        # update allocation ratios given by the ComputeNode object
-        self.cpu_allocation_ratio = compute.cpu_allocation_ratio
-        self.ram_allocation_ratio = compute.ram_allocation_ratio
-        self.disk_allocation_ratio = compute.disk_allocation_ratio
+        if 'metrics' in attrs:
+            self.metrics = objects.MonitorMetricList.from_json(
+                compute.metrics)
 
         # update failed_builds counter reported by the compute
-        self.failed_builds = int(self.stats.get('failed_builds', 0))
+        if 'failed_builds' in attrs:
+            self.failed_builds = int(self.stats.get('failed_builds', 0))
+
+    def __getattr__(self, name):
+        # NOTE: This is only called for attributes which are not set, which
+        # is the case of the ones deferred by _update_from_compute_node.
+        compute = self.__dict__.get('_lazy_compute')
+        if compute is None or name not in LAZY_HOST_STATE_ATTRS:
+            raise AttributeError(name)
+        LOG.debug("Lazy-loading '%(attr)s' on host state %(host)s "
+                  "(%(node)s)",
+                  {'attr': name, 'host': self.host, 'node': self.nodename})
+        self._lazy_compute = None
+        self._update_optional_attrs(
+            compute,
+            [attr for attr in LAZY_HOST_STATE_ATTRS
+             if attr not in self.__dict__])
+        return self.__dict__[name]
 
     def consume_from_request(self, spec_obj):
         """Incrementally update host state from a RequestSpec object."""
@@ -295,12 +359,13 @@ class HostState(object):
 
         # Calculate the NUMA usage...
         if self.numa_topology and spec_obj.numa_topology:
-            spec_obj.numa_topology = hardware.numa_fit_instance_to_host(
-                self.numa_topology, spec_obj.numa_topology,
-                limits=self.limits.get('numa_topology'),
-                pci_requests=pci_requests,
-                pci_stats=self.pci_stats,
-                provider_mapping=spec_obj.get_request_group_mapping())
+            spec_obj.numa_topology = (
+                scheduler_utils.numa_fit_instance_to_host(
+                    self.numa_topology, spec_obj.numa_topology,
+                    limits=self.limits.get('numa_topology'),
+                    pci_requests=pci_requests,
+                    pci_stats=self.pci_stats,
+                    provider_mapping=spec_obj.get_request_group_mapping()))
 
             self.numa_topology = hardware.numa_usage_from_instance_numa(
                 self.numa_topology, spec_obj.numa_topology)
@@ -321,7 +386,27 @@ class HostState(object):
         # is always an IO operation because we want to move the instance
         self.num_io_ops += 1
 
+    def copy(self):
+        """Return a copy of this HostState for use by a single request.
+
+        The copy can be filtered, weighed and consumed from without changing
+        this HostState.
+        """
+        host_state = copy.copy(self)
+        host_state.limits = {}
+        host_state.allocation_candidates = []
+        # NOTE: The PCI stats are updated in place when consuming from a
+        # request, so they must not be shared, unless they were not computed
+        # yet.
+        if 'pci_stats' in self.__dict__:
+            host_state.pci_stats = copy.deepcopy(self.pci_stats)
+        return host_state
+
     def __repr__(self):
+        # Do not compute these if they were deferred
+        attrs = vars(self)
+        num_io_ops = attrs.get('num_io_ops')
+        num_instances = attrs.get('num_instances')
         return (
             "(%(host)s, %(node)s) ram: %(free_ram)sMB "
             "disk: %(free_disk)sMB io_ops: %(num_io_ops)s "
@@ -332,13 +417,77 @@ class HostState(object):
                 "node": self.nodename,
                 "free_ram": self.free_ram_mb,
                 "free_disk": self.free_disk_mb,
-                "num_io_ops": self.num_io_ops,
-                "num_instances": self.num_instances,
+                "num_io_ops": num_io_ops,
+                "num_instances": num_instances,
                 "num_a_c": len(self.allocation_candidates),
             }
         )
 
 
+class HostStateCacheStats(object):
+    """Counters of the HostManager host state cache."""
+
+    def __init__(self):
+        # Number of host states found in the cache
+        self.hits = 0
+        # Number of host states created as they were not in the cache
+        self.misses = 0
+        # Number of cached host states refreshed from their compute node,
+        # service or aggregates
+        self.compute_refreshes = 0
+        self.service_refreshes = 0
+        self.aggregate_refreshes = 0
+        # Time spent building and refreshing host states, in seconds
+        self.refresh_time = 0.0
+
+    @property
+    def hit_ratio(self):
+        lookups = self.hits + self.misses
+        return float(self.hits) / lookups if lookups else 0.0
+
+    def add(self, other):
+        self.hits += other.hits
+        self.misses += other.misses
+        self.compute_refreshes += other.compute_refreshes
+        self.service_refreshes += other.service_refreshes
+        self.aggregate_refreshes += other.aggregate_refreshes
+        self.refresh_time += other.refresh_time
+
+    def __repr__(self):
+        return (
+            "hits: %(hits)d, misses: %(misses)d, "
+            "hit ratio: %(ratio).2f, compute refreshes: %(compute)d, "
+            "service refreshes: %(service)d, "
+            "aggregate refreshes: %(aggregate)d, "
+            "refresh time: %(time).3fs"
+            % {
+                "hits": self.hits,
+                "misses": self.misses,
+                "ratio": self.hit_ratio,
+                "compute": self.compute_refreshes,
+                "service": self.service_refreshes,
+                "aggregate": self.aggregate_refreshes,
+                "time": self.refresh_time,
+            }
+        )
+
+
+class _HostStateCacheEntry(object):
+    """A cached HostState and the versions of the data it was built from."""
+
+    def __init__(self, host_state):
+        self.host_state = host_state
+        self.compute_updated_at = None
+        self.service_key = None
+        self.aggregates_generation = None
+
+
+def _service_cache_key(service):
+    return tuple(service.get(field, None) for field in (
+        'updated_at', 'last_seen_up', 'disabled', 'disabled_reason',
+        'forced_down', 'version'))
+
+
 class HostManager(object):
     """Base HostManager class."""
 
@@ -363,6 +512,9 @@ class HostManager(object):
         # Dict of set of aggregate IDs keyed by the name of the host belonging
         # to those aggregates
         self.host_aggregates_map = collections.defaultdict(set)
+        # Incremented each time the aggregates are changed, so that the host
+        # state cache knows when to refresh the aggregates of its entries
+        self._aggregates_generation = 0
         self._init_aggregates()
         self.track_instance_changes = (
                 CONF.filter_scheduler.track_instance_changes)
@@ -391,6 +543,7 @@ class HostManager(object):
             self._update_aggregate(aggregates)
 
     def _update_aggregate(self, aggregate):
+        self._aggregates_generation += 1
         self.aggs_by_id[aggregate.id] = aggregate
         for host in aggregate.hosts:
             self.host_aggregates_map[host].add(aggregate.id)
@@ -404,6 +557,7 @@ class HostManager(object):
     def delete_aggregate(self, aggregate):
         """Deletes internal HostManager information about a specific aggregate.
         """
+        self._aggregates_generation += 1
         if aggregate.id in self.aggs_by_id:
             del self.aggs_by_id[aggregate.id]
         for host in self.host_aggregates_map:
@@ -614,8 +768,22 @@ class HostManager(object):
                     return []
             hosts = name_to_cls_map.values()
 
-        return self.filter_handler.get_filtered_objects(self.enabled_filters,
-                hosts, spec_obj, index)
+        numa_fit_cache = scheduler_utils.get_numa_fit_cache()
+        if numa_fit_cache is None:
+            return self.filter_handler.get_filtered_objects(
+                self.enabled_filters, hosts, spec_obj, index)
+
+        # NOTE: concurrent requests share the cache, so the counters of this
+        # request may include some fits done for other requests.
+        start_stats = numa_fit_cache.stats.copy()
+        result = self.filter_handler.get_filtered_objects(
+            self.enabled_filters, hosts, spec_obj, index)
+        LOG.debug("NUMA fit cache for this request: %(stats)s. "
+                  "Cumulated: %(total)s (%(entries)d entries)",
+                  {'stats': numa_fit_cache.stats - start_stats,
+                   'total': numa_fit_cache.stats,
+                   'entries': len(numa_fit_cache)})
+        return result
 
     def get_weighed_hosts(self, hosts, spec_obj):
         """Weigh the hosts."""
@@ -638,6 +806,8 @@ class HostManager(object):
          - services is a dict of services indexed by hostname
         """
 
+        expected_attrs = self._get_compute_node_attrs()
+
         def targeted_operation(cctxt):
             services = objects.ServiceList.get_by_binary(
                 cctxt, 'nova-compute', include_disabled=True)
@@ -645,7 +815,7 @@ class HostManager(object):
                 return services, objects.ComputeNodeList.get_all(cctxt)
             else:
                 return services, objects.ComputeNodeList.get_all_by_uuids(
-                    cctxt, compute_uuids)
+                    cctxt, compute_uuids, expected_attrs=expected_attrs)
 
         timeout = context_module.CELL_TIMEOUT
         results = context_module.scatter_gather_cells(context, cells, timeout,
@@ -664,6 +834,24 @@ class HostManager(object):
                                  for service in _services})
         return compute_nodes, services
 
+    def _get_compute_node_attrs(self):
+        """Get the optional ComputeNode fields to load for the HostStates.
+
+        :returns: The list of optional ComputeNode fields the HostState
+            attributes read by the enabled filters and weighers are computed
+            from, or None if all fields must be loaded.
+        """
+        if not CONF.filter_scheduler.compute_node_projection:
+            return None
+        attrs = set()
+        for obj in list(self.enabled_filters) + list(self.weighers):
+            host_state_attrs = getattr(obj, 'HOST_STATE_ATTRS', None)
+            if host_state_attrs is None:
+                return None
+            for attr in host_state_attrs:
+                attrs.update(LAZY_HOST_STATE_ATTRS.get(attr, ()))
+        return sorted(attrs)
+
     def _get_cell_by_host(self, ctxt, host):
         '''Get CellMapping object of a cell the given host belongs to.'''
         try:
@@ -764,6 +952,12 @@ class HostManager(object):
         # cell a particular host is in (used with self.cells).
         self.host_to_cell_uuid = {}
 
+        # Dict, keyed by compute node UUID, of _HostStateCacheEntry objects
+        # used when the [filter_scheduler]host_state_cache option is enabled.
+        # Cached entries are refreshed incrementally for each request.
+        self._host_state_cache = {}
+        self.host_state_cache_stats = HostStateCacheStats()
+
     def get_host_states_by_uuids(self, context, compute_uuids, spec_obj):
 
         if not self.cells:
@@ -792,6 +986,10 @@ class HostManager(object):
 
         Also updates the HostStates internal mapping for the HostManager.
         """
+        if CONF.filter_scheduler.host_state_cache:
+            return self._get_cached_host_states(
+                context, compute_nodes, services)
+
         # Get resource usage across the available compute nodes:
         host_state_map = {}
         seen_nodes = set()
@@ -826,6 +1024,85 @@ class HostManager(object):
 
         return (host_state_map[host] for host in seen_nodes)
 
+    def _get_cached_host_states(self, context, compute_nodes, services):
+        """Returns a generator over HostStates given a list of computes.
+
+        Unlike _get_host_states, HostStates are kept between requests and
+        only refreshed from the compute node, service or aggregates when these
+        changed. A copy of each cached HostState is returned, so the
+        resources consumed by this request are not seen by other requests.
+        """
+        stats = HostStateCacheStats()
+        host_state_map = {}
+        for cell_uuid, computes in compute_nodes.items():
+            for compute in computes:
+                service = services.get(compute.host)
+
+                if not service:
+                    LOG.warning(
+                        "No compute service record found for host %(host)s",
+                        {'host': compute.host})
+                    continue
+                state_key = (compute.host, compute.hypervisor_hostname)
+                if state_key in host_state_map:
+                    continue
+                host_state = self._refresh_cached_host_state(
+                    cell_uuid, compute, service, stats)
+                host_state.instances = self._get_instance_info(
+                    context, compute)
+                host_state_map[state_key] = host_state
+
+        self.host_state_cache_stats.add(stats)
+        LOG.debug("Host state cache for this request: %(stats)s. "
+                  "Cumulated: %(total)s",
+                  {'stats': stats, 'total': self.host_state_cache_stats})
+        return iter(host_state_map.values())
+
+    def _refresh_cached_host_state(self, cell_uuid, compute, service, stats):
+        """Return a copy of the up to date cached HostState of a compute."""
+        start = time.monotonic()
+        host = compute.host
+        node = compute.hypervisor_hostname
+        entry = self._host_state_cache.get(compute.uuid)
+        if (entry is None or entry.host_state.cell_uuid != cell_uuid or
+                entry.host_state.host != host or
+                entry.host_state.nodename != node):
+            entry = _HostStateCacheEntry(
+                self.host_state_cls(host, node, cell_uuid, compute=compute))
+            self._host_state_cache[compute.uuid] = entry
+            stats.misses += 1
+        else:
+            stats.hits += 1
+
+        refreshed_compute = None
+        if (entry.compute_updated_at is None or
+                entry.compute_updated_at != compute.updated_at):
+            refreshed_compute = compute
+            entry.compute_updated_at = compute.updated_at
+            stats.compute_refreshes += 1
+
+        refreshed_service = None
+        service_key = _service_cache_key(service)
+        if entry.service_key != service_key:
+            refreshed_service = dict(service)
+            entry.service_key = service_key
+            stats.service_refreshes += 1
+
+        refreshed_aggregates = None
+        if entry.aggregates_generation != self._aggregates_generation:
+            refreshed_aggregates = self._get_aggregates_info(host)
+            entry.aggregates_generation = self._aggregates_generation
+            stats.aggregate_refreshes += 1
+
+        if (refreshed_compute is not None or refreshed_service is not None or
+                refreshed_aggregates is not None):
+            entry.host_state.update(
+                refreshed_compute, refreshed_service, refreshed_aggregates)
+
+        host_state = entry.host_state.copy()
+        stats.refresh_time += time.monotonic() - start
+        return host_state
+
     def _get_aggregates_info(self, host):
         return [self.aggs_by_id[agg_id] for agg_id in
                 self.host_aggregates_map[host]]
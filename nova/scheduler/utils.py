@@ -1110,6 +1110,7 @@ _SUPPORTS_AFFINITY = None
 _SUPPORTS_ANTI_AFFINITY = None
 _SUPPORTS_SOFT_AFFINITY = None
 _SUPPORTS_SOFT_ANTI_AFFINITY = None
+_NUMA_FIT_CACHE = None
 
 
 def reset_globals():
@@ -1121,6 +1122,38 @@ def reset_globals():
     _SUPPORTS_SOFT_AFFINITY = None
     global _SUPPORTS_SOFT_ANTI_AFFINITY
     _SUPPORTS_SOFT_ANTI_AFFINITY = None
+    global _NUMA_FIT_CACHE
+    _NUMA_FIT_CACHE = None
+
+
+def get_numa_fit_cache():
+    """Return the NUMA fit cache of the scheduler, or None if disabled."""
+    global _NUMA_FIT_CACHE
+    size = CONF.filter_scheduler.numa_fit_cache_size
+    if not size:
+        return None
+    if _NUMA_FIT_CACHE is None or _NUMA_FIT_CACHE.maxsize != size:
+        _NUMA_FIT_CACHE = hardware.NUMAFitCache(size)
+    return _NUMA_FIT_CACHE
+
+
+def numa_fit_instance_to_host(host_topology, instance_topology,
+                              provider_mapping, limits=None,
+                              pci_requests=None, pci_stats=None):
+    """Fit the instance topology onto the host topology.
+
+    This is hardware.numa_fit_instance_to_host going through the NUMA fit
+    cache when [filter_scheduler]numa_fit_cache_size is set.
+    """
+    numa_fit_cache = get_numa_fit_cache()
+    if numa_fit_cache is None:
+        return hardware.numa_fit_instance_to_host(
+            host_topology, instance_topology,
+            provider_mapping=provider_mapping, limits=limits,
+            pci_requests=pci_requests, pci_stats=pci_stats)
+    return numa_fit_cache.fit(
+        host_topology, instance_topology, provider_mapping,
+        limits=limits, pci_requests=pci_requests, pci_stats=pci_stats)
 
 
 def _get_group_details(context, instance_uuid, user_group_hosts=None):
@@ -17,8 +17,14 @@
 Scheduler host weights
 """
 
+from oslo_log import log as logging
+
+import nova.conf
 from nova import weights
 
+CONF = nova.conf.CONF
+LOG = logging.getLogger(__name__)
+
 
 class WeighedHost(weights.WeighedObject):
     def to_dict(self):
@@ -33,7 +39,11 @@ class WeighedHost(weights.WeighedObject):
 
 class BaseHostWeigher(weights.BaseWeigher):
     """Base class for host weights."""
-    pass
+
+    # The HostState attributes computed from optional compute node fields
+    # (see nova.scheduler.host_manager.LAZY_HOST_STATE_ATTRS) this weigher
+    # reads. None means that the weigher may read any attribute.
+    HOST_STATE_ATTRS = None
 
 
 class HostWeightHandler(weights.BaseWeightHandler):
@@ -41,6 +51,19 @@ class HostWeightHandler(weights.BaseWeightHandler):
 
     def __init__(self):
         super(HostWeightHandler, self).__init__(BaseHostWeigher)
+        self._numpy_warned = False
+
+    def _use_columnar(self):
+        if not CONF.filter_scheduler.columnar_weighing:
+            return False
+        if weights.numpy is None:
+            if not self._numpy_warned:
+                LOG.warning('The columnar weighing engine is enabled by '
+                            '[filter_scheduler] columnar_weighing but numpy '
+                            'is not installed. Using the default engine.')
+                self._numpy_warned = True
+            return False
+        return True
 
 
 def all_weighers():
@@ -23,6 +23,8 @@ CONF = nova.conf.CONF
 
 
 class BuildFailureWeigher(weights.BaseHostWeigher):
+    HOST_STATE_ATTRS = ('failed_builds',)
+
     def weight_multiplier(self, host_state):
         """Override the weight multiplier. Note this is negated."""
         return -1 * utils.get_weight_multiplier(
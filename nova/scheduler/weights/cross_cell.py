@@ -24,6 +24,7 @@ CONF = conf.CONF
 
 
 class CrossCellWeigher(weights.BaseHostWeigher):
+    HOST_STATE_ATTRS = ()
 
     def weight_multiplier(self, host_state):
         """How weighted this weigher should be."""
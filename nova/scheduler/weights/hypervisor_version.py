@@ -26,6 +26,7 @@ CONF = nova.conf.CONF
 
 
 class HypervisorVersionWeigher(weights.BaseHostWeigher):
+    HOST_STATE_ATTRS = ()
 
     def weight_multiplier(self, host_state):
         """Override the weight multiplier."""
@@ -30,6 +30,8 @@ CONF = nova.conf.CONF
 
 
 class ImagePropertiesWeigher(weights.BaseHostWeigher):
+    HOST_STATE_ATTRS = ()
+
     def __init__(self):
         self._parse_setting()
 
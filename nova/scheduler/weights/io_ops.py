@@ -29,6 +29,7 @@ CONF = nova.conf.CONF
 
 
 class IoOpsWeigher(weights.BaseHostWeigher):
+    HOST_STATE_ATTRS = ('num_io_ops',)
     minval = 0
 
     def weight_multiplier(self, host_state):
@@ -42,3 +43,6 @@ class IoOpsWeigher(weights.BaseHostWeigher):
         to be the default.
         """
         return host_state.num_io_ops
+
+    def _weigh_columns(self, columns, weight_properties):
+        return columns.get('num_io_ops')
@@ -26,16 +26,21 @@ in the configuration file as follows:
     The final weight would be name1.value * 1.0 + name2.value * -1.0.
 """
 
+from oslo_utils import importutils
+
 import nova.conf
 from nova import exception
 from nova.scheduler import utils
 from nova.scheduler import weights
 
+numpy = importutils.try_import('numpy')
 
 CONF = nova.conf.CONF
 
 
 class MetricsWeigher(weights.BaseHostWeigher):
+    HOST_STATE_ATTRS = ('metrics',)
+
     def __init__(self):
         self._parse_setting()
 
@@ -75,3 +80,31 @@ class MetricsWeigher(weights.BaseHostWeigher):
                         return CONF.metrics.weight_of_unavailable
 
         return value
+
+    def _weigh_columns(self, columns, weight_properties):
+        hosts = [obj.obj for obj in columns.weighed_objs]
+        metrics_dicts = [
+            {m.name: m.value for m in host_state.metrics or []}
+            for host_state in hosts]
+        multipliers = columns.multipliers(self)
+
+        values = numpy.zeros(len(hosts))
+        unavailable = numpy.zeros(len(hosts), dtype=bool)
+        for (name, ratio) in self.setting:
+            missing = numpy.fromiter(
+                (name not in metrics for metrics in metrics_dicts),
+                dtype=bool, count=len(hosts))
+            if CONF.metrics.required and missing.any():
+                host_state = hosts[int(missing.argmax())]
+                raise exception.ComputeHostMetricNotFound(
+                        host=host_state.host,
+                        node=host_state.nodename,
+                        name=name)
+            values += ratio * numpy.fromiter(
+                (metrics.get(name, 0.0) for metrics in metrics_dicts),
+                dtype=float, count=len(hosts))
+            # Do nothing if ratio or weight_multiplier is 0.
+            unavailable |= missing & (ratio * multipliers != 0)
+
+        return numpy.where(
+            unavailable, CONF.metrics.weight_of_unavailable, values)
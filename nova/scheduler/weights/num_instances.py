@@ -27,6 +27,7 @@ CONF = nova.conf.CONF
 
 
 class NumInstancesWeigher(weights.BaseHostWeigher):
+    HOST_STATE_ATTRS = ('num_instances',)
 
     def weight_multiplier(self, host_state):
         """Override the weight multiplier."""
@@ -39,3 +40,6 @@ class NumInstancesWeigher(weights.BaseHostWeigher):
            as the default, hence the negative value of the multiplier.
         """
         return host_state.num_instances
+
+    def _weigh_columns(self, columns, weight_properties):
+        return columns.get('num_instances')
@@ -37,6 +37,7 @@ MAX_DEVS = 100
 
 
 class PCIWeigher(weights.BaseHostWeigher):
+    HOST_STATE_ATTRS = ('pci_stats',)
 
     def weight_multiplier(self, host_state):
         """Override the weight multiplier."""
@@ -0,0 +1,74 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""JSON serialization of the API responses.
+
+The encoder is selected by the ``[DEFAULT] json_serializer`` option. The
+``stdlib`` one is oslo.serialization's jsonutils, while the ``orjson`` one
+uses the orjson library if it is installed. With orjson, the objects it does
+not handle natively are still converted by jsonutils.to_primitive(), and so
+are datetimes so that both encoders format them the same way. The objects
+orjson fails to encode, like integers larger than 64 bits, are encoded by the
+standard library instead.
+
+The notification payloads are still converted to primitives by
+jsonutils.to_primitive(), since a JSON round trip through orjson would turn
+their non-string keys into strings and their non-finite floats into nulls.
+"""
+
+from oslo_log import log as logging
+from oslo_serialization import jsonutils
+from oslo_utils import importutils
+
+import nova.conf
+
+orjson = importutils.try_import('orjson')
+
+CONF = nova.conf.CONF
+LOG = logging.getLogger(__name__)
+
+if orjson is not None:
+    _ORJSON_OPTIONS = (orjson.OPT_NON_STR_KEYS |
+                       orjson.OPT_PASSTHROUGH_DATETIME)
+
+_warned_orjson_missing = False
+
+
+def _use_orjson():
+    global _warned_orjson_missing
+
+    if CONF.json_serializer != 'orjson':
+        return False
+    if orjson is None:
+        if not _warned_orjson_missing:
+            LOG.warning('The orjson JSON serializer is configured but the '
+                        'orjson library is not installed, falling back to '
+                        'the stdlib JSON serializer.')
+            _warned_orjson_missing = True
+        return False
+    return True
+
+
+def dumps(obj):
+    """Serialize an object to a JSON formatted str.
+
+    :param obj: The object to serialize
+    :returns: The JSON document
+    """
+    if _use_orjson():
+        try:
+            return orjson.dumps(obj, default=jsonutils.to_primitive,
+                                option=_ORJSON_OPTIONS).decode('utf-8')
+        except orjson.JSONEncodeError:
+            LOG.debug('orjson failed to serialize an object, falling back to '
+                      'the stdlib JSON serializer', exc_info=True)
+    return str(jsonutils.dumps(obj))
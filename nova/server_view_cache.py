@@ -0,0 +1,188 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+"""Cache of the parts of server views which only depend on the instances.
+
+The cached views of an instance are stored along with the values of the
+fields of the instance they are rendered from, so that they are only reused
+while the instance is rendered the same way. Each process keeps an in-process
+LRU cache which can be backed by memcached, shared by all the API workers.
+"""
+
+import collections
+import threading
+
+from oslo_log import log as logging
+
+from nova import cache_utils
+import nova.conf
+
+CONF = nova.conf.CONF
+LOG = logging.getLogger(__name__)
+
+# {instance_uuid: (version, {variant: fragment})}, least recently used first
+_LRU = collections.OrderedDict()
+_LOCK = threading.Lock()
+MC = None
+_STATS = collections.Counter()
+
+
+def _enabled():
+    return CONF.api.server_view_cache_size > 0
+
+
+def _get_memcached_client():
+    global MC
+
+    if MC is None and CONF.api.server_view_cache_use_memcached:
+        MC = cache_utils.get_memcached_client()
+
+    return MC
+
+
+def reset_cache():
+    """Reset the cache and its statistics, mainly for testing purposes."""
+    global MC
+
+    with _LOCK:
+        _LRU.clear()
+        _STATS.clear()
+    MC = None
+
+
+def _make_cache_key(instance_uuid):
+    return "server-view-%s" % instance_uuid
+
+
+# The fields of the instance which the cached views are rendered from. The
+# updated_at value alone is not enough since it only has a precision of one
+# second with MySQL, and is not bumped by the updates of the instance_extra
+# table like a resize.
+_VERSION_FIELDS = (
+    'updated_at', 'deleted', 'display_name', 'display_description',
+    'vm_state', 'task_state', 'power_state', 'progress', 'host', 'node',
+    'image_ref', 'access_ip_v4', 'access_ip_v6', 'auto_disk_config',
+    'config_drive', 'key_name', 'launched_at', 'terminated_at', 'hostname',
+    'locked_by', 'reservation_id', 'launch_index', 'kernel_id', 'ramdisk_id',
+    'root_device_name', 'user_data',
+)
+_FLAVOR_VERSION_FIELDS = (
+    'flavorid', 'name', 'memory_mb', 'vcpus', 'root_gb', 'ephemeral_gb',
+    'swap', 'disabled', 'is_public', 'rxtx_factor', 'description',
+)
+
+
+def _get_version(instance):
+    # NOTE: Only the fields which are already loaded are used, so that
+    # looking up the cache does not lazy-load the instance.
+    version = [instance.get(field) if field in instance else None
+               for field in _VERSION_FIELDS]
+
+    flavor = instance.flavor if 'flavor' in instance else None
+    if flavor is not None:
+        version.extend(
+            flavor.get(field) if field in flavor else None
+            for field in _FLAVOR_VERSION_FIELDS)
+        if 'extra_specs' in flavor and flavor.extra_specs:
+            version.append(tuple(sorted(flavor.extra_specs.items())))
+
+    if 'system_metadata' in instance and instance.system_metadata:
+        version.append(tuple(sorted(instance.system_metadata.items())))
+
+    if 'trusted_certs' in instance and instance.trusted_certs:
+        version.append(tuple(instance.trusted_certs.ids))
+
+    return tuple(version)
+
+
+def _store(instance_uuid, entry):
+    with _LOCK:
+        _LRU[instance_uuid] = entry
+        _LRU.move_to_end(instance_uuid)
+        while len(_LRU) > CONF.api.server_view_cache_size:
+            _LRU.popitem(last=False)
+
+
+def get_fragment(instance, variant):
+    """Get a cached part of the view of an instance.
+
+    :param instance: The Instance object the view is of
+    :param variant: A hashable value identifying what the view depends on
+        besides the instance, like the microversion it was rendered for
+    :returns: The cached view, or None
+    """
+    with _LOCK:
+        entry = _LRU.get(instance.uuid)
+        if entry is not None:
+            _LRU.move_to_end(instance.uuid)
+
+    mc = _get_memcached_client()
+    if entry is None and mc is not None:
+        entry = mc.get(_make_cache_key(instance.uuid))
+        if entry is not None:
+            _store(instance.uuid, entry)
+
+    fragment = None
+    if entry is not None and entry[0] == _get_version(instance):
+        fragment = entry[1].get(variant)
+    _STATS['hits' if fragment is not None else 'misses'] += 1
+    return fragment
+
+
+def set_fragment(instance, variant, fragment):
+    """Cache a part of the view of an instance.
+
+    :param instance: The Instance object the view is of
+    :param variant: A hashable value identifying what the view depends on
+        besides the instance, like the microversion it was rendered for
+    :param fragment: The view to cache, which must not be modified afterwards
+    """
+    version = _get_version(instance)
+    with _LOCK:
+        entry = _LRU.get(instance.uuid)
+        if entry is None or entry[0] != version:
+            entry = (version, {})
+        entry[1][variant] = fragment
+    _store(instance.uuid, entry)
+
+    mc = _get_memcached_client()
+    if mc is not None:
+        mc.set(_make_cache_key(instance.uuid), entry)
+
+
+def invalidate(instance_uuid):
+    """Drop the cached views of an instance.
+
+    This only affects the in-process cache of the calling process and
+    memcached, the in-process caches of the other processes are not
+    invalidated.
+    """
+    if not _enabled():
+        return
+
+    with _LOCK:
+        _LRU.pop(instance_uuid, None)
+
+    mc = _get_memcached_client()
+    if mc is not None:
+        mc.delete(_make_cache_key(instance_uuid))
+
+
+def get_stats():
+    """Get the number of cache hits and misses of this process.
+
+    :returns: A tuple of the number of hits, the number of misses and the hit
+        rate
+    """
+    hits, misses = _STATS['hits'], _STATS['misses']
+    lookups = hits + misses
+    return hits, misses, float(hits) / lookups if lookups else 0.0
@@ -93,6 +93,7 @@ VIR_DOMAIN_EVENT_SHUTDOWN = 6
 VIR_DOMAIN_EVENT_PMSUSPENDED = 7
 
 VIR_DOMAIN_EVENT_ID_DEVICE_REMOVED = 15
+VIR_DOMAIN_EVENT_ID_DEVICE_ADDED = 19
 VIR_DOMAIN_EVENT_ID_DEVICE_REMOVAL_FAILED = 22
 
 VIR_DOMAIN_EVENT_SUSPENDED_MIGRATED = 1
@@ -184,6 +185,16 @@ VIR_DOMAIN_BLOCK_COMMIT_RELATIVE = 4
 VIR_CONNECT_LIST_DOMAINS_ACTIVE = 1
 VIR_CONNECT_LIST_DOMAINS_INACTIVE = 2
 
+# virConnectGetAllDomainStats flags
+VIR_CONNECT_GET_ALL_DOMAINS_STATS_ACTIVE = 1
+VIR_CONNECT_GET_ALL_DOMAINS_STATS_INACTIVE = 2
+
+# virDomainStatsTypes
+VIR_DOMAIN_STATS_STATE = 1
+VIR_DOMAIN_STATS_BALLOON = 4
+VIR_DOMAIN_STATS_VCPU = 8
+VIR_DOMAIN_STATS_BLOCK = 32
+
 # virConnectListAllNodeDevices flags
 VIR_CONNECT_LIST_NODE_DEVICES_CAP_PCI_DEV = 2
 VIR_CONNECT_LIST_NODE_DEVICES_CAP_NET = 1 << 4
@@ -1741,6 +1752,29 @@ class Domain(object):
         self._snapshots[name] = snapshot
         return snapshot
 
+    def _get_stats(self, stats):
+        record = {}
+        if stats & VIR_DOMAIN_STATS_STATE:
+            record['state.state'] = self._state
+            record['state.reason'] = 0
+        if stats & VIR_DOMAIN_STATS_BALLOON:
+            record['balloon.current'] = int(self._def['memory'])
+            record['balloon.maximum'] = int(self._def['memory'])
+        if stats & VIR_DOMAIN_STATS_VCPU:
+            record['vcpu.current'] = self._def['vcpu']['number']
+            record['vcpu.maximum'] = self._def['vcpu']['number']
+        if stats & VIR_DOMAIN_STATS_BLOCK:
+            disks = self._def['devices'].get('disks', [])
+            record['block.count'] = len(disks)
+            for i, disk in enumerate(disks):
+                record['block.%d.name' % i] = disk.get('target_dev')
+                if disk.get('source'):
+                    record['block.%d.path' % i] = disk['source']
+                record['block.%d.allocation' % i] = 1073741824
+                record['block.%d.capacity' % i] = 10737418240
+                record['block.%d.physical' % i] = 1073741824
+        return record
+
     def vcpus(self):
         vcpus = ([], [])
         for i in range(0, self._def['vcpu']['number']):
@@ -1984,6 +2018,15 @@ class Connection(object):
                     vms.append(vm)
         return vms
 
+    def getAllDomainStats(self, stats, flags=0):
+        list_flags = flags & (VIR_CONNECT_LIST_DOMAINS_ACTIVE |
+                              VIR_CONNECT_LIST_DOMAINS_INACTIVE)
+        if not list_flags:
+            list_flags = (VIR_CONNECT_LIST_DOMAINS_ACTIVE |
+                          VIR_CONNECT_LIST_DOMAINS_INACTIVE)
+        return [(vm, vm._get_stats(stats))
+                for vm in self.listAllDomains(list_flags)]
+
     def _emit_lifecycle(self, dom, event, detail):
         if VIR_DOMAIN_EVENT_ID_LIFECYCLE not in self._event_callbacks:
             return
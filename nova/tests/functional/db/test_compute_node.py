@@ -153,6 +153,30 @@ class ComputeNodeTestCase(test.TestCase):
                                                         cn3.uuid])
         self.assertEqual(2, len(cns))
 
+    def test_get_all_by_uuids_expected_attrs(self):
+        cn1 = fake_compute_obj.obj_clone()
+        cn1._context = self.context
+        cn1.create()
+
+        cns = objects.ComputeNodeList.get_all_by_uuids(
+            self.context, [cn1.uuid], expected_attrs=['stats'])
+        self.assertEqual(1, len(cns))
+        cn = cns[0]
+        self.assertEqual(cn1.vcpus, cn.vcpus)
+        self.assertEqual(cn1.stats, cn.stats)
+        for attr in ('numa_topology', 'pci_device_pools', 'metrics',
+                     'cpu_info', 'supported_hv_specs'):
+            self.assertFalse(cn.obj_attr_is_set(attr))
+
+        # The other optional fields are all loaded on first access
+        self.assertEqual(cn1.numa_topology, cn.numa_topology)
+        self.assertTrue(cn.obj_attr_is_set('pci_device_pools'))
+        self.assertEqual(cn1.cpu_info, cn.cpu_info)
+        self.assertEqual(cn1.metrics, cn.metrics)
+        self.assertEqual(len(cn1.supported_hv_specs),
+                         len(cn.supported_hv_specs))
+        self.assertEqual(set(), cn.obj_what_changed())
+
     def test_get_by_hypervisor_type(self):
         cn1 = fake_compute_obj.obj_clone()
         cn1._context = self.context
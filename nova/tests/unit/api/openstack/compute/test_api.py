@@ -13,12 +13,16 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+from unittest import mock
+
 from oslo_serialization import jsonutils
 from oslo_utils import encodeutils
+from oslo_utils.fixture import uuidsentinel as uuids
 import webob.dec
 import webob.exc
 
 from nova.api import openstack as openstack_api
+from nova.api.openstack.compute import routes
 from nova.api.openstack import wsgi
 from nova import exception
 from nova import test
@@ -170,3 +174,78 @@ class APITest(test.NoDBTestCase):
         api = self._wsgi_app(fail)
         resp = fakes.HTTPRequest.blank('/').get_response(api)
         self.assertEqual(500, resp.status_int)
+
+
+class APIRouterFastRoutingTest(test.NoDBTestCase):
+
+    def setUp(self):
+        super(APIRouterFastRoutingTest, self).setUp()
+        self.flags(fast_path_routing=True, group='api')
+        self.router = routes.APIRouterV21()
+
+    def test_fast_match_is_mapper_match(self):
+        paths = [
+            '/servers', '/servers/detail', '/servers/detail/', '/servers/',
+            '/servers/%s' % uuids.server, '/servers/%s.json' % uuids.server,
+            '/servers/%s/action' % uuids.server, '/servers//action',
+            '/os-hypervisors', '/os-hypervisors/detail', '/os-hypervisors/1',
+            '/flavors', '/', '', 'servers', '/Servers', '/detail/servers',
+            '/servers/caf\xc3\xa9',
+        ]
+        fast_routed = 0
+        for method in ('GET', 'POST', 'PUT', 'DELETE'):
+            for path in paths:
+                for prefix in ('', '/%s' % fakes.FAKE_PROJECT_ID, '/abc-0'):
+                    environ = {'PATH_INFO': prefix + path,
+                               'REQUEST_METHOD': method}
+                    result = self.router._fast_match(environ)
+                    if result is None:
+                        continue
+                    fast_routed += 1
+                    match, route = result
+                    expected_match, expected_route = (
+                        self.router.map.routematch(environ=environ))
+                    self.assertEqual(expected_match, match, environ)
+                    self.assertIs(expected_route, route, environ)
+        # GET /servers, /servers/detail and /os-hypervisors, POST /servers,
+        # and GET, PUT and DELETE /servers/detail and the three other
+        # /servers/{id} paths, for each prefix.
+        self.assertEqual(3 * 15, fast_routed)
+
+    def test_fast_match_method_override(self):
+        environ = {'PATH_INFO': '/servers', 'REQUEST_METHOD': 'GET',
+                   'QUERY_STRING': '_method=post'}
+        self.assertIsNone(self.router._fast_match(environ))
+
+        environ = {'PATH_INFO': '/servers', 'REQUEST_METHOD': 'POST',
+                   'CONTENT_TYPE': 'application/x-www-form-urlencoded'}
+        self.assertIsNone(self.router._fast_match(environ))
+
+    def test_call_fast_routed(self):
+        req = fakes.HTTPRequest.blank('/%s/servers/detail' %
+                                      fakes.FAKE_PROJECT_ID)
+        with mock.patch.object(self.router, '_router') as mock_router:
+            app = self.router(req)
+        mock_router.assert_not_called()
+        match = req.environ['wsgiorg.routing_args'][1]
+        self.assertIs(match['controller'], app)
+        self.assertEqual('detail', match['action'])
+        self.assertEqual(fakes.FAKE_PROJECT_ID, match['project_id'])
+        self.assertNotIn(routes._ROUTING_START, req.environ)
+
+    def test_call_not_fast_routed(self):
+        req = fakes.HTTPRequest.blank('/flavors')
+        self.assertIs(self.router._router, self.router(req))
+        self.assertIs(self.router._timed_dispatch, self.router._router.app)
+
+    def test_fast_path_routing_disabled(self):
+        self.flags(fast_path_routing=False, group='api')
+        router = routes.APIRouterV21()
+        self.assertEqual({}, router._fast_routes)
+
+        req = fakes.HTTPRequest.blank('/servers')
+        with mock.patch.object(router, '_fast_match') as mock_match:
+            self.assertIs(router._router, router(req))
+        mock_match.assert_not_called()
+        self.assertNotIn(routes._ROUTING_START, req.environ)
+        self.assertIs(router._dispatch, router._router.app)
@@ -10,10 +10,12 @@
 # License for the specific language governing permissions and limitations
 # under the License.
 
+import fixtures
 import jsonschema.exceptions
 from oslo_log import log as logging
 
 from nova.api.openstack import compute
+from nova.api import validation
 from nova.api.validation import validators
 from nova import test
 
@@ -27,6 +29,17 @@ class SchemaTest(test.NoDBTestCase):
         self.router = compute.APIRouterV21()
         self.meta_schema = validators._SchemaValidator.validator_org
 
+    def test_compile_validators(self):
+        self.flags(compile_schema_validators=True, group='api')
+        self.useFixture(fixtures.MonkeyPatch(
+            'nova.api.validation.validators._VALIDATORS', {}))
+        compute.APIRouterV21()
+
+        self.assertNotEqual([], validation._REGISTERED_SCHEMAS)
+        for schema, _, is_body, _ in validation._REGISTERED_SCHEMAS:
+            self.assertIn((id(schema), False, is_body),
+                          validators._VALIDATORS)
+
     def test_schemas(self):
         missing_request_schemas = set()
         missing_query_schemas = set()
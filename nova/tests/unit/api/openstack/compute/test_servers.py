@@ -63,6 +63,7 @@ from nova.objects.instance_group import InstanceGroup
 from nova.objects import tag
 from nova.policies import servers as server_policies
 from nova import policy
+from nova import server_view_cache
 from nova import test
 from nova.tests import fixtures as nova_fixtures
 from nova.tests.unit.api.openstack import fakes
@@ -2653,6 +2654,36 @@ class ServersControllerTestV273(ControllerTest):
             sort_dirs=['desc'], sort_keys=['locked'],
             cell_down_support=False, all_tenants=False)
 
+    def test_get_servers_detail_loads_locked_reason_only(self):
+        instances = []
+
+        def fake_get_all(context, search_opts=None,
+                         limit=None, marker=None,
+                         expected_attrs=None, sort_keys=None, sort_dirs=None,
+                         cell_down_support=False, all_tenants=False):
+            self.assertIn('system_metadata.locked_reason', expected_attrs)
+            self.assertNotIn('system_metadata', expected_attrs)
+            db_list = [fakes.stub_instance(
+                       100, uuid=uuids.fake, locked_by='fake',
+                       system_metadata={'locked_reason': 'sold'})]
+            instances.extend(instance_obj._make_instance_list(
+                context, objects.InstanceList(), db_list,
+                ['metadata', 'flavor', 'info_cache', 'security_groups',
+                 'system_metadata.locked_reason']))
+            instances[0].tags = objects.TagList()
+            instances[0].trusted_certs = None
+            return objects.InstanceList(objects=instances)
+
+        self.mock_get_all.side_effect = fake_get_all
+
+        req = self.req(self.path_detail)
+        servers = self.controller.detail(req)['servers']
+
+        self.assertEqual(1, len(servers))
+        self.assertEqual('sold', servers[0]['locked_reason'])
+        # The rest of system_metadata was not lazy-loaded
+        self.assertNotIn('system_metadata', instances[0])
+
 
 class ServersControllerTestV275(ControllerTest):
 
@@ -7708,6 +7739,33 @@ class ServersViewBuilderTest(_ServersViewBuilderTest):
         output = self.view_builder.show(self.request, self.instance)
         self.assertThat(output, matchers.DictMatches(expected_server))
 
+    def test_build_server_detail_cache_fragment(self):
+        self.flags(server_view_cache_size=10, group='api')
+        server_view_cache.reset_cache()
+        self.addCleanup(server_view_cache.reset_cache)
+
+        expected = self.view_builder.show(self.request, self.instance)
+        output = self.view_builder.show(self.request, self.instance,
+                                        cache_fragment=True)
+        self.assertThat(output, matchers.DictMatches(expected))
+        self.assertEqual((0, 1, 0.0), server_view_cache.get_stats())
+
+        with mock.patch.object(self.view_builder, '_get_fragment') as mock_gf:
+            output = self.view_builder.show(self.request, self.instance,
+                                            cache_fragment=True)
+            mock_gf.assert_not_called()
+        self.assertThat(output, matchers.DictMatches(expected))
+        self.assertEqual((1, 1, 0.5), server_view_cache.get_stats())
+
+        # An update of the instance record makes the cached view stale.
+        self.instance.display_name = 'new_name'
+        self.instance.updated_at = self.instance.updated_at + (
+            datetime.timedelta(seconds=1))
+        output = self.view_builder.show(self.request, self.instance,
+                                        cache_fragment=True)
+        self.assertEqual('new_name', output['server']['name'])
+        self.assertEqual((1, 2, 1 / 3.0), server_view_cache.get_stats())
+
     def test_build_server_detail_with_fault(self):
         self.instance['vm_state'] = vm_states.ERROR
         self.instance['fault'] = fake_instance.fake_fault_obj(
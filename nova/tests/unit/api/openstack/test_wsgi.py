@@ -890,6 +890,22 @@ class APIVersionTestCase(test.NoDBTestCase):
         req.set_legacy_v2()
         self.assertEqual({'resources': []}, controller.fake_func(req))
 
+    def test_api_version_parsed_once(self):
+        class FakeController(wsgi.Controller):
+            @wsgi.api_version('2.10', '2.19')
+            def fake_func(self, req):
+                return {'resources': []}
+
+        controller = FakeController()
+        req = fakes.HTTPRequest.blank('', version='2.15')
+
+        with mock.patch.object(
+            api_version.APIVersionRequest, '__init__',
+            side_effect=AssertionError('version parsed per request'),
+        ):
+            self.assertEqual({'resources': []}, controller.fake_func(req))
+            self.assertEqual({'resources': []}, controller.fake_func(req))
+
 
 class ExpectedErrorTestCase(test.NoDBTestCase):
 
@@ -15,6 +15,7 @@
 
 import datetime
 from io import StringIO
+import os
 import sys
 import textwrap
 from unittest import mock
@@ -363,6 +364,124 @@ Archiving.....complete
     def test_archive_deleted_rows_until_complete_sleep(self):
         self.test_archive_deleted_rows_until_complete(sleep=30)
 
+    def test_archive_deleted_rows_invalid_parallel(self):
+        self.assertEqual(2, self.commands.archive_deleted_rows(parallel=0))
+
+    @mock.patch.object(db, 'archive_deleted_rows')
+    def test_archive_deleted_rows_parallel(self, mock_db_archive):
+        checkpoint_file = os.path.join(
+            self.useFixture(fixtures.TempDir()).path, 'checkpoint.json')
+        saved_checkpoints = []
+
+        def fake_archive(ctxt, max_rows, before=None, task_log=False,
+                         workers=None, checkpoint=None, stats=None):
+            if os.path.exists(checkpoint_file):
+                with open(checkpoint_file, 'rb') as f:
+                    saved_checkpoints.append(jsonutils.load(f))
+            if 'instances' in checkpoint:
+                return {}, [], 0
+            checkpoint['instances'] = 42
+            stats['instances'] = [10, 2.0]
+            return {'instances': 10}, [], 10
+
+        mock_db_archive.side_effect = fake_archive
+        result = self.commands.archive_deleted_rows(
+            20, verbose=True, until_complete=True, parallel=2,
+            checkpoint_file=checkpoint_file)
+        self.assertEqual(1, result)
+        mock_db_archive.assert_has_calls([
+            mock.call(
+                test.MatchType(context.RequestContext), 20, before=None,
+                task_log=False, workers=2, checkpoint=mock.ANY,
+                stats=mock.ANY),
+        ] * 2)
+        # The checkpoint was saved after the first batch, and the file
+        # removed once there was nothing left to archive.
+        self.assertEqual([{'default': {'instances': 42}}], saved_checkpoints)
+        self.assertFalse(os.path.exists(checkpoint_file))
+        expected = """\
+Archiving....complete
++-----------+-------------------------+
+| Table     | Number of Rows Archived |
++-----------+-------------------------+
+| instances | 10                      |
++-----------+-------------------------+
++-----------+--------------------------+
+| Table     | Rows Archived Per Second |
++-----------+--------------------------+
+| instances | 5.0                      |
++-----------+--------------------------+
+"""
+        self.assertEqual(expected, self.output.getvalue())
+
+    @mock.patch.object(db, 'archive_deleted_rows')
+    def test_archive_deleted_rows_resume(self, mock_db_archive):
+        checkpoint_file = os.path.join(
+            self.useFixture(fixtures.TempDir()).path, 'checkpoint.json')
+        with open(checkpoint_file, 'w') as f:
+            jsonutils.dump({'default': {'instances': 42}}, f)
+        mock_db_archive.return_value = ({'instances': 10}, [], 10)
+
+        result = self.commands.archive_deleted_rows(
+            20, checkpoint_file=checkpoint_file)
+        self.assertEqual(1, result)
+        mock_db_archive.assert_called_once_with(
+            test.MatchType(context.RequestContext), 20, before=None,
+            task_log=False, workers=None, checkpoint={'instances': 42},
+            stats={})
+        # Rows were archived so the checkpoint is kept for the next run
+        with open(checkpoint_file, 'rb') as f:
+            self.assertEqual(
+                {'default': {'instances': 42}}, jsonutils.load(f))
+
+    @mock.patch.object(db, 'archive_deleted_rows')
+    def test_archive_deleted_rows_parallel_all_cells(self, mock_db_archive):
+        cell_dbs = nova_fixtures.CellDatabases()
+        cell_dbs.add_cell_database('fake:///db1')
+        cell_dbs.add_cell_database('fake:///db2')
+        self.useFixture(cell_dbs)
+
+        ctxt = context.RequestContext()
+        for i in (1, 2):
+            objects.CellMapping(context=ctxt,
+                                uuid=uuidutils.generate_uuid(),
+                                database_connection='fake:///db%d' % i,
+                                transport_url='fake:///mq%d' % i,
+                                name='cell%d' % i).create()
+
+        def fake_archive(ctxt, max_rows, before=None, task_log=False,
+                         workers=None, checkpoint=None, stats=None):
+            stats['instances'] = [10, 1.0]
+            return {'instances': 10, 'consoles': 5}, [], 15
+
+        mock_db_archive.side_effect = fake_archive
+        # Each cell is archived with max_rows=20 although that is less than
+        # the total archived.
+        result = self.commands.archive_deleted_rows(
+            20, verbose=True, all_cells=True, parallel=2)
+        self.assertEqual(1, result)
+        self.assertEqual(2, mock_db_archive.call_count)
+        mock_db_archive.assert_called_with(
+            test.MatchType(context.RequestContext), 20, before=None,
+            task_log=False, workers=2, checkpoint={}, stats=mock.ANY)
+        expected = '''\
++-----------------+-------------------------+
+| Table           | Number of Rows Archived |
++-----------------+-------------------------+
+| cell1.consoles  | 5                       |
+| cell1.instances | 10                      |
+| cell2.consoles  | 5                       |
+| cell2.instances | 10                      |
++-----------------+-------------------------+
++-----------------+--------------------------+
+| Table           | Rows Archived Per Second |
++-----------------+--------------------------+
+| cell1.instances | 10.0                     |
+| cell2.instances | 10.0                     |
++-----------------+--------------------------+
+'''
+        self.assertEqual(expected, self.output.getvalue())
+
     @mock.patch('nova.db.main.api.purge_shadow_tables')
     @mock.patch.object(db, 'archive_deleted_rows')
     @mock.patch.object(objects.CellMappingList, 'get_all')
@@ -612,6 +731,28 @@ is set and run this command again.
                                            datetime.datetime(2015, 10, 21),
                                            status_fn=mock.ANY)
 
+    @mock.patch('nova.db.main.api.purge_shadow_tables')
+    def test_purge_max_rows(self, mock_purge):
+        mock_purge.return_value = 1
+        ret = self.commands.purge(purge_all=True, max_rows=100, max_rate=500,
+                                  parallel=4)
+        self.assertEqual(0, ret)
+        mock_purge.assert_called_once_with(
+            mock.ANY, None, status_fn=mock.ANY, max_rows=100, max_rate=500,
+            workers=4)
+
+    @mock.patch('nova.db.main.api.purge_shadow_tables')
+    def test_purge_max_rate_without_max_rows(self, mock_purge):
+        ret = self.commands.purge(purge_all=True, max_rate=500)
+        self.assertEqual(1, ret)
+        self.assertFalse(mock_purge.called)
+
+    @mock.patch('nova.db.main.api.purge_shadow_tables')
+    def test_purge_invalid_max_rows(self, mock_purge):
+        ret = self.commands.purge(purge_all=True, max_rows=0)
+        self.assertEqual(5, ret)
+        self.assertFalse(mock_purge.called)
+
     @mock.patch('nova.db.main.api.purge_shadow_tables')
     def test_purge_date_fail(self, mock_purge):
         ret = self.commands.purge(before='notadate')
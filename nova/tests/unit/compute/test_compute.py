@@ -8551,10 +8551,12 @@ class ComputeTestCase(BaseTestCase,
             mock.call(ctxt, instance1, []),
             mock.call(ctxt, instance2, [])])
 
+    @mock.patch.object(fake.FakeDriver, 'get_info_many',
+                       side_effect=NotImplementedError)
     @mock.patch.object(fake.FakeDriver, 'get_info')
     @mock.patch.object(compute_manager.ComputeManager,
                        '_sync_instance_power_state')
-    def test_sync_power_states(self, mock_sync, mock_get):
+    def test_sync_power_states(self, mock_sync, mock_get, mock_get_many):
         ctxt = self.context.elevated()
         self._create_fake_instance_obj({'host': self.compute.host})
         self._create_fake_instance_obj({'host': self.compute.host})
@@ -8572,9 +8574,12 @@ class ComputeTestCase(BaseTestCase,
         mock_get.assert_has_calls([mock.call(mock.ANY), mock.call(mock.ANY),
                                    mock.call(mock.ANY)])
         mock_sync.assert_has_calls([
-            mock.call(ctxt, mock.ANY, power_state.NOSTATE, use_slave=True),
-            mock.call(ctxt, mock.ANY, power_state.RUNNING, use_slave=True),
-            mock.call(ctxt, mock.ANY, power_state.SHUTDOWN, use_slave=True)])
+            mock.call(ctxt, mock.ANY, power_state.NOSTATE, use_slave=True,
+                      prefetched=False),
+            mock.call(ctxt, mock.ANY, power_state.RUNNING, use_slave=True,
+                      prefetched=False),
+            mock.call(ctxt, mock.ANY, power_state.SHUTDOWN, use_slave=True,
+                      prefetched=False)])
 
     @mock.patch.object(compute_manager.ComputeManager, '_get_power_state')
     @mock.patch.object(compute_manager.ComputeManager,
@@ -515,6 +515,43 @@ class ComputeManagerUnitTestCase(test.NoDBTestCase,
                 self.assertFalse(db_node.destroy.called)
         self.assertEqual(1, mock_rt.remove_node.call_count)
         mock_rt.clean_compute_node_cache.assert_called_once_with(db_nodes)
+        # Placement updates are never batched on startup
+        mock_rt.batch_placement_updates.assert_not_called()
+
+    def test_revalidate_provider_associations(self):
+        rc_mock = self.useFixture(fixtures.fixtures.MockPatchObject(
+            self.compute, 'reportclient')).mock
+
+        # Disabled by default
+        self.compute._revalidate_provider_associations(self.context)
+        rc_mock.revalidate_associations.assert_not_called()
+
+        self.flags(resource_provider_association_background_refresh=True,
+                   group='compute')
+        self.compute._revalidate_provider_associations(self.context)
+        rc_mock.revalidate_associations.assert_called_once_with(self.context)
+        rc_mock.get_association_stats.assert_called_once_with()
+
+    @mock.patch.object(manager.ComputeManager,
+                       '_update_available_resource_for_node')
+    @mock.patch.object(fake_driver.FakeDriver, 'get_available_nodes')
+    @mock.patch.object(manager.ComputeManager, '_get_compute_nodes_in_db')
+    def test_update_available_resource_batched(self, get_db_nodes,
+                                               get_avail_nodes, update_mock):
+        mock_rt = self._mock_rt()
+        batch = mock_rt.batch_placement_updates.return_value
+        batch.__enter__.side_effect = (
+            lambda: self.assertFalse(update_mock.called))
+        batch.__exit__.side_effect = (
+            lambda *a: self.assertEqual(2, update_mock.call_count))
+        get_db_nodes.return_value = []
+        get_avail_nodes.return_value = set(['node1', 'node2'])
+
+        self.compute.update_available_resource(self.context)
+
+        mock_rt.batch_placement_updates.assert_called_once_with(self.context)
+        batch.__enter__.assert_called_once_with()
+        batch.__exit__.assert_called_once_with(None, None, None)
 
     @mock.patch('nova.scheduler.client.report.SchedulerReportClient.'
                 'delete_resource_provider')
@@ -1065,9 +1102,9 @@ class ComputeManagerUnitTestCase(test.NoDBTestCase,
             mock_destroy.assert_called_once_with(
                 self.context, {uuids.our_node_uuid: our_node})
             mock_inst_init.assert_has_calls(
-                [mock.call(self.context, inst_list[0]),
-                 mock.call(self.context, inst_list[1]),
-                 mock.call(self.context, inst_list[2])])
+                [mock.call(self.context, inst_list[0], power_state.NOSTATE),
+                 mock.call(self.context, inst_list[1], power_state.NOSTATE),
+                 mock.call(self.context, inst_list[2], power_state.NOSTATE)])
 
             mock_init_host.assert_called_once_with(host=our_host)
             mock_host_get.assert_called_once_with(self.context, our_host,
@@ -1287,7 +1324,7 @@ class ComputeManagerUnitTestCase(test.NoDBTestCase,
         self.compute.init_host(None)
 
         mock_init_instance.assert_called_once_with(
-            self.context, active_instance)
+            self.context, active_instance, power_state.NOSTATE)
         mock_error_interrupted.assert_called_once_with(
             self.context, {active_instance.uuid, evacuating_instance.uuid},
             mock_get_nodes.return_value.keys())
@@ -4077,6 +4114,71 @@ class ComputeManagerUnitTestCase(test.NoDBTestCase,
                                         use_slave=True)
             mock_spawn.assert_called_once_with(mock.ANY, instance)
 
+    @mock.patch.object(objects.InstanceList, 'get_by_host')
+    def test_sync_power_states_max_age(self, mock_get):
+        self.flags(sync_power_state_max_age=600)
+        recently = time.monotonic() - 100
+        long_ago = time.monotonic() - 700
+        instances = [
+            objects.Instance(uuid=getattr(uuids, 'instance%d' % i),
+                             power_state=power_state.RUNNING)
+            for i in range(5)]
+        mock_get.return_value = instances
+        self.compute._confirmed_power_states = {
+            # confirmed recently
+            uuids.instance0: (power_state.RUNNING, recently),
+            # confirmed too long ago
+            uuids.instance1: (power_state.RUNNING, long_ago),
+            # the power state in the database changed since then
+            uuids.instance2: (power_state.SHUTDOWN, recently),
+            # a lifecycle event was received since then
+            uuids.instance3: (power_state.RUNNING, recently),
+            # deleted since then
+            uuids.deleted: (power_state.RUNNING, recently),
+        }
+        event = virtevent.LifecycleEvent(
+            uuids.instance3, virtevent.EVENT_LIFECYCLE_STOPPED)
+        with mock.patch.object(self.compute, 'handle_lifecycle_event'):
+            self.compute.handle_events(event)
+
+        with mock.patch.object(self.compute._sync_power_pool,
+                               'spawn_n') as mock_spawn:
+            self.compute._sync_power_states(mock.sentinel.context)
+
+        mock_spawn.assert_has_calls(
+            [mock.call(mock.ANY, instance) for instance in instances[1:]])
+        self.assertEqual(4, mock_spawn.call_count)
+        self.assertEqual(
+            {uuids.instance0, uuids.instance1, uuids.instance2},
+            set(self.compute._confirmed_power_states))
+
+    @mock.patch('nova.compute.manager.ComputeManager.'
+                '_sync_instance_power_state')
+    def test_query_driver_power_state_and_sync_confirmed(
+            self, mock_sync_power_state):
+        db_instance = objects.Instance(uuid=uuids.db_instance,
+                                       power_state=power_state.RUNNING,
+                                       task_state=None)
+        with mock.patch.object(
+            self.compute.driver, 'get_info',
+            return_value=hardware.InstanceInfo(state=power_state.RUNNING),
+        ):
+            self.compute._query_driver_power_state_and_sync(self.context,
+                                                            db_instance)
+        # The power states are only recorded with sync_power_state_max_age
+        self.assertEqual({}, self.compute._confirmed_power_states)
+
+        self.flags(sync_power_state_max_age=600)
+        with mock.patch.object(
+            self.compute.driver, 'get_info',
+            return_value=hardware.InstanceInfo(state=power_state.RUNNING),
+        ):
+            self.compute._query_driver_power_state_and_sync(self.context,
+                                                            db_instance)
+        self.assertEqual(
+            {uuids.db_instance: (power_state.RUNNING, mock.ANY)},
+            self.compute._confirmed_power_states)
+
     @mock.patch('nova.objects.InstanceList.get_by_host', new=mock.Mock())
     @mock.patch('nova.compute.manager.ComputeManager.'
                 '_query_driver_power_state_and_sync',
@@ -4216,7 +4318,167 @@ class ComputeManagerUnitTestCase(test.NoDBTestCase,
             mock_sync_power_state.assert_called_once_with(self.context,
                                                           db_instance,
                                                           power_state.NOSTATE,
-                                                          use_slave=True)
+                                                          use_slave=True,
+                                                          prefetched=False)
+
+    @mock.patch.object(manager.ComputeManager, '_init_instance')
+    def test_init_instances(self, mock_init_instance):
+        instances = [objects.Instance(uuid=uuids.instance1, task_state=None),
+                     objects.Instance(uuid=uuids.instance2, task_state=None)]
+        self.compute._init_instances(
+            self.context, instances, {uuids.instance1: power_state.RUNNING})
+        self.assertEqual(
+            [mock.call(self.context, instances[0], power_state.RUNNING),
+             mock.call(self.context, instances[1], None)],
+            mock_init_instance.call_args_list)
+
+    @mock.patch.object(manager.ComputeManager, '_init_instance')
+    def test_init_instances_concurrently(self, mock_init_instance):
+        self.flags(max_concurrent_instance_inits=2)
+        instances = [
+            objects.Instance(uuid=uuids.instance1, task_state=None),
+            objects.Instance(uuid=uuids.instance2, task_state=None),
+            objects.Instance(uuid=uuids.rebooting,
+                             task_state=task_states.REBOOTING),
+        ]
+        running = []
+        max_running = []
+
+        def fake_init_instance(context, instance, vm_power_state):
+            running.append(instance.uuid)
+            max_running.append(len(running))
+            # Let the other instances be initialized meanwhile
+            time.sleep(0)
+            running.remove(instance.uuid)
+
+        mock_init_instance.side_effect = fake_init_instance
+
+        self.compute._init_instances(
+            self.context, instances, {uuids.instance1: power_state.RUNNING})
+        # The instance with a pending task is initialized first
+        self.assertEqual(
+            [mock.call(self.context, instances[2], None),
+             mock.call(self.context, instances[0], power_state.RUNNING),
+             mock.call(self.context, instances[1], None)],
+            mock_init_instance.call_args_list)
+        self.assertEqual(2, max(max_running))
+
+    @mock.patch.object(objects.InstanceActionEvent,
+                       'event_finish_with_failure')
+    @mock.patch.object(objects.InstanceActionEvent, 'event_start')
+    def test_init_instances_concurrently_powering_off(self, mock_start,
+                                                      mock_finish):
+        # Retrying the interrupted stop takes the lock of the instance, so
+        # the instances must not be locked while they are initialized.
+        self.flags(max_concurrent_instance_inits=2)
+        instances = []
+        for uuid in (uuids.instance1, uuids.instance2):
+            instance = objects.Instance(self.context)
+            instance.uuid = uuid
+            instance.id = 1
+            instance.vm_state = vm_states.ACTIVE
+            instance.task_state = task_states.POWERING_OFF
+            instance.power_state = power_state.RUNNING
+            instance.host = self.compute.host
+            instances.append(instance)
+
+        with test.nested(
+            mock.patch.object(self.compute, '_get_power_state',
+                              return_value=power_state.SHUTDOWN),
+            mock.patch.object(self.compute, '_power_off_instance'),
+            mock.patch.object(self.compute, '_notify_about_instance_usage'),
+            mock.patch.object(compute_utils, 'notify_about_instance_action'),
+            mock.patch.object(objects.Instance, 'save'),
+            mock.patch.object(self.compute, '_get_share_info',
+                              return_value=objects.ShareMappingList()),
+        ) as (mock_get_power_state, mock_power_off, mock_notify,
+              mock_notify_action, mock_save, mock_get_share_info):
+            self.compute._init_instances(self.context, instances, {})
+
+        self.assertEqual(2, mock_power_off.call_count)
+        for instance in instances:
+            self.assertEqual(vm_states.STOPPED, instance.vm_state)
+            self.assertIsNone(instance.task_state)
+
+    @mock.patch.object(manager.ComputeManager, '_init_instance')
+    def test_init_instances_concurrently_error(self, mock_init_instance):
+        self.flags(max_concurrent_instance_inits=0)
+        instances = [objects.Instance(uuid=uuids.instance1, task_state=None),
+                     objects.Instance(uuid=uuids.instance2, task_state=None)]
+        mock_init_instance.side_effect = [test.TestingException, None]
+
+        self.assertRaises(test.TestingException, self.compute._init_instances,
+                          self.context, instances, {})
+        # The other instances are still initialized
+        self.assertEqual(2, mock_init_instance.call_count)
+
+    @mock.patch('nova.compute.manager.ComputeManager.'
+                '_sync_instance_power_state')
+    def test_query_driver_power_state_and_sync_known_state(
+            self, mock_sync_power_state):
+        db_instance = objects.Instance(uuid=uuids.db_instance,
+                                       power_state=power_state.RUNNING,
+                                       task_state=None)
+        with test.nested(
+            mock.patch.object(self.compute.driver, 'get_info'),
+            mock.patch.object(db_instance, 'refresh'),
+        ) as (mock_get_info, mock_refresh):
+            self.compute._query_driver_power_state_and_sync(
+                self.context, db_instance, power_state.RUNNING)
+            # The instance is only refreshed by _sync_instance_power_state()
+            mock_refresh.assert_not_called()
+            mock_get_info.assert_not_called()
+            mock_sync_power_state.assert_called_once_with(
+                self.context, db_instance, power_state.RUNNING,
+                use_slave=True, prefetched=True)
+
+    @mock.patch.object(fake_driver.FakeDriver, 'get_info')
+    @mock.patch.object(objects.Instance, 'refresh')
+    @mock.patch.object(objects.Instance, 'save')
+    def test_sync_instance_power_state_prefetched(self, mock_save,
+                                                  mock_refresh,
+                                                  mock_get_info):
+        instance = self._get_sync_instance(power_state.RUNNING,
+                                           vm_states.ACTIVE)
+        self.compute._sync_instance_power_state(
+            self.context, instance, power_state.RUNNING, prefetched=True)
+        mock_refresh.assert_called_once_with(use_slave=False)
+        mock_get_info.assert_not_called()
+
+        # The power state is queried again as it may be outdated
+        mock_get_info.return_value = hardware.InstanceInfo(
+            state=power_state.RUNNING)
+        self.compute._sync_instance_power_state(
+            self.context, instance, power_state.SHUTDOWN, prefetched=True)
+        mock_get_info.assert_called_once_with(instance)
+        self.assertEqual(power_state.RUNNING, instance.power_state)
+        mock_save.assert_not_called()
+
+    def test_get_power_states(self):
+        instances = [objects.Instance(uuid=uuids.running),
+                     objects.Instance(uuid=uuids.missing)]
+        with mock.patch.object(
+            self.compute.driver, 'get_info_many',
+            return_value={uuids.running: hardware.InstanceInfo(
+                state=power_state.RUNNING)},
+        ) as mock_get_info_many:
+            self.assertEqual(
+                {uuids.running: power_state.RUNNING,
+                 uuids.missing: power_state.NOSTATE},
+                self.compute._get_power_states(instances))
+            mock_get_info_many.assert_called_once_with(instances)
+
+    def test_get_power_states_not_implemented(self):
+        with mock.patch.object(self.compute.driver, 'get_info_many',
+                               side_effect=NotImplementedError):
+            self.assertEqual({}, self.compute._get_power_states(
+                [objects.Instance(uuid=uuids.instance)]))
+
+    def test_get_power_states_error(self):
+        with mock.patch.object(self.compute.driver, 'get_info_many',
+                               side_effect=exception.VirtDriverNotReady):
+            self.assertEqual({}, self.compute._get_power_states(
+                [objects.Instance(uuid=uuids.instance)]))
 
     def test_cleanup_running_deleted_instances_virt_driver_not_ready(self):
         """Tests the scenario that the driver raises VirtDriverNotReady
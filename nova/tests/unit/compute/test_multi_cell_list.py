@@ -13,6 +13,7 @@
 from contextlib import contextmanager
 import copy
 import datetime
+import time
 from unittest import mock
 
 from oslo_utils.fixture import uuidsentinel as uuids
@@ -169,6 +170,39 @@ class TestUtils(test.NoDBTestCase):
                 mock.MagicMock(), tester)][0],
             test.TestingException)
 
+    def test_prefetch_wrapper_success(self):
+        fetched = []
+
+        def test(ctx, data):
+            for batch in data:
+                fetched.append(batch)
+                yield batch
+
+        gen = multi_cell_list.prefetch_wrapper(None, test, [[1, 2], [3]])
+        self.assertEqual([1, 2, 3], list(gen))
+        self.assertEqual([[1, 2], [3]], fetched)
+
+    @mock.patch.object(context, 'CELL_TIMEOUT', 0)
+    def test_prefetch_wrapper_timeout(self):
+        def test(ctx):
+            time.sleep(1)
+            yield [1]
+
+        self.assertEqual([context.did_not_respond_sentinel],
+                         [x._db_record for x in
+                          multi_cell_list.prefetch_wrapper(
+                              mock.MagicMock(), test)])
+
+    def test_prefetch_wrapper_fail(self):
+        def tester(ctx):
+            yield [1]
+            raise test.TestingException
+
+        results = list(multi_cell_list.prefetch_wrapper(
+            mock.MagicMock(), tester))
+        self.assertEqual(1, results[0])
+        self.assertIsInstance(results[1]._db_record, test.TestingException)
+
 
 class TestListContext(multi_cell_list.RecordSortContext):
     def compare_records(self, rec1, rec2):
@@ -311,6 +345,37 @@ class TestBatching(test.NoDBTestCase):
                           [[10 for i in range(0, 500 // 10)]])
         self.assertEqual(limit_expected, summary['limit_by_cell'])
 
+    @mock.patch.dict(multi_cell_list._CELL_CONTRIBUTIONS, clear=True)
+    def test_batches_prefetch(self):
+        self.flags(list_records_by_prefetching_cells=True, group='api')
+        lister = TestLister(self._data, [], [],
+                            cells=self._cells, batch_size=10)
+        ctx = context.RequestContext()
+        res = list(lister.get_records_sorted(ctx, {}, 500, None))
+        self.assertEqual(500, len(res))
+        summary = lister.call_summary('get_by_filters')
+
+        # Since we got everything from one cell (due to how things are sorting)
+        # that cell was queried growing batches until the total was hit,
+        # while the second batch of every other cell was prefetched.
+        limit_expected = ([[10, 20] for cell in self._cells[1:]] +
+                          [[10, 20, 40, 80, 160, 190]])
+        self.assertEqual(limit_expected, summary['limit_by_cell'])
+
+        # The next listing queries what each cell contributed to the last
+        # one in the first batch, so that the total is hit before the second
+        # batch of any cell is needed.
+        self.assertEqual(
+            [0] * 9 + [500],
+            sorted(multi_cell_list._CELL_CONTRIBUTIONS.values()))
+        lister = TestLister(self._data, [], [],
+                            cells=self._cells, batch_size=10)
+        res = list(lister.get_records_sorted(ctx, {}, 500, None))
+        self.assertEqual(500, len(res))
+        summary = lister.call_summary('get_by_filters')
+        limit_expected = ([[10] for cell in self._cells[1:]] + [[500]])
+        self.assertEqual(limit_expected, summary['limit_by_cell'])
+
     def test_no_batches(self):
         lister = TestLister(self._data, [], [],
                             cells=self._cells)
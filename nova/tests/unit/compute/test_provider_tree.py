@@ -430,6 +430,40 @@ class TestProviderTree(test.NoDBTestCase):
         self.assertEqual([uuids.root, uuids.child], pt.get_provider_uuids())
         self.assertFalse(pt.exists(uuids.grandchild))
 
+    def test_copy_tree(self):
+        cn1 = self.compute_node1
+        pt = self._pt_with_cns()
+        numa0_uuid = pt.new_child('numa0', cn1.uuid)
+        pt.update_traits(numa0_uuid, ['CUSTOM_FOO'])
+
+        self.assertRaises(ValueError, pt.copy_tree, uuids.non_existing_rp)
+
+        for name_or_uuid in (cn1.uuid, 'numa0'):
+            cpt = pt.copy_tree(name_or_uuid)
+            self.assertEqual([cn1.uuid, numa0_uuid], cpt.get_provider_uuids())
+            self.assertEqual(pt.data(numa0_uuid), cpt.data('numa0'))
+            # The copy is independent from the original tree
+            cpt.update_traits(numa0_uuid, ['CUSTOM_BAR'])
+            self.assertEqual({'CUSTOM_FOO'}, pt.data(numa0_uuid).traits)
+
+    def test_add_trees(self):
+        cn1 = self.compute_node1
+        cn2 = self.compute_node2
+        pt = provider_tree.ProviderTree()
+        pt.new_root('old-name', cn1.uuid)
+        pt.new_child('old-child', cn1.uuid)
+
+        other = self._pt_with_cns()
+        numa0_uuid = other.new_child('numa0', cn1.uuid)
+        pt.add_trees(other)
+
+        self.assertEqual(
+            {cn1.uuid, cn2.uuid, numa0_uuid}, set(pt.get_provider_uuids()))
+        self.assertFalse(pt.exists('old-name'))
+        self.assertFalse(pt.exists('old-child'))
+        self.assertTrue(pt.exists(cn1.hypervisor_hostname))
+        self.assertTrue(pt.exists(cn2.hypervisor_hostname))
+
     def test_has_inventory_changed_no_existing_rp(self):
         pt = self._pt_with_cns()
         self.assertRaises(
@@ -1868,6 +1868,109 @@ class TestUpdateComputeNode(BaseTestCase):
         # The retry is restricted to _update_to_placement
         self.assertEqual(0, mock_resource_change.call_count)
 
+    def _setup_batch(self):
+        self._setup_rt()
+        computes = []
+        subtrees = {}
+        for i, uuid in enumerate((uuids.cn1, uuids.cn2)):
+            compute = objects.ComputeNode(
+                uuid=uuid, hypervisor_hostname='node%d' % i)
+            self.rt.compute_nodes[compute.hypervisor_hostname] = compute
+            self.rt.old_resources[compute.hypervisor_hostname] = compute
+            computes.append(compute)
+            subtrees[uuid] = provider_tree.ProviderTree()
+            subtrees[uuid].new_root(compute.hypervisor_hostname, uuid)
+        rc = self.rt.reportclient
+        rc.get_provider_subtree_and_ensure_root.side_effect = (
+            lambda ctx, uuid, name: subtrees[uuid])
+        rc.update_from_provider_trees.return_value = {}
+        self.driver_mock.update_provider_tree.side_effect = lambda *a: None
+        return computes, subtrees
+
+    @mock.patch('nova.compute.resource_tracker.ResourceTracker.'
+                '_sync_compute_service_disabled_trait', new=mock.Mock())
+    @mock.patch('nova.objects.ComputeNode.save', new=mock.Mock())
+    def test_batch_placement_updates(self):
+        self.flags(batch_provider_tree_sync=True, group='placement')
+        computes, subtrees = self._setup_batch()
+        rc = self.rt.reportclient
+
+        with self.rt.batch_placement_updates(mock.sentinel.ctx):
+            for compute in computes:
+                self.rt._update(mock.sentinel.ctx, compute)
+            rc.update_from_provider_trees.assert_not_called()
+
+        rc.update_from_provider_trees.assert_called_once_with(
+            mock.sentinel.ctx, [subtrees[uuids.cn1], subtrees[uuids.cn2]])
+        rc.update_from_provider_tree.assert_not_called()
+        rc.get_provider_tree_and_ensure_root.assert_not_called()
+        rc.get_allocations_for_provider_tree.assert_not_called()
+        self.assertEqual(2, self.driver_mock.update_provider_tree.call_count)
+        # The resource tracker keeps the trees of all the nodes.
+        self.assertEqual({uuids.cn1, uuids.cn2},
+                         set(self.rt.provider_tree.get_provider_uuids()))
+        self.assertIsNone(self.rt._batched_provider_trees)
+
+    @mock.patch('nova.compute.resource_tracker.ResourceTracker.'
+                '_sync_compute_service_disabled_trait', new=mock.Mock())
+    @mock.patch('nova.objects.ComputeNode.save', new=mock.Mock())
+    def test_batch_placement_updates_disabled(self):
+        computes, subtrees = self._setup_batch()
+        rc = self.rt.reportclient
+
+        with self.rt.batch_placement_updates(mock.sentinel.ctx):
+            for compute in computes:
+                self.rt._update(mock.sentinel.ctx, compute)
+
+        rc.update_from_provider_trees.assert_not_called()
+        rc.get_provider_subtree_and_ensure_root.assert_not_called()
+        self.assertEqual(2, rc.update_from_provider_tree.call_count)
+
+    @mock.patch('nova.compute.resource_tracker.ResourceTracker.'
+                '_sync_compute_service_disabled_trait', new=mock.Mock())
+    @mock.patch('nova.objects.ComputeNode.save', new=mock.Mock())
+    def test_batch_placement_updates_errors(self):
+        self.flags(batch_provider_tree_sync=True, group='placement')
+        computes, subtrees = self._setup_batch()
+        rc = self.rt.reportclient
+        rc.update_from_provider_trees.return_value = {
+            uuids.cn1: exc.ResourceProviderSyncFailed(),
+            uuids.cn2: exc.ResourceProviderUpdateConflict(
+                uuid=uuids.cn2, generation=42, error='error'),
+        }
+
+        with self.rt.batch_placement_updates(mock.sentinel.ctx):
+            for compute in computes:
+                self.rt._update(mock.sentinel.ctx, compute)
+
+        # Only the update of the node with a conflict is redriven, outside
+        # of the batch.
+        rc.get_provider_tree_and_ensure_root.assert_called_once_with(
+            mock.sentinel.ctx, uuids.cn2, name='node1')
+        rc.update_from_provider_tree.assert_called_once_with(
+            mock.sentinel.ctx,
+            rc.get_provider_tree_and_ensure_root.return_value,
+            allocations=None)
+
+    @mock.patch('nova.compute.resource_tracker.ResourceTracker.'
+                '_sync_compute_service_disabled_trait', new=mock.Mock())
+    @mock.patch('nova.objects.ComputeNode.save', new=mock.Mock())
+    def test_batch_placement_updates_superseded(self):
+        self.flags(batch_provider_tree_sync=True, group='placement')
+        computes, subtrees = self._setup_batch()
+        rc = self.rt.reportclient
+
+        with self.rt.batch_placement_updates(mock.sentinel.ctx):
+            for compute in computes:
+                self.rt._update(mock.sentinel.ctx, compute)
+            # An update flushed right away, like on startup, supersedes the
+            # batched one.
+            self.rt._update(mock.sentinel.ctx, computes[0], startup=True)
+            rc.update_from_provider_tree.assert_called_once()
+
+        rc.update_from_provider_trees.assert_called_once_with(
+            mock.sentinel.ctx, [subtrees[uuids.cn2]])
+
     @mock.patch(
         'nova.compute.resource_tracker.ResourceTracker.'
         '_sync_compute_service_disabled_trait',
@@ -532,6 +532,63 @@ class UnsupportedDbRegexpTestCase(DbTestCase):
                     marker = insts[-1]['uuid']
                     self.assertEqual(correct[-1]['uuid'], marker)
 
+    def test_instance_get_all_by_filters_sort_keys_paginate_keyset(self,
+            mock_get_regexp):
+        '''Verifies keyset pagination pages through the same order.'''
+        for name in ('test2', 'test1', 'test3', 'test1', 'test2', 'test1'):
+            self.create_instance_with_args(display_name=name)
+
+        for sort_keys, sort_dirs in ((None, None),
+                                     (['display_name'], ['asc']),
+                                     (['display_name'], ['desc']),
+                                     (['created_at', 'uuid'], ['asc', 'asc']),
+                                     (['display_name', 'vm_state'],
+                                      ['asc', 'asc'])):
+            self.flags(instance_list_keyset_pagination=False, group='api')
+            correct_order = db.instance_get_all_by_filters_sort(
+                self.context, {}, sort_keys=sort_keys, sort_dirs=sort_dirs)
+            self.assertEqual(6, len(correct_order))
+
+            self.flags(instance_list_keyset_pagination=True, group='api')
+            for limit in range(1, 4):
+                marker = None
+                for i in range(0, 7, limit):
+                    correct = correct_order[i:i + limit]
+                    insts = self._assert_equals_inst_order(
+                        correct, {}, sort_keys=sort_keys,
+                        sort_dirs=sort_dirs, limit=limit, marker=marker)
+                    if correct:
+                        marker = insts[-1]['uuid']
+
+    def test_instance_keyset_paginate_query(self, mock_get_regexp):
+        inst = self.create_instance_with_args(display_name='test1')
+        query = mock.Mock()
+
+        # Mixed directions, unsupported or non unique sort keys and markers
+        # with null values are left up to paginate_query()
+        self.assertIsNone(db._instance_keyset_paginate_query(
+            query, 10, ['created_at', 'id'], ['desc', 'asc']))
+        self.assertIsNone(db._instance_keyset_paginate_query(
+            query, 10, ['vm_state', 'created_at', 'id'], ['asc'] * 3))
+        self.assertIsNone(db._instance_keyset_paginate_query(
+            query, 10, ['display_name', 'created_at'], ['asc'] * 2))
+        self.assertIsNone(db._instance_keyset_paginate_query(
+            query, 10, ['updated_at', 'created_at', 'id'], ['asc'] * 3,
+            marker=inst))
+        query.filter.assert_not_called()
+
+        result = db._instance_keyset_paginate_query(
+            query, 10, ['display_name', 'id', 'uuid'], ['asc'] * 3,
+            marker=inst)
+        self.assertEqual(
+            query.filter.return_value.order_by.return_value.limit.return_value,
+            result)
+        # The keys following the unique id are dropped
+        self.assertEqual(
+            2, len(query.filter.return_value.order_by.call_args[0]))
+        query.filter.return_value.order_by.return_value.limit.\
+            assert_called_once_with(10)
+
     def test_instance_get_deleted_by_filters_sort_keys_paginate(self,
             mock_get_regexp):
         '''Verifies sort order with pagination for deleted instances.'''
@@ -914,18 +971,16 @@ class SqlAlchemyDbApiTestCase(DbTestCase):
             ctxt, begin=now)
         self.assertEqual(4, len(result))
         # verify that all default columns are joined
-        meta = utils.metadata_to_dict(result[0]['metadata'])
-        self.assertEqual(sample_data['metadata'], meta)
-        sys_meta = utils.metadata_to_dict(result[0]['system_metadata'])
-        self.assertEqual(sample_data['system_metadata'], sys_meta)
+        self.assertEqual(sample_data['metadata'], result[0]['metadata'])
+        self.assertEqual(sample_data['system_metadata'],
+                         result[0]['system_metadata'])
         self.assertIn('info_cache', result[0])
 
         result = db.instance_get_active_by_window_joined(
             ctxt, begin=now3, columns_to_join=['info_cache'])
         self.assertEqual(2, len(result))
         # verify that only info_cache is loaded
-        meta = utils.metadata_to_dict(result[0]['metadata'])
-        self.assertEqual({}, meta)
+        self.assertEqual({}, result[0]['metadata'])
         self.assertIn('info_cache', result[0])
 
         result = db.instance_get_active_by_window_joined(
@@ -937,10 +992,9 @@ class SqlAlchemyDbApiTestCase(DbTestCase):
             columns_to_join=['system_metadata'])
         self.assertEqual(2, len(result))
         # verify that only system_metadata is loaded
-        meta = utils.metadata_to_dict(result[0]['metadata'])
-        self.assertEqual({}, meta)
-        sys_meta = utils.metadata_to_dict(result[0]['system_metadata'])
-        self.assertEqual(sample_data['system_metadata'], sys_meta)
+        self.assertEqual({}, result[0]['metadata'])
+        self.assertEqual(sample_data['system_metadata'],
+                         result[0]['system_metadata'])
         self.assertNotIn('info_cache', result[0])
 
         result = db.instance_get_active_by_window_joined(
@@ -948,10 +1002,8 @@ class SqlAlchemyDbApiTestCase(DbTestCase):
             columns_to_join=['metadata', 'info_cache'])
         self.assertEqual(2, len(result))
         # verify that only metadata and info_cache are loaded
-        meta = utils.metadata_to_dict(result[0]['metadata'])
-        self.assertEqual(sample_data['metadata'], meta)
-        sys_meta = utils.metadata_to_dict(result[0]['system_metadata'])
-        self.assertEqual({}, sys_meta)
+        self.assertEqual(sample_data['metadata'], result[0]['metadata'])
+        self.assertEqual({}, result[0]['system_metadata'])
         self.assertIn('info_cache', result[0])
         self.assertEqual(network_info, result[0]['info_cache']['network_info'])
 
@@ -1596,10 +1648,9 @@ class InstanceTestCase(test.TestCase, ModelsObjectComparatorMixin):
     def test_instance_get_all_with_meta(self):
         self.create_instance_with_args()
         for inst in db.instance_get_all(self.ctxt):
-            meta = utils.metadata_to_dict(inst['metadata'])
-            self.assertEqual(meta, self.sample_data['metadata'])
-            sys_meta = utils.metadata_to_dict(inst['system_metadata'])
-            self.assertEqual(sys_meta, self.sample_data['system_metadata'])
+            self.assertEqual(inst['metadata'], self.sample_data['metadata'])
+            self.assertEqual(inst['system_metadata'],
+                             self.sample_data['system_metadata'])
 
     def test_instance_get_with_meta(self):
         inst_id = self.create_instance_with_args().id
@@ -1707,20 +1758,36 @@ class InstanceTestCase(test.TestCase, ModelsObjectComparatorMixin):
     def test_instance_get_all_by_filters_with_meta(self):
         self.create_instance_with_args()
         for inst in db.instance_get_all_by_filters(self.ctxt, {}):
-            meta = utils.metadata_to_dict(inst['metadata'])
-            self.assertEqual(meta, self.sample_data['metadata'])
-            sys_meta = utils.metadata_to_dict(inst['system_metadata'])
-            self.assertEqual(sys_meta, self.sample_data['system_metadata'])
+            self.assertEqual(inst['metadata'], self.sample_data['metadata'])
+            self.assertEqual(inst['system_metadata'],
+                             self.sample_data['system_metadata'])
+
+    def test_instance_get_all_by_filters_with_system_metadata_items(self):
+        self.create_instance_with_args()
+        result = db.instance_get_all_by_filters(
+            self.ctxt, {}, columns_to_join=['system_metadata.smkey1',
+                                            'system_metadata.nope'])
+        self.assertEqual(1, len(result))
+        self.assertEqual({'smkey1': 'smval1'}, result[0]['system_metadata'])
+        self.assertEqual({}, result[0]['metadata'])
+
+    def test_instance_get_by_uuid_with_system_metadata_items(self):
+        inst = self.create_instance_with_args()
+        result = db.instance_get_by_uuid(
+            self.ctxt, inst['uuid'],
+            columns_to_join=['system_metadata.smkey1'])
+        # A single instance gets all of its system_metadata
+        self.assertEqual(self.sample_data['system_metadata'],
+                         utils.metadata_to_dict(result['system_metadata'],
+                                                include_deleted=True))
 
     def test_instance_get_all_by_filters_without_meta(self):
         self.create_instance_with_args()
         result = db.instance_get_all_by_filters(self.ctxt, {},
                                                 columns_to_join=[])
         for inst in result:
-            meta = utils.metadata_to_dict(inst['metadata'])
-            self.assertEqual(meta, {})
-            sys_meta = utils.metadata_to_dict(inst['system_metadata'])
-            self.assertEqual(sys_meta, {})
+            self.assertEqual(inst['metadata'], {})
+            self.assertEqual(inst['system_metadata'], {})
 
     def test_instance_get_all_by_filters_with_fault(self):
         inst = self.create_instance_with_args()
@@ -1756,8 +1823,8 @@ class InstanceTestCase(test.TestCase, ModelsObjectComparatorMixin):
             return db._instance_metadata_get_multi(context, uuids)
 
         meta = test(self.ctxt)
-        for row in meta:
-            self.assertIn(row['instance_uuid'], uuids)
+        for instance_uuid, key, value, deleted in meta:
+            self.assertIn(instance_uuid, uuids)
 
     @mock.patch.object(query.Query, 'filter')
     def test_instance_metadata_get_multi_no_uuids(self, mock_query_filter):
@@ -1773,8 +1840,8 @@ class InstanceTestCase(test.TestCase, ModelsObjectComparatorMixin):
             return db._instance_system_metadata_get_multi(context, uuids)
 
         sys_meta = test(self.ctxt)
-        for row in sys_meta:
-            self.assertIn(row['instance_uuid'], uuids)
+        for instance_uuid, key, value in sys_meta:
+            self.assertIn(instance_uuid, uuids)
 
     @mock.patch.object(query.Query, 'filter')
     def test_instance_system_metadata_get_multi_no_uuids(self,
@@ -2032,7 +2099,7 @@ class InstanceTestCase(test.TestCase, ModelsObjectComparatorMixin):
         instance = self.create_instance_with_args()
         result = db.instance_get_all_by_host_and_node(self.ctxt, 'h1', 'n1')
         self.assertEqual(result[0]['uuid'], instance['uuid'])
-        self.assertEqual(result[0]['system_metadata'], [])
+        self.assertEqual(result[0]['system_metadata'], {})
 
     def test_instance_get_all_by_host_and_node(self):
         instance = self.create_instance_with_args(
@@ -2041,7 +2108,7 @@ class InstanceTestCase(test.TestCase, ModelsObjectComparatorMixin):
             self.ctxt, 'h1', 'n1',
             columns_to_join=['system_metadata', 'extra'])
         self.assertEqual(instance['uuid'], result[0]['uuid'])
-        self.assertEqual('bar', result[0]['system_metadata'][0]['value'])
+        self.assertEqual({'foo': 'bar'}, result[0]['system_metadata'])
         self.assertEqual(instance['uuid'], result[0]['extra']['instance_uuid'])
 
     @mock.patch('nova.db.main.api._instances_fill_metadata')
@@ -6562,6 +6629,152 @@ class ArchiveTestCase(test.TestCase, ModelsObjectComparatorMixin):
             rows = conn.execute(qstl).fetchall()
             self.assertEqual(len(rows), 6)
 
+    @mock.patch.object(db, '_ARCHIVE_PK_RANGE_SIZE', 2)
+    def test_archive_deleted_rows_checkpoint(self):
+        # Add 6 rows to table
+        for uuidstr in self.uuidstrs:
+            ins_stmt = self.instance_id_mappings.insert().values(uuid=uuidstr)
+            with self.engine.connect() as conn, conn.begin():
+                conn.execute(ins_stmt)
+        with self.engine.connect() as conn, conn.begin():
+            ids = [r[0] for r in conn.execute(
+                sql.select(self.instance_id_mappings.c.id).order_by(
+                    self.instance_id_mappings.c.id)).fetchall()]
+        # Set the 1st, 2nd, 4th and 5th to deleted
+        update_statement = self.instance_id_mappings.update().where(
+            self.instance_id_mappings.c.id.in_(ids[:2] + ids[3:5])
+        ).values(deleted=1, deleted_at=timeutils.utcnow())
+        with self.engine.connect() as conn, conn.begin():
+            conn.execute(update_statement)
+
+        checkpoint = {}
+        stats = {}
+        results = db.archive_deleted_rows(
+            max_rows=3, checkpoint=checkpoint, stats=stats)
+        self._assertEqualObjects(dict(instance_id_mappings=3), results[0])
+        # The checkpoint is the last row archived
+        self.assertEqual(ids[3], checkpoint['instance_id_mappings'])
+
+        # Rows deleted before the checkpoint are not archived until starting
+        # from scratch again
+        update_statement = self.instance_id_mappings.update().where(
+            self.instance_id_mappings.c.id == ids[2]
+        ).values(deleted=1, deleted_at=timeutils.utcnow())
+        with self.engine.connect() as conn, conn.begin():
+            conn.execute(update_statement)
+        results = db.archive_deleted_rows(
+            max_rows=3, checkpoint=checkpoint, stats=stats)
+        self._assertEqualObjects(dict(instance_id_mappings=1), results[0])
+        # The checkpoint is the last row scanned
+        self.assertEqual(ids[5], checkpoint['instance_id_mappings'])
+        results = db.archive_deleted_rows(
+            max_rows=3, checkpoint=checkpoint, stats=stats)
+        self._assertEqualObjects({}, results[0])
+
+        self.assertEqual(['instance_id_mappings'], list(stats))
+        self.assertEqual(4, stats['instance_id_mappings'][0])
+
+        results = db.archive_deleted_rows(max_rows=3, checkpoint={})
+        self._assertEqualObjects(dict(instance_id_mappings=1), results[0])
+
+    def test_archive_deleted_rows_workers(self):
+        # Add 6 rows to each table
+        for uuidstr in self.uuidstrs:
+            ins_stmt = self.instance_id_mappings.insert().values(uuid=uuidstr)
+            with self.engine.connect() as conn, conn.begin():
+                conn.execute(ins_stmt)
+            ins_stmt2 = self.instances.insert().values(uuid=uuidstr)
+            with self.engine.connect() as conn, conn.begin():
+                conn.execute(ins_stmt2)
+        # Set 4 of each to deleted
+        for table in (self.instance_id_mappings, self.instances):
+            update_statement = table.update().where(
+                table.c.uuid.in_(self.uuidstrs[:4])
+            ).values(deleted=1, deleted_at=timeutils.utcnow())
+            with self.engine.connect() as conn, conn.begin():
+                conn.execute(update_statement)
+
+        # The tables are not related so max_rows applies to each of them
+        results = db.archive_deleted_rows(max_rows=3, workers=2)
+        expected = dict(instance_id_mappings=3, instances=3)
+        self._assertEqualObjects(expected, results[0])
+        self.assertEqual(6, results[2])
+        self.assertEqual(3, len(results[1]))
+
+        results = db.archive_deleted_rows(max_rows=3, workers=2)
+        expected = dict(instance_id_mappings=1, instances=1)
+        self._assertEqualObjects(expected, results[0])
+        self._assert_shadow_tables_empty_except(
+            'shadow_instances',
+            'shadow_instance_id_mappings'
+        )
+
+    def test_get_table_dependency_chains(self):
+        metadata = sa.MetaData()
+        metadata.reflect(bind=self.engine)
+        chains = db._get_table_dependency_chains(metadata.sorted_tables)
+        chain_names = {
+            table.name: [t.name for t in chain]
+            for chain in chains for table in chain
+        }
+        instance_chain = chain_names['instances']
+        self.assertIn('instance_extra', instance_chain)
+        self.assertIn('instance_actions_events', instance_chain)
+        self.assertLess(instance_chain.index('instances'),
+                        instance_chain.index('instance_extra'))
+        self.assertNotIn('instance_id_mappings', instance_chain)
+        self.assertEqual(['instance_id_mappings'],
+                         chain_names['instance_id_mappings'])
+        self.assertEqual(len(metadata.sorted_tables),
+                         sum(len(chain) for chain in chains))
+
+    @mock.patch('time.sleep')
+    def test_purge_shadow_tables_max_rows(self, mock_sleep):
+        old = timeutils.parse_strtime('2017-01-01T00:00:00.0')
+        new = timeutils.utcnow()
+        # Add 5 old rows and 2 new ones to shadow tables
+        for i in range(7):
+            deleted_at = old if i < 5 else new
+            for table in (self.shadow_instance_id_mappings,
+                          self.shadow_instances):
+                ins_stmt = table.insert().values(
+                    uuid=self.uuidstrs[i % 6], deleted=1,
+                    deleted_at=deleted_at)
+                with self.engine.connect() as conn, conn.begin():
+                    conn.execute(ins_stmt)
+
+        lines = []
+        before_date = dateutil_parser.parse('2018-01-01', fuzzy=True)
+        deleted = db.purge_shadow_tables(
+            None, before_date, status_fn=lines.append, max_rows=2,
+            max_rate=1000000, workers=2)
+        self.assertEqual(10, deleted)
+        for table in ('shadow_instance_id_mappings', 'shadow_instances'):
+            # Progress is reported after each chunk of rows deleted
+            self.assertIn('Deleted 2 rows from %s so far' % table, lines)
+            self.assertIn('Deleted 4 rows from %s so far' % table, lines)
+            self.assertIn('Deleted 5 rows from %s so far' % table, lines)
+            self.assertIn('Deleted 5 rows from %s based on timestamp column '
+                          'deleted_at' % table, lines)
+
+        with self.engine.connect() as conn, conn.begin():
+            for table in (self.shadow_instance_id_mappings,
+                          self.shadow_instances):
+                rows = conn.execute(sql.select(table)).fetchall()
+                self.assertEqual(2, len(rows))
+                self.assertTrue(all(row.deleted_at == new for row in rows))
+
+        # Deleting 10 rows at a million rows per second needs no throttling,
+        # but deleting them at 1 row per second does.
+        def throttled():
+            return [c for c in mock_sleep.call_args_list if c.args[0] > 0]
+
+        self.assertEqual([], throttled())
+        deleted = db.purge_shadow_tables(
+            None, None, status_fn=lines.append, max_rows=2, max_rate=1)
+        self.assertEqual(4, deleted)
+        self.assertEqual(2, len(throttled()))
+
 
 class PciDeviceDBApiTestCase(test.TestCase, ModelsObjectComparatorMixin):
     def setUp(self):
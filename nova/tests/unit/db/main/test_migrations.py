@@ -379,6 +379,12 @@ class NovaMigrationsWalk(
                                 'console_auth_tokens',
                                 'tls_port')
 
+    def _check_b7e4d2a9c1f3(self, connection):
+        for index in ('instances_project_id_deleted_created_at_idx',
+                      'instances_project_id_deleted_updated_at_idx',
+                      'instances_project_id_deleted_display_name_idx'):
+            self.assertIndexExists(connection, 'instances', index)
+
     def test_single_base_revision(self):
         """Ensure we only have a single base revision.
 
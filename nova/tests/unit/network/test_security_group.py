@@ -300,6 +300,84 @@ class TestNeutronDriver(test.NoDBTestCase):
     def test_instances_security_group_bindings_more_then_max(self):
         self._test_instances_security_group_bindings_scale(300)
 
+    def test_instances_security_group_bindings_parallel(self):
+        self.flags(security_group_lookup_workers=4, group='neutron')
+        sg1 = {'id': uuids.sg1, 'name': 'wol'}
+        servers = [{'id': 'server-%d' % i} for i in range(300)]
+        ports = {server['id']: {'device_id': server['id'],
+                                'security_groups': [uuids.sg1]}
+                 for server in servers}
+
+        def fake_list_ports(device_id, fields):
+            return {'ports': [ports[id] for id in device_id]}
+
+        self.mocked_client.list_ports.side_effect = fake_list_ports
+        self.mocked_client.list_security_groups.return_value = {
+            'security_groups': [sg1]}
+
+        result = sg_api.get_instances_security_groups_bindings(
+            self.context, servers)
+        self.assertEqual({server['id']: [{'name': 'wol'}]
+                          for server in servers}, result)
+        self.assertEqual(2, self.mocked_client.list_ports.call_count)
+        self.mocked_client.list_ports.assert_has_calls([
+            mock.call(device_id=[s['id'] for s in servers[:150]],
+                      fields=['device_id', 'security_groups']),
+            mock.call(device_id=[s['id'] for s in servers[150:]],
+                      fields=['device_id', 'security_groups'])],
+            any_order=True)
+        self.mocked_client.list_security_groups.assert_called_once_with(
+            id=[uuids.sg1], fields=['id', 'name'])
+
+    @mock.patch('time.monotonic')
+    def test_instances_security_group_bindings_name_cache(self, mock_time):
+        self.flags(security_group_name_cache_ttl=60, group='neutron')
+        self.addCleanup(sg_api._SG_NAME_CACHE.clear)
+        mock_time.return_value = 1000
+        servers = [{'id': uuids.server}]
+        self.mocked_client.list_ports.return_value = {'ports': [
+            {'id': uuids.port1, 'device_id': uuids.server,
+             'security_groups': [uuids.sg1]},
+            {'id': uuids.port2, 'device_id': uuids.server,
+             'security_groups': [uuids.sg2]}]}
+
+        def fake_list_security_groups(id, fields):
+            sgs = {uuids.sg1: {'id': uuids.sg1, 'name': 'wol'},
+                   uuids.sg2: {'id': uuids.sg2, 'name': 'eor'}}
+            return {'security_groups': [sgs[sg_id] for sg_id in id]}
+
+        list_sgs = self.mocked_client.list_security_groups
+        list_sgs.side_effect = fake_list_security_groups
+        expected = {uuids.server: [{'name': 'wol'}, {'name': 'eor'}]}
+
+        for i in range(2):
+            result = sg_api.get_instances_security_groups_bindings(
+                self.context, servers)
+            self.assertEqual(expected, result)
+        list_sgs.assert_called_once_with(id=mock.ANY, fields=['id', 'name'])
+
+        # The cached names are not shared with other projects.
+        other_context = context.RequestContext('userid', 'other_tenantid')
+        result = sg_api.get_instances_security_groups_bindings(
+            other_context, servers)
+        self.assertEqual(expected, result)
+        self.assertEqual(2, list_sgs.call_count)
+
+        # Only the security group deleted through the API is looked up again.
+        sg_api.destroy(self.context, {'id': uuids.sg2})
+        list_sgs.reset_mock()
+        sg_api.get_instances_security_groups_bindings(self.context, servers)
+        list_sgs.assert_called_once_with(id=[uuids.sg2],
+                                         fields=['id', 'name'])
+
+        # The cached names expire.
+        mock_time.return_value = 1061
+        list_sgs.reset_mock()
+        sg_api.get_instances_security_groups_bindings(self.context, servers)
+        list_sgs.assert_called_once_with(id=mock.ANY, fields=['id', 'name'])
+        self.assertEqual(sorted([uuids.sg1, uuids.sg2]),
+                         sorted(list_sgs.call_args[1]['id']))
+
     def test_instances_security_group_bindings_with_hidden_sg(self):
         servers = [{'id': 'server_1'}]
         ports = [{'id': '1', 'device_id': 'dev_1', 'security_groups': ['1']},
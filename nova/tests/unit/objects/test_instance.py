@@ -655,6 +655,30 @@ class _TestInstanceObject(object):
         self.assertNotIn('pci_devices',
                          mock_fdo.call_args_list[0][1]['expected_attrs'])
 
+    @mock.patch('nova.server_view_cache.invalidate')
+    @mock.patch('nova.db.main.api.instance_extra_update_by_uuid')
+    @mock.patch('nova.db.main.api.instance_update_and_get_original')
+    @mock.patch.object(instance.Instance, '_from_db_object')
+    def test_save_invalidates_server_view_cache(self, mock_fdo, mock_update,
+                                                mock_extra_update,
+                                                mock_invalidate):
+        mock_update.return_value = None, None
+        inst = objects.Instance(
+            context=self.context, id=123, uuid=uuids.instance)
+        inst.obj_reset_changes()
+        inst.save()
+        mock_invalidate.assert_not_called()
+
+        inst.display_name = 'foo'
+        inst.save()
+        mock_invalidate.assert_called_once_with(uuids.instance)
+
+        mock_invalidate.reset_mock()
+        inst.obj_reset_changes()
+        inst.trusted_certs = objects.TrustedCerts(ids=['foo'])
+        inst.save()
+        mock_invalidate.assert_called_once_with(uuids.instance)
+
     @mock.patch('nova.db.main.api.instance_extra_update_by_uuid')
     @mock.patch('nova.db.main.api.instance_update_and_get_original')
     @mock.patch.object(instance.Instance, '_from_db_object')
@@ -1354,6 +1378,30 @@ class _TestInstanceObject(object):
         self.assertEqual(db_flavor['flavorid'],
                          inst.get_flavor().flavorid)
 
+    def test_get_system_metadata(self):
+        inst = objects.Instance(system_metadata={'foo': 'bar'})
+        self.assertEqual('bar', inst.get_system_metadata('foo'))
+        self.assertEqual('baz', inst.get_system_metadata('nope', 'baz'))
+
+    @mock.patch.object(objects.Instance, 'obj_load_attr')
+    def test_get_system_metadata_items(self, mock_load):
+        db_inst = fake_instance.fake_db_instance(
+            system_metadata={'foo': 'bar'})
+        inst = objects.Instance._from_db_object(
+            self.context, objects.Instance(), db_inst,
+            expected_attrs=['system_metadata.foo', 'system_metadata.nope'])
+        self.assertNotIn('system_metadata', inst)
+        self.assertEqual('bar', inst.get_system_metadata('foo'))
+        self.assertEqual('baz', inst.get_system_metadata('nope', 'baz'))
+        mock_load.assert_not_called()
+
+        # Other items lazy-load all of system_metadata
+        def load(attrname):
+            inst.system_metadata = {'foo': 'bar', 'other': 'value'}
+        mock_load.side_effect = load
+        self.assertEqual('value', inst.get_system_metadata('other'))
+        mock_load.assert_called_once_with('system_metadata')
+
     def test_get_flavor_namespace(self):
         db_flavor = objects.Flavor.get_by_name(self.context, 'm1.small')
         inst = objects.Instance(old_flavor=db_flavor)
@@ -2121,6 +2169,15 @@ class TestInstanceObjectMisc(test.NoDBTestCase):
                          instance._expected_cols(['metadata',
                                                   'numa_topology']))
 
+    def test_expected_cols_system_metadata_items(self):
+        self.assertEqual(['metadata', 'system_metadata.foo'],
+                         instance._expected_cols(['metadata',
+                                                  'system_metadata.foo']))
+        # The items are loaded with all of system_metadata anyway
+        self.assertEqual(['system_metadata'],
+                         instance._expected_cols(['system_metadata.foo',
+                                                  'system_metadata']))
+
     def test_expected_cols_no_duplicates(self):
         expected_attr = ['metadata', 'system_metadata', 'info_cache',
                          'info_cache', 'metadata',
@@ -16,6 +16,7 @@ import testtools
 from nova import exception
 from nova import objects
 from nova.tests.unit.objects import test_objects
+from nova.virt import hardware
 
 fake_obj_numa = objects.NUMATopology(cells=[
     objects.NUMACell(
@@ -101,6 +102,25 @@ class _TestNUMACell(object):
         numacell.unpin_cpus(set([1, 2, 3]))
         self.assertEqual(set([1, 2, 3, 4]), numacell.free_pcpus)
 
+    def test_free_siblings(self):
+        numacell = objects.NUMACell(
+            id=0,
+            cpuset=set(),
+            pcpuset=set([1, 2, 3, 4, 400, 401]),
+            memory=512,
+            cpu_usage=2,
+            memory_usage=256,
+            pinned_cpus=set(),
+            siblings=[set([1, 3]), set([2, 4]), set([400, 401])],
+            mempages=[])
+        numacell.pin_cpus(hardware.CPUSet([3, 401]))
+        self.assertEqual([set([1]), set([2, 4]), set([400])],
+                         numacell.free_siblings)
+        # The CPU sets are still serialized as sets of integers
+        self.assertIsInstance(numacell.pinned_cpus, set)
+        primitive = numacell.obj_to_primitive()['nova_object.data']
+        self.assertEqual([3, 401], sorted(primitive['pinned_cpus']))
+
     def test_pinning_with_siblings(self):
         numacell = objects.NUMACell(
             id=0,
@@ -12,16 +12,19 @@
 
 import copy
 import ddt
+import functools
 import time
 from unittest import mock
 from urllib import parse
 
 import fixtures
 from keystoneauth1 import exceptions as ks_exc
+from keystoneauth1 import session as ks_session
 import os_resource_classes as orc
 from oslo_serialization import jsonutils
 from oslo_utils.fixture import uuidsentinel as uuids
 
+from nova.compute import provider_tree
 import nova.conf
 from nova import context
 from nova import exception
@@ -240,6 +243,18 @@ class TestConstructor(test.NoDBTestCase):
         self.assertEqual({'accept': 'application/json'},
                          client._client.additional_headers)
 
+    def test_constructor_connection_pool(self):
+        self.flags(connection_pool_size=20, group='placement')
+        client = report.SchedulerReportClient()
+
+        requests_session = self.load_sess_mock.return_value.session
+        requests_session.mount.assert_has_calls([
+            mock.call('https://', mock.ANY), mock.call('http://', mock.ANY)])
+        adapter = requests_session.mount.call_args[0][1]
+        self.assertIsInstance(adapter, ks_session.TCPKeepAliveAdapter)
+        self.assertEqual(20, adapter._pool_maxsize)
+        self.assertIsNotNone(client._client)
+
 
 class SchedulerReportClientTestCase(test.NoDBTestCase):
 
@@ -1887,7 +1902,7 @@ class TestProviderOperations(SchedulerReportClientTestCase):
     @mock.patch('nova.scheduler.client.report.SchedulerReportClient.'
                 '_create_resource_provider')
     @mock.patch('nova.scheduler.client.report.SchedulerReportClient.'
-                '_refresh_associations')
+                '_refresh_associations_for_providers')
     @mock.patch('nova.scheduler.client.report.SchedulerReportClient.'
                 'get_providers_in_tree')
     def test_ensure_resource_provider_create_fail(self, get_rpt_mock,
@@ -1920,7 +1935,7 @@ class TestProviderOperations(SchedulerReportClientTestCase):
     @mock.patch('nova.scheduler.client.report.SchedulerReportClient.'
                 '_create_resource_provider', return_value=None)
     @mock.patch('nova.scheduler.client.report.SchedulerReportClient.'
-                '_refresh_associations')
+                '_refresh_associations_for_providers')
     @mock.patch('nova.scheduler.client.report.SchedulerReportClient.'
                 'get_providers_in_tree')
     def test_ensure_resource_provider_create_no_placement(self, get_rpt_mock,
@@ -1954,7 +1969,7 @@ class TestProviderOperations(SchedulerReportClientTestCase):
     @mock.patch('nova.scheduler.client.report.SchedulerReportClient.'
                 '_refresh_and_get_inventory')
     @mock.patch('nova.scheduler.client.report.SchedulerReportClient.'
-                '_refresh_associations')
+                '_refresh_associations_for_providers')
     @mock.patch('nova.scheduler.client.report.SchedulerReportClient.'
                 'get_providers_in_tree')
     def test_ensure_resource_provider_create(self, get_rpt_mock,
@@ -1999,7 +2014,7 @@ class TestProviderOperations(SchedulerReportClientTestCase):
                 self.context, uuids.cn2, 'a-name', parent_provider_uuid=None)
 
     @mock.patch('nova.scheduler.client.report.SchedulerReportClient.'
-                '_refresh_associations')
+                '_refresh_associations_for_providers')
     @mock.patch('nova.scheduler.client.report.SchedulerReportClient.'
                 '_create_resource_provider')
     @mock.patch('nova.scheduler.client.report.SchedulerReportClient.'
@@ -2020,8 +2035,9 @@ class TestProviderOperations(SchedulerReportClientTestCase):
 
         # We at least have to simulate the part of _refresh_associations that
         # marks a provider as 'seen'
-        def mocked_refresh(context, rp_uuid, **kwargs):
-            self.client._association_refresh_time[rp_uuid] = time.time()
+        def mocked_refresh(context, rp_uuids, **kwargs):
+            for rp_uuid in rp_uuids:
+                self.client._association_refresh_time[rp_uuid] = time.time()
         refresh_mock.side_effect = mocked_refresh
 
         # Not initially in the placement database, so we have to create it.
@@ -2077,7 +2093,7 @@ class TestProviderOperations(SchedulerReportClientTestCase):
     @mock.patch('nova.scheduler.client.report.SchedulerReportClient.'
                 'get_providers_in_tree')
     @mock.patch('nova.scheduler.client.report.SchedulerReportClient.'
-                '_refresh_associations')
+                '_refresh_associations_for_providers')
     def test_ensure_resource_provider_refresh_fetch(self, mock_ref_assoc,
                                                     mock_gpit):
         """Make sure refreshes are called with the appropriate UUIDs and flags
@@ -2090,9 +2106,9 @@ class TestProviderOperations(SchedulerReportClientTestCase):
                          self.client._ensure_resource_provider(self.context,
                                                                uuids.root))
         mock_gpit.assert_called_once_with(self.context, uuids.root)
-        mock_ref_assoc.assert_has_calls(
-            [mock.call(self.context, uuid, force=True)
-             for uuid in tree_uuids])
+        mock_ref_assoc.assert_called_once_with(
+            self.context, mock.ANY, force=True)
+        self.assertEqual(tree_uuids, set(mock_ref_assoc.call_args[0][1]))
         self.assertEqual(tree_uuids,
                          set(self.client._provider_tree.get_provider_uuids()))
 
@@ -2101,7 +2117,7 @@ class TestProviderOperations(SchedulerReportClientTestCase):
     @mock.patch('nova.scheduler.client.report.SchedulerReportClient.'
                 '_create_resource_provider')
     @mock.patch('nova.scheduler.client.report.SchedulerReportClient.'
-                '_refresh_associations')
+                '_refresh_associations_for_providers')
     def test_ensure_resource_provider_refresh_create(self, mock_refresh,
             mock_create, mock_gpit):
         """Make sure refresh is not called when we create the RP."""
@@ -2670,6 +2686,71 @@ class TestProviderOperations(SchedulerReportClientTestCase):
 
             self.ks_adap_mock.delete.reset_mock()
 
+    @mock.patch.object(report.SchedulerReportClient,
+                       '_ensure_resource_provider')
+    def test_get_provider_subtree_and_ensure_root(self, mock_ensure):
+        self.client._provider_tree.new_root('cn1', uuids.cn1, generation=0)
+        self.client._provider_tree.new_child('numa0', uuids.cn1,
+                                             uuid=uuids.numa0)
+        self.client._provider_tree.new_root('cn2', uuids.cn2, generation=0)
+
+        tree = self.client.get_provider_subtree_and_ensure_root(
+            self.context, uuids.cn1, name='cn1')
+
+        mock_ensure.assert_called_once_with(
+            self.context, uuids.cn1, name='cn1')
+        self.assertEqual([uuids.cn1, uuids.numa0], tree.get_provider_uuids())
+        # The tree is a copy
+        tree.update_traits(uuids.cn1, ['CUSTOM_FOO'])
+        self.assertEqual(
+            set(), self.client._provider_tree.data(uuids.cn1).traits)
+
+    @mock.patch.object(report.SchedulerReportClient,
+                       '_update_from_provider_tree')
+    def test_update_from_provider_trees(self, mock_update):
+        self.flags(max_concurrent_requests=2, group='placement')
+        cache = self.client._provider_tree
+        for name in ('cn1', 'cn2', 'cn3', 'cn4', 'cn5'):
+            cache.new_root(name, getattr(uuids, name), generation=0)
+        cache.new_child('numa0', uuids.cn1, uuid=uuids.numa0)
+        cache.update_inventory(uuids.cn1, {'VCPU': {'total': 8}})
+        cache.update_traits(uuids.cn2, ['CUSTOM_FOO'])
+        cache.update_aggregates(uuids.cn3, [uuids.agg])
+
+        trees = [cache.copy_tree(getattr(uuids, name))
+                 for name in ('cn1', 'cn2', 'cn3', 'cn4', 'cn5')]
+        # Unchanged
+        trees[0].update_inventory(uuids.cn1, {'VCPU': {'total': 8}})
+        # Changed inventory, traits and aggregates
+        trees[1].update_inventory(uuids.cn2, {'VCPU': {'total': 8}})
+        trees[2].update_traits(uuids.cn3, ['CUSTOM_FOO'])
+        trees[3].update_aggregates(uuids.cn4, [uuids.agg])
+        # New child
+        trees[4].new_child('numa1', uuids.cn5, uuid=uuids.numa1)
+        # New tree
+        new_tree = provider_tree.ProviderTree()
+        new_tree.new_root('cn6', uuids.cn6)
+        trees.append(new_tree)
+        error = exception.ResourceProviderSyncFailed()
+
+        def fake_update(ctx, tree, old_uuids):
+            if tree is trees[3]:
+                raise error
+
+        mock_update.side_effect = fake_update
+
+        errors = self.client.update_from_provider_trees(self.context, trees)
+
+        self.assertEqual({uuids.cn4: error}, errors)
+        mock_update.assert_has_calls([
+            mock.call(self.context, trees[1], [uuids.cn2]),
+            mock.call(self.context, trees[2], [uuids.cn3]),
+            mock.call(self.context, trees[3], [uuids.cn4]),
+            mock.call(self.context, trees[4], [uuids.cn5]),
+            mock.call(self.context, trees[5], []),
+        ], any_order=True)
+        self.assertEqual(5, mock_update.call_count)
+
     def test_set_aggregates_for_provider(self):
         aggs = [uuids.agg1, uuids.agg2]
         self.ks_adap_mock.put.return_value = fake_requests.FakeResponse(
@@ -3310,6 +3391,148 @@ class TestAssociations(SchedulerReportClientTestCase):
         self.client._refresh_associations(self.context, uuid)
         self.assert_getters_were_called(uuid)
 
+    @mock.patch('time.time', return_value=time.time())
+    def test_refresh_associations_background(self, mock_time):
+        """Test that associations are refreshed in the background when so
+        configured.
+        """
+        self.flags(resource_provider_association_background_refresh=True,
+                   group='compute')
+        rpar = CONF.compute.resource_provider_association_refresh
+        uuid = uuids.compute_node
+        # Seed the provider tree so _refresh_associations finds the provider
+        self.client._provider_tree.new_root('compute', uuid, generation=1)
+
+        # Called a first time because association_refresh_time is empty.
+        now = mock_time.return_value
+        self.client._refresh_associations(self.context, uuid)
+        self.assert_getters_were_called(uuid)
+        self.reset_getter_mocks()
+
+        # Not due yet
+        self.assertEqual([], self.client.revalidate_associations(self.context))
+        self.assert_getters_not_called(timer_entry=uuid)
+
+        # Not called although the refresh interval has passed
+        mock_time.return_value = now + rpar * 1.5 + 1
+        self.client._refresh_associations(self.context, uuid)
+        self.assert_getters_not_called(timer_entry=uuid)
+
+        # But revalidated in the background
+        self.assertEqual(
+            [uuid], self.client.revalidate_associations(self.context))
+        self.assert_getters_were_called(uuid)
+        self.assertEqual(mock_time.return_value,
+                         self.client._association_refresh_time[uuid])
+        self.assertEqual({'refreshed': 2, 'revalidated': 1, 'avoided': 1},
+                         self.client.get_association_stats())
+
+    @mock.patch('nova.scheduler.client.report.SchedulerReportClient.'
+                '_refresh_associations_for_providers')
+    def test_revalidate_associations_batch(self, mock_refresh):
+        self.flags(resource_provider_association_background_refresh=True,
+                   resource_provider_association_refresh_batch_size=2,
+                   group='compute')
+        rpar = CONF.compute.resource_provider_association_refresh
+        now = time.time()
+        for i, uuid in enumerate((uuids.rp1, uuids.rp2, uuids.rp3)):
+            self.client._provider_tree.new_root(uuid, uuid, generation=1)
+            self.client._association_refresh_time[uuid] = now - (2 + i) * rpar
+        # Not in the cache anymore
+        self.client._association_refresh_time[uuids.gone] = 0
+
+        self.assertEqual(
+            [uuids.rp3, uuids.rp2],
+            self.client.revalidate_associations(self.context))
+        mock_refresh.assert_called_once_with(
+            self.context, [uuids.rp3, uuids.rp2], force=True)
+
+        # Nothing done by default
+        mock_refresh.reset_mock()
+        self.flags(resource_provider_association_background_refresh=False,
+                   group='compute')
+        self.assertEqual([], self.client.revalidate_associations(self.context))
+        mock_refresh.assert_not_called()
+
+    def test_associations_updated(self):
+        self.flags(resource_provider_association_background_refresh=True,
+                   group='compute')
+        self.client._provider_tree.new_root('rp', uuids.rp, generation=1)
+        self.client._association_refresh_time[uuids.rp] = 1234
+
+        # Updated from the cached generation: the cache is fresh
+        self.client._associations_updated(uuids.rp, True)
+        self.assertGreater(self.client._association_refresh_time[uuids.rp],
+                           1234)
+        # Updated from another generation: the cache must be refreshed
+        self.client._associations_updated(uuids.rp, False)
+        self.assertNotIn(uuids.rp, self.client._association_refresh_time)
+
+    def test_set_aggregates_for_provider_invalidates_associations(self):
+        """Setting aggregates from a generation not matching the cache, as
+        aggregate_add_host does, invalidates the cached associations.
+        """
+        self.flags(resource_provider_association_background_refresh=True,
+                   group='compute')
+        self.ks_adap_mock.put.return_value = fake_requests.FakeResponse(
+            200, content=jsonutils.dumps({
+                'aggregates': [uuids.agg],
+                'resource_provider_generation': 6}))
+        self.client._provider_tree.new_root('rp', uuids.rp, generation=1)
+        self.client._association_refresh_time[uuids.rp] = time.time()
+
+        self.client.set_aggregates_for_provider(
+            self.context, uuids.rp, [uuids.agg], use_cache=False,
+            generation=5)
+
+        self.assertTrue(self.client._associations_stale(uuids.rp))
+
+    def test_refresh_associations_for_providers(self):
+        """Test that the associations of several providers are fetched
+        concurrently and their sharing providers refreshed.
+        """
+        self.flags(max_concurrent_requests=4, group='placement')
+        for uuid in (uuids.cn1, uuids.cn2):
+            self.client._provider_tree.new_root(uuid, uuid, generation=1)
+        self.mock_get_sharing.return_value = [
+            {'uuid': uuids.shr, 'name': 'shr', 'generation': 1}]
+
+        with mock.patch.object(
+                self.client, '_run_concurrently',
+                wraps=self.client._run_concurrently) as mock_run:
+            self.client._refresh_associations_for_providers(
+                self.context, [uuids.cn1, uuids.cn2])
+
+        # One batch for the compute nodes, one for the sharing provider
+        self.assertEqual(2, mock_run.call_count)
+        self.assertEqual(6, len(mock_run.call_args_list[0][0][0]))
+        self.mock_get_inv.assert_has_calls([
+            mock.call(self.context, uuid)
+            for uuid in (uuids.cn1, uuids.cn2, uuids.shr)], any_order=True)
+        # The sharing providers of all the aggregates are fetched at once
+        self.mock_get_sharing.assert_called_once_with(
+            self.context, {uuids.agg1})
+        for uuid in (uuids.cn1, uuids.cn2, uuids.shr):
+            self.assertIn(uuid, self.client._association_refresh_time)
+            self.assertTrue(
+                self.client._provider_tree.has_traits(uuid, ['CUSTOM_GOLD']))
+            self.assertEqual(
+                43, self.client._provider_tree.data(uuid).generation)
+
+    def test_run_concurrently(self):
+        self.flags(max_concurrent_requests=2, group='placement')
+        funcs = [functools.partial(lambda i: i * 2, i) for i in range(5)]
+        self.assertEqual([0, 2, 4, 6, 8],
+                         self.client._run_concurrently(funcs))
+
+    def test_run_concurrently_raises(self):
+        self.flags(max_concurrent_requests=2, group='placement')
+        funcs = [mock.Mock(return_value=1),
+                 mock.Mock(side_effect=exception.TraitRetrievalFailed(
+                     error='fake'))]
+        self.assertRaises(exception.TraitRetrievalFailed,
+                          self.client._run_concurrently, funcs)
+
 
 class TestAllocations(SchedulerReportClientTestCase):
 
@@ -18,6 +18,7 @@ from oslo_utils.fixture import uuidsentinel as uuids
 from nova import objects
 from nova.objects import fields
 from nova.scheduler.filters import numa_topology_filter
+from nova.scheduler import utils as scheduler_utils
 from nova import test
 from nova.tests.unit.scheduler import fakes
 
@@ -59,6 +60,29 @@ class TestNUMATopologyFilter(test.NoDBTestCase):
                                     })
         self.assertTrue(self.filt_cls.host_passes(host, spec_obj))
 
+    def test_numa_topology_filter_pass_cached(self):
+        self.flags(numa_fit_cache_size=10, group='filter_scheduler')
+        instance_topology = objects.InstanceNUMATopology(cells=[
+            objects.InstanceNUMACell(id=0, cpuset=set([1]), pcpuset=set(),
+                memory=512),
+            objects.InstanceNUMACell(id=1, cpuset=set([3]), pcpuset=set(),
+                memory=512),
+            ])
+        spec_obj = self._get_spec_obj(numa_topology=instance_topology)
+        for host_name in ('host1', 'host2'):
+            host = fakes.FakeHostState(host_name, 'node1',
+                                       {'numa_topology': fakes.NUMA_TOPOLOGY,
+                                        'pci_stats': None,
+                                        'cpu_allocation_ratio': 16.0,
+                                        'ram_allocation_ratio': 1.5,
+                                        'allocation_candidates': [
+                                            {"mappings": {}}]
+                                        })
+            self.assertTrue(self.filt_cls.host_passes(host, spec_obj))
+        cache_stats = scheduler_utils.get_numa_fit_cache().stats
+        self.assertEqual(1, cache_stats.misses)
+        self.assertEqual(1, cache_stats.hits)
+
     def test_numa_topology_filter_numa_instance_no_numa_host_fail(self):
         instance_topology = objects.InstanceNUMATopology(cells=[
             objects.InstanceNUMACell(id=0, cpuset=set([1]), pcpuset=set(),
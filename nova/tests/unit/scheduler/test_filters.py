@@ -233,3 +233,88 @@ class FiltersTestCase(test.NoDBTestCase):
             cargs = mock_log.call_args[0][0]
             self.assertIn("with instance ID '%s'" % fake_uuid, cargs)
             self.assertIn(exp_output, cargs)
+
+    @mock.patch.object(filters.BaseFilterHandler, '_get_partition_count',
+                       return_value=2)
+    def test_get_filtered_objects_partitioned(self, mock_partitions):
+        class FilterA(filters.BaseFilter):
+            def _filter_one(self, obj, spec_obj):
+                return obj not in ('Host0', 'Host4')
+
+        class FilterB(filters.BaseFilter):
+            def _filter_one(self, obj, spec_obj):
+                return obj != 'Host2'
+
+        hosts = ['Host%d' % i for i in range(6)]
+        spec_obj = objects.RequestSpec(instance_uuid=uuids.instance)
+        with mock.patch.object(filters.LOG, 'debug') as mock_log:
+            result = self.filter_handler.get_filtered_objects(
+                [FilterA(), FilterB()], hosts, spec_obj)
+        self.assertEqual(['Host1', 'Host3', 'Host5'], result)
+        mock_partitions.assert_called_once_with(6)
+        mock_log.assert_has_calls([
+            mock.call("Filter %(cls_name)s returned %(obj_len)d host(s)",
+                      {'cls_name': 'FilterA', 'obj_len': 4}),
+            mock.call("Filter %(cls_name)s returned %(obj_len)d host(s)",
+                      {'cls_name': 'FilterB', 'obj_len': 3})])
+
+    @mock.patch.object(filters.BaseFilterHandler, '_get_partition_count',
+                       return_value=2)
+    def test_get_filtered_objects_partitioned_none_returned(
+            self, mock_partitions):
+        # The first partition is left without hosts by FilterA while the
+        # second one is only emptied by FilterB.
+        class FilterA(filters.BaseFilter):
+            def _filter_one(self, obj, spec_obj):
+                return obj not in ('Host0', 'Host1', 'Host2')
+
+        class FilterB(filters.BaseFilter):
+            def _filter_one(self, obj, spec_obj):
+                return False
+
+        hosts = ['Host%d' % i for i in range(6)]
+        spec_obj = objects.RequestSpec(instance_uuid=uuids.instance)
+        with mock.patch.object(filters.LOG, 'info') as mock_log:
+            result = self.filter_handler.get_filtered_objects(
+                [FilterA(), FilterB()], hosts, spec_obj)
+        self.assertEqual([], result)
+        exp_output = ("['FilterA: (start: 6, end: 3)', "
+                      "'FilterB: (start: 3, end: 0)']")
+        self.assertIn(exp_output, mock_log.call_args[0][0])
+
+    @mock.patch.object(filters.BaseFilterHandler, '_get_partition_count',
+                       return_value=2)
+    def test_get_filtered_objects_partitioned_stop_filtering(
+            self, mock_partitions):
+        class FilterA(filters.BaseFilter):
+            def filter_all(self, list_objs, spec_obj):
+                # stop filtering only for the second partition
+                if 'Host5' in list_objs:
+                    return None
+                return list_objs
+
+        filt2_mock = mock.Mock(Filter2)
+        filt2_mock.run_filter_for_index.return_value = True
+        filt2_mock.filter_all.side_effect = lambda objs, spec: objs
+
+        hosts = ['Host%d' % i for i in range(6)]
+        result = self.filter_handler.get_filtered_objects(
+            [FilterA(), filt2_mock], hosts, objects.RequestSpec())
+        self.assertIsNone(result)
+
+    @mock.patch.object(filters.BaseFilterHandler, '_get_partition_count',
+                       return_value=3)
+    def test_get_filtered_objects_partitioned_for_index(
+            self, mock_partitions):
+        filt1_mock = mock.Mock(Filter1)
+        filt1_mock.run_filter_for_index.return_value = False
+        filt2_mock = mock.Mock(Filter2)
+        filt2_mock.run_filter_for_index.return_value = True
+        filt2_mock.filter_all.side_effect = lambda objs, spec: objs[1:]
+
+        hosts = ['Host%d' % i for i in range(6)]
+        result = self.filter_handler.get_filtered_objects(
+            [filt1_mock, filt2_mock], hosts, objects.RequestSpec(), index=1)
+        self.assertEqual(['Host1', 'Host3', 'Host5'], result)
+        filt1_mock.filter_all.assert_not_called()
+        self.assertEqual(3, filt2_mock.filter_all.call_count)
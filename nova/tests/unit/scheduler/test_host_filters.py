@@ -14,6 +14,8 @@
 """
 Tests For Scheduler Host Filters.
 """
+from unittest import mock
+
 from nova.scheduler import filters
 from nova.scheduler.filters import all_hosts_filter
 from nova.scheduler.filters import compute_filter
@@ -31,6 +33,20 @@ class HostFiltersTestCase(test.NoDBTestCase):
         self.assertIn(all_hosts_filter.AllHostsFilter, classes)
         self.assertIn(compute_filter.ComputeFilter, classes)
 
+    @mock.patch('nova.utils.concurrency_mode_threading', return_value=True)
+    def test_get_partition_count(self, mock_threading):
+        filter_handler = filters.HostFilterHandler()
+        self.assertEqual(1, filter_handler._get_partition_count(1000))
+
+        self.flags(filter_partitions=4, group='filter_scheduler')
+        self.assertEqual(4, filter_handler._get_partition_count(1000))
+        # Partitions are not smaller than min_partition_size
+        self.assertEqual(2, filter_handler._get_partition_count(120))
+        self.assertEqual(1, filter_handler._get_partition_count(10))
+
+        mock_threading.return_value = False
+        self.assertEqual(1, filter_handler._get_partition_count(1000))
+
     def test_all_host_filter(self):
         filt_cls = all_hosts_filter.AllHostsFilter()
         host = fakes.FakeHostState('host1', 'node1', {})
@@ -346,6 +346,27 @@ class HostManagerTestCase(test.NoDBTestCase):
                 fake_properties)
         self._verify_result(info, result)
 
+    @mock.patch.object(host_manager.LOG, 'debug')
+    def test_get_filtered_hosts_numa_fit_cache(self, mock_log):
+        self.flags(numa_fit_cache_size=10, group='filter_scheduler')
+        fake_properties = objects.RequestSpec(ignore_hosts=[],
+                                              instance_uuid=uuids.instance,
+                                              force_hosts=[],
+                                              force_nodes=[])
+
+        info = {'expected_objs': self.fake_hosts,
+                'expected_fprops': fake_properties}
+
+        self._mock_get_filtered_hosts(info)
+
+        result = self.host_manager.get_filtered_hosts(self.fake_hosts,
+                fake_properties)
+        self._verify_result(info, result)
+        mock_log.assert_any_call(
+            "NUMA fit cache for this request: %(stats)s. "
+            "Cumulated: %(total)s (%(entries)d entries)",
+            {'stats': mock.ANY, 'total': mock.ANY, 'entries': 0})
+
     def test_get_filtered_hosts_with_requested_destination(self):
         dest = objects.Destination(host='fake_host1', node='fake-node')
         fake_properties = objects.RequestSpec(requested_destination=dest,
@@ -645,6 +666,117 @@ class HostManagerTestCase(test.NoDBTestCase):
         self.assertEqual(host_states_map[('host4', 'node4')].free_disk_mb,
                          8388608)
 
+    def _get_cached_host_states(self, compute_nodes):
+        services = {service.host: service for service in fakes.SERVICES}
+        return {(state.host, state.nodename): state for state in
+                self.host_manager._get_host_states(
+                    nova_context.get_admin_context(),
+                    {uuids.cell: compute_nodes}, services)}
+
+    @mock.patch('nova.objects.InstanceList.get_uuids_by_host',
+                return_value=[])
+    def test_get_host_states_cached(self, mock_get_by_host):
+        self.flags(host_state_cache=True, group='filter_scheduler')
+        compute_nodes = [cn.obj_clone() for cn in fakes.COMPUTE_NODES]
+
+        # Metrics are deserialized each time a compute node is refreshed
+        with mock.patch.object(
+            objects.MonitorMetricList, 'from_json',
+            wraps=objects.MonitorMetricList.from_json,
+        ) as mock_update:
+            first = self._get_cached_host_states(compute_nodes)
+            self.assertEqual(4, mock_update.call_count)
+            mock_update.reset_mock()
+
+            second = self._get_cached_host_states(compute_nodes)
+            mock_update.assert_not_called()
+
+        # Each request gets its own copy of the cached host states
+        self.assertEqual(4, len(second))
+        for key, state in second.items():
+            self.assertIsNot(first[key], state)
+            self.assertEqual(first[key].free_ram_mb, state.free_ram_mb)
+            self.assertEqual(first[key].service, state.service)
+        self.assertEqual(524288, second[('host1', 'node1')].free_disk_mb)
+
+        stats = self.host_manager.host_state_cache_stats
+        self.assertEqual(4, stats.hits)
+        self.assertEqual(4, stats.misses)
+        self.assertEqual(0.5, stats.hit_ratio)
+        self.assertEqual(4, stats.compute_refreshes)
+        self.assertEqual(4, stats.service_refreshes)
+        self.assertEqual(4, stats.aggregate_refreshes)
+
+    @mock.patch('nova.objects.InstanceList.get_uuids_by_host',
+                return_value=[])
+    def test_get_host_states_cached_refresh(self, mock_get_by_host):
+        self.flags(host_state_cache=True, group='filter_scheduler')
+        compute_nodes = [cn.obj_clone() for cn in fakes.COMPUTE_NODES]
+        self._get_cached_host_states(compute_nodes)
+        self.host_manager.host_state_cache_stats = (
+            host_manager.HostStateCacheStats())
+
+        compute_nodes[0].free_ram_mb = 256
+        compute_nodes[0].updated_at = datetime.datetime(2015, 11, 11, 12)
+        fake_agg = objects.Aggregate(id=1, hosts=['host2'])
+        self.host_manager.update_aggregates([fake_agg])
+
+        host_states = self._get_cached_host_states(compute_nodes)
+
+        self.assertEqual(256, host_states[('host1', 'node1')].free_ram_mb)
+        self.assertEqual([fake_agg],
+                         host_states[('host2', 'node2')].aggregates)
+        self.assertEqual([], host_states[('host3', 'node3')].aggregates)
+        stats = self.host_manager.host_state_cache_stats
+        self.assertEqual(4, stats.hits)
+        self.assertEqual(0, stats.misses)
+        self.assertEqual(1, stats.compute_refreshes)
+        self.assertEqual(0, stats.service_refreshes)
+        self.assertEqual(4, stats.aggregate_refreshes)
+
+    @mock.patch('nova.objects.InstanceList.get_uuids_by_host',
+                return_value=[])
+    def test_get_host_states_cached_consume_not_shared(self,
+                                                       mock_get_by_host):
+        self.flags(host_state_cache=True, group='filter_scheduler')
+        compute_nodes = [cn.obj_clone() for cn in fakes.COMPUTE_NODES]
+        spec_obj = objects.RequestSpec(
+            flavor=objects.Flavor(root_gb=0, ephemeral_gb=0, memory_mb=128,
+                                  vcpus=1, extra_specs={}),
+            numa_topology=None, pci_requests=None)
+
+        host_state = self._get_cached_host_states(
+            compute_nodes)[('host1', 'node1')]
+        host_state.consume_from_request(spec_obj)
+        self.assertEqual(384, host_state.free_ram_mb)
+
+        host_state = self._get_cached_host_states(
+            compute_nodes)[('host1', 'node1')]
+        self.assertEqual(512, host_state.free_ram_mb)
+        self.assertEqual(0, host_state.num_io_ops)
+
+    def test_get_compute_node_attrs_disabled(self):
+        self.assertIsNone(self.host_manager._get_compute_node_attrs())
+
+    def test_get_compute_node_attrs(self):
+        self.flags(compute_node_projection=True, group='filter_scheduler')
+        filter_ = mock.Mock(HOST_STATE_ATTRS=('pci_stats',))
+        weigher = mock.Mock(HOST_STATE_ATTRS=('num_instances', 'host'))
+        self.host_manager.enabled_filters = [filter_]
+        self.host_manager.weighers = [weigher]
+
+        self.assertEqual(['numa_topology', 'pci_device_pools', 'stats'],
+                         self.host_manager._get_compute_node_attrs())
+
+        # A filter not declaring its attributes requires all of them
+        filter_.HOST_STATE_ATTRS = None
+        self.assertIsNone(self.host_manager._get_compute_node_attrs())
+
+    def test_refresh_cells_caches_clears_host_state_cache(self):
+        self.host_manager._host_state_cache[uuids.cn1] = mock.sentinel.entry
+        self.host_manager.refresh_cells_caches()
+        self.assertEqual({}, self.host_manager._host_state_cache)
+
     @mock.patch.object(nova.objects.InstanceList, 'get_uuids_by_host')
     @mock.patch.object(host_manager.HostState, '_update_from_compute_node')
     @mock.patch.object(objects.ComputeNodeList, 'get_all_by_uuids')
@@ -1119,7 +1251,8 @@ class HostManagerTestCase(test.NoDBTestCase):
         # and only looked up services and compute nodes in one
         mock_target.assert_called_once_with(context, cells[1])
         mock_cn.assert_called_once_with(
-            mock.sentinel.cctxt, [cn.uuid for cn in compute_nodes])
+            mock.sentinel.cctxt, [cn.uuid for cn in compute_nodes],
+            expected_attrs=None)
         mock_sl.assert_called_once_with(mock.sentinel.cctxt, 'nova-compute',
                                         include_disabled=True)
 
@@ -1709,3 +1842,58 @@ class HostStateTestCase(test.NoDBTestCase):
         self.assertEqual(0, host.free_ram_mb)
         # same with failed_builds
         self.assertEqual(0, host.failed_builds)
+
+    def test_copy(self):
+        host = host_manager.HostState("fakehost", "fakenode", uuids.cell)
+        host.free_ram_mb = 1024
+        host.limits = {'memory_mb': 2048}
+        host.allocation_candidates = [mock.sentinel.candidate]
+        host.pci_stats = pci_stats.PciDeviceStats(objects.NUMATopology())
+
+        host_copy = host.copy()
+
+        self.assertEqual(1024, host_copy.free_ram_mb)
+        self.assertEqual({}, host_copy.limits)
+        self.assertEqual([], host_copy.allocation_candidates)
+        self.assertIsNot(host.pci_stats, host_copy.pci_stats)
+        self.assertEqual({'memory_mb': 2048}, host.limits)
+
+    def test_update_from_compute_node_deferred(self):
+        compute = objects.ComputeNode(
+            uuid=uuids.cn1, memory_mb=1024, free_disk_gb=10,
+            local_gb_used=0, disk_available_least=None, free_ram_mb=512,
+            local_gb=10, vcpus=4, vcpus_used=0, updated_at=None,
+            host_ip='127.0.0.1', hypervisor_type='htype',
+            hypervisor_hostname='hostname', hypervisor_version=1,
+            cpu_allocation_ratio=16.0, ram_allocation_ratio=1.5,
+            disk_allocation_ratio=1.0,
+            stats={'num_instances': '5', 'io_workload': '2'})
+
+        host = host_manager.HostState("fakehost", "fakenode", uuids.cell)
+        host._update_from_compute_node(compute)
+
+        self.assertEqual(5, host.num_instances)
+        self.assertEqual(2, host.num_io_ops)
+        self.assertNotIn('numa_topology', host.__dict__)
+        self.assertNotIn('pci_stats', host.__dict__)
+        self.assertNotIn('metrics', host.__dict__)
+        # Neither copying nor logging the host state loads deferred fields
+        repr(host.copy())
+        self.assertNotIn('numa_topology', host.__dict__)
+
+        def fake_load(attrname):
+            compute.numa_topology = None
+            compute.pci_device_pools = None
+            compute.metrics = None
+            compute.cpu_info = 'cpu_info'
+            compute.supported_hv_specs = []
+
+        with mock.patch.object(compute, 'obj_load_attr',
+                               side_effect=fake_load) as mock_load:
+            self.assertIsNone(host.numa_topology)
+            self.assertIsInstance(host.pci_stats, pci_stats.PciDeviceStats)
+            self.assertEqual('cpu_info', host.cpu_info)
+            self.assertEqual([], host.supported_instances)
+            mock_load.assert_called_once_with('numa_topology')
+        self.assertIsNone(host._lazy_compute)
+        self.assertRaises(AttributeError, getattr, host, 'foo')
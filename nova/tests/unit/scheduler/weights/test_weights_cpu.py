@@ -188,3 +188,11 @@ class CPUWeigherTestCase(test.NoDBTestCase):
         weighed_host = weights[0]
         self.assertEqual(1.5, weighed_host.weight)
         self.assertEqual('host4', weighed_host.obj.host)
+
+
+class CPUWeigherColumnarTestCase(CPUWeigherTestCase):
+    """Run the same tests through the columnar weighing engine."""
+
+    def setUp(self):
+        super().setUp()
+        self.flags(columnar_weighing=True, group='filter_scheduler')
@@ -124,3 +124,11 @@ class IoOpsWeigherTestCase(test.NoDBTestCase):
         weighed_host = weights[0]
         self.assertEqual(1.0 * 1.5, weighed_host.weight)
         self.assertEqual('host4', weighed_host.obj.host)
+
+
+class IoOpsWeigherColumnarTestCase(IoOpsWeigherTestCase):
+    """Run the same tests through the columnar weighing engine."""
+
+    def setUp(self):
+        super().setUp()
+        self.flags(columnar_weighing=True, group='filter_scheduler')
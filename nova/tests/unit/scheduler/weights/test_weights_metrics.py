@@ -241,3 +241,11 @@ class MetricsWeigherTestCase(test.NoDBTestCase):
 
         self.assertEqual(1.5, weighed_host.weight)
         self.assertEqual('host4', weighed_host.obj.host)
+
+
+class MetricsWeigherColumnarTestCase(MetricsWeigherTestCase):
+    """Run the same tests through the columnar weighing engine."""
+
+    def setUp(self):
+        super().setUp()
+        self.flags(columnar_weighing=True, group='filter_scheduler')
@@ -69,3 +69,11 @@ class NumInstancesWeigherTestCase(test.NoDBTestCase):
         self.assertEqual(0.0, weighed_host.weight)
         # Host1 wins because it has the less instances
         self.assertEqual('host1', weighed_host.obj.host)
+
+
+class NumInstancesWeigherColumnarTestCase(NumInstancesWeigherTestCase):
+    """Run the same tests through the columnar weighing engine."""
+
+    def setUp(self):
+        super().setUp()
+        self.flags(columnar_weighing=True, group='filter_scheduler')
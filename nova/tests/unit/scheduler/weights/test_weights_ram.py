@@ -169,3 +169,11 @@ class RamWeigherTestCase(test.NoDBTestCase):
         weighed_host = weights[0]
         self.assertEqual(1.0 * 1.5, weighed_host.weight)
         self.assertEqual('host4', weighed_host.obj.host)
+
+
+class RamWeigherColumnarTestCase(RamWeigherTestCase):
+    """Run the same tests through the columnar weighing engine."""
+
+    def setUp(self):
+        super().setUp()
+        self.flags(columnar_weighing=True, group='filter_scheduler')
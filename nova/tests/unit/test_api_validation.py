@@ -309,6 +309,81 @@ class QueryParamsSchemaTestCase(test.NoDBTestCase):
         self.assertEqual(['_foo_', 'foo', 'foos'], res)
 
 
+class SchemaValidatorCacheTestCase(test.NoDBTestCase):
+
+    schema = {
+        'type': 'object',
+        'properties': {
+            'foo': {'type': 'integer'},
+        },
+        'additionalProperties': False,
+    }
+
+    def setUp(self):
+        super(SchemaValidatorCacheTestCase, self).setUp()
+        self.useFixture(fixtures.MonkeyPatch(
+            'nova.api.validation.validators._VALIDATORS', {}))
+        self.useFixture(fixtures.MonkeyPatch(
+            'nova.api.validation._REGISTERED_SCHEMAS', []))
+
+    def test_get_validator(self):
+        validator = validators.get_validator(self.schema)
+        self.assertIs(self.schema, validator.schema)
+        self.assertIs(validator, validators.get_validator(self.schema))
+
+        legacy_validator = validators.get_validator(self.schema, True)
+        self.assertIsNot(validator, legacy_validator)
+        self.assertIs(legacy_validator,
+                      validators.get_validator(self.schema, True))
+        self.assertIsNot(validator,
+                         validators.get_validator(self.schema, is_body=False))
+
+        # An equal schema is a different schema which may be changed later
+        other_schema = copy.deepcopy(self.schema)
+        self.assertIsNot(validator, validators.get_validator(other_schema))
+
+    def test_validation_reuses_validator(self):
+        @validation.schema(self.schema)
+        def post(req, body):
+            return 'Validation succeeded.'
+
+        self.assertEqual('Validation succeeded.',
+                         post(body={'foo': 1}, req=FakeRequest()))
+        validator = validators.get_validator(self.schema)
+        with fixtures.MockPatch(
+                'nova.api.validation.validators._SchemaValidator') as mock_sv:
+            self.assertEqual('Validation succeeded.',
+                             post(body={'foo': 2}, req=FakeRequest()))
+            self.assertRaises(exception.ValidationError, post,
+                              body={'bar': 1}, req=FakeRequest())
+            mock_sv.mock.assert_not_called()
+        self.assertIs(validator, validators.get_validator(self.schema))
+
+    def test_compile_validators(self):
+        query_schema = {'type': 'object', 'properties': {}}
+        response_schema = {'type': 'object', 'properties': {}}
+
+        validation.schema(self.schema, '2.1', '2.10')(
+            validation.query_schema(query_schema)(
+                validation.response_body_schema(response_schema)(
+                    lambda req, body: None)))
+        validation.compile_validators()
+        self.assertEqual(
+            {(id(self.schema), False, True),
+             (id(query_schema), False, False),
+             (id(query_schema), True, False),
+             (id(response_schema), False, True),
+             (id(response_schema), True, True)},
+            set(validators._VALIDATORS))
+
+        # Response schemas are not used when not validating responses
+        validators._VALIDATORS.clear()
+        self.flags(response_validation='ignore', group='api')
+        validation.compile_validators()
+        self.assertNotIn((id(response_schema), False, True),
+                         validators._VALIDATORS)
+
+
 class RequiredDisableTestCase(APIValidationTestCase):
 
     post_schema = {
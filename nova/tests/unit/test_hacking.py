@@ -255,6 +255,19 @@ class HackingTestCase(test.NoDBTestCase):
                 len(list(checks.use_jsonutils(
                     "jsonx.%s(" % method, "./nova/virt/libvirt/driver.py"))),
             )
+            self.assertEqual(
+                0,
+                len(list(checks.use_jsonutils(
+                    "orjson.%s(" % method, "./nova/serialization.py"))),
+            )
+            # Only orjson is allowed, not the other JSON libraries
+            for module in ('simplejson', 'ujson'):
+                self.assertEqual(
+                    1,
+                    len(list(checks.use_jsonutils(
+                        "%s.%s(" % (module, method),
+                        "./nova/virt/libvirt/driver.py"))),
+                )
 
         self.assertEqual(
             0,
@@ -12,6 +12,7 @@
 #    License for the specific language governing permissions and limitations
 #    under the License.
 
+import math
 from unittest import mock
 
 import oslo_messaging as messaging
@@ -336,6 +337,22 @@ class TestJsonPayloadSerializer(test.NoDBTestCase):
         mock_prim.assert_called_once_with('entity', convert_instances=True,
                                           fallback=serializer.fallback)
 
+    def test_serialize_entity_json_serializers(self):
+        # The payloads are the same whatever the JSON serializer is
+        serializer = rpc.JsonPayloadSerializer()
+        entity = {1: 'a', 'nan': float('nan'), 'inf': float('inf'),
+                  'nested': [{2: -float('inf')}]}
+        primitives = []
+        for json_serializer in ('stdlib', 'orjson'):
+            self.flags(json_serializer=json_serializer)
+            primitives.append(serializer.serialize_entity('context', entity))
+
+        for primitive in primitives:
+            self.assertEqual('a', primitive[1])
+            self.assertTrue(math.isnan(primitive['nan']))
+            self.assertEqual(float('inf'), primitive['inf'])
+            self.assertEqual([{2: -float('inf')}], primitive['nested'])
+
     def test_fallback(self):
         # Convert RequestContext, should get a dict.
         primitive = rpc.JsonPayloadSerializer.fallback(context.get_context())
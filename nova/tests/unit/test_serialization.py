@@ -0,0 +1,72 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+from unittest import mock
+
+import netaddr
+from oslo_serialization import jsonutils
+from oslo_utils.fixture import uuidsentinel as uuids
+import testtools
+
+from nova import objects
+from nova import serialization
+from nova import test
+
+
+class SerializationTestCase(test.NoDBTestCase):
+
+    def setUp(self):
+        super(SerializationTestCase, self).setUp()
+        self.obj = {
+            'id': uuids.instance,
+            'name': 'café',
+            'created': datetime.datetime(2024, 1, 2, 3, 4, 5, 6),
+            'date': datetime.date(2024, 1, 2),
+            'address': netaddr.IPAddress('192.168.1.1'),
+            'network': netaddr.IPNetwork('192.168.1.0/24'),
+            'tags': ('foo', 'bar'),
+            'ports': {1: 'one'},
+            'flavor': objects.Flavor(flavorid='1', name='m1.tiny',
+                                     extra_specs={}),
+            'bytes': b'raw',
+            'nested': [{'progress': 50, 'locked': False, 'fault': None}],
+        }
+
+    def test_dumps_stdlib(self):
+        self.assertEqual(jsonutils.dumps(self.obj),
+                         serialization.dumps(self.obj))
+
+    @testtools.skipIf(serialization.orjson is None, 'orjson is missing')
+    def test_dumps_orjson(self):
+        self.flags(json_serializer='orjson')
+        result = serialization.dumps(self.obj)
+        self.assertIsInstance(result, str)
+        self.assertEqual(jsonutils.loads(jsonutils.dumps(self.obj)),
+                         jsonutils.loads(result))
+
+    @testtools.skipIf(serialization.orjson is None, 'orjson is missing')
+    def test_dumps_orjson_fallback(self):
+        self.flags(json_serializer='orjson')
+        # orjson does not support integers larger than 64 bits
+        obj = {'big': 2 ** 70}
+        self.assertEqual(jsonutils.dumps(obj), serialization.dumps(obj))
+
+    @mock.patch.object(serialization, 'orjson', new=None)
+    @mock.patch.object(serialization, '_warned_orjson_missing', new=False)
+    @mock.patch.object(serialization, 'LOG')
+    def test_dumps_orjson_missing(self, mock_log):
+        self.flags(json_serializer='orjson')
+        for i in range(2):
+            self.assertEqual(jsonutils.dumps(self.obj),
+                             serialization.dumps(self.obj))
+        mock_log.warning.assert_called_once()
@@ -0,0 +1,124 @@
+#    Licensed under the Apache License, Version 2.0 (the "License"); you may
+#    not use this file except in compliance with the License. You may obtain
+#    a copy of the License at
+#
+#         http://www.apache.org/licenses/LICENSE-2.0
+#
+#    Unless required by applicable law or agreed to in writing, software
+#    distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+#    WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied. See the
+#    License for the specific language governing permissions and limitations
+#    under the License.
+
+import datetime
+from unittest import mock
+
+from oslo_utils.fixture import uuidsentinel as uuids
+
+from nova.compute import task_states
+from nova import context
+from nova import objects
+from nova import server_view_cache
+from nova import test
+from nova.tests.unit import fake_instance
+
+
+class ServerViewCacheTestCase(test.NoDBTestCase):
+
+    def setUp(self):
+        super(ServerViewCacheTestCase, self).setUp()
+        self.flags(server_view_cache_size=2, group='api')
+        server_view_cache.reset_cache()
+        self.addCleanup(server_view_cache.reset_cache)
+        self.context = context.get_admin_context()
+
+    def _create_instance(self, uuid):
+        return fake_instance.fake_instance_obj(
+            self.context, uuid=uuid,
+            updated_at=datetime.datetime(2024, 1, 1))
+
+    def test_get_set_fragment(self):
+        inst = self._create_instance(uuids.instance)
+        self.assertIsNone(server_view_cache.get_fragment(inst, 'v1'))
+        server_view_cache.set_fragment(inst, 'v1', {'name': 'foo'})
+        server_view_cache.set_fragment(inst, 'v2', {'name': 'bar'})
+
+        self.assertEqual({'name': 'foo'},
+                         server_view_cache.get_fragment(inst, 'v1'))
+        self.assertEqual({'name': 'bar'},
+                         server_view_cache.get_fragment(inst, 'v2'))
+        self.assertIsNone(server_view_cache.get_fragment(inst, 'v3'))
+        self.assertEqual((2, 2, 0.5), server_view_cache.get_stats())
+
+    def test_get_fragment_stale(self):
+        inst = self._create_instance(uuids.instance)
+        server_view_cache.set_fragment(inst, 'v1', {'name': 'foo'})
+
+        inst.updated_at = datetime.datetime(2024, 1, 2)
+        self.assertIsNone(server_view_cache.get_fragment(inst, 'v1'))
+
+        # Soft deleting an instance does not bump updated_at.
+        inst = self._create_instance(uuids.instance)
+        inst.deleted = True
+        self.assertIsNone(server_view_cache.get_fragment(inst, 'v1'))
+
+    def test_get_fragment_stale_same_updated_at(self):
+        inst = self._create_instance(uuids.instance)
+        server_view_cache.set_fragment(inst, 'v1', {'name': 'foo'})
+
+        # The updated_at value only has a precision of one second with MySQL.
+        inst = self._create_instance(uuids.instance)
+        inst.task_state = task_states.REBOOTING
+        self.assertIsNone(server_view_cache.get_fragment(inst, 'v1'))
+
+        # Resizing an instance does not bump updated_at.
+        inst = self._create_instance(uuids.instance)
+        server_view_cache.set_fragment(inst, 'v1', {'name': 'foo'})
+        inst.flavor = objects.Flavor(flavorid='new', name='new',
+                                     memory_mb=1024, vcpus=2)
+        self.assertIsNone(server_view_cache.get_fragment(inst, 'v1'))
+
+        inst = self._create_instance(uuids.instance)
+        server_view_cache.set_fragment(inst, 'v1', {'name': 'foo'})
+        inst.system_metadata = {'locked_reason': 'maintenance'}
+        self.assertIsNone(server_view_cache.get_fragment(inst, 'v1'))
+
+    def test_lru_eviction(self):
+        insts = [self._create_instance(uuid)
+                 for uuid in (uuids.inst1, uuids.inst2, uuids.inst3)]
+        server_view_cache.set_fragment(insts[0], 'v1', {'name': 'inst1'})
+        server_view_cache.set_fragment(insts[1], 'v1', {'name': 'inst2'})
+        # Make inst2 the least recently used one.
+        server_view_cache.get_fragment(insts[0], 'v1')
+        server_view_cache.set_fragment(insts[2], 'v1', {'name': 'inst3'})
+
+        self.assertIsNotNone(server_view_cache.get_fragment(insts[0], 'v1'))
+        self.assertIsNone(server_view_cache.get_fragment(insts[1], 'v1'))
+        self.assertIsNotNone(server_view_cache.get_fragment(insts[2], 'v1'))
+
+    def test_invalidate(self):
+        inst = self._create_instance(uuids.instance)
+        server_view_cache.set_fragment(inst, 'v1', {'name': 'foo'})
+        server_view_cache.invalidate(inst.uuid)
+        self.assertIsNone(server_view_cache.get_fragment(inst, 'v1'))
+
+    @mock.patch('nova.cache_utils.get_memcached_client')
+    def test_memcached(self, mock_get_client):
+        self.flags(server_view_cache_use_memcached=True, group='api')
+        mc = mock_get_client.return_value
+        inst = self._create_instance(uuids.instance)
+
+        server_view_cache.set_fragment(inst, 'v1', {'name': 'foo'})
+        entry = mc.set.call_args[0][1]
+        mc.set.assert_called_once_with(
+            'server-view-%s' % uuids.instance, entry)
+
+        # Another API worker gets the view from memcached.
+        server_view_cache.reset_cache()
+        mc.get.return_value = entry
+        self.assertEqual({'name': 'foo'},
+                         server_view_cache.get_fragment(inst, 'v1'))
+        mc.get.assert_called_once_with('server-view-%s' % uuids.instance)
+
+        server_view_cache.invalidate(inst.uuid)
+        mc.delete.assert_called_once_with('server-view-%s' % uuids.instance)
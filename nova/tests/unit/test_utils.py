@@ -1455,6 +1455,23 @@ class LatchErrorOnRaiseTests(test.NoDBTestCase):
         self.assertIs(first, second)
 
 
+class ExecutorTestCase(test.NoDBTestCase):
+    @mock.patch.object(
+        utils, 'concurrency_mode_threading', new=mock.Mock(return_value=False))
+    def test_get_executor_eventlet(self):
+        with utils.get_executor(3) as executor:
+            self.assertEqual('GreenThreadPoolExecutor',
+                             type(executor).__name__)
+            self.assertEqual([1, 4], list(executor.map(abs, [-1, 4])))
+
+    @mock.patch.object(
+        utils, 'concurrency_mode_threading', new=mock.Mock(return_value=True))
+    def test_get_executor_threading(self):
+        with utils.get_executor(3) as executor:
+            self.assertEqual('ThreadPoolExecutor', type(executor).__name__)
+            self.assertEqual(3, executor._max_workers)
+
+
 class ScatterGatherExecutorTestCase(test.NoDBTestCase):
     def test_executor_is_named(self):
         executor = utils.get_scatter_gather_executor()
@@ -18,7 +18,14 @@ Tests For weights.
 
 from unittest import mock
 
+import numpy
+
+from nova import objects
 from nova.scheduler import weights as scheduler_weights
+from nova.scheduler.weights import cpu
+from nova.scheduler.weights import disk
+from nova.scheduler.weights import io_ops
+from nova.scheduler.weights import num_instances
 from nova.scheduler.weights import ram
 from nova import test
 from nova.tests.unit.scheduler import fakes
@@ -72,3 +79,119 @@ class TestWeigher(test.NoDBTestCase):
         self.assertEqual(1, len(weighed_host))
         self.assertEqual('host1', weighed_host[0].obj.host)
         self.assertFalse(mock_weigh.called)
+
+
+class TestColumnarWeighing(test.NoDBTestCase):
+    def setUp(self):
+        super(TestColumnarWeighing, self).setUp()
+        self.flags(columnar_weighing=True, group='filter_scheduler')
+        self.weight_handler = scheduler_weights.HostWeightHandler()
+
+    def _get_hosts(self):
+        host_values = [
+            ('host1', 'node1', {'free_ram_mb': 512, 'free_disk_mb': 4096,
+                                'vcpus_total': 8, 'vcpus_used': 4,
+                                'cpu_allocation_ratio': 16.0,
+                                'num_io_ops': 1, 'num_instances': 3}),
+            ('host2', 'node2', {'free_ram_mb': 1024, 'free_disk_mb': 1024,
+                                'vcpus_total': 8, 'vcpus_used': 0,
+                                'cpu_allocation_ratio': 4.0,
+                                'num_io_ops': 0, 'num_instances': 3}),
+            ('host3', 'node3', {'free_ram_mb': 1024, 'free_disk_mb': 1024,
+                                'vcpus_total': 8, 'vcpus_used': 0,
+                                'cpu_allocation_ratio': 4.0,
+                                'num_io_ops': 0, 'num_instances': 3}),
+            ('host4', 'node4', {'free_ram_mb': -512, 'free_disk_mb': 2048,
+                                'vcpus_total': 16, 'vcpus_used': 32,
+                                'cpu_allocation_ratio': 1.0,
+                                'num_io_ops': 5, 'num_instances': 0}),
+        ]
+        hosts = [fakes.FakeHostState(host, node, values)
+                 for host, node, values in host_values]
+        hosts[0].aggregates = [objects.Aggregate(
+            id=1, name='agg1', hosts=['host1'],
+            metadata={'ram_weight_multiplier': '3.0'})]
+        return hosts
+
+    def test_normalize_column(self):
+        map_ = (
+            ((), None, None),
+            ((0.0, 0.0), None, None),
+            ((1.0, 1.0), None, None),
+            ((20.0, 50.0), None, None),
+            ((20.0, 50.0), None, 100.0),
+            ((20.0, 50.0), 0.0, None),
+            ((20.0, 50.0), 0.0, 100.0),
+        )
+        for seq, minval, maxval in map_:
+            ret = weights.normalize_column(
+                numpy.array(seq, dtype=float), minval=minval, maxval=maxval)
+            expected = weights.normalize(seq, minval=minval, maxval=maxval)
+            self.assertEqual(list(expected), ret.tolist())
+
+    def test_same_result_as_default_engine(self):
+        weighers = [ram.RAMWeigher(), cpu.CPUWeigher(), disk.DiskWeigher(),
+                    io_ops.IoOpsWeigher(),
+                    num_instances.NumInstancesWeigher()]
+
+        columnar = self.weight_handler.get_weighed_objects(
+            weighers, self._get_hosts(), {})
+        self.flags(columnar_weighing=False, group='filter_scheduler')
+        default = self.weight_handler.get_weighed_objects(
+            weighers, self._get_hosts(), {})
+
+        self.assertEqual(
+            [(w.obj.host, w.weight) for w in default],
+            [(w.obj.host, w.weight) for w in columnar])
+
+    @mock.patch('nova.weights.BaseWeigher.weigh_objects')
+    def test_columnar_weigher_skips_per_object_weighing(self, mock_weigh):
+        weighed_hosts = self.weight_handler.get_weighed_objects(
+            [ram.RAMWeigher()], self._get_hosts(), {})
+
+        self.assertFalse(mock_weigh.called)
+        # host1 is in an aggregate overriding the RAM weight multiplier
+        self.assertEqual('host1', weighed_hosts[0].obj.host)
+        self.assertEqual(1.5, weighed_hosts[0].weight)
+        self.assertEqual('host4', weighed_hosts[-1].obj.host)
+
+    def test_fallback_for_per_object_weigher(self):
+        class FakeWeigher(scheduler_weights.BaseHostWeigher):
+            maxval = 2
+
+            def _weigh_object(self, host_state, weight_properties):
+                return host_state.num_io_ops
+
+        weighed_hosts = self.weight_handler.get_weighed_objects(
+            [FakeWeigher()], self._get_hosts(), {})
+
+        self.assertEqual(
+            [('host4', 1.0), ('host1', 0.5), ('host2', 0.0), ('host3', 0.0)],
+            [(w.obj.host, w.weight) for w in weighed_hosts])
+
+    def test_fallback_for_overridden_columnar_weigher(self):
+        class FakeRAMWeigher(ram.RAMWeigher):
+            def _weigh_object(self, host_state, weight_properties):
+                return host_state.num_instances
+
+        weigher = FakeRAMWeigher()
+        self.assertFalse(weigher._has_columnar_impl())
+        self.assertTrue(ram.RAMWeigher()._has_columnar_impl())
+
+        weighed_hosts = self.weight_handler.get_weighed_objects(
+            [weigher], self._get_hosts(), {})
+
+        self.assertEqual('host4', weighed_hosts[-1].obj.host)
+        self.assertEqual(0.0, weighed_hosts[-1].weight)
+
+    @mock.patch.object(scheduler_weights.LOG, 'warning')
+    @mock.patch('nova.weights.numpy', new=None)
+    @mock.patch('nova.weights.BaseWeightHandler._get_weighed_objects_columnar')
+    def test_no_numpy(self, mock_columnar, mock_warn):
+        for _ in range(2):
+            weighed_hosts = self.weight_handler.get_weighed_objects(
+                [ram.RAMWeigher()], self._get_hosts(), {})
+            self.assertEqual('host1', weighed_hosts[0].obj.host)
+
+        mock_columnar.assert_not_called()
+        mock_warn.assert_called_once()
@@ -1229,6 +1229,44 @@ class IronicDriverTestCase(test.NoDBTestCase):
             instance_id=instance.uuid,
             fields=ironic_driver._NODE_FIELDS)
 
+    def test_get_info_many(self):
+        nodes = [
+            _get_cached_node(instance_id=self.instance_uuid,
+                             power_state=ironic_states.POWER_ON),
+            _get_cached_node(id=uuidutils.generate_uuid(),
+                             instance_id=uuids.other_host,
+                             power_state=ironic_states.POWER_OFF),
+        ]
+        self.mock_conn.nodes.return_value = iter(nodes)
+
+        instances = [
+            fake_instance.fake_instance_obj('fake-context',
+                                            uuid=self.instance_uuid),
+            fake_instance.fake_instance_obj('fake-context',
+                                            uuid=uuids.missing),
+        ]
+        result = self.driver.get_info_many(instances)
+        self.assertEqual(
+            {self.instance_uuid: hardware.InstanceInfo(
+                state=nova_states.RUNNING)},
+            result)
+        # All the nodes are fetched with a single call
+        self.mock_conn.nodes.assert_called_once_with(
+            associated=True, fields=('instance_uuid', 'power_state'))
+
+    @mock.patch.object(ironic_driver.IronicDriver, '_can_send_version')
+    def test_get_info_many_conductor_group_and_shard(self, mock_can_send):
+        self.flags(conductor_group='some-group', shard='shard1',
+                   group='ironic')
+        self.mock_conn.nodes.return_value = iter([])
+
+        self.assertEqual({}, self.driver.get_info_many([]))
+        # Only the nodes this service can manage are fetched
+        self.mock_conn.nodes.assert_called_once_with(
+            associated=True, fields=('instance_uuid', 'power_state'),
+            conductor_group='some-group', shard='shard1')
+        mock_can_send.assert_has_calls([mock.call('1.46'), mock.call('1.82')])
+
     @mock.patch.object(ironic_driver.LOG, 'error')
     def test__get_node_list_bad_response(self, mock_error):
         fake_nodes = [_get_cached_node(),
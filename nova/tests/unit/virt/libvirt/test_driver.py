@@ -9586,6 +9586,27 @@ class LibvirtConnTestCase(test.NoDBTestCase,
         self.assertEqual(uuids[3], vm4.UUIDString())
         mock_list.assert_called_with(only_running=False)
 
+    @mock.patch.object(host.Host, "list_instance_domains")
+    def test_get_info_many(self, mock_list):
+        running = FakeVirtDomain(uuidstr=uuids.running, id=3)
+        stopped = FakeVirtDomain(
+            uuidstr=uuids.stopped,
+            info=[fakelibvirt.VIR_DOMAIN_SHUTOFF, 0, 0, None, None])
+        not_ours = FakeVirtDomain(uuidstr=uuids.not_ours)
+        mock_list.return_value = [running, stopped, not_ours]
+
+        instances = [objects.Instance(uuid=uuids.running),
+                     objects.Instance(uuid=uuids.stopped),
+                     objects.Instance(uuid=uuids.missing)]
+        drvr = libvirt_driver.LibvirtDriver(fake.FakeVirtAPI(), False)
+        self.assertEqual(
+            {uuids.running: hardware.InstanceInfo(
+                 state=power_state.RUNNING, internal_id=3),
+             uuids.stopped: hardware.InstanceInfo(
+                 state=power_state.SHUTDOWN)},
+            drvr.get_info_many(instances))
+        mock_list.assert_called_once_with(only_running=False)
+
     @mock.patch('nova.virt.libvirt.host.Host.get_online_cpus',
                 return_value=set([0, 1, 2, 3]))
     def test_get_pcpu_available(self, get_online_cpus):
@@ -18883,6 +18904,102 @@ class LibvirtConnTestCase(test.NoDBTestCase,
         mock_get.assert_called_once_with(mock.ANY, filters, use_slave=True)
         mock_bdms.assert_called_with(mock.ANY, instance_uuids)
 
+    @mock.patch.object(host.Host, "get_domain_generation", return_value=1)
+    @mock.patch.object(host.Host, "get_all_domain_stats")
+    @mock.patch.object(host.Host, "list_instance_domains")
+    @mock.patch.object(objects.BlockDeviceMappingList, "bdms_by_instance_uuid")
+    @mock.patch.object(objects.InstanceList, "get_by_filters")
+    def test_disk_over_committed_size_total_bulk_domain_stats(
+            self, mock_get, mock_bdms, mock_list, mock_stats, mock_gen):
+        self.flags(domain_config_cache=True, group='libvirt')
+        dom_xml = """
+            <domain type='kvm'>
+              <uuid>%(uuid)s</uuid>
+              <devices>
+                <disk type='file' device='disk'>
+                  <driver name='qemu' type='qcow2'/>
+                  <source file='/path/%(uuid)s/disk'/>
+                  <target dev='vda' bus='virtio'/>
+                </disk>
+                <disk type='file' device='disk'>
+                  <driver name='qemu' type='raw'/>
+                  <source file='/path/%(uuid)s/disk.eph0'/>
+                  <target dev='vdb' bus='virtio'/>
+                </disk>
+                <disk type='block' device='disk'>
+                  <driver name='qemu' type='raw'/>
+                  <source dev='/dev/mapper/volume'/>
+                  <target dev='vdc' bus='virtio'/>
+                </disk>
+              </devices>
+            </domain>
+        """
+        instance_domains = []
+        for uuid in (uuids.running1, uuids.running2, uuids.stopped):
+            dom = mock.Mock(spec=fakelibvirt.virDomain)
+            dom.UUIDString.return_value = uuid
+            dom.name.return_value = uuid
+            dom.XMLDesc.return_value = dom_xml % {'uuid': uuid}
+            instance_domains.append(dom)
+        mock_list.return_value = instance_domains
+        mock_get.return_value = []
+        mock_bdms.return_value = {}
+
+        def stats(uuid, qcow2_size):
+            return {
+                'block.count': 3,
+                'block.0.name': 'vda',
+                'block.0.path': '/path/%s/disk' % uuid,
+                'block.0.capacity': 10 * units.Gi,
+                'block.0.physical': qcow2_size,
+                'block.1.name': 'vdb',
+                'block.1.path': '/path/%s/disk.eph0' % uuid,
+                'block.1.capacity': 2 * units.Gi,
+                # The physical size of a file is its apparent size, even if
+                # it is sparse.
+                'block.1.physical': 2 * units.Gi,
+                'block.2.name': 'vdc',
+                'block.2.path': '/dev/mapper/volume',
+                'block.2.capacity': 20 * units.Gi,
+                'block.2.physical': 20 * units.Gi,
+            }
+
+        mock_stats.return_value = {
+            uuids.running1: stats(uuids.running1, 5 * units.Gi),
+            uuids.running2: stats(uuids.running2, 13 * units.Gi),
+        }
+        # The sizes allocated to the disk files on the host
+        allocated = {
+            '/path/%s/disk' % uuids.running1: 4 * units.Gi,
+            '/path/%s/disk.eph0' % uuids.running1: units.Gi,
+            '/path/%s/disk' % uuids.running2: 12 * units.Gi,
+            '/path/%s/disk.eph0' % uuids.running2: units.Gi,
+        }
+
+        def fake_stat(path):
+            return mock.Mock(st_blocks=allocated[path] // 512)
+
+        drvr = libvirt_driver.LibvirtDriver(fake.FakeVirtAPI(), False)
+        with test.nested(
+            mock.patch.object(
+                drvr, "_get_instance_disk_info_from_config",
+                return_value=[{'over_committed_disk_size': 1000}]),
+            mock.patch.object(os, 'stat', side_effect=fake_stat),
+        ) as (mock_info, mock_stat):
+            result = drvr._get_disk_over_committed_size_total()
+            # The over committed size of the qcow2 disk of the second
+            # guest is 0 and not negative.
+            self.assertEqual(6 * units.Gi + 2 * units.Gi + 1000, result)
+            mock_stats.assert_called_once_with(
+                fakelibvirt.VIR_DOMAIN_STATS_BLOCK)
+            # Only the stopped guest is handled without the stats
+            mock_info.assert_called_once()
+
+            # The disks are not read again as the domains did not change
+            drvr._get_disk_over_committed_size_total()
+            for dom in instance_domains[:2]:
+                dom.XMLDesc.assert_called_once_with(flags=0)
+
     @mock.patch.object(host.Host, "list_instance_domains")
     @mock.patch.object(objects.BlockDeviceMappingList, "bdms_by_instance_uuid")
     @mock.patch.object(objects.InstanceList, "get_by_filters")
@@ -20160,6 +20277,20 @@ class LibvirtConnTestCase(test.NoDBTestCase,
         self.assertEqual(6, drvr._get_vcpu_used())
         mock_list.assert_called_with(only_running=True)
 
+    @mock.patch.object(host.Host, "list_instance_domains")
+    @mock.patch.object(host.Host, "get_all_domain_stats")
+    def test_vcpu_count_bulk_domain_stats(self, mock_stats, mock_list):
+        mock_stats.return_value = {
+            uuids.instance1: {'vcpu.current': 2, 'vcpu.maximum': 4},
+            uuids.instance2: {'vcpu.current': 1, 'vcpu.maximum': 1},
+            uuids.instance3: {},
+        }
+        drvr = libvirt_driver.LibvirtDriver(fake.FakeVirtAPI(), False)
+
+        self.assertEqual(4, drvr._get_vcpu_used())
+        mock_stats.assert_called_once_with(fakelibvirt.VIR_DOMAIN_STATS_VCPU)
+        mock_list.assert_not_called()
+
     def test_get_instance_capabilities(self):
         drvr = libvirt_driver.LibvirtDriver(fake.FakeVirtAPI(), True)
 
@@ -29325,7 +29456,7 @@ class LibvirtNonblockingTestCase(test.NoDBTestCase):
         conn = fakelibvirt.virConnect()
         conn.is_expected = True
 
-        side_effect = [conn, None, None, None]
+        side_effect = [conn, None, None, None, None]
         expected_calls = [
             mock.call(fakelibvirt.openAuth, 'test:///default',
                       mock.ANY, mock.ANY),
@@ -29335,6 +29466,9 @@ class LibvirtNonblockingTestCase(test.NoDBTestCase):
             mock.call(conn.domainEventRegisterAny, None,
                       fakelibvirt.VIR_DOMAIN_EVENT_ID_DEVICE_REMOVED,
                       mock.ANY, mock.ANY),
+            mock.call(conn.domainEventRegisterAny, None,
+                      fakelibvirt.VIR_DOMAIN_EVENT_ID_DEVICE_ADDED,
+                      mock.ANY, mock.ANY),
             mock.call(conn.domainEventRegisterAny, None,
                       fakelibvirt.VIR_DOMAIN_EVENT_ID_DEVICE_REMOVAL_FAILED,
                       mock.ANY, mock.ANY),
@@ -369,7 +369,7 @@ class HostTestCase(test.NoDBTestCase):
         get_conn_currency(self.host)
         get_conn_currency(self.host)
         self.assertEqual(self.connect_calls, 1)
-        self.assertEqual(self.register_calls, 3)
+        self.assertEqual(self.register_calls, 4)
 
     @mock.patch.object(fakelibvirt.virConnect, "domainEventRegisterAny")
     @mock.patch.object(host.Host, "_connect")
@@ -403,7 +403,7 @@ class HostTestCase(test.NoDBTestCase):
         thr1.wait()
         thr2.wait()
         self.assertEqual(self.connect_calls, 1)
-        self.assertEqual(self.register_calls, 3)
+        self.assertEqual(self.register_calls, 4)
 
     @mock.patch.object(host.Host, "_connect")
     def test_conn_event(self, mock_conn):
@@ -1058,6 +1058,196 @@ class HostTestCase(test.NoDBTestCase):
         mock_find_secret.return_value = None
         self.host.delete_secret("rbd", "rbdvol")
 
+    @mock.patch.object(greenthread, 'spawn_after')
+    def test_domain_generation(self, mock_spawn_after):
+        got_events = []
+        hostimpl = host.Host("qemu:///system",
+                             lifecycle_event_handler=got_events.append)
+        conn = hostimpl.get_connection()
+        dom = mock.Mock(spec=fakelibvirt.virDomain)
+        dom.UUIDString.return_value = uuids.domain
+
+        # The domain changes are not tracked without the events
+        self.assertIsNone(hostimpl.get_domain_generation(uuids.domain))
+
+        hostimpl._init_events_pipe()
+        self.assertEqual(0, hostimpl.get_domain_generation(uuids.domain))
+
+        hostimpl._event_lifecycle_callback(
+            conn, dom, fakelibvirt.VIR_DOMAIN_EVENT_DEFINED, 0, hostimpl)
+        hostimpl._dispatch_events()
+        defined = hostimpl.get_domain_generation(uuids.domain)
+        self.assertNotEqual(0, defined)
+        # The events of the domain definition are not emitted
+        self.assertEqual([], got_events)
+
+        hostimpl._event_lifecycle_callback(
+            conn, dom, fakelibvirt.VIR_DOMAIN_EVENT_STARTED, 0, hostimpl)
+        hostimpl._dispatch_events()
+        started = hostimpl.get_domain_generation(uuids.domain)
+        self.assertNotIn(started, (0, defined))
+        self.assertEqual(1, len(got_events))
+        self.assertEqual(0, hostimpl.get_domain_generation(uuids.other))
+
+        hostimpl._event_lifecycle_callback(
+            conn, dom, fakelibvirt.VIR_DOMAIN_EVENT_UNDEFINED, 0, hostimpl)
+        hostimpl._dispatch_events()
+        self.assertEqual(0, hostimpl.get_domain_generation(uuids.domain))
+        self.assertEqual(1, len(got_events))
+
+    @mock.patch.object(greenthread, 'spawn_after')
+    def test_device_added_event(self, mock_spawn_after):
+        got_events = []
+        hostimpl = host.Host("qemu:///system",
+                             lifecycle_event_handler=got_events.append)
+        conn = hostimpl.get_connection()
+        dom = mock.Mock(spec=fakelibvirt.virDomain)
+        dom.UUIDString.return_value = uuids.domain
+        hostimpl._init_events_pipe()
+
+        hostimpl._event_device_added_callback(conn, dom, 'net0', hostimpl)
+        hostimpl._dispatch_events()
+        self.assertNotEqual(0, hostimpl.get_domain_generation(uuids.domain))
+        # The device added events are not emitted
+        self.assertEqual([], got_events)
+
+    def _get_guest_config(self, hostimpl, guest, expected_calls):
+        config = hostimpl.get_guest_config(guest)
+        self.assertIsInstance(config, vconfig.LibvirtConfigGuest)
+        self.assertEqual(expected_calls, guest._domain.XMLDesc.call_count)
+        return config
+
+    def test_get_guest_config(self):
+        self.flags(domain_config_cache=True, group='libvirt')
+        hostimpl = host.Host("qemu:///system")
+        conn = hostimpl.get_connection()
+        dom = mock.Mock(spec=fakelibvirt.virDomain)
+        dom.UUIDString.return_value = uuids.domain
+        dom.XMLDesc.return_value = (
+            "<domain type='kvm'><uuid>%s</uuid></domain>" % uuids.domain)
+        guest = libvirt_guest.Guest(dom)
+
+        # The definitions are not cached without the events
+        config = self._get_guest_config(hostimpl, guest, 1)
+        self.assertIsNot(config, self._get_guest_config(hostimpl, guest, 2))
+
+        hostimpl._init_events_pipe()
+        config = self._get_guest_config(hostimpl, guest, 3)
+        self.assertIs(config, self._get_guest_config(hostimpl, guest, 3))
+
+        hostimpl._event_device_removed_callback(conn, dom, 'vdb', hostimpl)
+        hostimpl._dispatch_events()
+        config = self._get_guest_config(hostimpl, guest, 4)
+        self.assertIs(config, self._get_guest_config(hostimpl, guest, 4))
+
+        hostimpl._event_lifecycle_callback(
+            conn, dom, fakelibvirt.VIR_DOMAIN_EVENT_UNDEFINED, 0, hostimpl)
+        hostimpl._dispatch_events()
+        self.assertEqual({}, hostimpl._domain_configs)
+        self._get_guest_config(hostimpl, guest, 5)
+
+        stats = hostimpl.get_guest_config_stats()
+        self.assertEqual(2, stats['hits'])
+        self.assertEqual(5, stats['xml_desc_calls'])
+        self.assertGreater(stats['parse_time'], 0)
+
+    def _cache_guest_config(self, hostimpl, uuid):
+        dom = mock.Mock(spec=fakelibvirt.virDomain)
+        dom.UUIDString.return_value = uuid
+        dom.XMLDesc.return_value = (
+            "<domain type='kvm'><uuid>%s</uuid></domain>" % uuid)
+        hostimpl._domain_changed(uuid)
+        hostimpl.get_guest_config(libvirt_guest.Guest(dom))
+        self.assertIn(uuid, hostimpl._domain_configs)
+
+    def test_get_guest_config_reconnect(self):
+        self.flags(domain_config_cache=True, group='libvirt')
+        hostimpl = host.Host("qemu:///system")
+        hostimpl.get_connection()
+        hostimpl._init_events_pipe()
+        self._cache_guest_config(hostimpl, uuids.domain)
+
+        # The events are missed while disconnected from libvirt
+        with mock.patch.object(hostimpl, '_test_connection',
+                               return_value=False):
+            hostimpl.get_connection()
+        self.assertEqual({}, hostimpl._domain_generations)
+        self.assertEqual({}, hostimpl._domain_configs)
+
+    def test_prune_domain_configs(self):
+        self.flags(domain_config_cache=True, group='libvirt')
+        hostimpl = host.Host("qemu:///system")
+        hostimpl._init_events_pipe()
+        self._cache_guest_config(hostimpl, uuids.domain1)
+        self._cache_guest_config(hostimpl, uuids.domain2)
+        hostimpl._domain_changed(uuids.domain3)
+
+        hostimpl.prune_domain_configs([uuids.domain1, uuids.domain4])
+        self.assertEqual([uuids.domain1],
+                         list(hostimpl._domain_generations))
+        self.assertEqual([uuids.domain1], list(hostimpl._domain_configs))
+
+    def test_get_guest_config_cache_disabled(self):
+        hostimpl = host.Host("qemu:///system")
+        hostimpl._init_events_pipe()
+        dom = mock.Mock(spec=fakelibvirt.virDomain)
+        dom.UUIDString.return_value = uuids.domain
+        dom.XMLDesc.return_value = (
+            "<domain type='kvm'><uuid>%s</uuid></domain>" % uuids.domain)
+        guest = libvirt_guest.Guest(dom)
+
+        config = self._get_guest_config(hostimpl, guest, 1)
+        self.assertIsNot(config, self._get_guest_config(hostimpl, guest, 2))
+        self.assertEqual(0, hostimpl.get_guest_config_stats()['hits'])
+
+    def test_get_all_domain_stats_disabled(self):
+        self.flags(virt_type='kvm', group='libvirt')
+        with mock.patch.object(
+            fakelibvirt.virConnect, 'getAllDomainStats',
+        ) as mock_stats:
+            self.assertIsNone(self.host.get_all_domain_stats(
+                fakelibvirt.VIR_DOMAIN_STATS_VCPU))
+            self.flags(bulk_domain_stats=True, virt_type='lxc',
+                       group='libvirt')
+            self.assertIsNone(self.host.get_all_domain_stats(
+                fakelibvirt.VIR_DOMAIN_STATS_VCPU))
+        mock_stats.assert_not_called()
+
+    def test_get_all_domain_stats(self):
+        self.flags(bulk_domain_stats=True, virt_type='kvm', group='libvirt')
+        dom = mock.Mock(spec=fakelibvirt.virDomain)
+        dom.UUIDString.return_value = uuids.domain
+        with mock.patch.object(
+            fakelibvirt.virConnect, 'getAllDomainStats',
+            return_value=[(dom, {'vcpu.current': 2})],
+        ) as mock_stats:
+            self.assertEqual(
+                {uuids.domain: {'vcpu.current': 2}},
+                self.host.get_all_domain_stats(
+                    fakelibvirt.VIR_DOMAIN_STATS_VCPU))
+            mock_stats.assert_called_once_with(
+                fakelibvirt.VIR_DOMAIN_STATS_VCPU,
+                fakelibvirt.VIR_CONNECT_GET_ALL_DOMAINS_STATS_ACTIVE)
+
+            mock_stats.reset_mock()
+            self.host.get_all_domain_stats(
+                fakelibvirt.VIR_DOMAIN_STATS_BLOCK, only_running=False)
+            mock_stats.assert_called_once_with(
+                fakelibvirt.VIR_DOMAIN_STATS_BLOCK,
+                fakelibvirt.VIR_CONNECT_GET_ALL_DOMAINS_STATS_ACTIVE |
+                fakelibvirt.VIR_CONNECT_GET_ALL_DOMAINS_STATS_INACTIVE)
+
+    def test_get_all_domain_stats_error(self):
+        self.flags(bulk_domain_stats=True, virt_type='kvm', group='libvirt')
+        with mock.patch.object(
+            fakelibvirt.virConnect, 'getAllDomainStats',
+            side_effect=fakelibvirt.make_libvirtError(
+                fakelibvirt.libvirtError, 'this function is not supported',
+                error_code=fakelibvirt.VIR_ERR_NO_SUPPORT),
+        ):
+            self.assertIsNone(self.host.get_all_domain_stats(
+                fakelibvirt.VIR_DOMAIN_STATS_VCPU))
+
     def test_get_memory_total(self):
         with mock.patch.object(host.Host, "get_connection") as mock_conn:
             mock_conn().getInfo.return_value = ['zero', 'one', 'two']
@@ -1113,6 +1303,20 @@ Active:          8381604 kB
 
             self.assertEqual(8192, self.host._sum_domain_memory_mb())
 
+    @mock.patch.object(host.Host, 'list_guests')
+    @mock.patch.object(host.Host, 'get_all_domain_stats')
+    def test_sum_domain_memory_mb_bulk_domain_stats(self, mock_stats,
+                                                    mock_list):
+        mock_stats.return_value = {
+            uuids.domain1: {'balloon.current': 4096 * 1024},
+            uuids.domain2: {'balloon.current': 2048 * 1024},
+            uuids.domain3: {},
+        }
+        self.assertEqual(6144, self.host._sum_domain_memory_mb())
+        mock_stats.assert_called_once_with(
+            fakelibvirt.VIR_DOMAIN_STATS_BALLOON)
+        mock_list.assert_not_called()
+
     def test_get_memory_used_file_backed(self):
         self.flags(file_backed_memory=1048576,
                    group='libvirt')
@@ -1157,9 +1361,11 @@ Active:          8381604 kB
                                  fake_dom_xml,
                                  False)
         mock_defineXML.return_value = dom
+        self.host._init_events_pipe()
         guest = self.host.write_instance_config(fake_dom_xml)
         mock_defineXML.assert_called_once_with(fake_dom_xml)
         self.assertIsInstance(guest, libvirt_guest.Guest)
+        self.assertNotEqual(0, self.host.get_domain_generation(guest.uuid))
 
     def test_write_instance_config_unicode(self):
         fake_dom_xml = u"""
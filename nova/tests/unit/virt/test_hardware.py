@@ -240,6 +240,50 @@ class CPUSetTestCase(test.NoDBTestCase):
         self.assertEqual("10,11,13,14,15,16,19,20,40,42,48", spec)
 
 
+class CPUSetTypeTestCase(test.NoDBTestCase):
+    def test_set_operations(self):
+        cpus = hw.CPUSet([1, 2, 3, 383])
+        self.assertEqual(4, len(cpus))
+        self.assertEqual([1, 2, 3, 383], list(cpus))
+        self.assertEqual((1 << 1) | (1 << 2) | (1 << 3) | (1 << 383),
+                         cpus.mask)
+        self.assertIn(383, cpus)
+        self.assertNotIn(4, cpus)
+        self.assertNotIn(-1, cpus)
+        self.assertEqual(hw.CPUSet([2, 3]), cpus & {2, 3, 4})
+        self.assertEqual({1, 2, 3, 4, 383}, cpus | hw.CPUSet([4]))
+        self.assertEqual({1, 383}, cpus - {2, 3})
+        self.assertEqual({4}, {2, 3, 4} - cpus)
+        self.assertEqual({1, 4, 383}, cpus ^ {2, 3, 4})
+        self.assertIsInstance({2, 3} & cpus, hw.CPUSet)
+        self.assertFalse(hw.CPUSet())
+        self.assertTrue(cpus)
+
+    def test_comparisons(self):
+        cpus = hw.CPUSet([1, 2])
+        self.assertEqual({1, 2}, cpus)
+        self.assertEqual(cpus, frozenset([1, 2]))
+        self.assertNotEqual({1}, cpus)
+        self.assertNotEqual([1, 2], cpus)
+        self.assertEqual(hash(hw.CPUSet([2, 1])), hash(cpus))
+        for cpus_set in ({1, 2}, set(), {0, 63, 64, 383}):
+            self.assertEqual(hash(frozenset(cpus_set)),
+                             hash(hw.CPUSet(cpus_set)))
+        self.assertEqual(1, len({cpus, frozenset([1, 2])}))
+        self.assertTrue(cpus <= {1, 2})
+        self.assertTrue(cpus < {1, 2, 3})
+        self.assertFalse(cpus < {1, 2})
+        self.assertTrue(cpus >= {1})
+        self.assertTrue(cpus.issubset([1, 2, 3]))
+        self.assertTrue(cpus.issuperset([2]))
+        self.assertTrue(cpus.isdisjoint([3, 4]))
+        self.assertFalse(cpus.isdisjoint([2, 4]))
+
+    def test_repr(self):
+        self.assertEqual('CPUSet(0-3,8)', repr(hw.CPUSet([0, 1, 2, 3, 8])))
+        self.assertEqual('CPUSet()', repr(hw.CPUSet()))
+
+
 class VCPUTopologyTest(test.NoDBTestCase):
 
     def test_validate_config(self):
@@ -2867,6 +2911,114 @@ class VirtNUMAHostTopologyTestCase(test.NoDBTestCase):
         self.assertEqual(1, instance_topology.cells[0].id)
 
 
+class NUMAFitCacheTestCase(test.NoDBTestCase):
+    def setUp(self):
+        super(NUMAFitCacheTestCase, self).setUp()
+        self.cache = hw.NUMAFitCache(2)
+        self.limits = objects.NUMATopologyLimits(
+            cpu_allocation_ratio=2, ram_allocation_ratio=2)
+
+    @staticmethod
+    def _host_topology(memory_usage=0):
+        return objects.NUMATopology(cells=[
+            objects.NUMACell(
+                id=cell_id,
+                cpuset=set([cell_id * 2, cell_id * 2 + 1]),
+                pcpuset=set(),
+                memory=2048,
+                cpu_usage=0,
+                memory_usage=memory_usage if cell_id == 0 else 0,
+                socket=0,
+                pinned_cpus=set(),
+                mempages=[objects.NUMAPagesTopology(
+                    size_kb=4, total=524288, used=0)],
+                siblings=[set([cell_id * 2]), set([cell_id * 2 + 1])])
+            for cell_id in (0, 1)])
+
+    @staticmethod
+    def _instance_topology(memory=1024):
+        return objects.InstanceNUMATopology(cells=[
+            objects.InstanceNUMACell(
+                id=0, cpuset=set([0, 1]), pcpuset=set(), memory=memory),
+        ])
+
+    def test_fit_cached(self):
+        with mock.patch.object(
+                hw, 'numa_fit_instance_to_host',
+                wraps=hw.numa_fit_instance_to_host) as mock_fit:
+            fitted1 = self.cache.fit(
+                self._host_topology(), self._instance_topology(), {},
+                limits=self.limits)
+            # An identical host with the same usage gets the cached result
+            fitted2 = self.cache.fit(
+                self._host_topology(), self._instance_topology(), {},
+                limits=self.limits)
+        mock_fit.assert_called_once()
+        self.assertEqual(0, fitted2.cells[0].id)
+        self.assertEqual(
+            fitted1.obj_to_primitive(), fitted2.obj_to_primitive())
+        # The cached result is not shared with the callers
+        self.assertIsNot(fitted1, fitted2)
+        self.assertEqual(1, self.cache.stats.hits)
+        self.assertEqual(1, self.cache.stats.misses)
+        self.assertEqual(0.5, self.cache.stats.hit_ratio)
+
+    def test_fit_cached_no_fit(self):
+        for _ in range(2):
+            self.assertIsNone(self.cache.fit(
+                self._host_topology(), self._instance_topology(memory=4096),
+                {}, limits=self.limits))
+        self.assertEqual(1, self.cache.stats.hits)
+        self.assertEqual(1, self.cache.stats.misses)
+
+    def test_fit_usage_changes_key(self):
+        self.cache.fit(
+            self._host_topology(), self._instance_topology(), {},
+            limits=self.limits)
+        # The first cell is now less free than the second one
+        fitted = self.cache.fit(
+            self._host_topology(memory_usage=1024), self._instance_topology(),
+            {}, limits=self.limits)
+        self.assertEqual(1, fitted.cells[0].id)
+        self.assertEqual(0, self.cache.stats.hits)
+        self.assertEqual(2, self.cache.stats.misses)
+
+    def test_fit_lru_eviction(self):
+        for memory_usage in (0, 256, 0, 512):
+            self.cache.fit(
+                self._host_topology(memory_usage=memory_usage),
+                self._instance_topology(), {}, limits=self.limits)
+        self.assertEqual(2, len(self.cache))
+        self.assertEqual(1, self.cache.stats.hits)
+        self.assertEqual(3, self.cache.stats.misses)
+        # The 256 MiB entry was the least recently used one
+        self.assertEqual(1, self.cache.stats.evictions)
+        self.cache.fit(
+            self._host_topology(), self._instance_topology(), {},
+            limits=self.limits)
+        self.assertEqual(2, self.cache.stats.hits)
+
+    def test_fit_pci_requests_bypass(self):
+        test_dict = copy.copy(fake_pci.fake_pool_dict)
+        test_dict['numa_node'] = 0
+        pci_stats = stats.PciDeviceStats(
+            objects.NUMATopology(),
+            [objects.PciDevicePool.from_dict(test_dict)])
+        pci_request = objects.InstancePCIRequest(
+            count=1, spec=[{'vendor_id': '8086'}])
+        with mock.patch.object(
+                hw, 'numa_fit_instance_to_host',
+                wraps=hw.numa_fit_instance_to_host) as mock_fit:
+            for _ in range(2):
+                self.cache.fit(
+                    self._host_topology(), self._instance_topology(), {},
+                    limits=self.limits, pci_requests=[pci_request],
+                    pci_stats=pci_stats)
+        self.assertEqual(2, mock_fit.call_count)
+        self.assertEqual(0, len(self.cache))
+        self.assertEqual(2, self.cache.stats.bypasses)
+
+
 class NumberOfSerialPortsTest(test.NoDBTestCase):
     def test_flavor(self):
         flavor = objects.Flavor(vcpus=8, memory_mb=2048,
@@ -516,6 +516,14 @@ class _VirtDriverTestCase(_FakeDriverBackendTestCase):
                           self.connection.get_info,
                           fake_instance)
 
+    @catch_notimplementederror
+    def test_get_info_many(self):
+        instance_ref, network_info = self._get_running_instance()
+        fake_instance = test_utils.get_test_instance(obj=True)
+        infos = self.connection.get_info_many([instance_ref, fake_instance])
+        self.assertEqual([instance_ref.uuid], list(infos))
+        self.assertIsInstance(infos[instance_ref.uuid], hardware.InstanceInfo)
+
     @catch_notimplementederror
     def test_get_diagnostics(self):
         instance_ref, network_info = self._get_running_instance(obj=True)
@@ -1266,6 +1266,17 @@ def concurrency_mode_threading():
 SCATTER_GATHER_EXECUTOR = None
 
 
+def get_executor(max_workers):
+    """Get a new executor running up to the given number of workers at once.
+
+    The workers are threads or green threads depending on the concurrency
+    mode of the process.
+    """
+    if concurrency_mode_threading():
+        return futurist.ThreadPoolExecutor(max_workers=max_workers)
+    return futurist.GreenThreadPoolExecutor(max_workers=max_workers)
+
+
 def get_scatter_gather_executor():
     """Returns the executor used for scatter/gather operations."""
     global SCATTER_GATHER_EXECUTOR
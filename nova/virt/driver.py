@@ -352,6 +352,18 @@ class ComputeDriver(object):
         # TODO(Vek): Need to pass context in for access to auth_token
         raise NotImplementedError()
 
+    def get_info_many(self, instances):
+        """Get the current status of several instances at once.
+
+        Unlike get_info(), this never uses cached data. The callers fall back
+        to calling get_info() for each instance if this is not implemented.
+
+        :param instances: a list of nova.objects.instance.Instance objects
+        :returns: a dict of InstanceInfo objects by instance UUID, which does
+                  not contain the instances not found on the hypervisor
+        """
+        raise NotImplementedError()
+
     @classmethod
     def get_instance_driver_metadata(
         cls, instance: 'nova.objects.instance.Instance',
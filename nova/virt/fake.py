@@ -402,6 +402,12 @@ class FakeDriver(driver.ComputeDriver):
         i = self.instances[instance.uuid]
         return hardware.InstanceInfo(state=i.state)
 
+    def get_info_many(self, instances):
+        return {instance.uuid: hardware.InstanceInfo(
+                    state=self.instances[instance.uuid].state)
+                for instance in instances
+                if instance.uuid in self.instances}
+
     def get_diagnostics(self, instance):
         return {'cpu0_time': 17300000000,
                 'memory': 524288,
@@ -13,8 +13,10 @@
 # under the License.
 
 import collections
+import collections.abc
 import itertools
 import re
+import threading
 import typing as ty
 
 import os_resource_classes as orc
@@ -28,6 +30,7 @@ import nova.conf
 from nova import exception
 from nova.i18n import _
 from nova import objects
+from nova.objects import base as obj_base
 from nova.objects import compute_node
 from nova.objects import fields
 from nova.objects import service
@@ -204,6 +207,156 @@ def format_cpu_spec(
         return ",".join(str(id) for id in sorted(cpuset))
 
 
+class CPUSet(collections.abc.Set):
+    """An immutable set of CPU IDs backed by an integer bitmask.
+
+    Bit N of the mask is set if CPU N is in the set, so that unions,
+    intersections and differences of CPU sets are single integer operations,
+    however large the host is. This is used when fitting instances on host
+    NUMA cells; the NUMA objects still store and serialize their CPU sets as
+    sets of integers.
+
+    A CPUSet compares equal to a set or frozenset with the same CPUs, and
+    iterates over its CPUs in ascending order.
+    """
+
+    __slots__ = ('_mask',)
+
+    _mask: int
+
+    def __init__(self, cpus: ty.Iterable[int] = ()):
+        if isinstance(cpus, CPUSet):
+            mask = cpus._mask
+        else:
+            mask = 0
+            for cpu in cpus:
+                mask |= 1 << cpu
+        self._mask = mask
+
+    @classmethod
+    def from_mask(cls, mask: int) -> 'CPUSet':
+        cpuset = cls.__new__(cls)
+        cpuset._mask = mask
+        return cpuset
+
+    @property
+    def mask(self) -> int:
+        return self._mask
+
+    @staticmethod
+    def _mask_of(other) -> ty.Optional[int]:
+        if isinstance(other, CPUSet):
+            return other._mask
+        if isinstance(other, collections.abc.Set):
+            return CPUSet(other)._mask
+        return None
+
+    def __len__(self):
+        return self._mask.bit_count()
+
+    def __iter__(self):
+        mask = self._mask
+        while mask:
+            lowest = mask & -mask
+            yield lowest.bit_length() - 1
+            mask ^= lowest
+
+    def __contains__(self, cpu):
+        return isinstance(cpu, int) and cpu >= 0 and bool(
+            self._mask >> cpu & 1)
+
+    def __bool__(self):
+        return bool(self._mask)
+
+    def __eq__(self, other):
+        mask = self._mask_of(other)
+        if mask is None:
+            return NotImplemented
+        return self._mask == mask
+
+    def __ne__(self, other):
+        mask = self._mask_of(other)
+        if mask is None:
+            return NotImplemented
+        return self._mask != mask
+
+    def __hash__(self):
+        # NOTE: This must match the hash of the equal frozensets.
+        return self._hash()
+
+    def __le__(self, other):
+        mask = self._mask_of(other)
+        if mask is None:
+            return NotImplemented
+        return self._mask & ~mask == 0
+
+    def __lt__(self, other):
+        mask = self._mask_of(other)
+        if mask is None:
+            return NotImplemented
+        return self._mask != mask and self._mask & ~mask == 0
+
+    def __ge__(self, other):
+        mask = self._mask_of(other)
+        if mask is None:
+            return NotImplemented
+        return mask & ~self._mask == 0
+
+    def __gt__(self, other):
+        mask = self._mask_of(other)
+        if mask is None:
+            return NotImplemented
+        return self._mask != mask and mask & ~self._mask == 0
+
+    def __and__(self, other):
+        mask = self._mask_of(other)
+        if mask is None:
+            return NotImplemented
+        return CPUSet.from_mask(self._mask & mask)
+
+    __rand__ = __and__
+
+    def __or__(self, other):
+        mask = self._mask_of(other)
+        if mask is None:
+            return NotImplemented
+        return CPUSet.from_mask(self._mask | mask)
+
+    __ror__ = __or__
+
+    def __xor__(self, other):
+        mask = self._mask_of(other)
+        if mask is None:
+            return NotImplemented
+        return CPUSet.from_mask(self._mask ^ mask)
+
+    __rxor__ = __xor__
+
+    def __sub__(self, other):
+        mask = self._mask_of(other)
+        if mask is None:
+            return NotImplemented
+        return CPUSet.from_mask(self._mask & ~mask)
+
+    def __rsub__(self, other):
+        mask = self._mask_of(other)
+        if mask is None:
+            return NotImplemented
+        return CPUSet.from_mask(mask & ~self._mask)
+
+    def isdisjoint(self, other):
+        return not self._mask & CPUSet(other)._mask
+
+    def issubset(self, other):
+        return self <= CPUSet(other)
+
+    def issuperset(self, other):
+        return self >= CPUSet(other)
+
+    def __repr__(self):
+        return 'CPUSet(%s)' % format_cpu_spec(set(self))
+
+
 def get_number_of_serial_ports(flavor, image_meta):
     """Get the number of serial consoles from the flavor or image.
 
@@ -663,6 +816,7 @@ def _pack_instance_onto_cores(host_cell, instance_cell,
     """
     # get number of threads per core in host's cell
     threads_per_core = max(map(len, host_cell.siblings)) or 1
+    free_siblings = host_cell.free_siblings
 
     LOG.debug('Packing an instance onto a set of siblings: '
              '    host_cell_free_siblings: %(siblings)s'
@@ -670,7 +824,7 @@ def _pack_instance_onto_cores(host_cell, instance_cell,
              '    host_cell_id: %(host_cell_id)s'
              '    threads_per_core: %(threads_per_core)s'
              '    num_cpu_reserved: %(num_cpu_reserved)s',
-                {'siblings': host_cell.free_siblings,
+                {'siblings': free_siblings,
                  'cells': instance_cell,
                  'host_cell_id': host_cell.id,
                  'threads_per_core': threads_per_core,
@@ -679,10 +833,10 @@ def _pack_instance_onto_cores(host_cell, instance_cell,
     # We build up a data structure that answers the question: 'Given the
     # number of threads I want to pack, give me a list of all the available
     # sibling sets (or groups thereof) that can accommodate it'
-    sibling_sets: ty.Dict[int, ty.List[ty.Set[int]]] = (
+    sibling_sets: ty.Dict[int, ty.List[CPUSet]] = (
         collections.defaultdict(list)
     )
-    for sib in host_cell.free_siblings:
+    for sib in free_siblings:
         for threads_no in range(1, len(sib) + 1):
             sibling_sets[threads_no].append(sib)
     LOG.debug('Built sibling_sets: %(siblings)s', {'siblings': sibling_sets})
@@ -897,7 +1051,8 @@ def _pack_instance_onto_cores(host_cell, instance_cell,
             # here. By treating each core as independent, as we do here, we
             # maximize resource usage for almost-full nodes at the expense of a
             # possible performance impact to the guest.
-            sibling_set = [set([x]) for x in itertools.chain(*sibling_sets[1])]
+            sibling_set = [
+                CPUSet([x]) for x in itertools.chain(*sibling_sets[1])]
             pinning = _get_pinning(
                 threads_no, sibling_set,
                 instance_cell.pcpuset)
@@ -2624,6 +2779,161 @@ def numa_fit_instance_to_host(
             emulator_threads_policy=emulator_threads_policy)
 
 
+def _numa_fit_cache_value(value):
+    """Return a hashable, canonical representation of a fitting input."""
+    if isinstance(value, obj_base.NovaObject):
+        return (value.obj_name(),) + tuple(
+            (name, _numa_fit_cache_value(getattr(value, name)))
+            for name in sorted(value.fields)
+            if value.obj_attr_is_set(name))
+    if isinstance(value, (set, frozenset)):
+        return frozenset(value)
+    if isinstance(value, (list, tuple)):
+        return tuple(_numa_fit_cache_value(item) for item in value)
+    if isinstance(value, dict):
+        return tuple(sorted(
+            (key, _numa_fit_cache_value(item))
+            for key, item in value.items()))
+    return value
+
+
+def _numa_fit_cache_key(host_topology, instance_topology, limits, pci_stats):
+    """Return the fingerprint of the inputs of numa_fit_instance_to_host.
+
+    Two calls with the same fingerprint return the same result, which
+    allows sharing the result between hosts with the same NUMA topology and
+    usage.
+    """
+    pci_key = None
+    if pci_stats:
+        # Without PCI requests, only the number of free devices per NUMA
+        # node is used to order the host cells.
+        pci_counts: ty.Dict[ty.Any, int] = collections.Counter()
+        for pool in pci_stats.pools:
+            pci_counts[pool['numa_node']] += pool['count']
+        pci_key = tuple(sorted(pci_counts.items(), key=str))
+    return (
+        CONF.compute.packing_host_numa_cells_allocation_strategy,
+        _numa_fit_cache_value(host_topology),
+        _numa_fit_cache_value(instance_topology),
+        _numa_fit_cache_value(limits),
+        pci_key,
+    )
+
+
+class NUMAFitCacheStats(object):
+    """Counters of a NUMAFitCache."""
+
+    def __init__(self, hits=0, misses=0, bypasses=0, evictions=0):
+        # Number of fits served from the cache
+        self.hits = hits
+        # Number of fits computed and added to the cache
+        self.misses = misses
+        # Number of fits computed without the cache, as their result
+        # depends on the PCI devices of the host
+        self.bypasses = bypasses
+        # Number of results evicted from the cache
+        self.evictions = evictions
+
+    @property
+    def hit_ratio(self):
+        lookups = self.hits + self.misses
+        return float(self.hits) / lookups if lookups else 0.0
+
+    def copy(self):
+        return NUMAFitCacheStats(
+            self.hits, self.misses, self.bypasses, self.evictions)
+
+    def __sub__(self, other):
+        return NUMAFitCacheStats(
+            self.hits - other.hits, self.misses - other.misses,
+            self.bypasses - other.bypasses,
+            self.evictions - other.evictions)
+
+    def __repr__(self):
+        return ("hits: %d, misses: %d, bypasses: %d, evictions: %d, "
+                "hit ratio: %.2f" % (self.hits, self.misses, self.bypasses,
+                                     self.evictions, self.hit_ratio))
+
+
+class NUMAFitCache(object):
+    """A bounded LRU cache of numa_fit_instance_to_host results.
+
+    In a homogeneous deployment many hosts share the same NUMA topology and
+    usage, so fitting a given instance topology on them gives the same
+    result. The results are keyed by a fingerprint of the host topology and
+    usage, the requested instance topology, the limits and the free PCI
+    devices per NUMA node. Fits with PCI requests on a host with PCI devices
+    depend on the individual devices and are not cached.
+    """
+
+    _NO_ENTRY = object()
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self.stats = NUMAFitCacheStats()
+        self._entries: collections.OrderedDict = collections.OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def fit(
+        self,
+        host_topology: 'objects.NUMATopology',
+        instance_topology: 'objects.InstanceNUMATopology',
+        provider_mapping: ty.Optional[ty.Dict[str, ty.List[str]]],
+        limits: ty.Optional['objects.NUMATopologyLimit'] = None,
+        pci_requests: ty.Optional['objects.InstancePCIRequests'] = None,
+        pci_stats: ty.Optional[stats.PciDeviceStats] = None,
+    ):
+        """Fit the instance topology onto the host topology using the cache.
+
+        Takes the same parameters and returns the same result as
+        numa_fit_instance_to_host. Note that, unlike the latter, the instance
+        topology is not updated when the result is found in the cache.
+        """
+        if not (host_topology and instance_topology) or (
+                pci_requests and pci_stats):
+            if host_topology and instance_topology:
+                with self._lock:
+                    self.stats.bypasses += 1
+            return numa_fit_instance_to_host(
+                host_topology, instance_topology,
+                provider_mapping=provider_mapping, limits=limits,
+                pci_requests=pci_requests, pci_stats=pci_stats)
+
+        key = _numa_fit_cache_key(
+            host_topology, instance_topology, limits, pci_stats)
+        with self._lock:
+            result = self._entries.get(key, self._NO_ENTRY)
+            if result is not self._NO_ENTRY:
+                self._entries.move_to_end(key)
+                self.stats.hits += 1
+        if result is not self._NO_ENTRY:
+            return result.obj_clone() if result is not None else None
+
+        result = numa_fit_instance_to_host(
+            host_topology, instance_topology,
+            provider_mapping=provider_mapping, limits=limits,
+            pci_requests=pci_requests, pci_stats=pci_stats)
+        # The returned cells are the ones of the instance topology, which
+        # the caller may modify, so cache a copy.
+        cached = result.obj_clone() if result is not None else None
+        with self._lock:
+            self.stats.misses += 1
+            self._entries[key] = cached
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self.stats.evictions += 1
+        return result
+
+
 def numa_get_reserved_huge_pages():
     """Returns reserved memory pages from host option.
 
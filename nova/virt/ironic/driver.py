@@ -762,20 +762,12 @@ class IronicDriver(virt_driver.ComputeDriver):
                                             partitions=_HASH_RING_PARTITIONS)
         LOG.debug('Hash ring members are %s', services)
 
-    def _refresh_cache(self):
-        ctxt = nova_context.get_admin_context()
-        self._refresh_hash_ring(ctxt)
-        node_cache = {}
-
-        def _get_node_list(**kwargs):
-            # NOTE(TheJulia): This call can take a substantial amount
-            # of time as it may be attempting to retrieve thousands of
-            # baremetal nodes. Depending on the version of Ironic,
-            # this can be as long as 2-10 seconds per every thousand
-            # nodes, and this call may retrieve all nodes in a deployment,
-            # depending on if any filter parameters are applied.
-            return self._get_node_list(fields=_NODE_FIELDS, **kwargs)
+    def _get_node_list_filters(self):
+        """Get the filters limiting the nodes listed to the ones this service
+        can manage.
 
+        :returns: a dict of keyword arguments for _get_node_list()
+        """
         # NOTE(jroll) if conductor_group is set, we need to limit nodes that
         # can be managed to nodes that have a matching conductor_group
         # attribute. If the API isn't new enough to support conductor groups,
@@ -793,12 +785,27 @@ class IronicDriver(virt_driver.ComputeDriver):
             if shard:
                 self._can_send_version('1.82')
                 kwargs['shard'] = shard
-            nodes = _get_node_list(**kwargs)
         except exception.IronicAPIVersionNotAvailable:
             LOG.error('Required Ironic API version is not '
                       'available to filter nodes by conductor group '
                       'and shard.')
-            nodes = _get_node_list(**kwargs)
+        return kwargs
+
+    def _refresh_cache(self):
+        ctxt = nova_context.get_admin_context()
+        self._refresh_hash_ring(ctxt)
+        node_cache = {}
+
+        def _get_node_list(**kwargs):
+            # NOTE(TheJulia): This call can take a substantial amount
+            # of time as it may be attempting to retrieve thousands of
+            # baremetal nodes. Depending on the version of Ironic,
+            # this can be as long as 2-10 seconds per every thousand
+            # nodes, and this call may retrieve all nodes in a deployment,
+            # depending on if any filter parameters are applied.
+            return self._get_node_list(fields=_NODE_FIELDS, **kwargs)
+
+        nodes = _get_node_list(**self._get_node_list_filters())
 
         # NOTE(saga): As _get_node_list() will take a long
         # time to return in large clusters we need to call it before
@@ -1042,6 +1049,26 @@ class IronicDriver(virt_driver.ComputeDriver):
 
         return hardware.InstanceInfo(state=map_power_state(node.power_state))
 
+    def get_info_many(self, instances):
+        """Get the current state of several instances.
+
+        The nodes of all the instances are fetched from Ironic with a single
+        call, rather than one per instance, limited to the nodes of the
+        conductor group and shard of this service like by _refresh_cache().
+
+        :param instances: a list of instance objects.
+        :returns: a dict of InstanceInfo objects by instance UUID.
+        :raises: VirtDriverNotReady
+        """
+        instance_uuids = set(instance.uuid for instance in instances)
+        nodes = self._get_node_list(return_generator=True, associated=True,
+                                    fields=('instance_id', 'power_state'),
+                                    **self._get_node_list_filters())
+        return {node.instance_id: hardware.InstanceInfo(
+                    state=map_power_state(node.power_state))
+                for node in nodes
+                if node.instance_id in instance_uuids}
+
     def _get_network_metadata(self, node, network_info):
         """Gets a more complete representation of the instance network info.
 
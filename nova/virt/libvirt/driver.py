@@ -8073,6 +8073,28 @@ class LibvirtDriver(driver.ComputeDriver):
         # workaround, see libvirt/compat.py
         return guest.get_info(self._host)
 
+    def get_info_many(self, instances):
+        """Retrieve information from libvirt for several instances.
+
+        The domains are listed once instead of being looked up for each
+        instance.
+
+        :param instances: a list of nova.objects.instance.Instance objects
+        :returns: a dict of InstanceInfo objects by instance UUID
+        """
+        instance_uuids = set(instance.uuid for instance in instances)
+        infos = {}
+        for dom in self._host.list_instance_domains(only_running=False):
+            guest = libvirt_guest.Guest(dom)
+            if guest.uuid not in instance_uuids:
+                continue
+            try:
+                infos[guest.uuid] = guest.get_info(self._host)
+            except exception.InstanceNotFound:
+                # The domain was undefined since it was listed
+                pass
+        return infos
+
     def _create_domain_setup_lxc(self, context, instance, image_meta,
                                  block_device_info):
         inst_path = libvirt_utils.get_instance_path(instance)
@@ -8402,6 +8424,14 @@ class LibvirtDriver(driver.ComputeDriver):
         #
         # Thus when getting an exception we always report 1 as the
         # vCPU count, as the least worst value.
+        domain_stats = self._host.get_all_domain_stats(
+            libvirt.VIR_DOMAIN_STATS_VCPU)
+        if domain_stats is not None:
+            # NOTE: vcpu.current is the number of online vCPUs, which
+            # get_vcpus_info() returns the information of.
+            return sum(record.get('vcpu.current', 1)
+                       for record in domain_stats.values())
+
         for guest in self._host.list_guests():
             try:
                 vcpus = guest.get_vcpus_info()
@@ -12022,11 +12052,12 @@ class LibvirtDriver(driver.ComputeDriver):
         # Disk size that all instance uses : virtual_size - disk_size
         disk_over_committed_size = 0
         instance_domains = self._host.list_instance_domains(only_running=False)
+        # Get all instance uuids
+        instance_uuids = [dom.UUIDString() for dom in instance_domains]
+        self._host.prune_domain_configs(instance_uuids)
         if not instance_domains:
             return disk_over_committed_size
 
-        # Get all instance uuids
-        instance_uuids = [dom.UUIDString() for dom in instance_domains]
         ctx = nova_context.get_admin_context()
         # Get instance object list by uuid filter
         filters = {'uuid': instance_uuids}
@@ -12047,10 +12078,12 @@ class LibvirtDriver(driver.ComputeDriver):
         bdms = objects.BlockDeviceMappingList.bdms_by_instance_uuid(
             ctx, instance_uuids)
 
+        domain_stats = self._host.get_all_domain_stats(
+            libvirt.VIR_DOMAIN_STATS_BLOCK) or {}
+
         for dom in instance_domains:
             try:
                 guest = libvirt_guest.Guest(dom)
-                config = guest.get_config()
 
                 block_device_info = None
                 if guest.uuid in local_instances \
@@ -12059,6 +12092,14 @@ class LibvirtDriver(driver.ComputeDriver):
                     block_device_info = driver.get_block_device_info(
                         local_instances[guest.uuid], bdms[guest.uuid])
 
+                if guest.uuid in domain_stats:
+                    size = self._get_disk_over_committed_size_from_stats(
+                        guest, domain_stats[guest.uuid], block_device_info)
+                    if size is not None:
+                        disk_over_committed_size += size
+                        continue
+
+                config = self._host.get_guest_config(guest)
                 disk_infos = self._get_instance_disk_info_from_config(
                     config, block_device_info)
                 if not disk_infos:
@@ -12106,6 +12147,58 @@ class LibvirtDriver(driver.ComputeDriver):
 
             # NOTE(gtt116): give other tasks a chance.
             utils.cooperative_yield()
+
+        LOG.debug('Guest definitions fetched from libvirt: %(xml_desc_calls)d,'
+                  ' reused: %(hits)d, time spent parsing them: '
+                  '%(parse_time).3f seconds',
+                  self._host.get_guest_config_stats())
+        return disk_over_committed_size
+
+    def _get_disk_over_committed_size_from_stats(self, guest, stats,
+                                                 block_device_info):
+        """Get the over committed size of the disks of a running guest from
+        its block statistics, as returned by Host.get_all_domain_stats().
+
+        :returns: the over committed size in bytes, or None if it could not
+            be computed from the statistics
+        """
+        sizes = {}
+        for i in range(stats.get('block.count', 0)):
+            try:
+                sizes[stats['block.%d.path' % i]] = (
+                    stats['block.%d.capacity' % i])
+            except KeyError:
+                continue
+
+        volume_devices = set(
+            vol['mount_device'].rpartition("/")[2]
+            for vol in driver.block_device_info_get_mapping(
+                block_device_info))
+
+        disk_over_committed_size = 0
+        for disk in self._host.get_guest_config(guest).devices:
+            if not isinstance(disk, vconfig.LibvirtConfigGuestDisk):
+                continue
+            # NOTE: Like with _get_instance_disk_info_from_config(), only the
+            # local file disks can be over committed.
+            if (disk.source_type != 'file' or not disk.source_path or
+                    disk.target_dev in volume_devices):
+                continue
+            if (disk.driver_format == 'ploop' or
+                    disk.source_path not in sizes):
+                return None
+
+            # NOTE: The physical size libvirt reports for the file disks is
+            # their apparent size, so the size allocated to them on the host
+            # is still taken from their blocks, like qemu-img info does for
+            # the disk size of the qcow2 ones.
+            capacity = sizes[disk.source_path]
+            allocated = os.stat(disk.source_path).st_blocks * 512
+            if disk.driver_format == 'qcow2':
+                disk_over_committed_size += max(0, capacity - allocated)
+            else:
+                disk_over_committed_size += capacity - allocated
+
         return disk_over_committed_size
 
     def get_available_nodes(self, refresh=False):
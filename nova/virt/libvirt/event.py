@@ -45,3 +45,19 @@ class DeviceRemovedEvent(DeviceEvent):
 
 class DeviceRemovalFailedEvent(DeviceEvent):
     """Libvirt sends this event after an unsuccessful device detach"""
+
+
+class DeviceAddedEvent(DeviceEvent):
+    """Libvirt sends this event after a successful device attach"""
+
+
+class DomainDefinitionEvent(LibvirtEvent):
+    """Base class for the events of the definition of a domain changing"""
+
+
+class DomainDefinedEvent(DomainDefinitionEvent):
+    """Libvirt sends this event after a domain is defined or redefined"""
+
+
+class DomainUndefinedEvent(DomainDefinitionEvent):
+    """Libvirt sends this event after a domain is undefined"""
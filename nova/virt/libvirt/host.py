@@ -31,11 +31,13 @@ from collections import defaultdict
 import fnmatch
 import glob
 import inspect
+import itertools
 from lxml import etree
 import operator
 import os
 import queue
 import threading
+import time
 import typing as ty
 
 from eventlet import greenio
@@ -152,6 +154,20 @@ class Host(object):
         #                STOPPED lifecycle event some seconds.
         self._lifecycle_delay = 15
 
+        # {domain UUID: generation}, the generation of a domain changing
+        # whenever libvirt reports an event about it, since its definition
+        # may have changed then
+        self._domain_generations: ty.Dict[str, int] = {}
+        self._domain_generation_counter = itertools.count(1)
+
+        # {domain UUID: (generation, parsed live definition)}, the
+        # definitions reused by get_guest_config() while the generation of
+        # their domain stays the same
+        self._domain_configs: ty.Dict[
+            str, ty.Tuple[int, vconfig.LibvirtConfigGuest]] = {}
+        self._domain_config_stats = {
+            'hits': 0, 'xml_desc_calls': 0, 'parse_time': 0.0}
+
         self._initialized = False
         self._libvirt_proxy_classes = self._get_libvirt_proxy_classes(libvirt)
         self._libvirt_proxy = self._wrap_libvirt_proxy(libvirt)
@@ -254,6 +270,19 @@ class Host(object):
         uuid = dom.UUIDString()
         self._queue_event(libvirtevent.DeviceRemovedEvent(uuid, dev))
 
+    @staticmethod
+    def _event_device_added_callback(conn, dom, dev, opaque):
+        """Receives device added events from libvirt.
+
+        NB: this method is executing in a native thread, not
+        an eventlet coroutine. It can only invoke other libvirt
+        APIs, or use self._queue_event(). Any use of logging APIs
+        in particular is forbidden.
+        """
+        self = opaque
+        uuid = dom.UUIDString()
+        self._queue_event(libvirtevent.DeviceAddedEvent(uuid, dev))
+
     @staticmethod
     def _event_device_removal_failed_callback(conn, dom, dev, opaque):
         """Receives device removed events from libvirt.
@@ -313,6 +342,10 @@ class Host(object):
                 transition = virtevent.EVENT_LIFECYCLE_PAUSED
         elif event == libvirt.VIR_DOMAIN_EVENT_RESUMED:
             transition = virtevent.EVENT_LIFECYCLE_RESUMED
+        elif event == libvirt.VIR_DOMAIN_EVENT_DEFINED:
+            self._queue_event(libvirtevent.DomainDefinedEvent(uuid))
+        elif event == libvirt.VIR_DOMAIN_EVENT_UNDEFINED:
+            self._queue_event(libvirtevent.DomainUndefinedEvent(uuid))
 
         if transition is not None:
             self._queue_event(virtevent.LifecycleEvent(uuid, transition))
@@ -403,7 +436,15 @@ class Host(object):
                 event_type = ty.Union[
                     virtevent.InstanceEvent, ty.Mapping[str, ty.Any]]
                 event: event_type = self._event_queue.get(block=False)
-                if issubclass(type(event), virtevent.InstanceEvent):
+                if isinstance(event, virtevent.InstanceEvent):
+                    if isinstance(event, libvirtevent.DomainUndefinedEvent):
+                        self._forget_domains([event.uuid])
+                    else:
+                        self._domain_changed(event.uuid)
+                    if isinstance(event, (libvirtevent.DomainDefinitionEvent,
+                                          libvirtevent.DeviceAddedEvent)):
+                        # These are only used to track the domain changes
+                        continue
                     # call possibly with delay
                     self._event_emit_delayed(event)
 
@@ -423,6 +464,98 @@ class Host(object):
                 self._wrapped_conn = None
                 self._queue_conn_event_handler(False, msg)
 
+    def _domain_changed(self, uuid):
+        self._domain_generations[uuid] = next(
+            self._domain_generation_counter)
+
+    def _forget_domains(self, uuids=None):
+        """Forget the generations and cached definitions of domains.
+
+        :param uuids: the UUIDs of the domains to forget, or None to forget
+            all of them
+        """
+        if uuids is None:
+            self._domain_generations.clear()
+            self._domain_configs.clear()
+            return
+        for uuid in uuids:
+            self._domain_generations.pop(uuid, None)
+            self._domain_configs.pop(uuid, None)
+
+    def prune_domain_configs(self, uuids):
+        """Forget the domains which are not among the given ones.
+
+        The domains undefined while the events were not received, or which
+        vanished without an undefined event, would be tracked forever
+        otherwise.
+
+        :param uuids: the UUIDs of all the domains currently defined
+        """
+        self._forget_domains(
+            (set(self._domain_generations) | set(self._domain_configs)) -
+            set(uuids))
+
+    def get_domain_generation(self, uuid):
+        """Get the generation of a domain.
+
+        The generation of a domain changes whenever libvirt reports an event
+        about it, like a change of its definition or of its state, so that
+        data derived from the definition of a domain can be reused for as
+        long as its generation stays the same.
+
+        :param uuid: the UUID of the domain
+        :returns: the generation of the domain, or None if the changes of the
+            domains are not tracked because the events are not received
+        """
+        if self._event_queue is None:
+            return None
+        return self._domain_generations.get(uuid, 0)
+
+    def get_guest_config(self, guest):
+        """Get the parsed live definition of a guest.
+
+        If the domain_config_cache option is enabled, the definition is only
+        fetched and parsed again once the generation of the domain changed.
+        The definitions are then shared between the callers, which must not
+        modify them, so this is meant for the periodic tasks which only look
+        at the devices of the guests.
+
+        :param guest: a nova.virt.libvirt.Guest object
+        :returns: a nova.virt.libvirt.config.LibvirtConfigGuest object
+        """
+        generation = None
+        if CONF.libvirt.domain_config_cache:
+            # NOTE: The generation is read before fetching the definition, so
+            # that the definition is never cached with a generation newer
+            # than itself if an event is dispatched in the meantime.
+            generation = self.get_domain_generation(guest.uuid)
+        if generation is not None:
+            cached = self._domain_configs.get(guest.uuid)
+            if cached is not None and cached[0] == generation:
+                self._domain_config_stats['hits'] += 1
+                return cached[1]
+
+        xml = guest.get_xml_desc()
+        self._domain_config_stats['xml_desc_calls'] += 1
+        start = time.monotonic()
+        config = vconfig.LibvirtConfigGuest()
+        config.parse_str(xml)
+        self._domain_config_stats['parse_time'] += time.monotonic() - start
+
+        if generation is not None:
+            self._domain_configs[guest.uuid] = (generation, config)
+        return config
+
+    def get_guest_config_stats(self):
+        """Get the counters of get_guest_config().
+
+        :returns: a dict with the number of definitions fetched from libvirt
+            as ``xml_desc_calls``, the number of cached definitions reused as
+            ``hits`` and the seconds spent parsing the definitions as
+            ``parse_time``
+        """
+        return dict(self._domain_config_stats)
+
     def _event_emit_delayed(self, event):
         """Emit events - possibly delayed."""
         def event_cleanup(gt, *args, **kwargs):
@@ -509,6 +642,11 @@ class Host(object):
                 libvirt.VIR_DOMAIN_EVENT_ID_DEVICE_REMOVED,
                 self._event_device_removed_callback,
                 self)
+            wrapped_conn.domainEventRegisterAny(
+                None,
+                libvirt.VIR_DOMAIN_EVENT_ID_DEVICE_ADDED,
+                self._event_device_added_callback,
+                self)
             wrapped_conn.domainEventRegisterAny(
                 None,
                 libvirt.VIR_DOMAIN_EVENT_ID_DEVICE_REMOVAL_FAILED,
@@ -552,6 +690,10 @@ class Host(object):
                 try:
                     # This will raise if it fails to get a connection
                     self._wrapped_conn = self._get_new_connection()
+                    # NOTE: The events of the domains are not received
+                    # while disconnected, so their definitions may have
+                    # changed without their generations being bumped.
+                    self._forget_domains()
                 except Exception as ex:
                     with excutils.save_and_reraise_exception():
                         # If we previously had a connection and it went down,
@@ -729,6 +871,39 @@ class Host(object):
 
         return doms
 
+    def get_all_domain_stats(self, stats, only_running=True):
+        """Get the statistics of all the domains with a single libvirt call
+
+        This is only done if the [libvirt]bulk_domain_stats option is enabled
+        and the hypervisor supports it, otherwise callers have to get the
+        statistics of each domain separately.
+
+        :param stats: the VIR_DOMAIN_STATS_* flags of the groups of
+            statistics to get
+        :param only_running: True to only get the statistics of the running
+            domains
+        :returns: a dict of the statistics of each domain by UUID, each being
+            a dict of the parameters libvirt returns like 'vcpu.current', or
+            None if the statistics could not be got that way
+        """
+        if (not CONF.libvirt.bulk_domain_stats or
+                CONF.libvirt.virt_type not in ('kvm', 'qemu')):
+            return None
+
+        flags = libvirt.VIR_CONNECT_GET_ALL_DOMAINS_STATS_ACTIVE
+        if not only_running:
+            flags = flags | libvirt.VIR_CONNECT_GET_ALL_DOMAINS_STATS_INACTIVE
+
+        try:
+            records = self.get_connection().getAllDomainStats(stats, flags)
+        except libvirt.libvirtError as ex:
+            LOG.warning('Failed to get the statistics of all the domains, '
+                        'getting the statistics of each domain instead: %s',
+                        ex)
+            return None
+
+        return {dom.UUIDString(): record for dom, record in records}
+
     def get_available_cpus(self):
         """Get the set of CPUs that exist on the host.
 
@@ -1156,6 +1331,19 @@ class Host(object):
 
     def _sum_domain_memory_mb(self):
         """Get the total memory consumed by guest domains."""
+        domain_stats = self.get_all_domain_stats(
+            libvirt.VIR_DOMAIN_STATS_BALLOON)
+        if domain_stats is not None:
+            used = 0
+            for uuid, record in domain_stats.items():
+                if 'balloon.current' not in record:
+                    LOG.warning("couldn't obtain the memory from domain: "
+                                "%(uuid)s", {"uuid": uuid})
+                    continue
+                used += record['balloon.current']
+            # Convert it to MB
+            return used // units.Ki
+
         used = 0
         for guest in self.list_guests():
             try:
@@ -1231,7 +1419,10 @@ class Host(object):
         :returns: an instance of Guest
         """
         domain = self.get_connection().defineXML(xml)
-        return libvirt_guest.Guest(domain)
+        guest = libvirt_guest.Guest(domain)
+        # NOTE: Don't wait for the event of the domain being defined.
+        self._domain_changed(guest.uuid)
+        return guest
 
     def device_lookup_by_name(self, name):
         """Lookup a node device by its name.
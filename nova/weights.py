@@ -20,9 +20,11 @@ Pluggable Weighing support
 import abc
 
 from oslo_log import log as logging
+from oslo_utils import importutils
 
 from nova import loadables
 
+numpy = importutils.try_import('numpy')
 
 LOG = logging.getLogger(__name__)
 
@@ -56,6 +58,25 @@ def normalize(weight_list, minval=None, maxval=None):
     return ((i - minval) / range_ for i in weight_list)
 
 
+def normalize_column(column, minval=None, maxval=None):
+    """Normalize the values in a NumPy array between 0 and 1.0.
+
+    This is the vectorized equivalent of :func:`normalize` and follows the
+    same rules regarding minval, maxval and equal values.
+    """
+
+    if not len(column):
+        return column
+
+    maxval = float(column.max() if maxval is None else maxval)
+    minval = float(column.min() if minval is None else minval)
+
+    if minval == maxval:
+        return numpy.zeros(len(column))
+
+    return (column - minval) / (maxval - minval)
+
+
 class WeighedObject(object):
     """Object with weight information."""
 
@@ -67,6 +88,44 @@ class WeighedObject(object):
         return "<WeighedObject '%s': %s>" % (self.obj, self.weight)
 
 
+class WeighingColumns(object):
+    """Columnar view of the objects being weighed.
+
+    Attribute columns and weigher multipliers are gathered lazily into NumPy
+    arrays, once per weighing pass, so that weighers reading the same object
+    attribute share a single array.
+    """
+
+    def __init__(self, weighed_objs):
+        self.weighed_objs = weighed_objs
+        self._columns = {}
+        self._multipliers = {}
+
+    def __len__(self):
+        return len(self.weighed_objs)
+
+    def get(self, name):
+        """Return the values of the ``name`` attribute as a float array."""
+        column = self._columns.get(name)
+        if column is None:
+            column = numpy.fromiter(
+                (getattr(obj.obj, name) for obj in self.weighed_objs),
+                dtype=float, count=len(self.weighed_objs))
+            self._columns[name] = column
+        return column
+
+    def multipliers(self, weigher):
+        """Return the multipliers of ``weigher`` for each object."""
+        column = self._multipliers.get(weigher)
+        if column is None:
+            column = numpy.fromiter(
+                (weigher.weight_multiplier(obj.obj)
+                 for obj in self.weighed_objs),
+                dtype=float, count=len(self.weighed_objs))
+            self._multipliers[weigher] = column
+        return column
+
+
 class BaseWeigher(metaclass=abc.ABCMeta):
     """Base class for pluggable weighers.
 
@@ -119,10 +178,59 @@ class BaseWeigher(metaclass=abc.ABCMeta):
 
         return weights
 
+    def _weigh_columns(self, columns, weight_properties):
+        """Weigh all the objects at once.
+
+        Override in a subclass to provide a vectorized equivalent of
+        _weigh_object, using the arrays provided by ``columns``.
+        """
+        raise NotImplementedError()
+
+    def _has_columnar_impl(self):
+        # NOTE: A subclass overriding the per-object weighing of a
+        # weigher that has a columnar implementation must not inherit that
+        # implementation, so only use it if no class closer in the MRO
+        # overrides _weigh_object or weigh_objects.
+        for cls in type(self).__mro__:
+            if '_weigh_columns' in vars(cls):
+                return cls is not BaseWeigher
+            if '_weigh_object' in vars(cls) or 'weigh_objects' in vars(cls):
+                return False
+        return False
+
+    def weigh_columns(self, columns, weight_properties):
+        """Weigh multiple objects in columnar form.
+
+        Weighers which do not implement _weigh_columns are weighed through
+        weigh_objects, so third-party weighers work unchanged.
+
+        :param columns: A WeighingColumns object.
+        :returns: A NumPy array of weights, one per object.
+        """
+        if not self._has_columnar_impl():
+            return numpy.asarray(
+                self.weigh_objects(columns.weighed_objs, weight_properties),
+                dtype=float)
+
+        weights = self._weigh_columns(columns, weight_properties)
+
+        # don't let the weight go beyond the defined max/min
+        if self.minval is not None or self.maxval is not None:
+            weights = numpy.clip(weights, self.minval, self.maxval)
+
+        return weights
+
 
 class BaseWeightHandler(loadables.BaseLoader):
     object_class = WeighedObject
 
+    def _use_columnar(self):
+        """Whether to weigh objects with the columnar engine.
+
+        Override in a subclass to enable it. The engine requires NumPy.
+        """
+        return False
+
     def get_weighed_objects(self, weighers, obj_list, weighing_properties):
         """Return a sorted (descending), normalized list of WeighedObjects."""
         weighed_objs = [self.object_class(obj, 0.0) for obj in obj_list]
@@ -130,6 +238,10 @@ class BaseWeightHandler(loadables.BaseLoader):
         if len(weighed_objs) <= 1:
             return weighed_objs
 
+        if self._use_columnar():
+            return self._get_weighed_objects_columnar(
+                weighers, weighed_objs, weighing_properties)
+
         for weigher in weighers:
             weights = weigher.weigh_objects(weighed_objs, weighing_properties)
 
@@ -170,3 +282,50 @@ class BaseWeightHandler(loadables.BaseLoader):
             )
 
         return sorted(weighed_objs, key=lambda x: x.weight, reverse=True)
+
+    def _get_weighed_objects_columnar(self, weighers, weighed_objs,
+                                      weighing_properties):
+        """Columnar equivalent of get_weighed_objects.
+
+        The weights of each weigher are computed, normalized and scaled by
+        their multipliers as NumPy arrays rather than per object. The
+        resulting order is the same as the one of get_weighed_objects.
+        """
+        columns = WeighingColumns(weighed_objs)
+        totals = numpy.zeros(len(weighed_objs))
+        debug = LOG.isEnabledFor(logging.DEBUG)
+
+        for weigher in weighers:
+            weights = weigher.weigh_columns(columns, weighing_properties)
+
+            if debug:
+                LOG.debug(
+                    "%s: raw weights %s",
+                    weigher.__class__.__name__,
+                    {(obj.obj.host, obj.obj.nodename): weight
+                     for obj, weight in zip(weighed_objs, weights.tolist())}
+                )
+
+            weights = normalize_column(
+                weights, minval=weigher.minval, maxval=weigher.maxval)
+            multipliers = columns.multipliers(weigher)
+            totals += multipliers * weights
+
+            if debug:
+                LOG.debug(
+                    "%s: score (multiplier * weight) %s",
+                    weigher.__class__.__name__,
+                    {(obj.obj.host, obj.obj.nodename): f"{mult} * {weight}"
+                     for obj, mult, weight in zip(
+                         weighed_objs, multipliers.tolist(),
+                         weights.tolist())}
+                )
+
+        for obj, weight in zip(weighed_objs, totals.tolist()):
+            obj.weight = weight
+
+        # NOTE: A stable sort of the negated weights keeps objects
+        # with the same weight in their original order, like sorted() with
+        # reverse=True does.
+        order = numpy.argsort(-totals, kind='stable')
+        return [weighed_objs[i] for i in order.tolist()]
@@ -0,0 +1,93 @@
+#!/usr/bin/env python3
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.  See the License for the specific language governing
+# permissions and limitations under the License.
+
+
+# Compares the time taken to find the route of requests to the most used
+# paths of the compute API, with and without a project ID prefix, between
+# matching them against the routes of the mapper like the API does by default,
+# and looking them up in the table of the fast routed paths like the API does
+# when the [api] fast_path_routing option is enabled.
+#
+# Example:
+#
+#     tools/benchmark-api-routing.py --requests 10000
+
+import argparse
+import statistics
+import time
+from unittest import mock
+
+from oslo_utils import uuidutils
+
+import nova.conf
+
+CONF = nova.conf.CONF
+
+PATHS = (
+    ('GET', '/servers'),
+    ('GET', '/servers/detail'),
+    ('GET', '/servers/%s' % uuidutils.generate_uuid()),
+    ('DELETE', '/servers/%s' % uuidutils.generate_uuid()),
+    ('GET', '/os-hypervisors'),
+)
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--requests', type=int, default=10000,
+                        help='Number of requests to route')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Number of times the requests are routed')
+    return parser.parse_args()
+
+
+def create_router():
+    CONF([], project='nova')
+    CONF.set_override('fast_path_routing', True, group='api')
+    # The controllers of the routes create RPC clients.
+    with mock.patch('nova.rpc.get_client'), \
+            mock.patch('nova.rpc.get_notifier'):
+        from nova.api.openstack.compute import routes
+        return routes.APIRouterV21()
+
+
+def measure(match, environ, args):
+    timings = []
+    for _ in range(args.repeat):
+        start = time.monotonic()
+        for _ in range(args.requests):
+            match(environ)
+        timings.append((time.monotonic() - start) * 1e6 / args.requests)
+    return statistics.median(timings)
+
+
+def main():
+    args = parse_args()
+    router = create_router()
+    print('%d routes\n' % len(router.map.matchlist))
+
+    print('%-7s %-52s %-8s %12s %12s' % (
+        'method', 'path', 'project', 'mapper (us)', 'table (us)'))
+    for method, path in PATHS:
+        for prefix in ('', '/%s' % uuidutils.generate_uuid(dashed=False)):
+            environ = {'PATH_INFO': prefix + path, 'REQUEST_METHOD': method}
+            print('%-7s %-52s %-8s %12.1f %12.1f' % (
+                method, path, 'yes' if prefix else 'no',
+                measure(lambda env: router.map.routematch(environ=env),
+                        environ, args),
+                measure(router._fast_match, environ, args)))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,155 @@
+#!/usr/bin/env python3
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.  See the License for the specific language governing
+# permissions and limitations under the License.
+
+
+# Compares the wall time and memory allocated to fill the metadata and
+# system_metadata of listed instances, up to the dicts InstanceList
+# construction uses, between loading the metadata items as rows like
+# _instances_fill_metadata() used to, and its current loading of
+# (instance_uuid, key, value) tuples.
+#
+# A temporary SQLite database is seeded with the given number of instances,
+# each with the given number of metadata and system_metadata items.
+#
+# Example:
+#
+#     tools/benchmark-instance-fill-metadata.py --instances 1000,10000
+
+import argparse
+import collections
+import statistics
+import time
+import tracemalloc
+
+from oslo_utils import uuidutils
+import sqlalchemy as sa
+from sqlalchemy import orm
+
+from nova.db.main import api as db
+from nova.db.main import models
+from nova import utils
+
+
+class Context(object):
+    """The bare minimum of a RequestContext for model_query()."""
+
+    is_admin = True
+    read_deleted = 'no'
+
+    def __init__(self, session):
+        self.session = session
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--instances', default='1000,10000',
+                        help='Comma separated list of the numbers of '
+                             'instances to list')
+    parser.add_argument('--metadata', type=int, default=5,
+                        help='Number of metadata items per instance')
+    parser.add_argument('--system-metadata', type=int, default=30,
+                        help='Number of system_metadata items per instance')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Number of times each listing is filled')
+    return parser.parse_args()
+
+
+def seed(session, count, args):
+    session.execute(sa.delete(models.InstanceSystemMetadata))
+    session.execute(sa.delete(models.InstanceMetadata))
+    session.execute(sa.delete(models.Instance))
+    instances, meta, sys_meta = [], [], []
+    for i in range(count):
+        uuid = uuidutils.generate_uuid()
+        instances.append({'uuid': uuid, 'deleted': 0})
+        meta.extend({'instance_uuid': uuid, 'key': 'key%d' % j,
+                     'value': 'value%d' % j, 'deleted': 0}
+                    for j in range(args.metadata))
+        sys_meta.extend({'instance_uuid': uuid, 'key': 'image_key%d' % j,
+                         'value': 'value%d' % j, 'deleted': 0}
+                        for j in range(args.system_metadata))
+    session.execute(sa.insert(models.Instance), instances)
+    if meta:
+        session.execute(sa.insert(models.InstanceMetadata), meta)
+    if sys_meta:
+        session.execute(sa.insert(models.InstanceSystemMetadata), sys_meta)
+    session.commit()
+
+
+def fill_rows(context, instances):
+    # This is how _instances_fill_metadata() used to load the items
+    uuids = [inst['uuid'] for inst in instances]
+    meta = collections.defaultdict(list)
+    for row in db.model_query(context, models.InstanceMetadata).filter(
+            models.InstanceMetadata.instance_uuid.in_(uuids)):
+        meta[row['instance_uuid']].append(row)
+    sys_meta = collections.defaultdict(list)
+    for row in db.model_query(
+            context, models.InstanceSystemMetadata, read_deleted='yes'
+    ).filter(models.InstanceSystemMetadata.instance_uuid.in_(uuids)):
+        sys_meta[row['instance_uuid']].append(row)
+    filled = []
+    for inst in instances:
+        inst = dict(inst)
+        inst['system_metadata'] = sys_meta[inst['uuid']]
+        inst['metadata'] = meta[inst['uuid']]
+        filled.append(inst)
+    return filled
+
+
+def fill_tuples(context, instances):
+    return db._instances_fill_metadata(
+        context, instances, manual_joins=['metadata', 'system_metadata'])
+
+
+def measure(session, fill, repeat):
+    context = Context(session)
+    timings = []
+    peaks = []
+    for _ in range(repeat):
+        instances = session.query(models.Instance).all()
+        tracemalloc.start()
+        start = time.monotonic()
+        # Convert the items like Instance._from_db_object() does
+        for inst in fill(context, instances):
+            utils.instance_meta(inst)
+            utils.instance_sys_meta(inst)
+        timings.append((time.monotonic() - start) * 1000)
+        peaks.append(tracemalloc.get_traced_memory()[1] / 1024 / 1024)
+        tracemalloc.stop()
+        session.expunge_all()
+    return statistics.median(timings), statistics.median(peaks)
+
+
+def main():
+    args = parse_args()
+    engine = sa.create_engine('sqlite://')
+    for model in (models.Instance, models.InstanceMetadata,
+                  models.InstanceSystemMetadata):
+        model.__table__.create(engine)
+    session = orm.Session(engine)
+
+    print('%10s %12s %12s %14s %14s' % (
+        'instances', 'rows (ms)', 'tuples (ms)', 'rows (MiB)',
+        'tuples (MiB)'))
+    for count in (int(count) for count in args.instances.split(',')):
+        seed(session, count, args)
+        rows_ms, rows_mib = measure(session, fill_rows, args.repeat)
+        tuples_ms, tuples_mib = measure(session, fill_tuples, args.repeat)
+        print('%10d %12.1f %12.1f %14.1f %14.1f' % (
+            count, rows_ms, tuples_ms, rows_mib, tuples_mib))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.  See the License for the specific language governing
+# permissions and limitations under the License.
+
+
+# Compares the latency of listing a page of instances with the default
+# pagination of instance_get_all_by_filters_sort() and with the keyset
+# pagination enabled by [api]instance_list_keyset_pagination, at increasing
+# page depths.
+#
+# The instances table is created from the models, so that it has the same
+# indexes as a database migrated to the latest revision, and seeded with
+# instances spread across projects, a share of which are soft-deleted. By
+# default a temporary SQLite database is used; pass the URL of an empty
+# MySQL or PostgreSQL database with --connection to benchmark it instead.
+#
+# Example:
+#
+#     tools/benchmark-instance-pagination.py --instances 200000 \
+#         --sort-key display_name --depths 0,10,100,1000
+
+import argparse
+import datetime
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from oslo_db.sqlalchemy import utils as sqlalchemyutils
+from oslo_utils import uuidutils
+import sqlalchemy as sa
+from sqlalchemy import orm
+
+from nova.db.main import api as db
+from nova.db.main import models
+from nova.db import utils as db_utils
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--connection',
+                        help='URL of an empty database to use, defaults to '
+                             'a temporary SQLite database')
+    parser.add_argument('--instances', type=int, default=100000,
+                        help='Number of instances to seed')
+    parser.add_argument('--projects', type=int, default=4,
+                        help='Number of projects to spread instances across')
+    parser.add_argument('--deleted-ratio', type=float, default=0.3,
+                        help='Share of the instances which are deleted')
+    parser.add_argument('--page-size', type=int, default=100,
+                        help='Number of instances per page')
+    parser.add_argument('--depths', default='0,10,100,500',
+                        help='Comma separated list of the page numbers to '
+                             'time')
+    parser.add_argument('--sort-key', default='created_at',
+                        choices=('created_at', 'updated_at', 'display_name'),
+                        help='Sort key to list instances by')
+    parser.add_argument('--sort-dir', default='desc', choices=('asc', 'desc'))
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Number of times each page is listed')
+    return parser.parse_args()
+
+
+def seed(session, args):
+    rand = random.Random(42)
+    start = datetime.datetime(2020, 1, 1)
+    batch = []
+    for i in range(args.instances):
+        created_at = start + datetime.timedelta(seconds=i * 7)
+        deleted = rand.random() < args.deleted_ratio
+        batch.append({
+            'uuid': uuidutils.generate_uuid(),
+            'project_id': 'project-%d' % rand.randrange(args.projects),
+            'user_id': 'user',
+            'display_name': 'server-%06d' % rand.randrange(args.instances),
+            'created_at': created_at,
+            'updated_at': created_at + datetime.timedelta(
+                seconds=rand.randrange(86400)),
+            'vm_state': 'active',
+            'hidden': False,
+            'deleted': i + 1 if deleted else 0,
+            'deleted_at': created_at if deleted else None,
+        })
+        if len(batch) == 5000:
+            session.execute(sa.insert(models.Instance), batch)
+            batch = []
+    if batch:
+        session.execute(sa.insert(models.Instance), batch)
+    session.commit()
+
+
+def list_page(session, sort_keys, sort_dirs, limit, marker, keyset):
+    query = session.query(models.Instance).filter(
+        models.Instance.project_id == 'project-0',
+        models.Instance.deleted == 0,
+        sa.or_(models.Instance.hidden == sa.false(),
+               models.Instance.hidden == sa.null()))
+    paginated = None
+    if keyset:
+        paginated = db._instance_keyset_paginate_query(
+            query, limit, sort_keys, sort_dirs, marker=marker)
+    if paginated is None:
+        paginated = sqlalchemyutils.paginate_query(
+            query, models.Instance, limit, sort_keys, marker=marker,
+            sort_dirs=sort_dirs)
+    return paginated.all()
+
+
+def main():
+    args = parse_args()
+    connection = args.connection
+    if connection is None:
+        fd, path = tempfile.mkstemp(suffix='.sqlite')
+        os.close(fd)
+        connection = 'sqlite:///%s' % path
+
+    engine = sa.create_engine(connection)
+    models.Instance.__table__.create(engine)
+    session = orm.Session(engine)
+
+    print('Seeding %d instances...' % args.instances)
+    seed(session, args)
+
+    # Use the sort keys and directions of the compute API
+    sort_keys, sort_dirs = db_utils.process_sort_params(
+        [args.sort_key], [args.sort_dir], default_dir='desc')
+    sort_keys.append('uuid')
+    sort_dirs.append(args.sort_dir)
+
+    depths = sorted(int(depth) for depth in args.depths.split(','))
+    print('Listing pages of %d instances sorted by %s' % (
+        args.page_size, ', '.join(
+            '%s %s' % key for key in zip(sort_keys, sort_dirs))))
+    print('%8s %14s %14s' % ('page', 'default (ms)', 'keyset (ms)'))
+    for depth in depths:
+        # Find the marker of the page the way a client paging through
+        # instances would, from the last instance of the previous page.
+        marker = None
+        if depth:
+            offset = depth * args.page_size - 1
+            query = sqlalchemyutils.paginate_query(
+                session.query(models.Instance).filter(
+                    models.Instance.project_id == 'project-0',
+                    models.Instance.deleted == 0),
+                models.Instance, None, sort_keys, sort_dirs=sort_dirs)
+            marker = query.offset(offset).first()
+            if marker is None:
+                print('%8d %14s %14s' % (depth, '-', '-'))
+                continue
+
+        results = []
+        for keyset in (False, True):
+            timings = []
+            for _ in range(args.repeat):
+                start = time.monotonic()
+                page = list_page(session, sort_keys, sort_dirs,
+                                 args.page_size, marker, keyset)
+                timings.append((time.monotonic() - start) * 1000)
+            results.append((statistics.median(timings),
+                            [inst.uuid for inst in page]))
+        (default_ms, default_page), (keyset_ms, keyset_page) = results
+        if default_page != keyset_page:
+            print('WARNING: keyset pagination returned a different page')
+        print('%8d %14.2f %14.2f' % (depth, default_ms, keyset_ms))
+
+    session.close()
+    if args.connection is None:
+        os.unlink(path)
+
+
+if __name__ == '__main__':
+    main()
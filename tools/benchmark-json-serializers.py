@@ -0,0 +1,104 @@
+#!/usr/bin/env python3
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.  See the License for the specific language governing
+# permissions and limitations under the License.
+
+
+# Compares the time the JSON serializers selectable with the
+# [DEFAULT] json_serializer option take to encode a GET /servers/detail
+# response of the given numbers of servers, made of copies of the server of
+# the API sample of the latest microversion.
+#
+# Example:
+#
+#     tools/benchmark-json-serializers.py --servers 100,1000
+
+import argparse
+import copy
+import os
+import statistics
+import time
+
+from oslo_serialization import jsonutils
+from oslo_utils import uuidutils
+
+import nova.conf
+from nova import serialization
+
+CONF = nova.conf.CONF
+
+DOC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..',
+                       'doc')
+SERIALIZERS = ('stdlib', 'orjson')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--servers', default='100,1000',
+                        help='Comma separated list of the numbers of '
+                             'servers to list')
+    parser.add_argument('--repeat', type=int, default=5,
+                        help='Number of times each payload is encoded')
+    return parser.parse_args()
+
+
+def load_json(path):
+    with open(path, 'rb') as f:
+        return jsonutils.load(f)
+
+
+def server_detail_response(count):
+    samples_dir = os.path.join(DOC_DIR, 'api_samples', 'servers')
+    latest = max((d for d in os.listdir(samples_dir) if d.startswith('v2.')),
+                 key=lambda d: int(d.split('.')[1]))
+    sample = load_json(os.path.join(samples_dir, latest,
+                                    'servers-details-resp.json'))
+    servers = []
+    for _ in range(count):
+        server = copy.deepcopy(sample['servers'][0])
+        server['id'] = uuidutils.generate_uuid()
+        servers.append(server)
+    return {'servers': servers}
+
+
+def measure(func, payloads, serializer, repeat):
+    CONF.set_override('json_serializer', serializer)
+    timings = []
+    for _ in range(repeat):
+        start = time.monotonic()
+        for payload in payloads:
+            func(payload)
+        timings.append((time.monotonic() - start) * 1000)
+    return statistics.median(timings)
+
+
+def report(name, func, payloads, repeat):
+    timings = [measure(func, payloads, serializer, repeat)
+               for serializer in SERIALIZERS]
+    print('%-36s %12.1f %12.1f %8.1fx' % (
+        name, timings[0], timings[1], timings[0] / timings[1]))
+
+
+def main():
+    args = parse_args()
+    if serialization.orjson is None:
+        raise SystemExit('orjson is not installed')
+
+    print('%-36s %12s %12s %9s' % ('payload', 'stdlib (ms)', 'orjson (ms)',
+                                   'speedup'))
+    for count in (int(count) for count in args.servers.split(',')):
+        report('servers/detail, %d servers' % count, serialization.dumps,
+               [server_detail_response(count)], args.repeat)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,111 @@
+#!/usr/bin/env python3
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#    http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or
+# implied.  See the License for the specific language governing
+# permissions and limitations under the License.
+
+
+# Compares the time taken to validate POST /servers request bodies with the
+# given numbers of block_device_mapping_v2 and networks entries against the
+# create server schema of the latest microversion, between creating a
+# validator for each request like the API used to, and reusing the validator
+# of the schema.
+#
+# Also reports the time taken to create the validators of all the API
+# schemas, which the [api] compile_schema_validators option moves to the API
+# startup.
+#
+# Example:
+#
+#     tools/benchmark-schema-validation.py --entries 1,10,100
+
+import argparse
+import statistics
+import time
+
+from oslo_utils import uuidutils
+
+from nova.api.openstack.compute import routes  # noqa: F401
+from nova.api.openstack.compute.schemas import servers
+from nova.api import validation
+from nova.api.validation import validators
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--entries', default='1,10,100',
+                        help='Comma separated list of the numbers of '
+                             'block_device_mapping_v2 and networks entries '
+                             'of the requests')
+    parser.add_argument('--requests', type=int, default=100,
+                        help='Number of requests to validate')
+    parser.add_argument('--repeat', type=int, default=3,
+                        help='Number of times the requests are validated')
+    return parser.parse_args()
+
+
+def create_body(count):
+    image = uuidutils.generate_uuid()
+    return {
+        'server': {
+            'name': 'server',
+            'imageRef': image,
+            'flavorRef': '1',
+            'networks': [{'uuid': uuidutils.generate_uuid()}
+                         for _ in range(count)],
+            'block_device_mapping_v2': [
+                {'boot_index': i, 'uuid': image, 'source_type': 'image',
+                 'destination_type': 'volume', 'volume_size': 10,
+                 'delete_on_termination': True}
+                for i in range(count)],
+        },
+    }
+
+
+def validate_uncached(schema, body):
+    validators._SchemaValidator(schema).validate(body)
+
+
+def validate_cached(schema, body):
+    validators.get_validator(schema).validate(body)
+
+
+def measure(validate, schema, body, args):
+    timings = []
+    for _ in range(args.repeat):
+        start = time.monotonic()
+        for _ in range(args.requests):
+            validate(schema, body)
+        timings.append((time.monotonic() - start) * 1000 / args.requests)
+    return statistics.median(timings)
+
+
+def main():
+    args = parse_args()
+    schema = servers.create_v294
+
+    start = time.monotonic()
+    validation.compile_validators()
+    print('Created the validators of %d schemas in %.1f ms\n' % (
+        len(validation._REGISTERED_SCHEMAS),
+        (time.monotonic() - start) * 1000))
+
+    print('%8s %18s %18s' % ('entries', 'uncached (ms/req)',
+                             'cached (ms/req)'))
+    for count in (int(count) for count in args.entries.split(',')):
+        body = create_body(count)
+        print('%8d %18.2f %18.2f' % (
+            count, measure(validate_uncached, schema, body, args),
+            measure(validate_cached, schema, body, args)))
+
+
+if __name__ == '__main__':
+    main()